@@ -0,0 +1,117 @@
+"""Trigger de notificaciones por tabla con payload estructurado
+
+Revision ID: 3f1a9c2d7b84
+Revises: 6c7b366fc7a3
+Create Date: 2026-10-18 12:40:08.517342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b84'
+down_revision: Union[str, Sequence[str], None] = '6c7b366fc7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tablas cuyos cambios se notifican al frontend vía global_db_changes
+TABLAS = [
+    'acceso.usuario',
+    'acceso.permiso',
+    'administracion.global_clientes',
+    'administracion.global_proveedores',
+    'administracion.tabla_ubicaciones_monitoreo',
+    'administracion.tabla_weather_monitoreo',
+    'administracion.tabla_pro_monitoreo',
+    'administracion.tabla_serviciomc_monitoreo',
+    'administracion.tabla_chips_servicios_monitoreo',
+    'administracion.tabla_chips_inventario_monitoreo',
+    'almacen.catalogo_mercaderia',
+    'almacen.catalogo_material',
+    'almacen.ingreso_mercaderia',
+    'almacen.ingreso_material',
+    'almacen.salida_mercaderia',
+    'almacen.salida_material',
+    'contabilidad.ventas',
+    'contabilidad.compras',
+    'contabilidad.plan_contable',
+    'contabilidad.caja_movimientos_ventas',
+    'contabilidad.caja_movimientos_compras',
+    'contabilidad.libro_diario_ventas',
+    'contabilidad.libro_diario_compras',
+    'gerencia.clientesinicio',
+    'gerencia.proveedoresinicio',
+    'tesoreria.cajachica',
+    'tesoreria.bcpsoles',
+    'tesoreria.bcpdolares',
+    'tesoreria.obligaciones_fijas',
+    'tesoreria.obligaciones_eventuales',
+    'tesoreria.registros_pagos',
+    'tesoreria.registros_pagos_eventuales',
+]
+
+# Trigger por sentencia: un solo NOTIFY por INSERT/UPDATE/DELETE aunque afecte
+# miles de filas. Se envían hasta 50 ids; con más, "ids" va en null (el
+# payload de NOTIFY está limitado a 8000 bytes).
+FUNCION = """
+CREATE OR REPLACE FUNCTION public.notificar_cambio_tabla() RETURNS trigger AS $$
+DECLARE
+    total integer;
+    ids jsonb;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT count(*) INTO total FROM filas_viejas;
+        SELECT jsonb_agg(f.id) INTO ids FROM (SELECT to_jsonb(v) -> 'id' AS id FROM filas_viejas v LIMIT 50) f;
+    ELSE
+        SELECT count(*) INTO total FROM filas_nuevas;
+        SELECT jsonb_agg(f.id) INTO ids FROM (SELECT to_jsonb(n) -> 'id' AS id FROM filas_nuevas n LIMIT 50) f;
+    END IF;
+
+    IF total = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('global_db_changes', jsonb_build_object(
+        'schema', TG_TABLE_SCHEMA,
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'count', total,
+        'ids', CASE WHEN total <= 50 THEN ids END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(FUNCION)
+    for tabla in TABLAS:
+        op.execute(
+            f"CREATE TRIGGER trg_notificar_insert AFTER INSERT ON {tabla} "
+            f"REFERENCING NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.notificar_cambio_tabla()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_notificar_update AFTER UPDATE ON {tabla} "
+            f"REFERENCING NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.notificar_cambio_tabla()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_notificar_delete AFTER DELETE ON {tabla} "
+            f"REFERENCING OLD TABLE AS filas_viejas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.notificar_cambio_tabla()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla in TABLAS:
+        for operacion in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_notificar_{operacion} ON {tabla}")
+    op.execute("DROP FUNCTION IF EXISTS public.notificar_cambio_tabla()")
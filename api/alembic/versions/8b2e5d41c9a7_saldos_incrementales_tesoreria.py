@@ -0,0 +1,174 @@
+"""Saldos de tesorería mantenidos por triggers
+
+Revision ID: 8b2e5d41c9a7
+Revises: 3f1a9c2d7b84
+Create Date: 2026-10-18 15:05:41.208913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e5d41c9a7'
+down_revision: Union[str, Sequence[str], None] = '3f1a9c2d7b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Cuentas con saldo corrido; la clave en saldos_cuentas es el nombre de la tabla
+CUENTAS = ['cajachica', 'bcpsoles', 'bcpdolares']
+
+# Trigger por sentencia: suma el delta de las filas afectadas y actualiza la
+# fila del saldo una sola vez. Un UPDATE que no cambia montos no la toca.
+FUNCION_ACTUALIZAR = """
+CREATE OR REPLACE FUNCTION tesoreria.actualizar_saldo_cuenta() RETURNS trigger AS $$
+DECLARE
+    delta numeric := 0;
+    delta_movimientos bigint := 0;
+    parcial numeric;
+    filas bigint;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE tesoreria.saldos_cuentas
+           SET saldo = 0, movimientos = 0, actualizado_en = now()
+         WHERE cuenta = TG_TABLE_NAME;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT COALESCE(SUM(ingreso + egreso), 0), count(*) INTO parcial, filas FROM filas_nuevas;
+        delta := delta + parcial;
+        delta_movimientos := delta_movimientos + filas;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT COALESCE(SUM(ingreso + egreso), 0), count(*) INTO parcial, filas FROM filas_viejas;
+        delta := delta - parcial;
+        delta_movimientos := delta_movimientos - filas;
+    END IF;
+
+    IF delta = 0 AND delta_movimientos = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE tesoreria.saldos_cuentas
+       SET saldo = saldo + delta,
+           movimientos = movimientos + delta_movimientos,
+           actualizado_en = now()
+     WHERE cuenta = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Recalcula una cuenta desde su libro y corrige el saldo si difiere. Se llama
+# una cuenta por transacción: bloquea solo esa fila, sin riesgo de deadlock
+# con escrituras que tocan varias cuentas. Con p_antiguedad > 0 omite las
+# cuentas conciliadas hace menos de ese intervalo (varios workers la llaman).
+FUNCION_CONCILIAR = """
+CREATE OR REPLACE FUNCTION tesoreria.conciliar_saldo(p_cuenta varchar, p_antiguedad interval DEFAULT interval '0')
+RETURNS TABLE (saldo_anterior numeric, saldo_calculado numeric, movimientos_calculados bigint) AS $$
+DECLARE
+    anterior numeric;
+    ultima timestamptz;
+    calculado numeric;
+    total bigint;
+BEGIN
+    SELECT s.saldo, s.conciliado_en INTO anterior, ultima
+      FROM tesoreria.saldos_cuentas s
+     WHERE s.cuenta = p_cuenta
+       FOR UPDATE;
+    IF NOT FOUND OR ultima > now() - p_antiguedad THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('SELECT COALESCE(SUM(ingreso + egreso), 0), count(*) FROM tesoreria.%I', p_cuenta)
+       INTO calculado, total;
+
+    UPDATE tesoreria.saldos_cuentas s
+       SET saldo = calculado, movimientos = total, conciliado_en = now()
+     WHERE s.cuenta = p_cuenta;
+
+    saldo_anterior := anterior;
+    saldo_calculado := calculado;
+    movimientos_calculados := total;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+VISTA_SALDOS = """
+CREATE OR REPLACE VIEW tesoreria.v_saldos_independientes AS
+SELECT
+    COALESCE(MAX(saldo) FILTER (WHERE cuenta = 'cajachica'), 0) AS saldo_caja_chica,
+    COALESCE(MAX(saldo) FILTER (WHERE cuenta = 'bcpsoles'), 0) AS saldo_bcp_soles,
+    COALESCE(MAX(saldo) FILTER (WHERE cuenta = 'bcpdolares'), 0) AS saldo_bcp_dolares
+FROM tesoreria.saldos_cuentas;
+"""
+
+VISTA_ORIGINAL = """
+CREATE OR REPLACE VIEW tesoreria.v_saldos_independientes AS
+SELECT
+    (SELECT COALESCE(SUM(ingreso + egreso), 0) FROM tesoreria.cajachica) AS saldo_caja_chica,
+    (SELECT COALESCE(SUM(ingreso + egreso), 0) FROM tesoreria.bcpsoles) AS saldo_bcp_soles,
+    (SELECT COALESCE(SUM(ingreso + egreso), 0) FROM tesoreria.bcpdolares) AS saldo_bcp_dolares;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'saldos_cuentas',
+        sa.Column('cuenta', sa.VARCHAR(length=30), nullable=False),
+        sa.Column('saldo', sa.Numeric(16, 2), server_default=sa.text('0'), nullable=False),
+        sa.Column('movimientos', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('actualizado_en', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('conciliado_en', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('cuenta'),
+        schema='tesoreria',
+    )
+    op.execute(FUNCION_ACTUALIZAR)
+    op.execute(FUNCION_CONCILIAR)
+
+    for cuenta in CUENTAS:
+        tabla = f"tesoreria.{cuenta}"
+        # Sin escrituras entre el saldo inicial y la creación de los triggers
+        op.execute(f"LOCK TABLE {tabla} IN SHARE ROW EXCLUSIVE MODE")
+        op.execute(
+            f"INSERT INTO tesoreria.saldos_cuentas (cuenta, saldo, movimientos) "
+            f"SELECT '{cuenta}', COALESCE(SUM(ingreso + egreso), 0), count(*) FROM {tabla}"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_insert AFTER INSERT ON {tabla} "
+            f"REFERENCING NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.actualizar_saldo_cuenta()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_update AFTER UPDATE ON {tabla} "
+            f"REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.actualizar_saldo_cuenta()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_delete AFTER DELETE ON {tabla} "
+            f"REFERENCING OLD TABLE AS filas_viejas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.actualizar_saldo_cuenta()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_truncate AFTER TRUNCATE ON {tabla} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.actualizar_saldo_cuenta()"
+        )
+
+    op.execute(VISTA_SALDOS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(VISTA_ORIGINAL)
+    for cuenta in CUENTAS:
+        for operacion in ('insert', 'update', 'delete', 'truncate'):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_saldo_{operacion} ON tesoreria.{cuenta}")
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.conciliar_saldo(varchar, interval)")
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.actualizar_saldo_cuenta()")
+    op.drop_table('saldos_cuentas', schema='tesoreria')
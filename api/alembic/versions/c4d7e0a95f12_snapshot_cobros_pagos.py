@@ -0,0 +1,258 @@
+"""Snapshot incremental del reporte de cobros y pagos pendientes
+
+Revision ID: c4d7e0a95f12
+Revises: 8b2e5d41c9a7
+Create Date: 2026-10-18 16:20:13.774025
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e0a95f12'
+down_revision: Union[str, Sequence[str], None] = '8b2e5d41c9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, origen en la cola, columna con el id del documento, operaciones)
+# CLIENTES/PROVEEDORES se expanden a sus ventas/compras al refrescar
+# (cambia la razón social mostrada).
+FUENTES = [
+    ('contabilidad.ventas', 'VENTAS', 'id', ('insert', 'update', 'delete')),
+    ('contabilidad.caja_movimientos_ventas', 'VENTAS', 'venta_id', ('insert', 'update', 'delete')),
+    ('contabilidad.compras', 'COMPRAS', 'id', ('insert', 'update', 'delete')),
+    ('contabilidad.caja_movimientos_compras', 'COMPRAS', 'compra_id', ('insert', 'update', 'delete')),
+    ('tesoreria.obligaciones_eventuales', 'OE', 'id', ('insert', 'update', 'delete')),
+    ('tesoreria.registros_pagos_eventuales', 'OE', 'obligacion_id', ('insert', 'update', 'delete')),
+    ('tesoreria.obligaciones_fijas', 'OF', 'id', ('insert', 'update', 'delete')),
+    ('tesoreria.registros_pagos', 'OF', 'obligacion_id', ('insert', 'update', 'delete')),
+    ('administracion.global_clientes', 'CLIENTES', 'id', ('update',)),
+    ('administracion.global_proveedores', 'PROVEEDORES', 'id', ('update',)),
+]
+
+# Los triggers solo encolan ids (sin índice único: nunca esperan a otra
+# transacción). El recálculo lo hace quien lee el snapshot, en su propia
+# transacción, así que no agrega bloqueos a las escrituras.
+FUNCION_ENCOLAR = """
+CREATE OR REPLACE FUNCTION tesoreria.encolar_snapshot_cobros_pagos() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format(
+            'INSERT INTO tesoreria.snapshot_cobros_pagos_pendientes (origen, documento_id) '
+            'SELECT DISTINCT %L, %I FROM filas_nuevas WHERE %I IS NOT NULL',
+            TG_ARGV[0], TG_ARGV[1], TG_ARGV[1]);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format(
+            'INSERT INTO tesoreria.snapshot_cobros_pagos_pendientes (origen, documento_id) '
+            'SELECT DISTINCT %L, %I FROM filas_viejas WHERE %I IS NOT NULL',
+            TG_ARGV[0], TG_ARGV[1], TG_ARGV[1]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Mismas reglas que la vista reporte_cobros_pagos_actual, filtradas por ids
+# (NULL = todos). Las obligaciones fijas dependen del mes en curso: al
+# cambiar de mes se reconstruye el snapshot completo.
+FUNCION_REFRESCAR = """
+CREATE OR REPLACE FUNCTION tesoreria.refrescar_snapshot_cobros_pagos(p_completo boolean DEFAULT false)
+RETURNS integer AS $$
+DECLARE
+    periodo_actual date := date_trunc('month', current_date)::date;
+    periodo_snapshot date;
+    ids_ventas bigint[];
+    ids_compras bigint[];
+    ids_oe bigint[];
+    ids_of bigint[];
+    ids_clientes bigint[];
+    ids_proveedores bigint[];
+    procesados integer := 0;
+BEGIN
+    -- Un solo refresco a la vez; el siguiente ve lo que este dejó confirmado
+    PERFORM pg_advisory_xact_lock(hashtext('tesoreria.snapshot_cobros_pagos'));
+
+    SELECT periodo INTO periodo_snapshot FROM tesoreria.snapshot_cobros_pagos_estado WHERE id = 1;
+    IF p_completo OR periodo_snapshot IS DISTINCT FROM periodo_actual THEN
+        DELETE FROM tesoreria.snapshot_cobros_pagos_pendientes;
+        DELETE FROM tesoreria.snapshot_cobros_pagos;
+    ELSE
+        WITH sacados AS (
+            DELETE FROM tesoreria.snapshot_cobros_pagos_pendientes RETURNING origen, documento_id
+        )
+        SELECT
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'VENTAS'), '{}'),
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'COMPRAS'), '{}'),
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'OE'), '{}'),
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'OF'), '{}'),
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'CLIENTES'), '{}'),
+            COALESCE(array_agg(DISTINCT documento_id) FILTER (WHERE origen = 'PROVEEDORES'), '{}'),
+            count(*)
+        INTO ids_ventas, ids_compras, ids_oe, ids_of, ids_clientes, ids_proveedores, procesados
+        FROM sacados;
+
+        IF procesados = 0 THEN
+            UPDATE tesoreria.snapshot_cobros_pagos_estado SET refrescado_en = now() WHERE id = 1;
+            RETURN 0;
+        END IF;
+
+        IF cardinality(ids_clientes) > 0 THEN
+            ids_ventas := ids_ventas || ARRAY(SELECT id::bigint FROM contabilidad.ventas WHERE cliente_id = ANY(ids_clientes));
+        END IF;
+        IF cardinality(ids_proveedores) > 0 THEN
+            ids_compras := ids_compras || ARRAY(SELECT id::bigint FROM contabilidad.compras WHERE proveedor_id = ANY(ids_proveedores));
+        END IF;
+
+        DELETE FROM tesoreria.snapshot_cobros_pagos
+         WHERE (origen = 'VENTAS' AND documento_id = ANY(ids_ventas))
+            OR (origen = 'COMPRAS' AND documento_id = ANY(ids_compras))
+            OR (origen = 'OE' AND documento_id = ANY(ids_oe))
+            OR (origen = 'OF' AND documento_id = ANY(ids_of));
+    END IF;
+
+    INSERT INTO tesoreria.snapshot_cobros_pagos
+        (origen, documento_id, razon_social, fecha_vencimiento, moneda, monto_total, monto_pagado)
+    SELECT
+        'VENTAS', v.id, gc.razon_social, v.fecha_vencimiento, v.moneda,
+        CASE
+            WHEN v.moneda = 'USD' THEN ROUND((v.total - (COALESCE(v.monto_retencion, 0) + COALESCE(v.monto_detraccion, 0))) / NULLIF(v.tipo_cambio, 0), 2)
+            ELSE v.total - (COALESCE(v.monto_retencion, 0) + COALESCE(v.monto_detraccion, 0))
+        END,
+        COALESCE(SUM(cmv.monto_pagado), 0.00)
+    FROM contabilidad.ventas v
+    LEFT JOIN contabilidad.caja_movimientos_ventas cmv ON v.id = cmv.venta_id
+    JOIN administracion.global_clientes gc ON v.cliente_id = gc.id
+    WHERE v.is_active = '1' AND (ids_ventas IS NULL OR v.id = ANY(ids_ventas))
+    GROUP BY v.id, gc.razon_social, v.fecha_vencimiento, v.moneda, v.total, v.tipo_cambio
+    HAVING COALESCE(SUM(cmv.monto_pagado), 0.00) <
+           CASE
+               WHEN v.moneda = 'USD' THEN ROUND((v.total / NULLIF(v.tipo_cambio, 0))::numeric, 2)
+               ELSE v.total
+           END;
+
+    INSERT INTO tesoreria.snapshot_cobros_pagos
+        (origen, documento_id, razon_social, fecha_vencimiento, moneda, monto_total, monto_pagado)
+    SELECT
+        'COMPRAS', c.id, gp.razon_social, c.fecha_vencimiento, c.moneda,
+        CASE
+            WHEN c.moneda = 'USD' THEN ROUND((c.total / NULLIF(c.tipo_cambio, 0))::numeric, 2)
+            ELSE c.total
+        END,
+        COALESCE(SUM(cmc.monto_pagado), 0.00)
+    FROM contabilidad.compras c
+    LEFT JOIN contabilidad.caja_movimientos_compras cmc ON c.id = cmc.compra_id
+    JOIN administracion.global_proveedores gp ON c.proveedor_id = gp.id
+    WHERE c.is_active = '1' AND (ids_compras IS NULL OR c.id = ANY(ids_compras))
+    GROUP BY c.id, gp.razon_social, c.fecha_vencimiento, c.moneda, c.total, c.tipo_cambio
+    HAVING COALESCE(SUM(cmc.monto_pagado), 0.00) <
+           CASE
+               WHEN c.moneda = 'USD' THEN ROUND((c.total / NULLIF(c.tipo_cambio, 0))::numeric, 2)
+               ELSE c.total
+           END;
+
+    INSERT INTO tesoreria.snapshot_cobros_pagos
+        (origen, documento_id, razon_social, fecha_vencimiento, moneda, monto_total, monto_pagado)
+    SELECT
+        'OE', oe.id, oe.empresa, oe.fecha_vencimiento, oe.moneda, oe.monto_esperado,
+        COALESCE(SUM(rpe.monto_pagado), 0.00)
+    FROM tesoreria.obligaciones_eventuales oe
+    LEFT JOIN tesoreria.registros_pagos_eventuales rpe ON oe.id = rpe.obligacion_id
+    WHERE oe.activo = TRUE AND (ids_oe IS NULL OR oe.id = ANY(ids_oe))
+    GROUP BY oe.id, oe.empresa, oe.fecha_vencimiento, oe.moneda, oe.monto_esperado
+    HAVING COALESCE(SUM(rpe.monto_pagado), 0.00) < oe.monto_esperado;
+
+    INSERT INTO tesoreria.snapshot_cobros_pagos
+        (origen, documento_id, razon_social, fecha_vencimiento, moneda, monto_total, monto_pagado)
+    SELECT
+        'OF', of.id, of.empresa,
+        (periodo_actual + (of.dia_pago - 1) * INTERVAL '1 day')::date,
+        of.moneda, of.monto_esperado,
+        COALESCE(SUM(rp.monto_pagado), 0.00)
+    FROM tesoreria.obligaciones_fijas of
+    LEFT JOIN tesoreria.registros_pagos rp ON of.id = rp.obligacion_id
+        AND DATE_TRUNC('month', rp.fecha_operacion) = periodo_actual
+    WHERE of.activo = TRUE AND (ids_of IS NULL OR of.id = ANY(ids_of))
+    GROUP BY of.id, of.empresa, of.dia_pago, of.moneda, of.monto_esperado
+    HAVING COALESCE(SUM(rp.monto_pagado), 0.00) < of.monto_esperado;
+
+    UPDATE tesoreria.snapshot_cobros_pagos_estado
+       SET periodo = periodo_actual,
+           refrescado_en = now(),
+           completo_en = CASE WHEN ids_ventas IS NULL THEN now() ELSE completo_en END
+     WHERE id = 1;
+    RETURN procesados;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'snapshot_cobros_pagos',
+        sa.Column('origen', sa.VARCHAR(length=10), nullable=False),
+        sa.Column('documento_id', sa.BigInteger(), nullable=False),
+        sa.Column('razon_social', sa.VARCHAR(), nullable=True),
+        sa.Column('fecha_vencimiento', sa.Date(), nullable=True),
+        sa.Column('moneda', sa.VARCHAR(length=10), nullable=True),
+        sa.Column('monto_total', sa.Numeric(14, 2), nullable=True),
+        sa.Column('monto_pagado', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('origen', 'documento_id'),
+        schema='tesoreria',
+    )
+    op.create_index('ix_snapshot_cobros_pagos_vencimiento', 'snapshot_cobros_pagos', ['fecha_vencimiento'], schema='tesoreria')
+    op.create_table(
+        'snapshot_cobros_pagos_pendientes',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('origen', sa.VARCHAR(length=12), nullable=False),
+        sa.Column('documento_id', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='tesoreria',
+    )
+    op.create_table(
+        'snapshot_cobros_pagos_estado',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('periodo', sa.Date(), nullable=True),
+        sa.Column('refrescado_en', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('completo_en', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='tesoreria',
+    )
+    op.execute("INSERT INTO tesoreria.snapshot_cobros_pagos_estado (id) VALUES (1)")
+
+    op.execute(FUNCION_ENCOLAR)
+    op.execute(FUNCION_REFRESCAR)
+
+    for tabla, origen, columna, operaciones in FUENTES:
+        for operacion in operaciones:
+            referencias = {
+                'insert': "REFERENCING NEW TABLE AS filas_nuevas",
+                'update': "REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas",
+                'delete': "REFERENCING OLD TABLE AS filas_viejas",
+            }[operacion]
+            op.execute(
+                f"CREATE TRIGGER trg_snapshot_cobros_pagos_{operacion} AFTER {operacion.upper()} ON {tabla} "
+                f"{referencias} FOR EACH STATEMENT "
+                f"EXECUTE FUNCTION tesoreria.encolar_snapshot_cobros_pagos('{origen}', '{columna}')"
+            )
+
+    # Carga inicial (el cambio de periodo NULL -> mes actual fuerza el completo)
+    op.execute("SELECT tesoreria.refrescar_snapshot_cobros_pagos(true)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla, _origen, _columna, operaciones in FUENTES:
+        for operacion in operaciones:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_snapshot_cobros_pagos_{operacion} ON {tabla}")
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.refrescar_snapshot_cobros_pagos(boolean)")
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.encolar_snapshot_cobros_pagos()")
+    op.drop_table('snapshot_cobros_pagos_estado', schema='tesoreria')
+    op.drop_table('snapshot_cobros_pagos_pendientes', schema='tesoreria')
+    op.drop_index('ix_snapshot_cobros_pagos_vencimiento', table_name='snapshot_cobros_pagos', schema='tesoreria')
+    op.drop_table('snapshot_cobros_pagos', schema='tesoreria')
@@ -0,0 +1,134 @@
+"""Columna saldo_acumulado en caja chica y bancos
+
+Revision ID: d1e6b3f07a28
+Revises: c4d7e0a95f12
+Create Date: 2026-10-18 17:02:55.410362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e6b3f07a28'
+down_revision: Union[str, Sequence[str], None] = 'c4d7e0a95f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CUENTAS = ['cajachica', 'bcpsoles', 'bcpdolares']
+
+# Las escrituras de un mismo libro se serializan ANTES de tocar filas: así
+# el recálculo ve lo que confirmó la transacción anterior y no hay ciclos
+# de espera entre el lock y los bloqueos de fila.
+FUNCION_BLOQUEAR = """
+CREATE OR REPLACE FUNCTION tesoreria.bloquear_libro_efectivo() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('tesoreria.saldo_acumulado.' || TG_TABLE_NAME));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Recalcula saldo_acumulado (orden fecha, id) desde la primera posición que
+# tocó la sentencia. Los movimientos nuevos suelen ir al final del libro, así
+# que normalmente se actualizan solo las filas insertadas.
+FUNCION_RECALCULAR = """
+CREATE OR REPLACE FUNCTION tesoreria.recalcular_saldo_acumulado() RETURNS trigger AS $$
+DECLARE
+    desde_fecha timestamptz;
+    desde_id bigint;
+    base numeric;
+BEGIN
+    -- El UPDATE de abajo vuelve a disparar este trigger
+    IF pg_trigger_depth() > 1 THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        SELECT n.fecha, n.id INTO desde_fecha, desde_id
+          FROM filas_nuevas n ORDER BY n.fecha, n.id LIMIT 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT o.fecha, o.id INTO desde_fecha, desde_id
+          FROM filas_viejas o ORDER BY o.fecha, o.id LIMIT 1;
+    ELSE
+        SELECT p.fecha, p.id INTO desde_fecha, desde_id
+          FROM (
+              SELECT n.fecha, n.id FROM filas_nuevas n JOIN filas_viejas o ON o.id = n.id
+               WHERE (n.fecha, n.ingreso, n.egreso) IS DISTINCT FROM (o.fecha, o.ingreso, o.egreso)
+              UNION ALL
+              SELECT o.fecha, o.id FROM filas_nuevas n JOIN filas_viejas o ON o.id = n.id
+               WHERE (n.fecha, n.ingreso, n.egreso) IS DISTINCT FROM (o.fecha, o.ingreso, o.egreso)
+          ) p
+         ORDER BY p.fecha, p.id LIMIT 1;
+    END IF;
+
+    IF desde_id IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format(
+        'SELECT saldo_acumulado FROM tesoreria.%I WHERE (fecha, id) < ($1, $2) ORDER BY fecha DESC, id DESC LIMIT 1',
+        TG_TABLE_NAME)
+       INTO base USING desde_fecha, desde_id;
+
+    EXECUTE format(
+        'UPDATE tesoreria.%1$I t SET saldo_acumulado = s.acumulado '
+        'FROM (SELECT id, $3 + SUM(ingreso + egreso) OVER (ORDER BY fecha, id) AS acumulado '
+        '        FROM tesoreria.%1$I WHERE (fecha, id) >= ($1, $2)) s '
+        'WHERE t.id = s.id AND t.saldo_acumulado IS DISTINCT FROM s.acumulado',
+        TG_TABLE_NAME)
+       USING desde_fecha, desde_id, COALESCE(base, 0);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(FUNCION_BLOQUEAR)
+    op.execute(FUNCION_RECALCULAR)
+
+    for cuenta in CUENTAS:
+        tabla = f"tesoreria.{cuenta}"
+        op.add_column(cuenta, sa.Column('saldo_acumulado', sa.Numeric(16, 2), nullable=True), schema='tesoreria')
+        op.execute(f"LOCK TABLE {tabla} IN SHARE ROW EXCLUSIVE MODE")
+        op.execute(
+            f"UPDATE {tabla} t SET saldo_acumulado = s.acumulado "
+            f"FROM (SELECT id, SUM(ingreso + egreso) OVER (ORDER BY fecha, id) AS acumulado FROM {tabla}) s "
+            f"WHERE t.id = s.id"
+        )
+        for operacion in ('insert', 'update', 'delete'):
+            op.execute(
+                f"CREATE TRIGGER trg_saldo_acumulado_bloqueo_{operacion} BEFORE {operacion.upper()} ON {tabla} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.bloquear_libro_efectivo()"
+            )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_acumulado_insert AFTER INSERT ON {tabla} "
+            f"REFERENCING NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.recalcular_saldo_acumulado()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_acumulado_update AFTER UPDATE ON {tabla} "
+            f"REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.recalcular_saldo_acumulado()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_saldo_acumulado_delete AFTER DELETE ON {tabla} "
+            f"REFERENCING OLD TABLE AS filas_viejas "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION tesoreria.recalcular_saldo_acumulado()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for cuenta in CUENTAS:
+        for operacion in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_saldo_acumulado_{operacion} ON tesoreria.{cuenta}")
+            op.execute(f"DROP TRIGGER IF EXISTS trg_saldo_acumulado_bloqueo_{operacion} ON tesoreria.{cuenta}")
+        op.drop_column(cuenta, 'saldo_acumulado', schema='tesoreria')
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.recalcular_saldo_acumulado()")
+    op.execute("DROP FUNCTION IF EXISTS tesoreria.bloquear_libro_efectivo()")
@@ -0,0 +1,68 @@
+"""Saldo de stock por lote de material y mercadería
+
+Revision ID: e7a3c9f15b60
+Revises: d1e6b3f07a28
+Create Date: 2026-10-18 18:11:37.902154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9f15b60'
+down_revision: Union[str, Sequence[str], None] = 'd1e6b3f07a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tipo, columna uuid)
+INVENTARIOS = [
+    ('material', 'uuid_material'),
+    ('mercaderia', 'uuid_mercaderia'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for tipo, col in INVENTARIOS:
+        # recalcular_lotes busca ingresos y salidas por lote
+        op.create_index(f'ix_ingreso_{tipo}_lote', f'ingreso_{tipo}', [col, 'serie'], schema='almacen')
+        op.create_index(f'ix_salida_{tipo}_lote', f'salida_{tipo}', [col, 'serie'], schema='almacen')
+
+        op.create_table(
+            f'stock_lote_{tipo}',
+            sa.Column('uuid_registro', sa.VARCHAR(length=40), nullable=False),
+            sa.Column('serie', sa.VARCHAR(length=100), nullable=False),
+            sa.Column('ingreso_id', sa.BigInteger(), nullable=False),
+            sa.Column('codigo', sa.VARCHAR(length=20), nullable=False),
+            sa.Column('cantidad_inicial', sa.BigInteger(), nullable=False),
+            sa.Column('cantidad_salida', sa.BigInteger(), nullable=False),
+            sa.Column('stock_actual', sa.BigInteger(), sa.Computed('cantidad_inicial - cantidad_salida', persisted=True)),
+            sa.Column('actualizado_en', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+            sa.PrimaryKeyConstraint('uuid_registro', 'serie'),
+            schema='almacen',
+        )
+        op.create_index(f'ix_stock_lote_{tipo}_codigo', f'stock_lote_{tipo}', ['codigo'], schema='almacen')
+
+        # Carga inicial (misma consulta que recalcular_lotes sin filtro)
+        op.execute(f"""
+            INSERT INTO almacen.stock_lote_{tipo}
+                (uuid_registro, serie, ingreso_id, codigo, cantidad_inicial, cantidad_salida)
+            SELECT i.{col}, i.serie, MIN(i.id), MIN(i.codigo), SUM(i.cantidad),
+                   COALESCE((SELECT SUM(s.cantidad) FROM almacen.salida_{tipo} s
+                              WHERE s.{col} = i.{col} AND s.serie = i.serie), 0)
+            FROM almacen.ingreso_{tipo} i
+            GROUP BY i.{col}, i.serie
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tipo, _col in INVENTARIOS:
+        op.drop_index(f'ix_stock_lote_{tipo}_codigo', table_name=f'stock_lote_{tipo}', schema='almacen')
+        op.drop_table(f'stock_lote_{tipo}', schema='almacen')
+        op.drop_index(f'ix_salida_{tipo}_lote', table_name=f'salida_{tipo}', schema='almacen')
+        op.drop_index(f'ix_ingreso_{tipo}_lote', table_name=f'ingreso_{tipo}', schema='almacen')
@@ -0,0 +1,145 @@
+"""Imágenes fuera de Postgres: columnas LargeBinary reemplazadas por su SHA-256
+
+Revision ID: f2b8d4a61c39
+Revises: e7a3c9f15b60
+Create Date: 2026-10-18 21:02:44.618390
+
+Los bytes de cada imagen se copian al almacén de blobs configurado
+(`BLOBS_BACKEND`, ver app/core/blobs.py) y la fila queda con el hash. El
+mismo contenido repetido en varias filas se guarda una sola vez.
+
+El upgrade se niega a correr con el almacén en memoria (los blobs se
+perderían al terminar el proceso) o con un `BLOBS_DIR` inexistente o sin
+permiso de escritura, y antes de borrar cada columna vuelve a leer del
+almacén una muestra de hashes y los compara con los bytes originales.
+
+DROP COLUMN no devuelve el espacio en disco: después de migrar conviene un
+`VACUUM FULL` de estas tablas en una ventana de mantenimiento.
+"""
+import hashlib
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.blobs import BlobNoEncontrado, blob_store
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a61c39'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c9f15b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (schema, tabla, [(columna binaria, columna de hash)])
+TABLAS = [
+    ('acceso', 'usuario', [('imagen', 'imagen_sha256')]),
+    ('almacen', 'catalogo_mercaderia', [(f'imagen{n}', f'imagen{n}_sha256') for n in range(1, 5)]),
+    ('almacen', 'catalogo_material', [(f'imagen{n}', f'imagen{n}_sha256') for n in range(1, 5)]),
+    ('almacen', 'ingreso_mercaderia', [('image_byte', 'image_sha256')]),
+    ('almacen', 'ingreso_material', [('image_byte', 'image_sha256')]),
+    ('almacen', 'salida_mercaderia', [('image_byte', 'image_sha256')]),
+    ('almacen', 'salida_material', [('image_byte', 'image_sha256')]),
+]
+
+# Filas por lote: acota la memoria (cada fila trae su imagen completa)
+LOTE = 200
+
+SELECT_LOTE = "SELECT id, {origen} FROM {schema}.{tabla} WHERE id > :desde AND {origen} IS NOT NULL ORDER BY id LIMIT :lote"
+
+# Un UPDATE por lote: el trigger de notificaciones es por sentencia
+UPDATE_LOTE = """
+UPDATE {schema}.{tabla} AS t SET {destino} = v.valor
+FROM unnest(CAST(:ids AS BIGINT[]), CAST(:valores AS {tipo}[])) AS v(id, valor)
+WHERE t.id = v.id
+"""
+
+
+def _copiar(schema: str, tabla: str, origen: str, destino: str, tipo: str, convertir) -> None:
+    """Recorre por lotes las filas con `origen` y guarda `convertir(valor)` en `destino`."""
+    conn = op.get_bind()
+    select_lote = sa.text(SELECT_LOTE.format(schema=schema, tabla=tabla, origen=origen))
+    update_lote = sa.text(UPDATE_LOTE.format(schema=schema, tabla=tabla, destino=destino, tipo=tipo))
+    desde = 0
+    while True:
+        filas = conn.execute(select_lote, {'desde': desde, 'lote': LOTE}).all()
+        if not filas:
+            break
+        conn.execute(update_lote, {
+            'ids': [fila[0] for fila in filas],
+            'valores': [convertir(fila[1]) for fila in filas],
+        })
+        desde = filas[-1][0]
+
+
+# Filas releídas del almacén antes de borrar cada columna
+MUESTRA = 20
+
+# Primera y última fila más una muestra al azar
+SELECT_MUESTRA = """
+(SELECT {origen}, {destino} FROM {schema}.{tabla} WHERE {origen} IS NOT NULL ORDER BY id LIMIT 1)
+UNION ALL
+(SELECT {origen}, {destino} FROM {schema}.{tabla} WHERE {origen} IS NOT NULL ORDER BY id DESC LIMIT 1)
+UNION ALL
+(SELECT {origen}, {destino} FROM {schema}.{tabla} WHERE {origen} IS NOT NULL ORDER BY random() LIMIT :muestra)
+"""
+
+SIN_COPIAR = "SELECT count(*) FROM {schema}.{tabla} WHERE {origen} IS NOT NULL AND {destino} IS NULL"
+
+
+def _comprobar_almacen() -> None:
+    """Aborta antes de tocar el esquema si el almacén configurado no es persistente o no se puede escribir."""
+    if settings.BLOBS_BACKEND not in ('local', 's3'):
+        raise RuntimeError(
+            f"BLOBS_BACKEND={settings.BLOBS_BACKEND!r} no es persistente; "
+            "esta migración requiere 'local' o 's3'"
+        )
+    if settings.BLOBS_BACKEND == 'local':
+        directorio = settings.BLOBS_DIR
+        # Un directorio inexistente suele ser un volumen sin montar: no se crea aquí
+        if not os.path.isdir(directorio):
+            raise RuntimeError(f"BLOBS_DIR={directorio!r} no existe")
+        if not os.access(directorio, os.W_OK | os.X_OK):
+            raise RuntimeError(f"BLOBS_DIR={directorio!r} no tiene permiso de escritura")
+
+
+def _verificar_copia(schema: str, tabla: str, origen: str, destino: str) -> None:
+    """Comprueba que todas las filas tienen hash y que una muestra se relee igual del almacén."""
+    conn = op.get_bind()
+    formato = dict(schema=schema, tabla=tabla, origen=origen, destino=destino)
+    sin_copiar = conn.execute(sa.text(SIN_COPIAR.format(**formato))).scalar_one()
+    if sin_copiar:
+        raise RuntimeError(f"{schema}.{tabla}.{origen}: {sin_copiar} filas sin hash en {destino}")
+    for data, sha256 in conn.execute(sa.text(SELECT_MUESTRA.format(**formato)), {'muestra': MUESTRA}):
+        data = bytes(data)
+        try:
+            guardado = blob_store.leer_sync(sha256)
+        except BlobNoEncontrado:
+            raise RuntimeError(f"{schema}.{tabla}.{origen}: el blob {sha256} no está en el almacén") from None
+        if sha256 != hashlib.sha256(data).hexdigest() or guardado != data:
+            raise RuntimeError(f"{schema}.{tabla}.{origen}: el blob {sha256} no coincide con la columna original")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _comprobar_almacen()
+    # ADD COLUMN toma la tabla en exclusiva hasta el final: nadie escribe durante la copia
+    for schema, tabla, columnas in TABLAS:
+        for origen, destino in columnas:
+            op.add_column(tabla, sa.Column(destino, sa.VARCHAR(length=64), nullable=True), schema=schema)
+            _copiar(schema, tabla, origen, destino, 'VARCHAR', lambda data: blob_store.guardar_sync(bytes(data)))
+            _verificar_copia(schema, tabla, origen, destino)
+            op.drop_column(tabla, origen, schema=schema)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Los blobs no se borran del almacén: pueden seguir compartidos o servir a un nuevo upgrade
+    for schema, tabla, columnas in TABLAS:
+        for origen, destino in columnas:
+            op.add_column(tabla, sa.Column(origen, sa.LargeBinary(), nullable=True), schema=schema)
+            _copiar(schema, tabla, destino, origen, 'BYTEA', blob_store.leer_sync)
+            op.drop_column(tabla, destino, schema=schema)
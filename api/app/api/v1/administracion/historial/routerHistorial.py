@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
@@ -6,6 +9,8 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 # Importaciones de tus archivos
 from app.core.deps import get_current_user
 from app.core.db import get_session
+from app.core.pagination import PaginaOLista, Paginacion, aplicar_rango, paginacion_params, paginar
+from app.core.streaming import FormatoStream, respuesta_stream
 
 from app.api.v1.administracion.historial.shemaHistorial import ListaHistorialVentas, ListaHistorialCompras
 from app.api.v1.administracion.globalClienteProveedor.modelGlobalCliente import GlobalCliente
@@ -23,20 +28,46 @@ router_administracion_historial = APIRouter(
 )
 
 
-@router_administracion_historial.get("/ventas", response_model=list[ListaHistorialVentas])
-async def obtener_historial_ventas(db: AsyncSession = Depends(get_session)):
+def _query_historial_ventas(cliente_id: Optional[int], fecha_desde: Optional[date], fecha_hasta: Optional[date]):
     query = select(
         Venta.id, Venta.fecha_emision, Venta.tipo_cp_codigo, Venta.serie, Venta.numero,
         GlobalCliente.tipo_documento, GlobalCliente.nro_documento, GlobalCliente.razon_social,
         Venta.base_imponible, Venta.igv, Venta.total, Venta.moneda, Venta.tipo_cambio, Venta.categoria, Venta.descripcion_comprobante
     ).join(GlobalCliente, Venta.cliente_id == GlobalCliente.id, isouter=True)
 
-    query = query.order_by(Venta.fecha_emision.asc())
+    if cliente_id is not None:
+        query = query.where(Venta.cliente_id == cliente_id)
+    return aplicar_rango(query, Venta.fecha_emision, fecha_desde, fecha_hasta)
+
+
+def _query_historial_compras(proveedor_id: Optional[int], fecha_desde: Optional[date], fecha_hasta: Optional[date]):
+    query = select(
+        Compra.id, Compra.fecha_emision, Compra.descripcion_comprobante, Compra.tipo_cp_codigo, Compra.serie, Compra.numero,
+        GlobalProveedor.nro_documento, GlobalProveedor.razon_social, Compra.base_imponible, Compra.igv, Compra.no_gravadas, Compra.otros, Compra.total, Compra.moneda, Compra.tipo_cambio
+    ).join(GlobalProveedor, Compra.proveedor_id == GlobalProveedor.id, isouter=True)
+
+    if proveedor_id is not None:
+        query = query.where(Compra.proveedor_id == proveedor_id)
+    return aplicar_rango(query, Compra.fecha_emision, fecha_desde, fecha_hasta)
+
+
+@router_administracion_historial.get("/ventas", response_model=PaginaOLista[ListaHistorialVentas])
+async def obtener_historial_ventas(
+    cliente_id: Optional[int] = Query(None),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_emision >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_emision <= fecha_hasta"),
+    pag: Paginacion = Depends(paginacion_params),
+    db: AsyncSession = Depends(get_session),
+):
+    query = _query_historial_ventas(cliente_id, fecha_desde, fecha_hasta)
 
     try:
-        result = await db.execute(query)
-        resultados = result.mappings().all()
-        return resultados if resultados else []
+        return await paginar(
+            db, query, pag,
+            ordenes={"fecha_emision": Venta.fecha_emision, "id": Venta.id},
+            orden_defecto="fecha_emision",
+            desempate=Venta.id,
+        )
     
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -45,22 +76,52 @@ async def obtener_historial_ventas(db: AsyncSession = Depends(get_session)):
         )
 
 
-@router_administracion_historial.get("/compras", response_model=list[ListaHistorialCompras])
-async def obtener_historial_compras(db: AsyncSession = Depends(get_session)):
-    query = select(
-        Compra.id, Compra.fecha_emision, Compra.descripcion_comprobante, Compra.tipo_cp_codigo, Compra.serie, Compra.numero,
-        GlobalProveedor.nro_documento, GlobalProveedor.razon_social, Compra.base_imponible, Compra.igv, Compra.no_gravadas, Compra.otros, Compra.total, Compra.moneda, Compra.tipo_cambio
-    ).join(GlobalProveedor, Compra.proveedor_id == GlobalProveedor.id, isouter=True)
-
-    query = query.order_by(Compra.fecha_emision.asc())
+@router_administracion_historial.get("/compras", response_model=PaginaOLista[ListaHistorialCompras])
+async def obtener_historial_compras(
+    proveedor_id: Optional[int] = Query(None),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_emision >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_emision <= fecha_hasta"),
+    pag: Paginacion = Depends(paginacion_params),
+    db: AsyncSession = Depends(get_session),
+):
+    query = _query_historial_compras(proveedor_id, fecha_desde, fecha_hasta)
 
     try:
-        result = await db.execute(query)
-        resultados = result.mappings().all()
-        return resultados if resultados else []
+        return await paginar(
+            db, query, pag,
+            ordenes={"fecha_emision": Compra.fecha_emision, "id": Compra.id},
+            orden_defecto="fecha_emision",
+            desempate=Compra.id,
+        )
     
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno al obtener los registros: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router_administracion_historial.get("/ventas/stream")
+async def exportar_historial_ventas(
+    cliente_id: Optional[int] = Query(None),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_emision >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_emision <= fecha_hasta"),
+    formato: FormatoStream = Query("ndjson", description="ndjson (una fila por línea) o json (arreglo)"),
+    db: AsyncSession = Depends(get_session),
+):
+    """Historial completo de ventas en streaming, sin cargarlo en memoria."""
+    query = _query_historial_ventas(cliente_id, fecha_desde, fecha_hasta).order_by(Venta.fecha_emision.asc(), Venta.id.asc())
+    return respuesta_stream(db, query, ListaHistorialVentas, formato, nombre_archivo="historial_ventas")
+
+
+@router_administracion_historial.get("/compras/stream")
+async def exportar_historial_compras(
+    proveedor_id: Optional[int] = Query(None),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_emision >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_emision <= fecha_hasta"),
+    formato: FormatoStream = Query("ndjson", description="ndjson (una fila por línea) o json (arreglo)"),
+    db: AsyncSession = Depends(get_session),
+):
+    """Historial completo de compras en streaming, sin cargarlo en memoria."""
+    query = _query_historial_compras(proveedor_id, fecha_desde, fecha_hasta).order_by(Compra.fecha_emision.asc(), Compra.id.asc())
+    return respuesta_stream(db, query, ListaHistorialCompras, formato, nombre_archivo="historial_compras")
@@ -0,0 +1,288 @@
+"""
+Motor de importación desde Excel para los servicios de monitoreo.
+
+Weather, Pro, MC y Chips importan hojas con la misma forma: datos del
+cliente, una ubicación, (opcionalmente) un chip y columnas propias del
+servicio. En lugar de recorrer el DataFrame fila por fila, este módulo:
+
+1. Limpia y valida todas las columnas de forma vectorizada con pandas.
+2. Resuelve clientes, ubicaciones y chips por lotes: un `SELECT ... IN`
+   para los existentes y un `INSERT ... ON CONFLICT DO NOTHING RETURNING`
+   para los nuevos.
+3. Inserta los servicios en lotes de `TAMANIO_LOTE` filas, cada lote en
+   un SAVEPOINT: si un lote falla se reintenta fila por fila para
+   reportar solo las filas con error sin abortar la importación.
+
+Las filas inválidas se devuelven en `errores` como `{"fila", "error"}`,
+con el número de fila tal como aparece en Excel.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import pandas as pd
+from fastapi import HTTPException, status
+from sqlalchemy import String, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.excel import leer_excel
+from app.core.uploads import ArchivoSubido
+from app.api.v1.administracion.globalClienteProveedor.modelGlobalCliente import GlobalCliente
+from app.api.v1.administracion.monitoreo.models.model_inventario_chips import InventarioChips
+from app.api.v1.administracion.monitoreo.models.model_ubicaciones import TablaUbicacionesMonitoreo
+
+TAMANIO_LOTE = 1000
+"""Filas por sentencia en las búsquedas IN y en los INSERT por lotes."""
+
+TIPO_DOCUMENTO_POR_DEFECTO = "6"
+ESTADO_POR_DEFECTO = "PENDIENTE"
+
+_NULOS_TEXTO = ("NAN", "NONE", "NAT", "")
+
+Progreso = Callable[[float, str], Awaitable[None]]
+"""Callback `(porcentaje, mensaje)`, p. ej. `ContextoJob.progreso`."""
+
+
+@dataclass
+class ConfigImportacion:
+    """Describe la hoja Excel y la tabla destino de un servicio de monitoreo."""
+    modelo: type
+    columnas_requeridas: list[str]
+    columnas_opcionales: list[str] = field(default_factory=list)
+    """Columnas de texto propias del servicio que se copian tal cual (limpias)."""
+    dtype: dict[str, Any] = field(default_factory=dict)
+    usa_chip: bool = False
+
+
+def _lotes(items: list, tamanio: int = TAMANIO_LOTE):
+    for i in range(0, len(items), tamanio):
+        yield items[i:i + tamanio]
+
+
+def _normalizar_clave(serie: pd.Series) -> pd.Series:
+    """Equivalente vectorizado de `limpiar_texto`: espacios, mayúsculas y nulos falsos."""
+    texto = (
+        serie.astype("string")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.upper()
+    )
+    return texto.mask(texto.isin(_NULOS_TEXTO))
+
+
+def _limpiar_texto(serie: pd.Series) -> pd.Series:
+    texto = serie.astype("string").str.strip()
+    return texto.mask(texto.isin(_NULOS_TEXTO))
+
+
+def _longitud_maxima(modelo: type, columna: str) -> Optional[int]:
+    tipo = modelo.__table__.c[columna].type
+    return tipo.length if isinstance(tipo, String) else None
+
+
+class _Errores:
+    """Acumula errores por fila y mantiene la máscara de filas aún válidas."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.validas = pd.Series(True, index=df.index)
+        self.detalle: dict[int, str] = {}
+
+    def marcar(self, mascara: pd.Series, mensaje: str) -> None:
+        nuevas = mascara & self.validas
+        for fila in self.df.loc[nuevas, "_fila"]:
+            self.detalle[int(fila)] = mensaje
+        self.validas &= ~mascara
+
+    def agregar(self, fila: int, mensaje: str) -> None:
+        self.detalle[fila] = mensaje
+
+    def lista(self) -> list[dict]:
+        return [{"fila": f, "error": e} for f, e in sorted(self.detalle.items())]
+
+
+def _preparar_dataframe(df: pd.DataFrame, config: ConfigImportacion, errores: _Errores) -> pd.DataFrame:
+    df["nro_documento"] = _normalizar_clave(df["nro_documento"])
+    df["razon_social"] = _normalizar_clave(df["razon_social"])
+    df["ubicacion"] = _normalizar_clave(df["ubicacion"])
+    if config.usa_chip:
+        df["numero"] = _limpiar_texto(df["numero"])
+
+    for col in config.columnas_opcionales:
+        if col in df.columns:
+            df[col] = _limpiar_texto(df[col])
+        else:
+            df[col] = pd.Series(pd.NA, index=df.index, dtype="string")
+
+    df["estado"] = _limpiar_texto(df["estado"]).fillna(ESTADO_POR_DEFECTO)
+
+    for col in ("fecha_inicio", "fecha_fin"):
+        fechas = pd.to_datetime(df[col], errors="coerce", format="mixed")
+        errores.marcar(fechas.isna(), f"{col} vacía o con formato inválido")
+        df[col] = fechas.dt.date
+
+    obligatorias = ["nro_documento", "razon_social", "ubicacion"] + (["numero"] if config.usa_chip else [])
+    for col in obligatorias:
+        errores.marcar(df[col].isna(), f"{col} es obligatorio")
+
+    # Longitudes contra las columnas destino, para no fallar en Postgres
+    limites = {
+        "nro_documento": _longitud_maxima(GlobalCliente, "nro_documento"),
+        "razon_social": _longitud_maxima(GlobalCliente, "razon_social"),
+        "ubicacion": _longitud_maxima(TablaUbicacionesMonitoreo, "ubicacion"),
+        "estado": _longitud_maxima(config.modelo, "estado"),
+        **{col: _longitud_maxima(config.modelo, col) for col in config.columnas_opcionales},
+    }
+    if config.usa_chip:
+        limites["numero"] = _longitud_maxima(InventarioChips, "numero_chip")
+    for col, limite in limites.items():
+        if limite:
+            errores.marcar(df[col].str.len().fillna(0) > limite, f"{col} excede {limite} caracteres")
+
+    return df[errores.validas]
+
+
+async def _resolver_ids(db: AsyncSession, modelo: type, clave: str, nuevos: dict[str, dict]) -> dict[str, int]:
+    """
+    Devuelve `{valor_clave: id}` para todas las claves de `nuevos`, creando las que falten.
+
+    Args:
+        db: Sesión de base de datos.
+        modelo: Tabla con restricción UNIQUE sobre `clave`.
+        clave: Nombre de la columna única.
+        nuevos: Valor de la clave -> fila a insertar si no existe.
+    """
+    columna = getattr(modelo, clave)
+    claves = list(nuevos)
+    ids: dict[str, int] = {}
+
+    for lote in _lotes(claves):
+        result = await db.execute(select(columna, modelo.id).where(columna.in_(lote)))
+        ids.update(result.tuples().all())
+
+    faltantes = [nuevos[k] for k in claves if k not in ids]
+    for lote in _lotes(faltantes):
+        stmt = (
+            pg_insert(modelo)
+            .values(lote)
+            .on_conflict_do_nothing(index_elements=[clave])
+            .returning(columna, modelo.id)
+        )
+        result = await db.execute(stmt)
+        ids.update(result.tuples().all())
+
+    # Claves insertadas por otra transacción entre el SELECT y el INSERT
+    pendientes = [k for k in claves if k not in ids]
+    for lote in _lotes(pendientes):
+        result = await db.execute(select(columna, modelo.id).where(columna.in_(lote)))
+        ids.update(result.tuples().all())
+
+    return ids
+
+
+async def _insertar_servicios(
+    db: AsyncSession, modelo: type, filas: list[dict], errores: _Errores, progreso: Optional[Progreso] = None
+) -> int:
+    insertados = 0
+    for n, lote in enumerate(_lotes(filas), start=1):
+        if progreso:
+            # La inserción ocupa el tramo 40-100 % del avance
+            await progreso(40 + 60 * (n - 1) * TAMANIO_LOTE / len(filas), "Insertando servicios")
+        datos = [{k: v for k, v in f.items() if k != "_fila"} for f in lote]
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(modelo), datos)
+            insertados += len(lote)
+            continue
+        except DBAPIError:
+            pass
+
+        # El lote falló: se reintenta fila por fila para aislar las filas con error
+        for fila, dato in zip(lote, datos):
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(modelo), [dato])
+                insertados += 1
+            except DBAPIError as e:
+                errores.agregar(fila["_fila"], str(e.orig))
+    return insertados
+
+
+async def importar_excel_monitoreo(
+    archivo: ArchivoSubido, db: AsyncSession, config: ConfigImportacion, progreso: Optional[Progreso] = None
+) -> dict:
+    """
+    Importa una hoja Excel de servicios de monitoreo en una sola transacción.
+
+    Args:
+        archivo: Archivo Excel subido.
+        db: Sesión de base de datos (se hace commit al final).
+        config: Columnas y tabla destino del servicio.
+        progreso: Callback opcional para reportar el avance por etapa.
+
+    Returns:
+        Un dict con `status`, `message`, `importados` y `errores` por fila.
+
+    Raises:
+        HTTPException: 400 si falta alguna columna requerida.
+    """
+    if progreso:
+        await progreso(5, "Leyendo Excel")
+    dtype = {"nro_documento": str, **({"numero": str} if config.usa_chip else {}), **config.dtype}
+    df = await leer_excel(archivo.ruta, dtype=dtype)
+
+    for col in config.columnas_requeridas:
+        if col not in df.columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Falta la columna requerida en el Excel: {col}"
+            )
+
+    df = df.reset_index(drop=True)
+    df["_fila"] = df.index + 2  # +1 por la cabecera y +1 porque Excel cuenta desde 1
+    errores = _Errores(df)
+    df = _preparar_dataframe(df, config, errores)
+
+    if progreso:
+        await progreso(20, "Resolviendo clientes y ubicaciones")
+    # Clientes: se usa la primera razón social que aparece para cada documento
+    primeros = df.drop_duplicates("nro_documento")
+    clientes = await _resolver_ids(db, GlobalCliente, "nro_documento", {
+        doc: {"tipo_documento": TIPO_DOCUMENTO_POR_DEFECTO, "nro_documento": doc, "razon_social": razon}
+        for doc, razon in zip(primeros["nro_documento"], primeros["razon_social"])
+    })
+    ubicaciones = await _resolver_ids(db, TablaUbicacionesMonitoreo, "ubicacion", {
+        u: {"ubicacion": u} for u in df["ubicacion"].unique()
+    })
+
+    servicio = pd.DataFrame({
+        "_fila": df["_fila"],
+        "cliente_id": df["nro_documento"].map(clientes),
+        "ubicacion_id": df["ubicacion"].map(ubicaciones),
+        "fecha_inicio": df["fecha_inicio"],
+        "fecha_fin": df["fecha_fin"],
+        "estado": df["estado"],
+    })
+    if config.usa_chip:
+        chips = await _resolver_ids(db, InventarioChips, "numero_chip", {
+            n: {"numero_chip": n} for n in df["numero"].unique()
+        })
+        servicio["chip_id"] = df["numero"].map(chips)
+    for col in config.columnas_opcionales:
+        servicio[col] = df[col]
+
+    filas = servicio.astype(object).where(servicio.notna(), None).to_dict("records")
+    importados = await _insertar_servicios(db, config.modelo, filas, errores, progreso)
+    await db.commit()
+
+    lista_errores = errores.lista()
+    mensaje = f"Se importaron con éxito {importados} registros."
+    if lista_errores:
+        mensaje += f" {len(lista_errores)} filas con errores."
+    return {
+        "status": "success",
+        "message": mensaje,
+        "importados": importados,
+        "errores": lista_errores,
+    }
@@ -1,13 +1,17 @@
 
 from datetime import datetime, date
 from typing import List, Optional
-from sqlalchemy import TIMESTAMP, String, Numeric, ForeignKey, CHAR, Text, text
+from sqlalchemy import Index, TIMESTAMP, String, Numeric, ForeignKey, CHAR, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.base_class import Base
 
 class ServicioChips(Base):
     __tablename__ = "tabla_chips_servicios_monitoreo"
-    __table_args__ = {"schema": "administracion"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_tabla_chips_servicios_monitoreo_fecha_inicio_id", "fecha_inicio", "id"),
+        {"schema": "administracion"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     cliente_id: Mapped[Optional[int]] = mapped_column(ForeignKey("administracion.global_clientes.id"), nullable=True, index=True)
@@ -1,200 +1,56 @@
 
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import delete, desc, func, select, text
-import pandas as pd
-import io
 from app.core.deps import get_current_user
+from app.core.config import settings
+from app.core.jobs import ContextoJob, encolar_job, registrar_tarea
+from app.core.uploads import ArchivoSubido, recibir_archivo
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
 from app.core.db import get_session
+from app.core.pagination import PaginaOLista, Paginacion, aplicar_rango, paginacion_params, paginar
 
 from app.api.v1.administracion.globalClienteProveedor.modelGlobalCliente import GlobalCliente
 from app.api.v1.administracion.monitoreo.models.model_ubicaciones import TablaUbicacionesMonitoreo
 from app.api.v1.administracion.monitoreo.models.model_inventario_chips import InventarioChips
 from app.api.v1.administracion.monitoreo.models.model_chips import ServicioChips
-from app.api.v1.administracion.monitoreo.schemas.schema_chips import ChipsImportacion, ChipsCreate, CreateCliente, CreateUbicacion, ChipsOut, ChipsUpdate, ActualizarEstadoSchema, ChipsCalendarioVencimientosApiSchema
+from app.api.v1.administracion.monitoreo.schemas.schema_chips import ChipsCreate, ChipsOut, ChipsUpdate, ActualizarEstadoSchema, ChipsCalendarioVencimientosApiSchema
+from app.api.v1.administracion.monitoreo.importador import ConfigImportacion, importar_excel_monitoreo
 
 router_servicio_chips = APIRouter(prefix="/servicio-chips", tags=["Servicio Chips"], dependencies=[Depends(get_current_user)])
 
-@router_servicio_chips.post("/importar", status_code=status.HTTP_201_CREATED)
-async def importar_servicio_weather(file: UploadFile = File(...), db: AsyncSession = Depends(get_session)):
-    try:
-        # Leer el archivo Excel
-        contents = await file.read()
-        df = pd.read_excel(
-            io.BytesIO(contents),
-            dtype={"fact_relacionada": str}
-        )
-        
-        # Reemplazamos todos los NaN/NaT por None de forma segura para Pydantic
-        df = df.astype(object).where(pd.notnull(df), None)
-
-        # Validar que las columnas necesarias estén presentes
-        required_columns = ["nro_documento", "razon_social", "ubicacion", "numero", "fecha_inicio", "fecha_fin", "fact_relacionada", "estado"]
-        for col in required_columns:
-            if col not in df.columns:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail=f"Falta la columna requerida en el Excel: {col}"
-                )
-
-        registros_creados = 0
-
-        # CACHÉ DE SESIÓN LOCAL: Guardará los IDs mapeados durante la ejecución de este bucle
-        # Esto evita que si la fila 2 inserta 'SIN UBICACIÓN', la fila 3 intente insertarla de nuevo.
-        cache_clientes = {}
-        cache_ubicaciones = {}
-        cache_inventario_chips = {}
-
-        # Iterar sobre cada fila del DataFrame
-        for index, row in df.iterrows():
-            fila_actual = index + 2
-            try:
-                # 1. Convertir fechas y validar CLIENTE primero
-                f_inicio = pd.to_datetime(row["fecha_inicio"]).date()
-                f_fin = pd.to_datetime(row["fecha_fin"]).date()
-                
-                # .strip() elimina espacios en blanco accidentales que rompen la unicidad de las llaves
-                nro_doc_clean = str(row["nro_documento"]).strip()
-                razon_social_clean = str(row["razon_social"]).strip()
-                ubicacion_clean = str(row["ubicacion"]).strip()
-                numero_clean = str(row["numero"]).strip()
-
-                cliente_data = CreateCliente(
-                    nro_documento=nro_doc_clean,
-                    razon_social=razon_social_clean
-                )
-                
-                # Opcionales con manejo de vacíos
-                estado_row = row.get("estado")
-                estado_val = str(estado_row).strip() if estado_row and pd.notna(estado_row) else "PENDIENTE"
-                
-            except Exception as validation_err:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error de validación inicial en la fila {fila_actual}: {str(validation_err)}"
-                )
-
-            # 2. Validar/Crear el cliente en la BD para obtener su ID
-            # Primero revisamos si ya lo procesamos en una fila anterior de este mismo Excel
-            if cliente_data.nro_documento in cache_clientes:
-                cliente_id = cache_clientes[cliente_data.nro_documento]
-            else:
-                # Si no está en caché, buscamos en la Base de Datos
-                result_cliente = await db.execute(
-                    select(GlobalCliente).where(GlobalCliente.nro_documento == cliente_data.nro_documento)
-                )
-                cliente = result_cliente.scalars().first()
-                
-                if not cliente:
-                    cliente = GlobalCliente(
-                        tipo_documento=cliente_data.tipo_documento,
-                        nro_documento=cliente_data.nro_documento,
-                        razon_social=cliente_data.razon_social
-                    )
-                    db.add(cliente)
-                    await db.flush() # Sincroniza y genera el ID inmediatamente de forma segura
-
-                cliente_id = cliente.id
-                cache_clientes[cliente_data.nro_documento] = cliente_id # Guardamos en la caché local
-
-            # 3. Validar y limpiar la ubicación con Pydantic
-            try:
-                ubicacion_data = CreateUbicacion(
-                    ubicacion=ubicacion_clean
-                )
-                
-                servicio_data = ChipsImportacion(
-                    nro_documento=cliente_data.nro_documento,
-                    razon_social=cliente_data.razon_social,
-                    ubicacion=ubicacion_data.ubicacion,
-                    numero=numero_clean,
-                    fecha_inicio=f_inicio,
-                    fecha_fin=f_fin,
-                    fact_relacionada=row.get("fact_relacionada").strip() if pd.notna(row.get("fact_relacionada")) else None,
-                    estado=estado_val,
-                    adicional=str(row.get("adicional")).strip() if pd.notna(row.get("adicional")) else None
-                )
-            except Exception as validation_err:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error de validación de ubicación en la fila {fila_actual}: {str(validation_err)}"
-                )
-
-            # 4. Validar si la ubicación ya existe para obtener su ID (Solución al error 'SIN UBICACIÓN')
-            # Primero revisamos nuestra caché local de este Excel
-            if ubicacion_data.ubicacion in cache_ubicaciones:
-                ubicacion_id = cache_ubicaciones[ubicacion_data.ubicacion]
-            else:
-                # Si no está en nuestra caché, vamos a la BD a verificar de verdad (Eliminamos tu consulta duplicada)
-                result_ubicacion = await db.execute(
-                    select(TablaUbicacionesMonitoreo).where(
-                        TablaUbicacionesMonitoreo.ubicacion == ubicacion_data.ubicacion
-                    )
-                )
-                ubicacion = result_ubicacion.scalars().first()
-
-                if not ubicacion:
-                    ubicacion = TablaUbicacionesMonitoreo(
-                        ubicacion=ubicacion_data.ubicacion
-                    )
-                    db.add(ubicacion)
-                    await db.flush() # Sincroniza la BD al instante para que la siguiente fila la reconozca
-
-                ubicacion_id = ubicacion.id
-                cache_ubicaciones[ubicacion_data.ubicacion] = ubicacion_id # Guardamos en la caché local
-            
-            # 4. Validar si la inventario chips ya existe para obtener su ID (Solución al error 'SIN INVENTARIO CHIPS')
-            # Primero revisamos nuestra caché local de este Excel
-            if numero_clean in cache_inventario_chips:
-                chip_id = cache_inventario_chips[numero_clean]
-            else:
-                # Si no está en nuestra caché, vamos a la BD a verificar de verdad (Eliminamos tu consulta duplicada)
-                result_chip = await db.execute(
-                    select(InventarioChips).where(
-                        InventarioChips.numero_chip == numero_clean
-                    )
-                )
-                chip = result_chip.scalars().first()
-
-                if not chip:
-                    chip = InventarioChips(
-                        numero_chip=numero_clean
-                    )
-                    db.add(chip)
-                    await db.flush() # Sincroniza la BD al instante para que la siguiente fila la reconozca
-
-                chip_id = chip.id
-                cache_inventario_chips[numero_clean] = chip_id # Guardamos en la caché local
-
-            # 5. Hacer el registro en la base de datos de ServicioPro
-            nuevo_servicio = ServicioChips(
-                cliente_id=cliente_id,
-                ubicacion_id=ubicacion_id,
-                chip_id=chip_id,
-                fecha_inicio=servicio_data.fecha_inicio,
-                fecha_fin=servicio_data.fecha_fin,
-                fact_relacionada=servicio_data.fact_relacionada,
-                estado=servicio_data.estado,
-                adicional=servicio_data.adicional
-            )
-            db.add(nuevo_servicio)
-            registros_creados += 1
-
-        # Confirmar todos los cambios en la base de datos de un solo golpe al final
-        await db.commit()
-        return {"status": "success", "message": f"Se importaron con éxito {registros_creados} registros."}
-
-    except HTTPException as http_exc:
-        await db.rollback()
-        raise http_exc
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error interno: {str(e)}")
-
-@router_servicio_chips.get("/mostrar", response_model=List[ChipsOut], status_code=status.HTTP_200_OK)
-async def mostrar_servicio_weather(db: AsyncSession = Depends(get_session)):
+IMPORTACION_CHIPS = ConfigImportacion(
+    modelo=ServicioChips,
+    columnas_requeridas=["nro_documento", "razon_social", "ubicacion", "numero", "fecha_inicio", "fecha_fin", "fact_relacionada", "estado"],
+    columnas_opcionales=["fact_relacionada", "adicional"],
+    dtype={"fact_relacionada": str},
+    usa_chip=True,
+)
+
+@registrar_tarea("monitoreo.chips.importar")
+async def importar_servicio_job(archivo: ArchivoSubido, db: AsyncSession, job: ContextoJob) -> dict:
+    return await importar_excel_monitoreo(archivo, db, IMPORTACION_CHIPS, job.progreso)
+
+@router_servicio_chips.post("/importar", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
+async def importar_servicio_weather(file: UploadFile = File(...), current_user: UsuarioPrincipal = Depends(get_current_user)):
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("monitoreo.chips.importar", archivo, current_user.id, file.filename)
+
+@router_servicio_chips.get("/mostrar", response_model=PaginaOLista[ChipsOut], status_code=status.HTTP_200_OK)
+async def mostrar_servicio_weather(
+    estado: Optional[str] = Query(None),
+    cliente_id: Optional[int] = Query(None),
+    ubicacion_id: Optional[int] = Query(None),
+    chip_id: Optional[int] = Query(None),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_inicio >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_inicio <= fecha_hasta"),
+    pag: Paginacion = Depends(paginacion_params),
+    db: AsyncSession = Depends(get_session),
+):
     query = (
         select(
             ServicioChips.id,
@@ -215,14 +71,27 @@ async def mostrar_servicio_weather(db: AsyncSession = Depends(get_session)):
         .join(GlobalCliente, ServicioChips.cliente_id == GlobalCliente.id)
         .join(TablaUbicacionesMonitoreo, ServicioChips.ubicacion_id == TablaUbicacionesMonitoreo.id)
         .join(InventarioChips, ServicioChips.chip_id == InventarioChips.id)
-        .order_by(ServicioChips.fecha_inicio.desc())
     )
+    if estado is not None:
+        query = query.where(ServicioChips.estado == estado)
+    if cliente_id is not None:
+        query = query.where(ServicioChips.cliente_id == cliente_id)
+    if ubicacion_id is not None:
+        query = query.where(ServicioChips.ubicacion_id == ubicacion_id)
+    if chip_id is not None:
+        query = query.where(ServicioChips.chip_id == chip_id)
+    query = aplicar_rango(query, ServicioChips.fecha_inicio, fecha_desde, fecha_hasta)
 
     try:
-        result = await db.execute(query)
-        servicios = result.mappings().all()
-        return servicios
+        return await paginar(
+            db, query, pag,
+            ordenes={"fecha_inicio": ServicioChips.fecha_inicio, "fecha_fin": ServicioChips.fecha_fin, "id": ServicioChips.id},
+            orden_defecto="-fecha_inicio",
+            desempate=ServicioChips.id,
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error interno: {str(e)}")
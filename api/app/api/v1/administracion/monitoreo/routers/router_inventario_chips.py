@@ -6,8 +6,13 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import delete, desc, func, select, text
 import pandas as pd
-import io
 from app.core.deps import get_current_user
+from app.core.excel import leer_excel
+from app.core.config import settings
+from app.core.jobs import ContextoJob, encolar_job, registrar_tarea
+from app.core.uploads import ArchivoSubido, recibir_archivo
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
 from app.core.db import get_session
 
 from app.api.v1.administracion.monitoreo.models.model_inventario_chips import InventarioChips
@@ -15,88 +20,85 @@ from app.api.v1.administracion.monitoreo.schemas.schema_inventario_chips import
 
 router_servicio_inventario_chips = APIRouter(prefix="/servicio-inventario-chips", tags=["Servicio Inventario Chips"], dependencies=[Depends(get_current_user)])
 
-@router_servicio_inventario_chips.post("/importar", status_code=status.HTTP_201_CREATED)
-async def importar_servicio_weather(file: UploadFile = File(...), db: AsyncSession = Depends(get_session)):
+@registrar_tarea("monitoreo.inventario_chips.importar")
+async def importar_inventario_chips_job(archivo: ArchivoSubido, db: AsyncSession, job: ContextoJob) -> dict:
+    # Leer el archivo Excel
+    df = await leer_excel(archivo.ruta)
     
-    try:
-        # Leer el archivo Excel
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        
-        # Reemplazamos todos los NaN/NaT por None de forma segura para Pydantic
-        df = df.astype(object).where(pd.notnull(df), None)
-
-        # Validar que las columnas necesarias estén presentes
-        required_columns = ["numero_chip", "iccid", "operador", "plan", "fecha_activacion", "fecha_instalacion"]
-        for col in required_columns:
-            if col not in df.columns:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, 
-                    detail=f"Falta la columna requerida en el Excel: {col}"
-                )
-
-        registros_creados = 0
-
-        # Iterar sobre cada fila del DataFrame
-        for index, row in df.iterrows():
-            fila_actual = index + 2
-            try:
-                # 1. Convertir fechas y validar CLIENTE primero
-                fecha_activacion = pd.to_datetime(row["fecha_activacion"]).date() if pd.notna(row["fecha_activacion"]) else None
-                fecha_instalacion = pd.to_datetime(row["fecha_instalacion"]).date() if pd.notna(row["fecha_instalacion"]) else None
-
-                numero_chip_clean = str(row["numero_chip"]).strip()
-                iccid_clean = str(row["iccid"]).strip()
-                operador_clean = str(row["operador"]).strip()
-                plan_clean = str(row["plan"]).strip()
-                
-            except Exception as validation_err:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error de validación inicial en la fila {fila_actual}: {str(validation_err)}"
-                )
+    # Reemplazamos todos los NaN/NaT por None de forma segura para Pydantic
+    df = df.astype(object).where(pd.notnull(df), None)
+
+    # Validar que las columnas necesarias estén presentes
+    required_columns = ["numero_chip", "iccid", "operador", "plan", "fecha_activacion", "fecha_instalacion"]
+    for col in required_columns:
+        if col not in df.columns:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail=f"Falta la columna requerida en el Excel: {col}"
+            )
+
+    registros_creados = 0
 
+    # Iterar sobre cada fila del DataFrame
+    for index, row in df.iterrows():
+        fila_actual = index + 2
+        try:
+            # 1. Convertir fechas y validar CLIENTE primero
+            fecha_activacion = pd.to_datetime(row["fecha_activacion"]).date() if pd.notna(row["fecha_activacion"]) else None
+            fecha_instalacion = pd.to_datetime(row["fecha_instalacion"]).date() if pd.notna(row["fecha_instalacion"]) else None
+
+            numero_chip_clean = str(row["numero_chip"]).strip()
+            iccid_clean = str(row["iccid"]).strip()
+            operador_clean = str(row["operador"]).strip()
+            plan_clean = str(row["plan"]).strip()
             
-            # 3. Validar y limpiar la ubicación con Pydantic
-            try:
-                
-                servicio_data = CreateIventarioChipsImportacion(
-                    numero_chip=numero_chip_clean,
-                    iccid=iccid_clean,
-                    operador=operador_clean,
-                    plan=plan_clean,
-                    fecha_activacion=fecha_activacion,
-                    fecha_instalacion=fecha_instalacion
-                )
-            except Exception as validation_err:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error de validación de ubicación en la fila {fila_actual}: {str(validation_err)}"
-                )
-
-
-            # 5. Hacer el registro en la base de datos de ServicioPro
-            nuevo_servicio = InventarioChips(
-                numero_chip=servicio_data.numero_chip,
-                iccid=servicio_data.iccid,
-                operador=servicio_data.operador,
-                plan=servicio_data.plan,
-                fecha_activacion=servicio_data.fecha_activacion,
-                fecha_instalacion=servicio_data.fecha_instalacion
+        except Exception as validation_err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Error de validación inicial en la fila {fila_actual}: {str(validation_err)}"
             )
-            db.add(nuevo_servicio)
-            registros_creados += 1
 
-        # Confirmar todos los cambios en la base de datos de un solo golpe al final
-        await db.commit()
-        return {"status": "success", "message": f"Se importaron con éxito {registros_creados} registros."}
+        
+        # 3. Validar y limpiar la ubicación con Pydantic
+        try:
+            
+            servicio_data = CreateIventarioChipsImportacion(
+                numero_chip=numero_chip_clean,
+                iccid=iccid_clean,
+                operador=operador_clean,
+                plan=plan_clean,
+                fecha_activacion=fecha_activacion,
+                fecha_instalacion=fecha_instalacion
+            )
+        except Exception as validation_err:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Error de validación de ubicación en la fila {fila_actual}: {str(validation_err)}"
+            )
 
-    except HTTPException as http_exc:
-        await db.rollback()
-        raise http_exc
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error interno: {str(e)}")
+
+        # 5. Hacer el registro en la base de datos de ServicioPro
+        nuevo_servicio = InventarioChips(
+            numero_chip=servicio_data.numero_chip,
+            iccid=servicio_data.iccid,
+            operador=servicio_data.operador,
+            plan=servicio_data.plan,
+            fecha_activacion=servicio_data.fecha_activacion,
+            fecha_instalacion=servicio_data.fecha_instalacion
+        )
+        db.add(nuevo_servicio)
+        registros_creados += 1
+
+    await job.progreso(80, "Guardando registros")
+    # Confirmar todos los cambios en la base de datos de un solo golpe al final
+    await db.commit()
+    return {"status": "success", "message": f"Se importaron con éxito {registros_creados} registros."}
+
+
+@router_servicio_inventario_chips.post("/importar", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
+async def importar_servicio_weather(file: UploadFile = File(...), current_user: UsuarioPrincipal = Depends(get_current_user)):
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("monitoreo.inventario_chips.importar", archivo, current_user.id, file.filename)
 
 @router_servicio_inventario_chips.get("/mostrar", response_model=List[IventarioChipsOut], status_code=status.HTTP_200_OK)
 async def mostrar_servicio_weather(db: AsyncSession = Depends(get_session)):
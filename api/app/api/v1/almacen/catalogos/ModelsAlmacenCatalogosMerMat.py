@@ -1,7 +1,5 @@
-import base64
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, column_property, mapped_column
 from sqlalchemy import TIMESTAMP, VARCHAR, BigInteger, text
-from sqlalchemy.types import LargeBinary
 from datetime import datetime
 from app.core.base_class import Base
 
@@ -20,27 +18,26 @@ class CatalogoMercaderia(Base):
     dimension: Mapped[str] = mapped_column(VARCHAR(100), nullable=True)
     descripcion: Mapped[str] = mapped_column(VARCHAR(400), nullable=True)
     
-    # Imágenes en binario
-    imagen1: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen2: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen3: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen4: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    # SHA-256 de las imágenes en el almacén de blobs (se sirven desde /{id}/imagen/{n})
+    imagen1_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen2_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen3_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen4_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
 
-    # --- Optimización ---
+    tiene_imagen1: Mapped[bool] = column_property(imagen1_sha256.isnot(None))
+    tiene_imagen2: Mapped[bool] = column_property(imagen2_sha256.isnot(None))
+    tiene_imagen3: Mapped[bool] = column_property(imagen3_sha256.isnot(None))
+    tiene_imagen4: Mapped[bool] = column_property(imagen4_sha256.isnot(None))
 
-    def _convert_to_base64(self, image_data: bytes | None) -> str | None:
-        if not image_data: return None
-        try:
-            return base64.b64encode(image_data).decode("utf-8")
-        except Exception: return None
+    # --- Optimización ---
 
     @property
-    def imagenes_base64(self) -> dict[str, str | None]:
-        """Genera dinámicamente el diccionario de imágenes decodificadas."""
+    def imagenes_url(self) -> dict[str, str | None]:
+        """URLs de las imágenes existentes; los bytes nunca viajan en el listado."""
         return {
-            f"imagen{i}": self._convert_to_base64(getattr(self, f"imagen{i}"))
+            f"imagen{i}": f"/catalogoMercaderia/{self.id}/imagen/{i}" if getattr(self, f"tiene_imagen{i}") else None
             for i in range(1, 5)
         }
     
@@ -60,26 +57,25 @@ class CatalogoMaterial(Base):
     dimension: Mapped[str] = mapped_column(VARCHAR(100), nullable=True)
     descripcion: Mapped[str] = mapped_column(VARCHAR(400), nullable=True)
     
-    # Imágenes en binario
-    imagen1: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen2: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen3: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
-    imagen4: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    # SHA-256 de las imágenes en el almacén de blobs (se sirven desde /{id}/imagen/{n})
+    imagen1_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen2_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen3_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
+    imagen4_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
 
-    # --- Optimización ---
+    tiene_imagen1: Mapped[bool] = column_property(imagen1_sha256.isnot(None))
+    tiene_imagen2: Mapped[bool] = column_property(imagen2_sha256.isnot(None))
+    tiene_imagen3: Mapped[bool] = column_property(imagen3_sha256.isnot(None))
+    tiene_imagen4: Mapped[bool] = column_property(imagen4_sha256.isnot(None))
 
-    def _convert_to_base64(self, image_data: bytes | None) -> str | None:
-        if not image_data: return None
-        try:
-            return base64.b64encode(image_data).decode("utf-8")
-        except Exception: return None
+    # --- Optimización ---
 
     @property
-    def imagenes_base64(self) -> dict[str, str | None]:
-        """Genera dinámicamente el diccionario de imágenes decodificadas."""
+    def imagenes_url(self) -> dict[str, str | None]:
+        """URLs de las imágenes existentes; los bytes nunca viajan en el listado."""
         return {
-            f"imagen{i}": self._convert_to_base64(getattr(self, f"imagen{i}"))
+            f"imagen{i}": f"/catalogoMaterial/{self.id}/imagen/{i}" if getattr(self, f"tiene_imagen{i}") else None
             for i in range(1, 5)
         }
\ No newline at end of file
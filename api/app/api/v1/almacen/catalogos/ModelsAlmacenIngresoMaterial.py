@@ -1,13 +1,17 @@
-import base64
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import TIMESTAMP, VARCHAR, BigInteger, Numeric, text
-from sqlalchemy.types import LargeBinary
+from sqlalchemy.orm import Mapped, column_property, mapped_column
+from sqlalchemy import Index, TIMESTAMP, VARCHAR, BigInteger, Numeric, text
 from datetime import datetime
 from app.core.base_class import Base
 
 class IngresoMaterial(Base):
     __tablename__ = "ingreso_material"
-    __table_args__ = {"schema": "almacen"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_ingreso_material_fecha_id", "fecha", "id"),
+        # Búsqueda por lote (stock_lote_*)
+        Index("ix_ingreso_material_lote", "uuid_material", "serie"),
+        {"schema": "almacen"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     ruc: Mapped[str] = mapped_column(VARCHAR(11), nullable=False)
@@ -27,17 +31,17 @@ class IngresoMaterial(Base):
     serie: Mapped[str] = mapped_column(VARCHAR(100), nullable=False)
     cantidad: Mapped[int] = mapped_column(BigInteger, nullable=False)
     valor: Mapped[float] = mapped_column(Numeric(precision=10, scale=2), nullable=False)
-    image_byte: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    # SHA-256 de la imagen en el almacén de blobs; se sirve (o se reduce a miniatura) desde /{id}/imagen
+    image_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
     tipo: Mapped[str] = mapped_column(VARCHAR(100), nullable=False)
     ubicacion: Mapped[str] = mapped_column(VARCHAR(100), nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    tiene_imagen: Mapped[bool] = column_property(image_sha256.isnot(None))
     
 
     @property
-    def image_base64(self) -> str | None:
-        if not self.image_byte:
+    def imagen_url(self) -> str | None:
+        """URL de la imagen; añadir `?size=` para pedir una miniatura."""
+        if not self.tiene_imagen:
             return None
-        try:
-            return base64.b64encode(self.image_byte).decode("utf-8")
-        except Exception:
-            return None
\ No newline at end of file
+        return f"/ingresoMaterial/{self.id}/imagen"
\ No newline at end of file
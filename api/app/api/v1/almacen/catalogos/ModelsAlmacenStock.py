@@ -0,0 +1,40 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Computed, Index, TIMESTAMP, VARCHAR, BigInteger, text
+from datetime import datetime
+from app.core.base_class import Base
+
+# Saldo por lote (uuid de ingreso + serie). Lo mantienen los endpoints de
+# ingreso/salida con ServiceAlmacenStock.recalcular_lotes; los datos
+# descriptivos se leen del registro de ingreso (ingreso_id).
+
+class StockLoteMaterial(Base):
+    __tablename__ = "stock_lote_material"
+    __table_args__ = (
+        Index("ix_stock_lote_material_codigo", "codigo"),
+        {"schema": "almacen"},
+    )
+
+    uuid_registro: Mapped[str] = mapped_column(VARCHAR(40), primary_key=True)
+    serie: Mapped[str] = mapped_column(VARCHAR(100), primary_key=True)
+    ingreso_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    codigo: Mapped[str] = mapped_column(VARCHAR(20), nullable=False)
+    cantidad_inicial: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    cantidad_salida: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    stock_actual: Mapped[int] = mapped_column(BigInteger, Computed("cantidad_inicial - cantidad_salida", persisted=True))
+    actualizado_en: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+
+class StockLoteMercaderia(Base):
+    __tablename__ = "stock_lote_mercaderia"
+    __table_args__ = (
+        Index("ix_stock_lote_mercaderia_codigo", "codigo"),
+        {"schema": "almacen"},
+    )
+
+    uuid_registro: Mapped[str] = mapped_column(VARCHAR(40), primary_key=True)
+    serie: Mapped[str] = mapped_column(VARCHAR(100), primary_key=True)
+    ingreso_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    codigo: Mapped[str] = mapped_column(VARCHAR(20), nullable=False)
+    cantidad_inicial: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    cantidad_salida: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    stock_actual: Mapped[int] = mapped_column(BigInteger, Computed("cantidad_inicial - cantidad_salida", persisted=True))
+    actualizado_en: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
@@ -3,14 +3,17 @@ import binascii
 import logging
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Request, Response, status
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.blobs import guardar_blob
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import evaluar_codigos
 from app.api.v1.almacen.catalogos.ModelsAlmacenCatalogosMerMat import CatalogoMaterial, CatalogoMercaderia
 from app.api.v1.almacen.catalogos.SchemaAlmacenCatalagosMerMat import CatalogoMercaderiaCreate, CatalogoMercaderiaUpdate, CatalogoMercaderiaOut, CatalogoMaterialCreate, CatalogoMaterialUpdate, CatalogoMaterialOut
 
@@ -32,6 +35,21 @@ def decode_base64_image(data: Union[str, list, None]) -> Optional[bytes]:
     except (binascii.Error, ValueError):
         return None
 
+async def guardar_imagenes_catalogo(data) -> dict[str, Optional[str]]:
+    """Guarda en el almacén de blobs las imágenes base64 `imagen1..4` y devuelve las columnas de hash."""
+    return {
+        f"imagen{n}_sha256": await guardar_blob(decode_base64_image(getattr(data, f"imagen{n}")))
+        for n in range(1, 5)
+    }
+
+# Campos del catálogo que cambian las alertas de stock bajo el límite
+CAMPOS_ALERTA = {"codigo", "name", "plimit"}
+
+async def servir_imagen_catalogo(modelo, registro_id: int, n: int, request: Request, session: AsyncSession, size: Optional[int]) -> Response:
+    """Devuelve los bytes de `imagen{n}` del catálogo (o su miniatura) con ETag fuerte (304 si no cambió)."""
+    columna = getattr(modelo, f"imagen{n}_sha256")
+    return await respuesta_columna_imagen(request, session, columna, modelo.id == registro_id, size)
+
 # ---------- CATALOGO MERCADERIA ----------
 router_catalogoMercaderia = APIRouter(
     prefix="/catalogoMercaderia",
@@ -42,6 +60,7 @@ router_catalogoMercaderia = APIRouter(
 @router_catalogoMercaderia.post("", response_model=CatalogoMercaderiaOut, status_code=status.HTTP_201_CREATED)
 async def crear_catalogoMercaderia(data: CatalogoMercaderiaCreate, session: AsyncSession = Depends(get_session)):
     try:
+        imagenes = await guardar_imagenes_catalogo(data)
         nuevo = CatalogoMercaderia(
             codigo=data.codigo,
             name=data.name,
@@ -52,14 +71,12 @@ async def crear_catalogoMercaderia(data: CatalogoMercaderiaCreate, session: Asyn
             plimit=data.plimit,
             dimension=data.dimension,
             descripcion=data.descripcion,
-            imagen1=decode_base64_image(data.imagen1),
-            imagen2=decode_base64_image(data.imagen2),
-            imagen3=decode_base64_image(data.imagen3),
-            imagen4=decode_base64_image(data.imagen4),
+            **imagenes,
         )
         session.add(nuevo)
         await session.commit()
         await session.refresh(nuevo)
+        await evaluar_codigos(session, "mercaderia", [nuevo.codigo])
         return nuevo
     except IntegrityError:
         await session.rollback()
@@ -73,6 +90,16 @@ async def listar_catalogoMercaderia(session: AsyncSession = Depends(get_session)
     result = await session.execute(stmt)
     return result.scalars().all()
 
+@router_catalogoMercaderia.get("/{catalogoMercaderia_id}/imagen/{n}", response_class=Response)
+async def obtener_imagen_catalogoMercaderia(
+    catalogoMercaderia_id: int,
+    request: Request,
+    n: int = Path(..., ge=1, le=4),
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await servir_imagen_catalogo(CatalogoMercaderia, catalogoMercaderia_id, n, request, session, size)
+
 @router_catalogoMercaderia.put("/{catalogoMercaderia_id}", response_model=CatalogoMercaderiaOut)
 async def actualizar_catalogoMercaderia(
     catalogoMercaderia_id: int, 
@@ -84,17 +111,20 @@ async def actualizar_catalogoMercaderia(
         raise HTTPException(status_code=404, detail="Registro no encontrado")
 
     data = payload.model_dump(exclude_unset=True)
+    codigo_anterior = catalogoMercaderia.codigo
     
     try:
         for key, value in data.items():
-            # Si el campo empieza por 'imagen', aplicamos la decodificación
-            if key.startswith("imagen") and value is not None:
-                value = decode_base64_image(value)
+            # Las imágenes van al almacén de blobs; la fila guarda solo su hash
+            if key.startswith("imagen"):
+                key, value = f"{key}_sha256", await guardar_blob(decode_base64_image(value))
             
             setattr(catalogoMercaderia, key, value)
         
         await session.commit()
         await session.refresh(catalogoMercaderia)
+        if CAMPOS_ALERTA & data.keys():
+            await evaluar_codigos(session, "mercaderia", [codigo_anterior, catalogoMercaderia.codigo])
         return catalogoMercaderia
     except Exception as e:
         await session.rollback()
@@ -111,6 +141,7 @@ async def eliminar_catalogoMercaderia(catalogoMercaderia_id: int, session: Async
     try:
         await session.delete(catalogoMercaderia)
         await session.commit()
+        await evaluar_codigos(session, "mercaderia", [catalogoMercaderia.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=409, detail="No se puede eliminar por restricciones de integridad")
@@ -126,6 +157,7 @@ router_catalogoMaterial = APIRouter(
 @router_catalogoMaterial.post("", response_model=CatalogoMaterialOut, status_code=status.HTTP_201_CREATED)
 async def crear_catalogoMaterial(data: CatalogoMaterialCreate, session: AsyncSession = Depends(get_session)):
     try:
+        imagenes = await guardar_imagenes_catalogo(data)
         nuevo = CatalogoMaterial(
             codigo=data.codigo,
             name=data.name,
@@ -136,14 +168,12 @@ async def crear_catalogoMaterial(data: CatalogoMaterialCreate, session: AsyncSes
             plimit=data.plimit,
             dimension=data.dimension,
             descripcion=data.descripcion,
-            imagen1=decode_base64_image(data.imagen1),
-            imagen2=decode_base64_image(data.imagen2),
-            imagen3=decode_base64_image(data.imagen3),
-            imagen4=decode_base64_image(data.imagen4),
+            **imagenes,
         )
         session.add(nuevo)
         await session.commit()
         await session.refresh(nuevo)
+        await evaluar_codigos(session, "material", [nuevo.codigo])
         return nuevo
     except IntegrityError:
         await session.rollback()
@@ -157,6 +187,16 @@ async def listar_catalogoMaterial(session: AsyncSession = Depends(get_session)):
     result = await session.execute(stmt)
     return result.scalars().all()
 
+@router_catalogoMaterial.get("/{catalogoMaterial_id}/imagen/{n}", response_class=Response)
+async def obtener_imagen_catalogoMaterial(
+    catalogoMaterial_id: int,
+    request: Request,
+    n: int = Path(..., ge=1, le=4),
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await servir_imagen_catalogo(CatalogoMaterial, catalogoMaterial_id, n, request, session, size)
+
 @router_catalogoMaterial.put("/{catalogoMaterial_id}", response_model=CatalogoMaterialOut)
 async def actualizar_catalogoMaterial(
     catalogoMaterial_id: int, 
@@ -168,16 +208,19 @@ async def actualizar_catalogoMaterial(
         raise HTTPException(status_code=404, detail="Registro no encontrado")
 
     data = payload.model_dump(exclude_unset=True)
+    codigo_anterior = catalogoMaterial.codigo
 
     try:
         for key, value in data.items():
-            if key.startswith("imagen") and value is not None:
-                value = decode_base64_image(value)
+            if key.startswith("imagen"):
+                key, value = f"{key}_sha256", await guardar_blob(decode_base64_image(value))
             
             setattr(catalogoMaterial, key, value)
         
         await session.commit()
         await session.refresh(catalogoMaterial)
+        if CAMPOS_ALERTA & data.keys():
+            await evaluar_codigos(session, "material", [codigo_anterior, catalogoMaterial.codigo])
         return catalogoMaterial
     except Exception as e:
         await session.rollback()
@@ -193,6 +236,7 @@ async def eliminar_catalogoMaterial(catalogoMaterial_id: int, session: AsyncSess
     try:
         await session.delete(catalagoMaterial)
         await session.commit()
+        await evaluar_codigos(session, "material", [catalagoMaterial.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=404, detail="No se puede eliminar por restricciones de integridad")
@@ -2,17 +2,26 @@ import base64
 import binascii
 import json
 import logging
+from datetime import datetime
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from sqlalchemy import select, text
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMaterial import IngresoMaterial
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import evaluar_codigos, productos_bajo_limite
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import recalcular_lotes, stock_detallado
 from app.api.v1.almacen.catalogos.SchemaAlmacenIngresoMaterial import RegistrarProveedorRequestMaterial, RegistroIngresoMaterialCreate, RegistroIngresoMaterialOut, StockActualMaterialDetallado, StockActualLimitMaterial
+from app.core.blobs import guardar_blob
+from app.core.bulk import insertar_retornando
+from app.core.config import settings
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.core.pagination import PaginaOLista, Paginacion, aplicar_rango, paginacion_params, paginar
+from app.core.uploads import recibir_archivos
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -39,22 +48,20 @@ async def crear_ingresoMaterial(
             raise HTTPException(status_code=422, detail=f"Error en formato JSON: {str(e)}")
 
         # 2. Mapear archivos binarios por nombre para búsqueda rápida
-        files_map = {}
-        if files:
-            for f in files:
-                files_map[f.filename] = await f.read()
+        files_map = await recibir_archivos(files, settings.UPLOAD_MAX_IMAGE_BYTES)
 
-        nuevos_registros = []
+        filas = []
 
         # 3. Procesar productos y aplanar para la base de datos
         for p_idx, p in enumerate(validated_data.productos):
             
             # Buscamos la imagen binaria usando la convención del frontend: prod_{index}_img_0.jpg
             filename_expected = f"prod_{p_idx}_img_0.jpg"
-            img_bytes = files_map.get(filename_expected)
+            imagen = files_map.get(filename_expected)
+            imagen_sha256 = await guardar_blob(imagen)
 
-            # Creamos el objeto de base de datos directamente
-            registro_db = IngresoMaterial(
+            # Fila para el INSERT masivo
+            registro_db = dict(
                 ruc=validated_data.ruc,
                 proveedor=validated_data.proveedor,
                 serieNumCP=validated_data.serieNumCP,
@@ -75,19 +82,22 @@ async def crear_ingresoMaterial(
                 cantidad=p.cantidad,
                 valor=p.valor,
                 ubicacion=p.ubicacion,
-                # Asignamos los bytes binarios (si existen)
-                image_byte=img_bytes 
+                # Hash de la imagen en el almacén de blobs (si existe)
+                image_sha256=imagen_sha256
             )
-            nuevos_registros.append(registro_db)
+            filas.append(registro_db)
 
-        # 4. Guardar en Base de Datos
-        session.add_all(nuevos_registros)
+        # 4. Guardar: un solo INSERT ... RETURNING devuelve ids y created_at
+        nuevos_registros = await insertar_retornando(
+            session, IngresoMaterial, filas,
+            calculados={"tiene_imagen": lambda fila: fila["image_sha256"] is not None},
+        )
+        # Saldo por lote en la misma transacción
+        await recalcular_lotes(session, "material", [r.uuid_material for r in nuevos_registros])
         await session.commit()
-        
-        # Refrescar para obtener IDs generados y campos automáticos (created_at)
-        for r in nuevos_registros:
-            await session.refresh(r)
 
+        # Alertas de stock bajo el límite (después del commit, solo estos códigos)
+        await evaluar_codigos(session, "material", [r.codigo for r in nuevos_registros])
         return nuevos_registros
 
     except IntegrityError as e:
@@ -97,28 +107,53 @@ async def crear_ingresoMaterial(
             status_code=400, 
             detail="Error de integridad: Posible duplicado de serie o documento."
         )
+    except HTTPException:
+        # 413 (imagen demasiado grande) y 422 llegan tal cual al cliente
+        raise
     except Exception as e:
         await session.rollback()
         logger.error(f"Error inesperado en ingreso: {str(e)}")
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
-@router_ingresoMaterial.get("", response_model=List[RegistroIngresoMaterialOut])
-async def listar_ingresoMaterial(session: AsyncSession = Depends(get_session)):
-    stmt = select(IngresoMaterial).order_by(IngresoMaterial.id)
-    result = await session.execute(stmt)
-    return result.scalars().all()
+@router_ingresoMaterial.get("", response_model=PaginaOLista[RegistroIngresoMaterialOut])
+async def listar_ingresoMaterial(
+    codigo: Optional[str] = Query(None),
+    ruc: Optional[str] = Query(None),
+    fecha_desde: Optional[datetime] = Query(None),
+    fecha_hasta: Optional[datetime] = Query(None),
+    pag: Paginacion = Depends(paginacion_params),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(IngresoMaterial)
+    if codigo is not None:
+        stmt = stmt.where(IngresoMaterial.codigo == codigo)
+    if ruc is not None:
+        stmt = stmt.where(IngresoMaterial.ruc == ruc)
+    stmt = aplicar_rango(stmt, IngresoMaterial.fecha, fecha_desde, fecha_hasta)
+    return await paginar(
+        session, stmt, pag,
+        ordenes={"id": IngresoMaterial.id, "fecha": IngresoMaterial.fecha},
+        orden_defecto="id",
+        desempate=IngresoMaterial.id,
+        entidad=True,
+    )
 
 @router_ingresoMaterial.get("/stock_actual_detallado", response_model=List[StockActualMaterialDetallado])
 async def obtener_stock_actual(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT * FROM almacen.v_stock_actual_detallado_material ;")
-    result = await session.execute(query)
-    return result.mappings().all()
+    return await stock_detallado(session, "material")
 
 @router_ingresoMaterial.get("/stock_actual_limite", response_model=List[StockActualLimitMaterial])
 async def obtener_stock_actual_limite(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT * FROM almacen.v_stock_actual_material_limit;")
-    result = await session.execute(query)
-    return result.mappings().all()
+    return await productos_bajo_limite(session, "material")
+
+@router_ingresoMaterial.get("/{ingresoMaterial_id}/imagen", response_class=Response)
+async def obtener_imagen_ingresoMaterial(
+    ingresoMaterial_id: int,
+    request: Request,
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await respuesta_columna_imagen(request, session, IngresoMaterial.image_sha256, IngresoMaterial.id == ingresoMaterial_id, size)
 
 @router_ingresoMaterial.delete("/{ingresoMaterial_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_ingresoMaterial(ingresoMaterial_id: int, session: AsyncSession = Depends(get_session)):
@@ -128,7 +163,10 @@ async def eliminar_ingresoMaterial(ingresoMaterial_id: int, session: AsyncSessio
     
     try:
         await session.delete(ingresoMaterial)
+        await session.flush()
+        await recalcular_lotes(session, "material", [ingresoMaterial.uuid_material])
         await session.commit()
+        await evaluar_codigos(session, "material", [ingresoMaterial.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=404, detail="No se puede eliminar por restricciones de integridad")
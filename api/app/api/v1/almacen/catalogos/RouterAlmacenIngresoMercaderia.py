@@ -4,16 +4,23 @@ import json
 import logging
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, UploadFile, status
-from sqlalchemy import select, text
+from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.almacen.catalogos.modelos import IngresoGlobalIn
 from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMercaderia import IngresoMercaderia
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import evaluar_codigos, productos_bajo_limite
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import recalcular_lotes, stock_detallado
 from app.api.v1.almacen.catalogos.SchemaAlmacenIngresoMercaderia import RegistrarProveedorRequestMercaderia, RegistroIngresoMercaderiaCreate, RegistroIngresoMercaderiaOut, StockActualDetallado, StockActualLimitMercaderia
+from app.core.blobs import guardar_blob
+from app.core.bulk import insertar_retornando
+from app.core.config import settings
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.core.uploads import recibir_archivos
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -37,9 +44,9 @@ async def crear_ingreso_mercaderia(
         validated_data = IngresoGlobalIn(**raw_json)
         
         # 2. Mapear archivos por su nombre de campo (file_pIdx_sIdx)
-        files_map = {f.filename: await f.read() for f in (files or [])}
+        files_map = await recibir_archivos(files, settings.UPLOAD_MAX_IMAGE_BYTES)
         
-        resultado_db = []
+        filas = []
         
         # 3. Aplanar la estructura (Tu "crear_estructura_de_datos" adaptada)
         for p_idx, producto in enumerate(validated_data.productos):
@@ -47,9 +54,10 @@ async def crear_ingreso_mercaderia(
                 
                 # Buscamos si existe una imagen para esta combinación de producto/serie
                 filename_expected = f"image_{p_idx}_{s_idx}.jpg"
-                img_bytes = files_map.get(filename_expected)
+                imagen = files_map.get(filename_expected)
+                imagen_sha256 = await guardar_blob(imagen)
                 
-                nuevo_registro = IngresoMercaderia(
+                nuevo_registro = dict(
                     ruc=validated_data.ruc,
                     proveedor=validated_data.proveedor,
                     serieNumCP=validated_data.serieNumCP,
@@ -71,16 +79,26 @@ async def crear_ingreso_mercaderia(
                     # Dato de la serie e imagen
                     serie=serie_item.get("codigo"),
                     cantidad=serie_item.get("cantidad"),
-                    image_byte=img_bytes
+                    image_sha256=imagen_sha256
                 )
-                resultado_db.append(nuevo_registro)
+                filas.append(nuevo_registro)
 
-        # 4. Guardar en DB
-        session.add_all(resultado_db)
+        # 4. Guardar: un solo INSERT ... RETURNING devuelve ids y created_at
+        resultado_db = await insertar_retornando(
+            session, IngresoMercaderia, filas,
+            calculados={"tiene_imagen": lambda fila: fila["image_sha256"] is not None},
+        )
+        # Saldo por lote en la misma transacción
+        await recalcular_lotes(session, "mercaderia", [r.uuid_mercaderia for r in resultado_db])
         await session.commit()
-        
+
+        # Alertas de stock bajo el límite (después del commit, solo estos códigos)
+        await evaluar_codigos(session, "mercaderia", [r.codigo for r in resultado_db])
         return resultado_db
 
+    except HTTPException:
+        # 413 (imagen demasiado grande) y 422 llegan tal cual al cliente
+        raise
     except Exception as e:
         await session.rollback()
         logger.error(f"Error procesando ingreso: {str(e)}")
@@ -95,15 +113,20 @@ async def listar_ingresoMercaderia(session: AsyncSession = Depends(get_session))
 
 @router_ingresoMercaderia.get("/stock_actual_detallado", response_model=List[StockActualDetallado])
 async def obtener_stock_actual(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT * FROM almacen.v_stock_actual_detallado;")
-    result = await session.execute(query)
-    return result.mappings().all()
+    return await stock_detallado(session, "mercaderia")
 
 @router_ingresoMercaderia.get("/stock_actual_limite", response_model=List[StockActualLimitMercaderia])
 async def obtener_stock_actual_limite(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT * FROM almacen.v_stock_actual_mercaderia_limit;")
-    result = await session.execute(query)
-    return result.mappings().all()
+    return await productos_bajo_limite(session, "mercaderia")
+
+@router_ingresoMercaderia.get("/{ingresoMercaderia_id}/imagen", response_class=Response)
+async def obtener_imagen_ingresoMercaderia(
+    ingresoMercaderia_id: int,
+    request: Request,
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await respuesta_columna_imagen(request, session, IngresoMercaderia.image_sha256, IngresoMercaderia.id == ingresoMercaderia_id, size)
 
 @router_ingresoMercaderia.delete("/{ingresoMercaderia_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_ingresoMercaderia(ingresoMercaderia_id: int, session: AsyncSession = Depends(get_session)):
@@ -113,7 +136,10 @@ async def eliminar_ingresoMercaderia(ingresoMercaderia_id: int, session: AsyncSe
     
     try:
         await session.delete(ingresoMercaderia)
+        await session.flush()
+        await recalcular_lotes(session, "mercaderia", [ingresoMercaderia.uuid_mercaderia])
         await session.commit()
+        await evaluar_codigos(session, "mercaderia", [ingresoMercaderia.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=404, detail="No se puede eliminar por restricciones de integridad")
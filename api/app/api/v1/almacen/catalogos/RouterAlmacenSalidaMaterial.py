@@ -1,16 +1,23 @@
 import json
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.almacen.catalogos.ModelsAlmacenSalidaMaterial import SalidaMaterial
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import evaluar_codigos
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import recalcular_lotes
 from app.api.v1.almacen.catalogos.SchemaAlmacenSalidaMaterial import RegistrarClienteRequestMaterial, RegistroSalidaMaterialCreate, RegistroSalidaMaterialOut
+from app.core.blobs import guardar_blob
+from app.core.bulk import insertar_retornando
+from app.core.config import settings
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.core.uploads import recibir_archivos
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -42,12 +49,9 @@ async def crear_SalidaMaterial(
 
         # 2. Crear un mapa de archivos para acceso rápido
         # El frontend envía nombres como: prod_{pIdx}_img_{iIdx}.jpg
-        files_map = {}
-        if files:
-            for f in files:
-                files_map[f.filename] = await f.read()
+        files_map = await recibir_archivos(files, settings.UPLOAD_MAX_IMAGE_BYTES)
 
-        nuevos_registros = []
+        filas = []
 
         # 3. Procesar productos y asociar sus imágenes binarias
         for p_idx, p in enumerate(validated_data.productos):
@@ -55,12 +59,13 @@ async def crear_SalidaMaterial(
             # Buscamos la imagen correspondiente al producto basándonos en el índice
             # Según tu frontend anterior: "prod_{pIdx}_img_0.jpg"
             filename_expected = f"prod_{p_idx}_img_0.jpg"
-            img_bytes = files_map.get(filename_expected)
+            imagen = files_map.get(filename_expected)
+            imagen_sha256 = await guardar_blob(imagen)
 
             # Si el backend NO recibió archivo pero el JSON traía algo (fallback), 
             # podrías procesarlo, pero con FormData el binario manda.
             
-            registro_db = SalidaMaterial(
+            registro_db = dict(
                 ruc=validated_data.ruc,
                 cliente=validated_data.cliente,
                 adicional=validated_data.adicional,
@@ -80,24 +85,30 @@ async def crear_SalidaMaterial(
                 cantidad=p.cantidad,
                 valor=p.valor,
                 moneda=p.moneda,
-                image_byte=img_bytes  # Guardamos los bytes directos del UploadFile
+                image_sha256=imagen_sha256  # Solo el hash; los bytes van al almacén de blobs
             )
-            nuevos_registros.append(registro_db)
-
-        # 4. Guardar en Base de Datos
-        session.add_all(nuevos_registros)
+            filas.append(registro_db)
+
+        # 4. Guardar: un solo INSERT ... RETURNING devuelve ids y created_at
+        nuevos_registros = await insertar_retornando(
+            session, SalidaMaterial, filas,
+            calculados={"tiene_imagen": lambda fila: fila["image_sha256"] is not None},
+        )
+        # Saldo por lote en la misma transacción
+        await recalcular_lotes(session, "material", [r.uuid_material for r in nuevos_registros])
         await session.commit()
-        
-        # Opcional: refrescar registros para devolver datos completos (IDs, etc)
-        for r in nuevos_registros:
-            await session.refresh(r)
 
+        # Alertas de stock bajo el límite (después del commit, solo estos códigos)
+        await evaluar_codigos(session, "material", [r.codigo for r in nuevos_registros])
         return nuevos_registros
 
     except IntegrityError as e:
         await session.rollback()
         logger.error(f"Error de integridad: {e}")
         raise HTTPException(status_code=400, detail="Error de integridad: Posible duplicado.")
+    except HTTPException:
+        # 413 (imagen demasiado grande) y 422 llegan tal cual al cliente
+        raise
     except Exception as e:
         await session.rollback()
         logger.error(f"Error procesando salida de material: {str(e)}")
@@ -109,6 +120,15 @@ async def listar_SalidaMaterial(session: AsyncSession = Depends(get_session)):
     result = await session.execute(stmt)
     return result.scalars().all()
 
+@router_salidaMaterial.get("/{SalidaMaterial_id}/imagen", response_class=Response)
+async def obtener_imagen_SalidaMaterial(
+    SalidaMaterial_id: int,
+    request: Request,
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await respuesta_columna_imagen(request, session, SalidaMaterial.image_sha256, SalidaMaterial.id == SalidaMaterial_id, size)
+
 @router_salidaMaterial.delete("/{SalidaMaterial_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_SalidaMaterial(SalidaMaterial_id: int, session: AsyncSession = Depends(get_session)):
     salidaMaterial = await session.get(SalidaMaterial, SalidaMaterial_id)
@@ -117,7 +137,10 @@ async def eliminar_SalidaMaterial(SalidaMaterial_id: int, session: AsyncSession
     
     try:
         await session.delete(salidaMaterial)
+        await session.flush()
+        await recalcular_lotes(session, "material", [salidaMaterial.uuid_material])
         await session.commit()
+        await evaluar_codigos(session, "material", [salidaMaterial.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=404, detail="No se puede eliminar por restricciones de integridad")
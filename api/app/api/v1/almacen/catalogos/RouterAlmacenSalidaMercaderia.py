@@ -4,15 +4,22 @@ import json
 import logging
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.almacen.catalogos.ModelsAlmacenSalidaMercaderia import SalidaMercaderia
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import evaluar_codigos
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import recalcular_lotes
 from app.api.v1.almacen.catalogos.SchemaAlmacenSalidaMercaderia import RegistrarClienteRequestMercaderia, RegistroSalidaMercaderiaCreate, RegistroSalidaMercaderiaOut
+from app.core.blobs import guardar_blob
+from app.core.bulk import insertar_retornando
+from app.core.config import settings
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.core.uploads import recibir_archivos
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -38,9 +45,9 @@ async def crear_SalidaMercaderia(
 
         # 2. Mapear archivos por su nombre de campo para búsqueda rápida
         # El frontend envía: prod_{pIdx}_img_{iIdx}.jpg
-        files_map = {f.filename: await f.read() for f in (files or [])}
+        files_map = await recibir_archivos(files, settings.UPLOAD_MAX_IMAGE_BYTES)
         
-        nuevos_registros = []
+        filas = []
 
         # 3. Procesar productos (Aplanamiento de datos)
         for p_idx, p in enumerate(validated_data.productos):
@@ -50,9 +57,10 @@ async def crear_SalidaMercaderia(
             
             # Buscamos la primera imagen del producto (basado en el índice del frontend)
             filename_expected = f"prod_{p_idx}_img_0.jpg" 
-            img_bytes = files_map.get(filename_expected)
+            imagen = files_map.get(filename_expected)
+            imagen_sha256 = await guardar_blob(imagen)
 
-            registro_db = SalidaMercaderia(
+            registro_db = dict(
                 ruc=validated_data.ruc,
                 cliente=validated_data.cliente,
                 adicional=validated_data.adicional,
@@ -72,21 +80,30 @@ async def crear_SalidaMercaderia(
                 cantidad=p.cantidad,
                 valor=p.valor,
                 categoria=p.categoria,
-                image_byte=img_bytes # Guardamos los bytes directos
+                image_sha256=imagen_sha256  # Solo el hash; los bytes van al almacén de blobs
             )
-            nuevos_registros.append(registro_db)
+            filas.append(registro_db)
 
-        # 4. Guardar en Base de Datos
-        session.add_all(nuevos_registros)
+        # 4. Guardar: un solo INSERT ... RETURNING devuelve ids y created_at
+        nuevos_registros = await insertar_retornando(
+            session, SalidaMercaderia, filas,
+            calculados={"tiene_imagen": lambda fila: fila["image_sha256"] is not None},
+        )
+        # Saldo por lote en la misma transacción
+        await recalcular_lotes(session, "mercaderia", [r.uuid_mercaderia for r in nuevos_registros])
         await session.commit()
-        
-        # Opcional: refrescar si necesitas los IDs generados por la DB
+
+        # Alertas de stock bajo el límite (después del commit, solo estos códigos)
+        await evaluar_codigos(session, "mercaderia", [r.codigo for r in nuevos_registros])
         return nuevos_registros
 
     except IntegrityError as e:
         await session.rollback()
         logger.error(f"Error de integridad: {e}")
         raise HTTPException(status_code=400, detail="Error de integridad: Posible duplicado.")
+    except HTTPException:
+        # 413 (imagen demasiado grande) y 422 llegan tal cual al cliente
+        raise
     except Exception as e:
         await session.rollback()
         logger.error(f"Error procesando salida: {str(e)}")
@@ -98,6 +115,15 @@ async def listar_SalidaMercaderia(session: AsyncSession = Depends(get_session)):
     result = await session.execute(stmt)
     return result.scalars().all()
 
+@router_salidaMercaderia.get("/{salidaMercaderia_id}/imagen", response_class=Response)
+async def obtener_imagen_salidaMercaderia(
+    salidaMercaderia_id: int,
+    request: Request,
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    return await respuesta_columna_imagen(request, session, SalidaMercaderia.image_sha256, SalidaMercaderia.id == salidaMercaderia_id, size)
+
 @router_salidaMercaderia.delete("/{salidaMercaderia_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_SalidaMercaderia(salidaMercaderia_id: int, session: AsyncSession = Depends(get_session)):
     salidaMercaderia = await session.get(SalidaMercaderia, salidaMercaderia_id)
@@ -106,7 +132,10 @@ async def eliminar_SalidaMercaderia(salidaMercaderia_id: int, session: AsyncSess
     
     try:
         await session.delete(salidaMercaderia)
+        await session.flush()
+        await recalcular_lotes(session, "mercaderia", [salidaMercaderia.uuid_mercaderia])
         await session.commit()
+        await evaluar_codigos(session, "mercaderia", [salidaMercaderia.codigo])
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=404, detail="No se puede eliminar por restricciones de integridad")
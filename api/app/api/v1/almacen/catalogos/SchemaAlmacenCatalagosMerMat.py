@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, ConfigDict, model_validator
+from pydantic import BaseModel, ConfigDict, Field
 
 # Configuración compartida para modelos de salida (ORM Mode)
 cfg_orm = ConfigDict(from_attributes=True)
@@ -16,11 +16,18 @@ class CatalogoBase(BaseModel):
     plimit: int
     dimension: Optional[str] = None
     descripcion: Optional[str] = None
+
+# Imágenes en base64 que envía el frontend al crear
+class CatalogoImagenesIn(BaseModel):
     imagen1: Optional[str] = None
     imagen2: Optional[str] = None
     imagen3: Optional[str] = None
     imagen4: Optional[str] = None
 
+# Las salidas solo llevan URLs: GET /catalogo*/{id}/imagen/{n}
+class CatalogoImagenesOut(BaseModel):
+    imagenes_url: dict[str, Optional[str]] = Field(default_factory=dict)
+
 
 # ---- CATALOGO MERCADERIA ----
 
@@ -28,7 +35,7 @@ class CatalogoMercaderiaBase(CatalogoBase):
     categoria: str
     pass
 
-class CatalogoMercaderiaCreate(CatalogoMercaderiaBase):
+class CatalogoMercaderiaCreate(CatalogoMercaderiaBase, CatalogoImagenesIn):
     pass
 
 class CatalogoMercaderiaUpdate(BaseModel):
@@ -46,29 +53,18 @@ class CatalogoMercaderiaUpdate(BaseModel):
     imagen3: Optional[str] = None
     imagen4: Optional[str] = None
 
-class CatalogoMercaderiaOut(CatalogoMercaderiaBase):
+class CatalogoMercaderiaOut(CatalogoMercaderiaBase, CatalogoImagenesOut):
     model_config = cfg_orm
     id: int
     created_at: datetime
 
-    @model_validator(mode="before")
-    @classmethod
-    def map_images_from_property(cls, data):
-        # Si la propiedad existe en el objeto de la DB
-        if hasattr(data, "imagenes_base64"):
-            imgs = data.imagenes_base64
-            # Mapeo dinámico: asigna imagen1, imagen2, etc.
-            for key, value in imgs.items():
-                setattr(data, key, value)
-        return data
-
 
 # ---- CATALOGO MATERIAL ----
 
 class CatalogoMaterialBase(CatalogoBase):
     pass
 
-class CatalogoMaterialCreate(CatalogoMaterialBase):
+class CatalogoMaterialCreate(CatalogoMaterialBase, CatalogoImagenesIn):
     tipo: str
 
 class CatalogoMaterialUpdate(BaseModel):
@@ -86,19 +82,8 @@ class CatalogoMaterialUpdate(BaseModel):
     imagen3: Optional[str] = None
     imagen4: Optional[str] = None
 
-class CatalogoMaterialOut(CatalogoMaterialBase):
+class CatalogoMaterialOut(CatalogoMaterialBase, CatalogoImagenesOut):
     model_config = cfg_orm
     id: int
     tipo: str
     created_at: datetime
-
-    @model_validator(mode="before")
-    @classmethod
-    def map_images_from_property(cls, data):
-        # Si la propiedad existe en el objeto de la DB
-        if hasattr(data, "imagenes_base64"):
-            imgs = data.imagenes_base64
-            # Mapeo dinámico: asigna imagen1, imagen2, etc.
-            for key, value in imgs.items():
-                setattr(data, key, value)
-        return data
@@ -1,7 +1,6 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Union
 from datetime import datetime
-import base64
 
 class ImageItem(BaseModel):
     image_byte: str
@@ -55,13 +54,13 @@ class RegistroIngresoInventarioBase(BaseModel):
     serie: str
     cantidad: int
     valor: float
-    image_byte: Optional[Union[bytes, str]] = None
     ubicacion: str
 
 # ---- MODELO INGRESO Material ----
 
 class RegistroIngresoMaterialCreate(RegistroIngresoInventarioBase):
     tipo: str
+    image_byte: Optional[Union[bytes, str]] = None
 
 
 class RegistroIngresoMaterialOut(RegistroIngresoInventarioBase):
@@ -69,14 +68,8 @@ class RegistroIngresoMaterialOut(RegistroIngresoInventarioBase):
     id: int
     tipo: str
     created_at: datetime
-
-    @field_validator("image_byte", mode="before")
-    @classmethod
-    def bytes_to_base64(cls, v):
-        if isinstance(v, bytes):
-            # Convertimos los bytes de la DB a string base64 para el JSON
-            return base64.b64encode(v).decode("utf-8")
-        return v
+    # Los bytes no viajan en el JSON: GET {imagen_url}?size=128 devuelve una miniatura
+    imagen_url: Optional[str] = None
 
 # ----- MODELO DE SALIDA DE DATOS DE TABLA VIEW STOCK MATERIAL DETALLADO ----
 class StockActualMaterialDetallado(BaseModel):
@@ -99,15 +92,8 @@ class StockActualMaterialDetallado(BaseModel):
     valor: float
     moneda: str
     fecha_ingreso: datetime
-    image_byte: Optional[Union[bytes, str]] = None
-
-    @field_validator("image_byte", mode="before")
-    @classmethod
-    def bytes_to_base64(cls, v):
-        if isinstance(v, bytes):
-            # Convertimos los bytes de la DB a string base64 para el JSON
-            return base64.b64encode(v).decode("utf-8")
-        return v
+    # Imagen del registro de ingreso del lote: GET {imagen_url}?size=128 devuelve una miniatura
+    imagen_url: Optional[str] = None
     
 
 # ---- MODELO DE SALIDA DE LIMITE DE STOCK COMO FILTRO DE PRODUCTOS AGOTADOS ----
@@ -115,16 +101,7 @@ class StockActualMaterialDetallado(BaseModel):
 class StockActualLimitMaterial(BaseModel):
     codigo: str
     name: str
-    imagen1: Optional[str] = None
-    imagen2: Optional[str] = None
-    imagen3: Optional[str] = None
-    imagen4: Optional[str] = None
     stock_actual: int
     plimit: int
-    @field_validator("imagen1", "imagen2", "imagen3", "imagen4", mode="before")
-    @classmethod
-    def bytes_to_base64(cls, v):
-        """Convierte automáticamente cualquier campo de imagen de bytes a base64."""
-        if isinstance(v, bytes):
-            return base64.b64encode(v).decode("utf-8")
-        return v
\ No newline at end of file
+    # URLs de las imágenes del catálogo (imagen1..imagen4; None si no existe)
+    imagenes_url: dict[str, Optional[str]] = Field(default_factory=dict)
@@ -1,7 +1,6 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Union
 from datetime import datetime
-import base64
 
 class ImageItem(BaseModel):
     image_byte: str
@@ -54,12 +53,12 @@ class RegistroSalidaInventarioBase(BaseModel):
     serie: str
     cantidad: int
     valor: float
-    image_byte: Optional[Union[bytes, str]] = None
 
 # ---- MODELO Salida Material ----
 
 class RegistroSalidaMaterialCreate(RegistroSalidaInventarioBase):
     tipo: str
+    image_byte: Optional[Union[bytes, str]] = None
 
 
 class RegistroSalidaMaterialOut(RegistroSalidaInventarioBase):
@@ -67,11 +66,5 @@ class RegistroSalidaMaterialOut(RegistroSalidaInventarioBase):
     id: int
     tipo: str
     created_at: datetime
-
-    @field_validator("image_byte", mode="before")
-    @classmethod
-    def bytes_to_base64(cls, v):
-        if isinstance(v, bytes):
-            # Convertimos los bytes de la DB a string base64 para el JSON
-            return base64.b64encode(v).decode("utf-8")
-        return v
+    # Los bytes no viajan en el JSON: GET {imagen_url}?size=128 devuelve una miniatura
+    imagen_url: Optional[str] = None
@@ -0,0 +1,178 @@
+"""
+Alertas de stock bajo el límite (`plimit`) del catálogo.
+
+En Redis se guarda, por inventario, el conjunto de productos con stock
+menor o igual a su límite (hash `almacen:stock_bajo:{tipo}`, codigo ->
+JSON con name, stock_actual y plimit). Los endpoints de ingreso, salida y
+catálogo llaman a `evaluar_codigos` después del commit con los códigos que
+tocaron: se recalculan solo esos productos y las transiciones se publican
+en el tópico `alertas.stock` del WebSocket de notificaciones:
+
+    {"type": "alerta_stock", "evento": "bajo_limite"|"actualizado"|"repuesto"|"retirado",
+     "tipo", "codigo", "name", "stock_actual", "plimit"}
+
+`/stock_actual_limite` se sirve desde el mismo conjunto (`productos_bajo_limite`),
+completado con las URLs de las imágenes del catálogo.
+El conjunto vence cada `ALMACEN_ALERTAS_RECONSTRUIR_SECONDS` y la siguiente
+consulta lo reconstruye desde la base, lo que corrige cualquier desvío (p. ej.
+una evaluación perdida porque Redis no respondía).
+"""
+import json
+import logging
+from typing import Iterable, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import (
+    INVENTARIOS,
+    TipoStock,
+    columnas_imagenes_catalogo,
+    imagenes_url_catalogo,
+    stock_bajo_limite,
+)
+from app.core.config import settings
+from app.core.realtime import publicar_evento, redis_client
+
+logger = logging.getLogger("app.almacen.alertas")
+
+TOPICO_ALERTAS = "alertas.stock"
+
+# Escribe (o borra, con valor vacío) varios códigos y devuelve los valores
+# anteriores, todo atómico: dos evaluaciones simultáneas no anuncian dos veces
+# la misma transición
+_intercambiar = redis_client.register_script(
+    "local previos = {} "
+    "for i = 1, #ARGV, 2 do "
+    "  previos[#previos + 1] = redis.call('hget', KEYS[1], ARGV[i]) "
+    "  if ARGV[i + 1] == '' then redis.call('hdel', KEYS[1], ARGV[i]) "
+    "  else redis.call('hset', KEYS[1], ARGV[i], ARGV[i + 1]) end "
+    "end "
+    "return previos"
+)
+
+
+def _clave(tipo: TipoStock) -> str:
+    return f"almacen:stock_bajo:{tipo}"
+
+
+def _clave_lista(tipo: TipoStock) -> str:
+    """Marca de conjunto construido; su TTL fuerza la reconstrucción periódica."""
+    return f"almacen:stock_bajo:{tipo}:listo"
+
+
+def _item(fila) -> dict:
+    return {
+        "codigo": fila["codigo"],
+        "name": fila["name"],
+        "stock_actual": int(fila["stock_actual"]),
+        "plimit": fila["plimit"],
+    }
+
+
+def _bajo_limite(item: Optional[dict]) -> bool:
+    # Mismo criterio que `stock_bajo_limite`; None = el código ya no está en el catálogo
+    return item is not None and item["stock_actual"] <= item["plimit"]
+
+
+async def _stock_codigos(session: AsyncSession, tipo: TipoStock, codigos: list[str]) -> dict[str, dict]:
+    """Stock total y límite de los códigos indicados que siguen en el catálogo."""
+    inv = INVENTARIOS[tipo]
+    lote, catalogo = inv.lote, inv.catalogo
+    stmt = (
+        select(
+            catalogo.codigo,
+            catalogo.name,
+            func.coalesce(func.sum(lote.stock_actual), 0).label("stock_actual"),
+            catalogo.plimit,
+        )
+        .outerjoin(lote, lote.codigo == catalogo.codigo)
+        .where(catalogo.codigo.in_(codigos))
+        .group_by(catalogo.id)
+    )
+    result = await session.execute(stmt)
+    return {fila["codigo"]: _item(fila) for fila in result.mappings().all()}
+
+
+async def reconstruir(session: AsyncSession, tipo: TipoStock) -> list:
+    """Recalcula el conjunto completo desde la base; devuelve las filas con sus `imagenes_url`."""
+    filas = await stock_bajo_limite(session, tipo)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(_clave(tipo))
+        if filas:
+            pipe.hset(_clave(tipo), mapping={f["codigo"]: json.dumps(_item(f)) for f in filas})
+        pipe.set(_clave_lista(tipo), "1", ex=settings.ALMACEN_ALERTAS_RECONSTRUIR_SECONDS)
+        await pipe.execute()
+    return filas
+
+
+async def evaluar_codigos(session: AsyncSession, tipo: TipoStock, codigos: Iterable[Optional[str]]) -> None:
+    """
+    Recalcula los códigos afectados por una operación ya confirmada y publica
+    las transiciones. No lanza excepciones: la operación ya se guardó y el
+    conjunto se corrige en la próxima reconstrucción.
+    """
+    codigos = sorted({c for c in codigos if c})
+    if not codigos:
+        return
+    try:
+        if not await redis_client.exists(_clave_lista(tipo)):
+            # Sin conjunto previo no hay con qué comparar: se construye y listo
+            await reconstruir(session, tipo)
+            return
+
+        actuales = await _stock_codigos(session, tipo, codigos)
+        argumentos = []
+        for codigo in codigos:
+            item = actuales.get(codigo)
+            argumentos += [codigo, json.dumps(item) if _bajo_limite(item) else ""]
+        previos = await _intercambiar(keys=[_clave(tipo)], args=argumentos)
+
+        eventos = []
+        for codigo, previo in zip(codigos, previos):
+            previo = json.loads(previo) if previo else None
+            item = actuales.get(codigo)
+            bajo = _bajo_limite(item)
+            if bajo and previo is None:
+                evento = "bajo_limite"
+            elif bajo and previo != item:
+                evento = "actualizado"
+            elif not bajo and previo is not None:
+                evento = "repuesto" if item is not None else "retirado"
+            else:
+                continue
+            datos = item or previo
+            eventos.append({"type": "alerta_stock", "evento": evento, "tipo": tipo, **datos})
+        await publicar_evento(TOPICO_ALERTAS, eventos)
+    except (RedisError, SQLAlchemyError) as e:
+        logger.warning(f"No se pudieron evaluar alertas de stock ({tipo}: {codigos}): {e}")
+
+
+async def productos_bajo_limite(session: AsyncSession, tipo: TipoStock) -> list:
+    """
+    Filas de `StockActualLimit*` servidas desde el conjunto de Redis; del
+    catálogo solo se lee qué imágenes existen, y solo para esos códigos. Sin
+    Redis se calcula directamente en la base.
+    """
+    try:
+        if not await redis_client.exists(_clave_lista(tipo)):
+            return await reconstruir(session, tipo)
+        items = [json.loads(v) for v in (await redis_client.hgetall(_clave(tipo))).values()]
+    except RedisError as e:
+        logger.warning(f"Conjunto de stock bajo no disponible ({tipo}): {e}")
+        return await stock_bajo_limite(session, tipo)
+
+    if not items:
+        return []
+    catalogo = INVENTARIOS[tipo].catalogo
+    result = await session.execute(
+        select(catalogo.codigo, *columnas_imagenes_catalogo(catalogo))
+        .where(catalogo.codigo.in_([i["codigo"] for i in items]))
+    )
+    imagenes = {fila["codigo"]: imagenes_url_catalogo(tipo, fila) for fila in result.mappings().all()}
+    return [
+        {**item, "imagenes_url": imagenes.get(item["codigo"], {})}
+        for item in sorted(items, key=lambda i: i["codigo"])
+    ]
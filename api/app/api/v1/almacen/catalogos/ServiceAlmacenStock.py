@@ -0,0 +1,288 @@
+"""
+Saldo de stock por lote para material y mercadería.
+
+Reemplaza a las vistas `almacen.v_stock_actual_*`, que sumaban todos los
+ingresos y salidas de la historia en cada consulta. Las tablas
+`almacen.stock_lote_*` guardan un saldo por lote (uuid de ingreso + serie)
+y los endpoints de ingreso/salida llaman a `recalcular_lotes` con los uuid
+que tocaron, dentro de la misma transacción: el costo es proporcional a
+los lotes afectados, no al historial.
+
+`recalcular_lotes(session, tipo)` sin uuids reconstruye todo y devuelve
+cuántos lotes corrigió (ver `python -m app.conciliar_stock`).
+
+El saldo se lleva por lote y no por SKU porque las salidas descuentan de
+un lote concreto (uuid_registro + serie) y `/stock_actual_detallado` lista
+lotes; el total por SKU es la suma de sus lotes por `codigo` (indexado).
+`comparar_con_vistas` contrasta ambos niveles con las vistas antiguas
+mientras sigan en la base.
+
+Las imágenes no viajan en las respuestas: cada fila lleva la URL del
+registro de ingreso (`imagen_url`) o del catálogo (`imagenes_url`).
+"""
+from dataclasses import dataclass
+from typing import Iterable, Literal, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.almacen.catalogos.ModelsAlmacenCatalogosMerMat import CatalogoMaterial, CatalogoMercaderia
+from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMaterial import IngresoMaterial
+from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMercaderia import IngresoMercaderia
+from app.api.v1.almacen.catalogos.ModelsAlmacenStock import StockLoteMaterial, StockLoteMercaderia
+
+TipoStock = Literal["material", "mercaderia"]
+
+
+@dataclass(frozen=True)
+class _Inventario:
+    lote: type
+    ingreso: type
+    catalogo: type
+    tabla_lote: str
+    tabla_ingreso: str
+    tabla_salida: str
+    columna_uuid: str
+    columna_clase: str  # "tipo" en material, "categoria" en mercadería
+    ruta_ingreso: str
+    ruta_catalogo: str
+    vista_detallado: str
+    vista_limite: str
+
+
+INVENTARIOS: dict[str, _Inventario] = {
+    "material": _Inventario(
+        lote=StockLoteMaterial,
+        ingreso=IngresoMaterial,
+        catalogo=CatalogoMaterial,
+        tabla_lote="almacen.stock_lote_material",
+        tabla_ingreso="almacen.ingreso_material",
+        tabla_salida="almacen.salida_material",
+        columna_uuid="uuid_material",
+        columna_clase="tipo",
+        ruta_ingreso="/ingresoMaterial",
+        ruta_catalogo="/catalogoMaterial",
+        vista_detallado="almacen.v_stock_actual_detallado_material",
+        vista_limite="almacen.v_stock_actual_material_limit",
+    ),
+    "mercaderia": _Inventario(
+        lote=StockLoteMercaderia,
+        ingreso=IngresoMercaderia,
+        catalogo=CatalogoMercaderia,
+        tabla_lote="almacen.stock_lote_mercaderia",
+        tabla_ingreso="almacen.ingreso_mercaderia",
+        tabla_salida="almacen.salida_mercaderia",
+        columna_uuid="uuid_mercaderia",
+        columna_clase="categoria",
+        ruta_ingreso="/ingresoMercaderia",
+        ruta_catalogo="/catalogoMercaderia",
+        vista_detallado="almacen.v_stock_actual_detallado",
+        vista_limite="almacen.v_stock_actual_mercaderia_limit",
+    ),
+}
+
+
+def columnas_imagenes_catalogo(catalogo: type) -> list:
+    """Columnas que `imagenes_url_catalogo` necesita: id y si existe cada imagen."""
+    return [catalogo.id.label("catalogo_id")] + [
+        getattr(catalogo, f"imagen{i}_sha256").isnot(None).label(f"tiene_imagen{i}") for i in range(1, 5)
+    ]
+
+
+def imagenes_url_catalogo(tipo: TipoStock, fila) -> dict[str, Optional[str]]:
+    """Igual que `Catalogo*.imagenes_url`, para filas leídas con `columnas_imagenes_catalogo`."""
+    ruta = INVENTARIOS[tipo].ruta_catalogo
+    return {
+        f"imagen{i}": f"{ruta}/{fila['catalogo_id']}/imagen/{i}" if fila[f"tiene_imagen{i}"] else None
+        for i in range(1, 5)
+    }
+
+
+async def recalcular_lotes(session: AsyncSession, tipo: TipoStock, uuids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recalcula desde ingresos y salidas el saldo de los lotes indicados.
+
+    Args:
+        session: Sesión de la transacción que modificó ingresos/salidas
+            (se llama antes del commit).
+        tipo: "material" o "mercaderia".
+        uuids: uuid de los lotes afectados; None recalcula todos.
+
+    Returns:
+        Cantidad de lotes insertados, corregidos o eliminados.
+    """
+    inv = INVENTARIOS[tipo]
+    col = inv.columna_uuid
+    params: dict = {}
+    filtro_ingreso = ""
+    filtro_lote = ""
+    if uuids is None:
+        # La reconstrucción completa espera a que terminen las escrituras en
+        # curso y las frena hasta su commit (si no, podría pisar un lote
+        # confirmado después de tomar su snapshot)
+        await session.execute(text(f"LOCK TABLE {inv.tabla_lote} IN SHARE ROW EXCLUSIVE MODE"))
+    else:
+        params["uuids"] = sorted(set(uuids))
+        if not params["uuids"]:
+            return 0
+        filtro_ingreso = f"WHERE i.{col} = ANY(:uuids)"
+        filtro_lote = "l.uuid_registro = ANY(:uuids) AND"
+        # Mismo orden de bloqueo en todas las transacciones: sin deadlocks
+        await session.execute(
+            text(f"SELECT 1 FROM {inv.tabla_lote} WHERE uuid_registro = ANY(:uuids) "
+                 f"ORDER BY uuid_registro, serie FOR UPDATE"),
+            params,
+        )
+
+    upsert = await session.execute(
+        text(f"""
+            INSERT INTO {inv.tabla_lote} AS l
+                (uuid_registro, serie, ingreso_id, codigo, cantidad_inicial, cantidad_salida, actualizado_en)
+            SELECT i.{col}, i.serie, MIN(i.id), MIN(i.codigo), SUM(i.cantidad),
+                   COALESCE((SELECT SUM(s.cantidad) FROM {inv.tabla_salida} s
+                              WHERE s.{col} = i.{col} AND s.serie = i.serie), 0),
+                   now()
+            FROM {inv.tabla_ingreso} i
+            {filtro_ingreso}
+            GROUP BY i.{col}, i.serie
+            ON CONFLICT (uuid_registro, serie) DO UPDATE SET
+                ingreso_id = EXCLUDED.ingreso_id,
+                codigo = EXCLUDED.codigo,
+                cantidad_inicial = EXCLUDED.cantidad_inicial,
+                cantidad_salida = EXCLUDED.cantidad_salida,
+                actualizado_en = now()
+            WHERE (l.ingreso_id, l.codigo, l.cantidad_inicial, l.cantidad_salida)
+                  IS DISTINCT FROM
+                  (EXCLUDED.ingreso_id, EXCLUDED.codigo, EXCLUDED.cantidad_inicial, EXCLUDED.cantidad_salida)
+        """),
+        params,
+    )
+    # Lotes cuyo ingreso ya no existe
+    huerfanos = await session.execute(
+        text(f"""
+            DELETE FROM {inv.tabla_lote} l
+            WHERE {filtro_lote} NOT EXISTS (
+                SELECT 1 FROM {inv.tabla_ingreso} i
+                WHERE i.{col} = l.uuid_registro AND i.serie = l.serie
+            )
+        """),
+        params,
+    )
+    return upsert.rowcount + huerfanos.rowcount
+
+
+async def stock_detallado(session: AsyncSession, tipo: TipoStock) -> list:
+    """Filas de `StockActual*Detallado`: un registro por lote con sus datos de ingreso."""
+    inv = INVENTARIOS[tipo]
+    lote, ingreso, catalogo = inv.lote, inv.ingreso, inv.catalogo
+    stmt = (
+        select(
+            ingreso.codigo,
+            lote.uuid_registro,
+            ingreso.name,
+            ingreso.marca,
+            ingreso.modelo,
+            ingreso.medida,
+            ingreso.dimension,
+            getattr(ingreso, inv.columna_clase),
+            ingreso.ubicacion,
+            func.coalesce(catalogo.plimit, 0).label("plimit"),
+            lote.serie,
+            lote.cantidad_inicial,
+            lote.cantidad_salida,
+            lote.stock_actual,
+            ingreso.valor,
+            ingreso.moneda,
+            ingreso.fecha.label("fecha_ingreso"),
+            ingreso.id.label("ingreso_id"),
+            ingreso.image_sha256.isnot(None).label("tiene_imagen"),
+        )
+        .join(ingreso, ingreso.id == lote.ingreso_id)
+        .outerjoin(catalogo, catalogo.codigo == lote.codigo)
+        .order_by(lote.codigo, ingreso.fecha, lote.serie)
+    )
+    result = await session.execute(stmt)
+    return [
+        {**fila, "imagen_url": f"{inv.ruta_ingreso}/{fila['ingreso_id']}/imagen" if fila["tiene_imagen"] else None}
+        for fila in result.mappings().all()
+    ]
+
+
+async def stock_bajo_limite(session: AsyncSession, tipo: TipoStock) -> list:
+    """
+    Filas de `StockActualLimit*`: productos del catálogo con stock total
+    menor o igual a su `plimit` (sin lotes cuenta como stock 0).
+    """
+    inv = INVENTARIOS[tipo]
+    lote, catalogo = inv.lote, inv.catalogo
+    stock = func.coalesce(func.sum(lote.stock_actual), 0)
+    stmt = (
+        select(
+            catalogo.codigo,
+            catalogo.name,
+            stock.label("stock_actual"),
+            catalogo.plimit,
+            *columnas_imagenes_catalogo(catalogo),
+        )
+        .outerjoin(lote, lote.codigo == catalogo.codigo)
+        .group_by(catalogo.id)
+        .having(stock <= catalogo.plimit)
+        .order_by(catalogo.codigo)
+    )
+    result = await session.execute(stmt)
+    return [{**fila, "imagenes_url": imagenes_url_catalogo(tipo, fila)} for fila in result.mappings().all()]
+
+
+# Lotes cuyo saldo difiere entre la tabla y la vista antigua (o que faltan en una de las dos)
+COMPARAR_DETALLADO = """
+SELECT COALESCE(l.uuid_registro, v.uuid_registro) AS uuid_registro,
+       COALESCE(l.serie, v.serie) AS serie,
+       l.stock_actual AS stock_tabla, v.stock_actual AS stock_vista
+FROM {tabla_lote} l
+FULL JOIN {vista} v ON v.uuid_registro = l.uuid_registro AND v.serie = l.serie
+WHERE (l.cantidad_inicial, l.cantidad_salida, l.stock_actual)
+      IS DISTINCT FROM (v.cantidad_inicial, v.cantidad_salida, v.stock_actual)
+ORDER BY 1, 2
+"""
+
+# Productos bajo el límite según la tabla vs. según la vista antigua
+COMPARAR_LIMITE = """
+WITH tabla AS (
+    SELECT c.codigo, COALESCE(SUM(l.stock_actual), 0) AS stock_actual
+    FROM {tabla_catalogo} c
+    LEFT JOIN {tabla_lote} l ON l.codigo = c.codigo
+    GROUP BY c.id
+    HAVING COALESCE(SUM(l.stock_actual), 0) <= c.plimit
+)
+SELECT COALESCE(t.codigo, v.codigo) AS codigo, t.stock_actual AS stock_tabla, v.stock_actual AS stock_vista
+FROM tabla t
+FULL JOIN {vista} v ON v.codigo = t.codigo
+WHERE t.stock_actual IS DISTINCT FROM v.stock_actual
+ORDER BY 1
+"""
+
+
+async def comparar_con_vistas(session: AsyncSession, tipo: TipoStock) -> Optional[dict[str, list]]:
+    """
+    Diferencias entre el saldo por lote y las vistas `v_stock_actual_*`
+    que reemplaza, por lote (`detallado`) y por producto bajo su límite
+    (`limite`). Solo lee; None si las vistas ya no existen.
+    """
+    inv = INVENTARIOS[tipo]
+    existen = await session.execute(
+        text("SELECT to_regclass(:detallado) IS NOT NULL AND to_regclass(:limite) IS NOT NULL"),
+        {"detallado": inv.vista_detallado, "limite": inv.vista_limite},
+    )
+    if not existen.scalar_one():
+        return None
+    detallado = await session.execute(
+        text(COMPARAR_DETALLADO.format(tabla_lote=inv.tabla_lote, vista=inv.vista_detallado))
+    )
+    limite = await session.execute(
+        text(COMPARAR_LIMITE.format(
+            tabla_lote=inv.tabla_lote,
+            tabla_catalogo=inv.catalogo.__table__.fullname,
+            vista=inv.vista_limite,
+        ))
+    )
+    return {"detallado": detallado.mappings().all(), "limite": limite.mappings().all()}
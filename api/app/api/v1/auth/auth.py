@@ -5,10 +5,11 @@ from sqlalchemy import select
 from pydantic import BaseModel, EmailStr
 
 from app.core.db import get_session
-from app.core.deps import get_current_user
+from app.core.deps import get_current_user, requiere_modulo
 from app.api.v1.auth.auth_models import Usuario
-from app.core.security import verify_password, create_access_token
-from app.api.v1.auth.schema_usuario import UsuarioOut
+from app.core.security import create_access_token
+from app.core.passwords import password_service
+from app.api.v1.auth.schema_usuario import UsuarioOut, UsuarioPrincipal
 
 logger = logging.getLogger("uvicorn.error")
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -39,7 +40,7 @@ async def login(data: LoginIn, session: AsyncSession = Depends(get_session)) ->
             detail="Error interno del servidor"
         )
 
-    if not user or not verify_password(data.password, user.password_hash):
+    if not user or not await password_service.verify(data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas",
@@ -52,8 +53,12 @@ async def login(data: LoginIn, session: AsyncSession = Depends(get_session)) ->
 
 
 @router.get("/me", response_model=UsuarioOut)
-async def get_me(current_user: Usuario = Depends(get_current_user)) -> UsuarioOut:
-    """Retorna el perfil del usuario autenticado."""
-    # model_validate es redundante aquí si response_model está definido, 
-    # pero se deja si necesitas asegurar la conversión manual.
-    return current_user
\ No newline at end of file
+async def get_me(current_user: UsuarioPrincipal = Depends(get_current_user)) -> UsuarioOut:
+    """Retorna el perfil del usuario autenticado (la imagen se sirve en /usuarios/{id}/imagen)."""
+    return current_user
+
+
+@router.get("/password-metrics", dependencies=[Depends(requiere_modulo("gerencia"))])
+async def password_metrics() -> dict:
+    """Métricas del pool de bcrypt de este proceso (cola, rechazos y tiempos promedio); solo gerencia."""
+    return password_service.metricas()
@@ -1,8 +1,6 @@
-import base64
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 from sqlalchemy import JSON, TIMESTAMP, VARCHAR, BigInteger, ForeignKey, text, UniqueConstraint
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.types import LargeBinary
 from datetime import datetime
 from app.core.base_class import Base
 
@@ -25,16 +23,18 @@ class Usuario(Base):
     password_hash: Mapped[str] = mapped_column(nullable=False)
     cargo: Mapped[str] = mapped_column(nullable=False)
     estado: Mapped[str] = mapped_column(estado_usuario_pg, server_default=text("'bloqueado'::acceso.estado_usuario"), nullable=False)
-    imagen:Mapped[bytes] = mapped_column(LargeBinary)
+    # SHA-256 del avatar en el almacén de blobs; se sirve desde GET /usuarios/{id}/imagen
+    imagen_sha256: Mapped[str] = mapped_column(VARCHAR(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    tiene_imagen: Mapped[bool] = column_property(imagen_sha256.isnot(None))
 
     permisos: Mapped[list["Permiso"]] = relationship(back_populates="usuario", cascade="all, delete-orphan", lazy="selectin")
 
     @property
-    def image_base64(self) -> str:
-        if not self.imagen:
+    def imagen_url(self) -> str | None:
+        if not self.tiene_imagen:
             return None
-        return base64.b64encode(self.imagen).decode("utf-8")
+        return f"/usuarios/{self.id}/imagen"
 
 class Permiso(Base):
     __tablename__ = "permiso"
@@ -56,7 +56,8 @@ class UsuarioUpdate(BaseModel):
 
 
 
-class UsuarioOut(BaseModel):
+class UsuarioPrincipal(BaseModel):
+    """Usuario autenticado; es lo que se guarda en la caché de principales."""
     model_config = ConfigDict(from_attributes=True)
 
     id: int
@@ -65,6 +66,9 @@ class UsuarioOut(BaseModel):
     email: EmailStr
     cargo: str
     estado: EstadoUsuario
-    image_base64: Optional[str] = None
+    imagen_url: Optional[str] = None
     permisos: List[PermisoBase] = Field(default_factory=list)
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class UsuarioOut(UsuarioPrincipal):
+    pass
\ No newline at end of file
@@ -2,18 +2,21 @@ import base64
 import binascii
 import logging
 from typing import List, Optional, Union
-from app.core.realtime import redis_client
+from app.core.realtime import presencia
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status
 from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.v1.auth.schema_usuario import UsuarioCreate, UsuarioOut, UsuarioUpdate
+from app.core.blobs import guardar_blob
 from app.core.db import get_session
 from app.core.deps import get_current_user
-from app.core.security import hash_password
+from app.core.principal_cache import principal_cache
+from app.core.passwords import password_service
+from app.helpers.imagenHttp import respuesta_columna_imagen, tamanio_miniatura
 from app.api.v1.auth.auth_models import Permiso, Usuario
 
 logger = logging.getLogger("uvicorn.error")
@@ -50,15 +53,18 @@ def raise_duplicate_email():
 
 @router.post("", response_model=UsuarioOut, status_code=status.HTTP_201_CREATED)
 async def crear_usuario(data: UsuarioCreate, session: AsyncSession = Depends(get_session)):
+    # Fuera del try: un 503 por saturación de bcrypt no debe volverse 500
+    password_hash = await password_service.hash(data.password)
+    imagen_sha256 = await guardar_blob(decode_base64_image(data.image_byte))
     try:
         nuevo = Usuario(
             name=data.name,
             last_name=data.last_name,
             email=str(data.email),
-            password_hash=hash_password(data.password),
+            password_hash=password_hash,
             cargo=data.cargo,
             estado=data.estado,
-            imagen=decode_base64_image(data.image_byte), # Ahora procesa el string limpio
+            imagen_sha256=imagen_sha256, # El avatar queda en el almacén de blobs
         )
         session.add(nuevo)
         await session.flush()
@@ -72,7 +78,7 @@ async def crear_usuario(data: UsuarioCreate, session: AsyncSession = Depends(get
             )
 
         await session.commit()
-        await session.refresh(nuevo, attribute_names=["permisos"])
+        await session.refresh(nuevo, attribute_names=["permisos", "tiene_imagen"])
         return nuevo
 
     except IntegrityError:
@@ -106,17 +112,21 @@ async def actualizar_usuario(
     if not update_data:
         return user
 
+    nuevo_hash = None
+    if update_data.get("password"):
+        nuevo_hash = await password_service.hash(update_data["password"])
+
     try:
         # Campos directos
         for field in ("name", "last_name", "cargo", "estado", "email"):
             if field in update_data:
                 setattr(user, field, update_data[field])
 
-        if "password" in update_data and update_data["password"]:
-            user.password_hash = hash_password(update_data["password"])
+        if nuevo_hash:
+            user.password_hash = nuevo_hash
 
         if "image_byte" in update_data:
-            user.imagen = decode_base64_image(update_data["image_byte"])
+            user.imagen_sha256 = await guardar_blob(decode_base64_image(update_data["image_byte"]))
 
         # Lógica de Permisos Sincronizada (Ahora trabaja puramente con Sets de Strings)
         if "permisos" in update_data:
@@ -138,8 +148,10 @@ async def actualizar_usuario(
                 )
 
         await session.commit()
+        # El principal cacheado (estado, permisos, sesión) ya no es válido
+        await principal_cache.invalidate(usuario_id)
         # Forzamos re-fetch de relaciones tras modificaciones directas de delete/insert
-        await session.refresh(user, attribute_names=["permisos"]) 
+        await session.refresh(user, attribute_names=["permisos", "tiene_imagen"])
         return user
 
     except IntegrityError:
@@ -151,6 +163,16 @@ async def actualizar_usuario(
         raise HTTPException(status_code=500, detail="Error interno al actualizar")
 
 
+@router.get("/{usuario_id}/imagen", response_class=Response)
+async def obtener_imagen_usuario(
+    usuario_id: int,
+    request: Request,
+    size: Optional[int] = Depends(tamanio_miniatura),
+    session: AsyncSession = Depends(get_session),
+):
+    """Sirve el avatar del usuario como bytes crudos con ETag fuerte (304 si no cambió)."""
+    return await respuesta_columna_imagen(request, session, Usuario.imagen_sha256, Usuario.id == usuario_id, size)
+
 @router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_usuario(usuario_id: int, session: AsyncSession = Depends(get_session)):
     usuario = await session.get(Usuario, usuario_id)
@@ -160,6 +182,7 @@ async def eliminar_usuario(usuario_id: int, session: AsyncSession = Depends(get_
     try:
         await session.delete(usuario)
         await session.commit()
+        await principal_cache.invalidate(usuario_id)
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=409, detail="Restricción de integridad al eliminar")
@@ -174,24 +197,8 @@ async def eliminar_usuario(usuario_id: int, session: AsyncSession = Depends(get_
 async def obtener_usuarios_online(
     session: AsyncSession = Depends(get_session)
 ):
-    cursor = 0
-    online_ids = set() # Usar un set evita IDs duplicados si el SCAN repite alguno
-
     try:
-        while True:
-            # El count=100 le dice a Redis que devuelva aproximadamente 100 llaves por paso
-            cursor, keys = await redis_client.scan(cursor, match="user:online:*", count=100)
-            for k in keys:
-                # Si redis_client no tiene decode_responses=True, k será bytes
-                key_str = k.decode("utf-8") if isinstance(k, bytes) else k
-                try:
-                    user_id = int(key_str.split(":")[-1])
-                    online_ids.add(user_id)
-                except (ValueError, IndexError):
-                    continue
-            
-            if cursor == 0:
-                break
+        online_ids = await presencia.usuarios_online()
 
         if not online_ids:
             return []
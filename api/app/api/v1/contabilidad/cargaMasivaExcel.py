@@ -0,0 +1,219 @@
+"""
+Carga masiva de comprobantes (ventas/compras) desde Excel vía COPY.
+
+Los archivos mensuales del SIRE/PLE traen decenas de miles de líneas.
+En lugar de validar cada fila con Pydantic y crear un objeto ORM por
+comprobante, la carga se hace en tres pasos:
+
+1. Limpieza y validación vectorizada del DataFrame (tipos, longitudes
+   contra las columnas destino y valores por defecto).
+2. `COPY` de todas las filas a una tabla temporal (`copy_records_to_table`
+   de asyncpg), con las mismas columnas y tipos que la tabla destino más
+   los datos del cliente/proveedor.
+3. Dos sentencias set-based: alta de los clientes/proveedores nuevos
+   (`INSERT ... ON CONFLICT DO NOTHING`) y un único
+   `INSERT ... SELECT ... JOIN` hacia la tabla de comprobantes.
+
+Todo ocurre en la transacción de la sesión; la tabla temporal se
+descarta sola al hacer commit (`ON COMMIT DROP`).
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import pandas as pd
+from fastapi import HTTPException, status
+from sqlalchemy import CHAR, String, Table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MAX_ERRORES_REPORTADOS = 100
+
+_COLUMNAS_TERCERO = ["tipo_documento", "nro_documento", "razon_social"]
+_COLUMNAS_CODIGO = ["periodo", "tipo_cp_codigo", "serie", "numero"]
+_NULOS_TEXTO = ("NAN", "NONE", "NAT", "")
+
+
+@dataclass
+class ConfigCarga:
+    """Tabla destino y columnas de un tipo de comprobante."""
+    tabla: Table
+    tabla_terceros: Table
+    fk_tercero: str
+    columnas_requeridas: list[str]
+    columnas_numericas: dict[str, Decimal]
+    """Columna -> valor por defecto; la escala se toma de la columna destino."""
+    columnas_texto: list[str] = field(default_factory=list)
+    patron_periodo: str | None = None
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    """Convierte a texto, quita el '.0' de números leídos como float y normaliza nulos."""
+    valores = (
+        serie.astype("string")
+        .str.replace(r"\.0$", "", regex=True)
+        .str.strip()
+    )
+    return valores.mask(valores.str.upper().isin(_NULOS_TEXTO))
+
+
+def _longitud(tabla: Table, columna: str) -> int | None:
+    tipo = tabla.c[columna].type
+    return tipo.length if isinstance(tipo, (String, CHAR)) else None
+
+
+def _a_decimal(serie: pd.Series, escala: int) -> pd.Series:
+    formato = f"{{:.{escala}f}}"
+    return serie.map(lambda v: Decimal(formato.format(v)))
+
+
+def preparar_comprobantes(df: pd.DataFrame, config: ConfigCarga) -> pd.DataFrame:
+    """
+    Limpia y valida el DataFrame del Excel sin iterar fila por fila.
+
+    Returns:
+        Un DataFrame con exactamente las columnas a copiar al staging.
+
+    Raises:
+        HTTPException: 400 si faltan columnas, 422 con el detalle por fila
+            si alguna fila no es válida.
+    """
+    df.columns = [str(c).lower().strip() for c in df.columns]
+
+    missing = [col for col in config.columnas_requeridas if col not in df.columns]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail = [
+                {
+                    "loc": ["body"],
+                    "msg": f"Columnas faltantes: {', '.join(missing)}, se recomienda al usuario revisar correctamente el archivo",
+                    "type": "value_error"
+                }
+            ]
+        )
+
+    df = df.reset_index(drop=True)
+    filas = df.index + 2
+    errores: dict[int, str] = {}
+
+    def marcar(mascara: pd.Series, mensaje: str) -> None:
+        for fila in filas[mascara.to_numpy(dtype=bool, na_value=False)]:
+            errores.setdefault(int(fila), mensaje)
+
+    def columna(nombre: str) -> pd.Series:
+        if nombre in df.columns:
+            return df[nombre]
+        return pd.Series(pd.NA, index=df.index, dtype="object")
+
+    salida = pd.DataFrame(index=df.index)
+
+    for col in _COLUMNAS_TERCERO:
+        salida[col] = _texto(columna(col))
+        marcar(salida[col].isna(), f"{col} es obligatorio")
+
+    for col in _COLUMNAS_CODIGO:
+        salida[col] = _texto(columna(col))
+        marcar(salida[col].isna(), f"{col} es obligatorio")
+    salida["tipo_cp_codigo"] = salida["tipo_cp_codigo"].str.zfill(2)
+    if config.patron_periodo:
+        marcar(
+            ~salida["periodo"].fillna("").str.fullmatch(config.patron_periodo),
+            "periodo con formato inválido",
+        )
+
+    for col in ("fecha_emision", "fecha_vencimiento"):
+        fechas = pd.to_datetime(columna(col), errors="coerce", format="mixed")
+        marcar(fechas.isna(), f"{col} vacía o con formato inválido")
+        salida[col] = fechas.dt.date
+
+    for col, defecto in config.columnas_numericas.items():
+        original = columna(col)
+        numeros = pd.to_numeric(original, errors="coerce")
+        marcar(numeros.isna() & original.notna(), f"{col} no es numérico")
+        escala = config.tabla.c[col].type.scale
+        salida[col] = _a_decimal(numeros.fillna(float(defecto)), escala)
+
+    moneda = _texto(columna("moneda"))
+    salida["moneda"] = moneda.fillna("PEN").str.upper()
+
+    if "is_active" in df.columns:
+        salida["is_active"] = pd.to_numeric(df["is_active"], errors="coerce").fillna(0).astype(int).astype(str)
+    else:
+        salida["is_active"] = "1"
+
+    salida["descripcion_comprobante"] = (
+        columna("descripcion_comprobante")
+        .astype("string")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.upper()
+    )
+    salida["descripcion_comprobante"] = salida["descripcion_comprobante"].mask(
+        salida["descripcion_comprobante"].isin(_NULOS_TEXTO)
+    )
+    for col in config.columnas_texto:
+        salida[col] = _texto(columna(col))
+
+    # Longitudes contra las columnas destino, para no abortar el COPY en Postgres
+    for col in salida.columns:
+        tabla = config.tabla_terceros if col in _COLUMNAS_TERCERO else config.tabla
+        limite = _longitud(tabla, col)
+        if limite:
+            marcar(salida[col].str.len().fillna(0) > limite, f"{col} excede {limite} caracteres")
+
+    if errores:
+        detalle = [{"fila": f, "error": e} for f, e in sorted(errores.items())]
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=detalle[:MAX_ERRORES_REPORTADOS],
+        )
+    return salida
+
+
+async def cargar_comprobantes(db: AsyncSession, df: pd.DataFrame, config: ConfigCarga) -> tuple[int, int]:
+    """
+    Copia `df` a una tabla temporal y lo fusiona con la tabla destino.
+
+    Args:
+        db: Sesión de base de datos (el commit queda a cargo del llamador).
+        df: Resultado de `preparar_comprobantes`.
+        config: Tabla destino y de terceros.
+
+    Returns:
+        (comprobantes insertados, clientes/proveedores nuevos).
+    """
+    staging = f"stg_{config.tabla.name}"
+    columnas = list(df.columns)
+    propias = [c for c in columnas if c not in _COLUMNAS_TERCERO]
+    destino = config.tabla.fullname
+    terceros = config.tabla_terceros.fullname
+
+    # Mismas columnas y tipos que las tablas reales, sin copiar datos
+    await db.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {', '.join('d.' + c for c in propias)}, {', '.join('t.' + c for c in _COLUMNAS_TERCERO)} "
+        f"FROM {destino} d, {terceros} t WITH NO DATA"
+    ))
+
+    conexion = await db.connection()
+    raw = await conexion.get_raw_connection()
+    registros = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    await raw.driver_connection.copy_records_to_table(staging, records=registros, columns=columnas)
+
+    nuevos = await db.scalar(text(
+        f"WITH ins AS ("
+        f" INSERT INTO {terceros} (tipo_documento, nro_documento, razon_social)"
+        f" SELECT DISTINCT ON (nro_documento) tipo_documento, nro_documento, razon_social"
+        f" FROM {staging} ORDER BY nro_documento"
+        f" ON CONFLICT (nro_documento) DO NOTHING RETURNING 1"
+        f") SELECT count(*) FROM ins"
+    ))
+
+    insertados = await db.scalar(text(
+        f"WITH ins AS ("
+        f" INSERT INTO {destino} ({', '.join(propias)}, {config.fk_tercero})"
+        f" SELECT {', '.join('s.' + c for c in propias)}, t.id"
+        f" FROM {staging} s JOIN {terceros} t ON t.nro_documento = s.nro_documento"
+        f" RETURNING 1"
+        f") SELECT count(*) FROM ins"
+    ))
+    return insertados, nuevos
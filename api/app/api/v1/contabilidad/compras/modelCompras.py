@@ -1,13 +1,17 @@
 from datetime import datetime, date
 from typing import List, Optional
-from sqlalchemy import TIMESTAMP, String, Numeric, ForeignKey, CHAR, Text, text
+from sqlalchemy import Index, TIMESTAMP, String, Numeric, ForeignKey, CHAR, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.base_class import Base
 
 # 3. Ventas (Registro Principal)
 class Compra(Base):
     __tablename__ = "compras"
-    __table_args__ = {"schema": "contabilidad"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_compras_fecha_emision_id", "fecha_emision", "id"),
+        {"schema": "contabilidad"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     periodo: Mapped[str] = mapped_column(CHAR(6), nullable=False) # NOT NULL
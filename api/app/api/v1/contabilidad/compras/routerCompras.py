@@ -3,14 +3,19 @@ from decimal import Decimal
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import delete, desc, func, select, text
-import pandas as pd
-import io
 
 # Importaciones de tus archivos
 from app.api.v1.contabilidad.compras.modelCompras import Compra, CajaMovimientoCompra
 from app.api.v1.administracion.globalClienteProveedor.modelGlobalProveedor import GlobalProveedor
-from app.api.v1.contabilidad.compras.schemaCompras import CompraBase, SyncComrpasPayload, ResponseCompraLista, DeleteComprasPayload
+from app.api.v1.contabilidad.compras.schemaCompras import SyncComrpasPayload, ResponseCompraLista, DeleteComprasPayload
+from app.api.v1.contabilidad.cargaMasivaExcel import ConfigCarga, cargar_comprobantes, preparar_comprobantes
 from app.core.deps import get_current_user
+from app.core.excel import leer_excel
+from app.core.config import settings
+from app.core.jobs import ContextoJob, encolar_job, registrar_tarea
+from app.core.uploads import ArchivoSubido, recibir_archivo
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
 from app.core.db import get_session
 
 router_contabilidad_compras = APIRouter(
@@ -19,147 +24,54 @@ router_contabilidad_compras = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
-@router_contabilidad_compras.post("/importar-ventas-excel", status_code=status.HTTP_201_CREATED)
+CARGA_COMPRAS = ConfigCarga(
+    tabla=Compra.__table__,
+    tabla_terceros=GlobalProveedor.__table__,
+    fk_tercero="proveedor_id",
+    columnas_requeridas=[
+        'periodo', 'fecha_emision', 'tipo_cp_codigo', 'serie', 'numero',
+        'nro_documento', 'razon_social', 'tipo_documento',
+        'base_imponible', 'igv', 'total'
+    ],
+    columnas_numericas={
+        'base_imponible': Decimal("0.00"), 'igv': Decimal("0.00"), 'no_gravadas': Decimal("0.00"),
+        'otros': Decimal("0.00"), 'total': Decimal("0.00"), 'tipo_cambio': Decimal("1.000"),
+    },
+    columnas_texto=['nro_guia_remision'],
+)
+
+@registrar_tarea("contabilidad.compras.importar")
+async def importar_compras_excel_job(archivo: ArchivoSubido, db: AsyncSession, job: ContextoJob) -> dict:
+    await job.progreso(5, "Leyendo Excel")
+    df = await leer_excel(archivo.ruta)
+
+    # Validación vectorizada + COPY a staging + merge en un solo INSERT
+    await job.progreso(30, "Validando filas")
+    df_compras = preparar_comprobantes(df, CARGA_COMPRAS)
+    await job.progreso(50, "Cargando comprobantes y proveedores")
+    compras_creadas, proveedores_nuevos = await cargar_comprobantes(db, df_compras, CARGA_COMPRAS)
+    await db.commit()
+
+    return {
+        "status": "success",
+        "message": f"Se importaron {compras_creadas} comprobantes.",
+        "ventas_creadas": compras_creadas,
+        "proveedors_nuevos_registrados": proveedores_nuevos
+    }
+
+
+@router_contabilidad_compras.post("/importar-ventas-excel", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
 async def importar_ventas_excel(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_session)
+    current_user: UsuarioPrincipal = Depends(get_current_user)
 ):
+    """Encola la importación; el avance se consulta en /jobs/{job_id} o llega por el WebSocket."""
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(
             status_code=400, detail="Formato de archivo no soportado.")
 
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-
-        # 1. Normalización y Limpieza inicial
-        df.columns = [c.lower().strip() for c in df.columns]
-
-        required_cols = [
-            'periodo', 'fecha_emision', 'tipo_cp_codigo', 'serie', 'numero',
-            'nro_documento', 'razon_social', 'tipo_documento',
-            'base_imponible', 'igv', 'total'
-        ]
-
-        df['descripcion_comprobante'] = (df['descripcion_comprobante']
-                    .astype(str)
-                    .str.replace(r'\n|\r', ' ', regex=True)
-                    .str.replace(r'\s+', ' ', regex=True)
-                    .str.strip()
-                    .str.upper())
-
-        df['descripcion_comprobante'] = df['descripcion_comprobante'].replace(["NAN", "NONE", "NAT"], None)
-
-        missing = [col for col in required_cols if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail = [
-                    {
-                        "loc": ["body"],
-                        "msg": f"Columnas faltantes: {', '.join(missing)}, se recomienda al usuario revisar correctamente el archivo",
-                        "type": "value_error"
-                    }
-                ]
-            )
-
-        # Limpieza masiva de NaN y formatos de string
-        df = df.replace({pd.NA: None, float('nan'): None})
-
-        # conversion de tipos
-        df['is_active'] = pd.to_numeric(df['is_active'], errors='coerce').fillna(0).astype(int).astype(str)
-
-        # Vectorización: Limpieza de documentos sin loops
-        for col in ['nro_documento', 'tipo_documento']:
-            df[col] = df[col].astype(str).str.replace(
-                r'\.0$', '', regex=True).str.strip()
-
-        # 2. Sincronización de proveedors (OPTIMIZADO)
-        # Obtenemos solo los proveedors únicos del Excel
-        df_proveedors = df[['tipo_documento', 'nro_documento',
-                        'razon_social']].drop_duplicates(subset=['nro_documento'])
-        lista_nros = df_proveedors['nro_documento'].tolist()
-
-        # Consultamos de un solo golpe qué proveedors YA existen en la DB
-        stmt_existentes = select(GlobalProveedor).where(
-            GlobalProveedor.nro_documento.in_(lista_nros))
-        res_existentes = await db.execute(stmt_existentes)
-        proveedors_db = {
-            c.nro_documento: c for c in res_existentes.scalars().all()}
-
-        # Identificamos cuáles faltan y los añadimos
-        nuevo_proveedores_count = 0
-        for _, row in df_proveedors.iterrows():
-            nro = row['nro_documento']
-            if nro not in proveedors_db:
-                nuevo = GlobalProveedor(
-                    tipo_documento=row['tipo_documento'],
-                    nro_documento=nro,
-                    razon_social=row['razon_social']
-                )
-                db.add(nuevo)
-                # Lo añadimos al mapeo para el paso de ventas
-                proveedors_db[nro] = nuevo
-                nuevo_proveedores_count += 1
-
-        # Flush para obtener IDs de nuevos proveedors
-        if nuevo_proveedores_count > 0:
-            await db.flush()
-
-        # 3. Procesamiento de Ventas
-        compras_para_insertar = []
-        numeric_fields = ['base_imponible', 'igv', 'total', 'tipo_cambio', 'no_gravadas', 'otros']
-
-        for index, row in df.iterrows():
-            data = row.to_dict()
-
-            # Normalización de strings y ceros a la izquierda
-            for field in ['periodo', 'tipo_cp_codigo', 'serie', 'numero']:
-                if data.get(field):
-                    val = str(data[field]).replace('.0', '').strip()
-                    data[field] = val.zfill(2) if field == 'tipo_cp_codigo' and len(val) == 1 else val
-
-            # CORREGIDO: Conversión limpia de Float a Decimal para Pydantic
-            for field in numeric_fields:
-                val = data.get(field)
-                if val is None or pd.isna(val):
-                    data[field] = Decimal("1.000") if field == 'tipo_cambio' else Decimal("0.00")
-                else:
-                    data[field] = Decimal(str(val)) # Conversión segura a través de string
-
-            try:
-                venta_validada = CompraBase(**data)
-
-                # Buscamos el ID del proveedor (mapeado en la sincronización previa)
-                proveedor_obj = proveedors_db.get(data['nro_documento'])
-
-                nueva_compra = Compra(
-                    **venta_validada.model_dump(exclude={"id"}),
-                    proveedor_id=proveedor_obj.id if proveedor_obj else None
-                )
-                compras_para_insertar.append(nueva_compra)
-            except Exception as ve:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                    detail=f"Error en Fila {index + 2}: {str(ve)}")
-
-        # 4. Inserción Masiva Final
-        db.add_all(compras_para_insertar)
-        await db.commit()
-
-        return {
-            "status": "success",
-            "ventas_creadas": len(compras_para_insertar),
-            "proveedors_nuevos_registrados": nuevo_proveedores_count
-        }
-
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error crítico en importación: {str(e)}")
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("contabilidad.compras.importar", archivo, current_user.id, file.filename)
 
 
 @router_contabilidad_compras.get("/get-years", response_model=list[str])
@@ -1,6 +1,6 @@
 from datetime import datetime, date
 from typing import List, Optional
-from sqlalchemy import TIMESTAMP, String, Integer, Numeric, ForeignKey, CHAR, Text, DateTime, func, text
+from sqlalchemy import Index, TIMESTAMP, String, Integer, Numeric, ForeignKey, CHAR, Text, DateTime, func, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from app.core.base_class import Base
@@ -23,7 +23,11 @@ class PlanContable(Base):
 # 3. Ventas (Registro Principal)
 class Venta(Base):
     __tablename__ = "ventas"
-    __table_args__ = {"schema": "contabilidad"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_ventas_fecha_emision_id", "fecha_emision", "id"),
+        {"schema": "contabilidad"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     periodo: Mapped[str] = mapped_column(CHAR(6), nullable=False) # NOT NULL
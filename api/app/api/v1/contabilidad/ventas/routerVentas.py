@@ -1,15 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, status
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import delete, desc, func, select, text
-import pandas as pd
-import io
 
 # Importaciones de tus archivos
 from app.api.v1.contabilidad.ventas.modelVentas import Venta
 from app.api.v1.administracion.globalClienteProveedor.modelGlobalCliente import GlobalCliente
-from app.api.v1.contabilidad.ventas.schemaVentas import VentaBase, ResponseVentaLista, DeleteVentasPayload, SyncVentasPayload
+from app.api.v1.contabilidad.ventas.schemaVentas import ResponseVentaLista, DeleteVentasPayload, SyncVentasPayload
+from app.api.v1.contabilidad.cargaMasivaExcel import ConfigCarga, cargar_comprobantes, preparar_comprobantes
 from app.core.deps import get_current_user
+from app.core.excel import leer_excel
+from app.core.config import settings
+from app.core.jobs import ContextoJob, encolar_job, registrar_tarea
+from app.core.uploads import ArchivoSubido, recibir_archivo
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
 from app.core.db import get_session
+from app.core.pagination import PaginaOLista, Paginacion, aplicar_rango, paginacion_params, paginar
 
 router_contabilidad_ventas = APIRouter(
     prefix="/contabilidad/ventas",
@@ -17,6 +27,23 @@ router_contabilidad_ventas = APIRouter(
     dependencies=[Depends(get_current_user)]
 )
 
+CARGA_VENTAS = ConfigCarga(
+    tabla=Venta.__table__,
+    tabla_terceros=GlobalCliente.__table__,
+    fk_tercero="cliente_id",
+    columnas_requeridas=[
+        'periodo', 'fecha_emision', 'tipo_cp_codigo', 'serie', 'numero',
+        'nro_documento', 'razon_social', 'tipo_documento',
+        'base_imponible', 'igv', 'total', 'categoria'
+    ],
+    columnas_numericas={
+        'base_imponible': Decimal("0.00"), 'igv': Decimal("0.00"), 'total': Decimal("0.00"),
+        'monto_retencion': Decimal("0.00"), 'monto_detraccion': Decimal("0.00"), 'tipo_cambio': Decimal("1.000"),
+    },
+    columnas_texto=['categoria', 'nro_orden_compra', 'nro_guia_remision'],
+    patron_periodo=r"\d{6}",
+)
+
 
 @router_contabilidad_ventas.post("/sync-ventas", status_code=status.HTTP_201_CREATED)
 async def sync_ventas(payload: SyncVentasPayload, db: AsyncSession = Depends(get_session)):
@@ -96,149 +123,38 @@ async def sync_ventas(payload: SyncVentasPayload, db: AsyncSession = Depends(get
             status_code=500, detail=f"Error en sincronización masiva: {str(e)}")
 
 
-@router_contabilidad_ventas.post("/importar-ventas-excel", status_code=status.HTTP_201_CREATED)
+@registrar_tarea("contabilidad.ventas.importar")
+async def importar_ventas_excel_job(archivo: ArchivoSubido, db: AsyncSession, job: ContextoJob) -> dict:
+    await job.progreso(5, "Leyendo Excel")
+    df = await leer_excel(archivo.ruta)
+
+    # Validación vectorizada + COPY a staging + merge en un solo INSERT
+    await job.progreso(30, "Validando filas")
+    df_ventas = preparar_comprobantes(df, CARGA_VENTAS)
+    await job.progreso(50, "Cargando comprobantes y clientes")
+    ventas_creadas, clientes_nuevos = await cargar_comprobantes(db, df_ventas, CARGA_VENTAS)
+    await db.commit()
+
+    return {
+        "status": "success",
+        "message": f"Se importaron {ventas_creadas} comprobantes.",
+        "ventas_creadas": ventas_creadas,
+        "clientes_nuevos_registrados": clientes_nuevos
+    }
+
+
+@router_contabilidad_ventas.post("/importar-ventas-excel", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
 async def importar_ventas_excel(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_session)
+    current_user: UsuarioPrincipal = Depends(get_current_user)
 ):
+    """Encola la importación; el avance se consulta en /jobs/{job_id} o llega por el WebSocket."""
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(
             status_code=400, detail="Formato de archivo no soportado.")
 
-    try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-
-        # 1. Normalización y Limpieza inicial
-        df.columns = [c.lower().strip() for c in df.columns]
-
-        required_cols = [
-            'periodo', 'fecha_emision', 'tipo_cp_codigo', 'serie', 'numero',
-            'nro_documento', 'razon_social', 'tipo_documento',
-            'base_imponible', 'igv', 'total', 'categoria'
-        ]
-
-        df['descripcion_comprobante'] = (df['descripcion_comprobante']
-                    .astype(str)
-                    .str.replace(r'\n|\r', ' ', regex=True)
-                    .str.replace(r'\s+', ' ', regex=True)
-                    .str.strip()
-                    .str.upper())
-
-        df['descripcion_comprobante'] = df['descripcion_comprobante'].replace(["NAN", "NONE", "NAT"], None)
-
-        missing = [col for col in required_cols if col not in df.columns]
-        if missing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail = [
-                    {
-                        "loc": ["body"],
-                        "msg": f"Columnas faltantes: {', '.join(missing)}, se recomienda al usuario revisar correctamente el archivo",
-                        "type": "value_error"
-                    }
-                ]
-            )
-
-        # Limpieza masiva de NaN y formatos de string
-        df = df.replace({pd.NA: None, float('nan'): None})
-
-        # conversion de tipos
-        df['is_active'] = pd.to_numeric(df['is_active'], errors='coerce').fillna(0).astype(int).astype(str)
-
-        # Vectorización: Limpieza de documentos sin loops
-        for col in ['nro_documento', 'tipo_documento']:
-            df[col] = df[col].astype(str).str.replace(
-                r'\.0$', '', regex=True).str.strip()
-
-        # 2. Sincronización de Clientes (OPTIMIZADO)
-        # Obtenemos solo los clientes únicos del Excel
-        df_clientes = df[['tipo_documento', 'nro_documento',
-                        'razon_social']].drop_duplicates(subset=['nro_documento'])
-        lista_nros = df_clientes['nro_documento'].tolist()
-
-        # Consultamos de un solo golpe qué clientes YA existen en la DB
-        stmt_existentes = select(GlobalCliente).where(
-            GlobalCliente.nro_documento.in_(lista_nros))
-        res_existentes = await db.execute(stmt_existentes)
-        clientes_db = {
-            c.nro_documento: c for c in res_existentes.scalars().all()}
-
-        # Identificamos cuáles faltan y los añadimos
-        nuevos_clientes_count = 0
-        for _, row in df_clientes.iterrows():
-            nro = row['nro_documento']
-            if nro not in clientes_db:
-                nuevo = GlobalCliente(
-                    tipo_documento=row['tipo_documento'],
-                    nro_documento=nro,
-                    razon_social=row['razon_social']
-                )
-                db.add(nuevo)
-                # Lo añadimos al mapeo para el paso de ventas
-                clientes_db[nro] = nuevo
-                nuevos_clientes_count += 1
-
-        # Flush para obtener IDs de nuevos clientes
-        if nuevos_clientes_count > 0:
-            await db.flush()
-
-        # 3. Procesamiento de Ventas
-        ventas_para_insertar = []
-        numeric_fields = ['base_imponible', 'igv', 'total',
-                        'monto_retencion', 'monto_detraccion', 'tipo_cambio']
-
-        for index, row in df.iterrows():
-            data = row.to_dict()
-
-            # Normalización de strings y ceros a la izquierda
-            for field in ['periodo', 'tipo_cp_codigo', 'serie', 'numero']:
-                if data.get(field):
-                    val = str(data[field]).replace('.0', '').strip()
-                    data[field] = val.zfill(
-                        2) if field == 'tipo_cp_codigo' and len(val) == 1 else val
-
-            # Normalización numérica (Vectorizable, pero aquí se hace por fila para validación de Pydantic)
-            for field in numeric_fields:
-                val = data.get(field)
-                if val is None or pd.isna(val):
-                    data[field] = 1.0 if field == 'tipo_cambio' else 0.0
-                else:
-                    data[field] = float(val)
-
-            try:
-                venta_validada = VentaBase(**data)
-
-                # Buscamos el ID del cliente en nuestro mapeo local optimizado
-                cliente_obj = clientes_db.get(data['nro_documento'])
-
-                nueva_venta = Venta(
-                    **venta_validada.model_dump(exclude={"id"}),
-                    cliente_id=cliente_obj.id if cliente_obj else None
-                )
-                ventas_para_insertar.append(nueva_venta)
-            except Exception as ve:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
-                    detail=f"Error en Fila {index + 2}: {str(ve)}")
-
-        # 4. Inserción Masiva Final
-        db.add_all(ventas_para_insertar)
-        await db.commit()
-
-        return {
-            "status": "success",
-            "ventas_creadas": len(ventas_para_insertar),
-            "clientes_nuevos_registrados": nuevos_clientes_count
-        }
-
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error crítico en importación: {str(e)}")
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("contabilidad.ventas.importar", archivo, current_user.id, file.filename)
 
 
 @router_contabilidad_ventas.get("/get-years", response_model=list[str])
@@ -253,8 +169,16 @@ async def get_years(db: AsyncSession = Depends(get_session)):
     return result.scalars().all()
 
 
-@router_contabilidad_ventas.get("/lista", response_model=list[ResponseVentaLista])
-async def get_lista_ventas(db: AsyncSession = Depends(get_session), periodo: str = None):
+@router_contabilidad_ventas.get("/lista", response_model=PaginaOLista[ResponseVentaLista])
+async def get_lista_ventas(
+    db: AsyncSession = Depends(get_session),
+    periodo: Optional[str] = Query(None, min_length=6, max_length=6, description="Periodo AAAAMM"),
+    cliente_id: Optional[int] = Query(None),
+    is_active: Optional[str] = Query(None, pattern="^[01]$", description="'1' activas, '0' anuladas"),
+    fecha_desde: Optional[date] = Query(None, description="Filtra por fecha_emision >= fecha_desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Filtra por fecha_emision <= fecha_hasta"),
+    pag: Paginacion = Depends(paginacion_params),
+):
     query = select(
         Venta.id, Venta.periodo, Venta.fecha_emision, Venta.fecha_vencimiento, Venta.tipo_cp_codigo, Venta.serie, Venta.numero,
         GlobalCliente.tipo_documento, GlobalCliente.nro_documento, GlobalCliente.razon_social,
@@ -263,11 +187,18 @@ async def get_lista_ventas(db: AsyncSession = Depends(get_session), periodo: str
 
     if periodo:
         query = query.where(Venta.periodo == periodo)
-
-    query = query.order_by(Venta.id.asc())
-
-    result = await db.execute(query)
-    return result.mappings().all()
+    if cliente_id is not None:
+        query = query.where(Venta.cliente_id == cliente_id)
+    if is_active is not None:
+        query = query.where(Venta.is_active == is_active)
+    query = aplicar_rango(query, Venta.fecha_emision, fecha_desde, fecha_hasta)
+
+    return await paginar(
+        db, query, pag,
+        ordenes={"id": Venta.id, "fecha_emision": Venta.fecha_emision},
+        orden_defecto="id",
+        desempate=Venta.id,
+    )
 
 
 @router_contabilidad_ventas.delete("/delete", status_code=204)
@@ -1,7 +1,5 @@
 import logging
 from typing import List
-import pandas as pd
-import io
 from fastapi import UploadFile, File
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -11,6 +9,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_session
 from app.core.deps import get_current_user
+from app.core.excel import leer_excel
+from app.core.config import settings
+from app.core.jobs import ContextoJob, encolar_job, registrar_tarea
+from app.core.uploads import ArchivoSubido, recibir_archivo
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
 from app.api.v1.gerencia.inicio.SchemaGerenciaInicioProvClient import ClienteCreate, ClienteOut, ClienteUpdate, ProveedorCreate, ProveedorOut, ProveedorUpdate
 from app.api.v1.gerencia.inicio.ModelsGerenciaInicioProvClient import ClienteInicio, ProveedorInicio
 
@@ -36,56 +40,57 @@ async def crear_cliente(data: ClienteCreate, session: AsyncSession = Depends(get
             {"loc": ["body", "ruc"], "msg": "RUC duplicado", "type": "value_error"},
         ])
 
-@router_clientesGerenciaInicio.post("/import", status_code=status.HTTP_201_CREATED)
+@registrar_tarea("gerencia.clientes.importar")
+async def import_clientes_job(archivo: ArchivoSubido, session: AsyncSession, job: ContextoJob) -> dict:
+    # 2. Leer el Excel desde el archivo subido
+    df = await leer_excel(archivo.ruta)
+    
+    # 3. Normalizar nombres de columnas y limpiar
+    df.columns = [c.lower().strip() for c in df.columns]
+    
+    # Validar que existan las columnas mínimas
+    required = ["ruc", "cliente"]
+    if not all(col in df.columns for col in required):
+        raise HTTPException(status_code=400, detail= f"Columnas faltantes. Requeridas: {required}")
+
+    # Limpieza básica
+    df = df[required].dropna(subset=["ruc", "cliente"])
+    df["ruc"] = df["ruc"].astype(str).str.strip()
+
+    # 4. Validar duplicados internos en el Excel
+    if df["ruc"].duplicated().any():
+        raise HTTPException(422, "Existen RUCs duplicados dentro del archivo Excel")
+
+    # 5. Validar contra la Base de Datos (Evitar Conflictos)
+    rucs_en_excel = df["ruc"].tolist()
+    query_existentes = await session.execute(
+        select(ClienteInicio.ruc).where(ClienteInicio.ruc.in_(rucs_en_excel))
+    )
+    existentes = query_existentes.scalars().all()
+    
+    if existentes:
+        raise HTTPException(status_code=409, detail= f"Los siguientes RUCs ya existen en la BD: {', '.join(existentes)}")
+        
+    # 6. Inserción masiva
+    registros = df.to_dict(orient="records")
+    await session.execute(insert(ClienteInicio), registros)
+    await session.commit()
+
+    return {"status": "success", "message": f"Se registraron {len(registros)} clientes.", "inserted": len(registros)}
+
+
+@router_clientesGerenciaInicio.post("/import", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
 async def import_clientes(
     file: UploadFile = File(...), # Recibe el binario
-    session: AsyncSession = Depends(get_session)
+    current_user: UsuarioPrincipal = Depends(get_current_user)
 ):
     # 1. Validar extensión
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="El archivo debe ser un Excel")
 
-    try:
-        # 2. Leer el binario en memoria
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        
-        # 3. Normalizar nombres de columnas y limpiar
-        df.columns = [c.lower().strip() for c in df.columns]
-        
-        # Validar que existan las columnas mínimas
-        required = ["ruc", "cliente"]
-        if not all(col in df.columns for col in required):
-            raise HTTPException(status_code=400, detail= f"Columnas faltantes. Requeridas: {required}")
-
-        # Limpieza básica
-        df = df[required].dropna(subset=["ruc", "cliente"])
-        df["ruc"] = df["ruc"].astype(str).str.strip()
-
-        # 4. Validar duplicados internos en el Excel
-        if df["ruc"].duplicated().any():
-            raise HTTPException(422, "Existen RUCs duplicados dentro del archivo Excel")
-
-        # 5. Validar contra la Base de Datos (Evitar Conflictos)
-        rucs_en_excel = df["ruc"].tolist()
-        query_existentes = await session.execute(
-            select(ClienteInicio.ruc).where(ClienteInicio.ruc.in_(rucs_en_excel))
-        )
-        existentes = query_existentes.scalars().all()
-        
-        if existentes:
-            raise HTTPException(status_code=409, detail= f"Los siguientes RUCs ya existen en la BD: {', '.join(existentes)}")
-            
-        # 6. Inserción masiva
-        registros = df.to_dict(orient="records")
-        await session.execute(insert(ClienteInicio), registros)
-        await session.commit()
-
-        return {"status": "success", "inserted": len(registros)}
-
-    except Exception as e:
-        await session.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al procesar el archivo: {str(e)}")
+    # El procesamiento sigue en segundo plano; el avance se consulta en /jobs/{job_id}
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("gerencia.clientes.importar", archivo, current_user.id, file.filename)
 
 
 @router_clientesGerenciaInicio.get("", response_model=List[ClienteOut])
@@ -151,55 +156,58 @@ async def crear_proveedor(data: ProveedorCreate, session: AsyncSession = Depends
             {"loc": ["body", "ruc"], "msg": "RUC duplicado", "type": "value_error"},
         ])
 
-@router_proveedoresGerenciaInicio.post("/import", status_code=status.HTTP_201_CREATED)
+@registrar_tarea("gerencia.proveedores.importar")
+async def import_proveedores_job(archivo: ArchivoSubido, session: AsyncSession, job: ContextoJob) -> dict:
+    # 2. Leer el Excel desde el archivo subido
+    df = await leer_excel(archivo.ruta)
+    
+    # 3. Normalizar nombres de columnas y limpiar
+    df.columns = [c.lower().strip() for c in df.columns]
+    
+    # Validar que existan las columnas mínimas
+    required = ["ruc", "proveedor"]
+    if not all(col in df.columns for col in required):
+        raise HTTPException(status_code=400, detail= f"Columnas faltantes. Requeridas: {required}")
+
+    # Limpieza básica
+    df = df[required].dropna(subset=["ruc", "proveedor"])
+    df["ruc"] = df["ruc"].astype(str).str.strip()
+
+    # 4. Validar duplicados internos en el Excel
+    if df["ruc"].duplicated().any():
+        raise HTTPException(422, "Existen RUCs duplicados dentro del archivo Excel")
+
+    # 5. Validar contra la Base de Datos (Evitar Conflictos)
+    rucs_en_excel = df["ruc"].tolist()
+    query_existentes = await session.execute(
+        select(ProveedorInicio.ruc).where(ProveedorInicio.ruc.in_(rucs_en_excel))
+    )
+    existentes = query_existentes.scalars().all()
+
+    if existentes:
+        raise HTTPException(status_code=409, detail= f"Los siguientes RUCs ya existen en la BD: {', '.join(existentes)}")
+        
+    # 6. Inserción masiva
+    registros = df.to_dict(orient="records")
+    await session.execute(insert(ProveedorInicio), registros)
+    await session.commit()
+
+    return {"status": "success", "message": f"Se registraron {len(registros)} proveedores.", "inserted": len(registros)}
+
+
+@router_proveedoresGerenciaInicio.post("/import", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
 async def import_proveedores(
     file: UploadFile = File(...), # Recibe el binario
-    session: AsyncSession = Depends(get_session)
+    current_user: UsuarioPrincipal = Depends(get_current_user)
 ):
     # 1. Validar extensión
     if not file.filename.endswith(('.xlsx', '.xls')):
         raise HTTPException(status_code=400, detail="El archivo debe ser un Excel")
-    try:
-        # 2. Leer el binario en memoria
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        
-        # 3. Normalizar nombres de columnas y limpiar
-        df.columns = [c.lower().strip() for c in df.columns]
-        
-        # Validar que existan las columnas mínimas
-        required = ["ruc", "proveedor"]
-        if not all(col in df.columns for col in required):
-            raise HTTPException(status_code=400, detail= f"Columnas faltantes. Requeridas: {required}")
-
-        # Limpieza básica
-        df = df[required].dropna(subset=["ruc", "proveedor"])
-        df["ruc"] = df["ruc"].astype(str).str.strip()
-
-        # 4. Validar duplicados internos en el Excel
-        if df["ruc"].duplicated().any():
-            raise HTTPException(422, "Existen RUCs duplicados dentro del archivo Excel")
-
-        # 5. Validar contra la Base de Datos (Evitar Conflictos)
-        rucs_en_excel = df["ruc"].tolist()
-        query_existentes = await session.execute(
-            select(ProveedorInicio.ruc).where(ProveedorInicio.ruc.in_(rucs_en_excel))
-        )
-        existentes = query_existentes.scalars().all()
-
-        if existentes:
-            raise HTTPException(status_code=409, detail= f"Los siguientes RUCs ya existen en la BD: {', '.join(existentes)}")
-            
-        # 6. Inserción masiva
-        registros = df.to_dict(orient="records")
-        await session.execute(insert(ProveedorInicio), registros)
-        await session.commit()
 
-        return {"status": "success", "inserted": len(registros)}
-    
-    except Exception as e:
-        await session.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al procesar el archivo: {str(e)}")
+    # El procesamiento sigue en segundo plano; el avance se consulta en /jobs/{job_id}
+    archivo = await recibir_archivo(file, settings.UPLOAD_MAX_EXCEL_BYTES)
+    return await encolar_job("gerencia.proveedores.importar", archivo, current_user.id, file.filename)
+
 
 @router_proveedoresGerenciaInicio.get("", response_model=List[ProveedorOut])
 async def listar_proveedores(session: AsyncSession = Depends(get_session)):
@@ -0,0 +1 @@
+"""Punto de entrada para los esquemas de la API v1."""
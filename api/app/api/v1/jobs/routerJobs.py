@@ -0,0 +1,36 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.core.deps import get_current_user
+from app.core.jobs import listar_jobs_usuario, obtener_job
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.api.v1.jobs.schemaJobs import JobOut
+
+
+router_jobs = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+)
+
+
+@router_jobs.get("", response_model=List[JobOut])
+async def listar_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: UsuarioPrincipal = Depends(get_current_user),
+):
+    """Trabajos recientes del usuario actual, del más nuevo al más antiguo."""
+    return await listar_jobs_usuario(current_user.id, limit)
+
+
+@router_jobs.get("/{job_id}", response_model=JobOut)
+async def obtener_estado_job(
+    job_id: str,
+    current_user: UsuarioPrincipal = Depends(get_current_user),
+):
+    """Estado, progreso y resultado (o errores) de un trabajo del usuario actual."""
+    job = await obtener_job(job_id)
+    # Un trabajo ajeno se reporta igual que uno inexistente
+    if job is None or job["usuario_id"] != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trabajo no encontrado")
+    return job
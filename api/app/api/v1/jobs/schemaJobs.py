@@ -0,0 +1,17 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel
+
+
+class JobOut(BaseModel):
+    """Estado de un trabajo en segundo plano (p. ej. una importación de Excel)."""
+    id: str
+    tipo: str
+    estado: Literal["pendiente", "en_proceso", "completado", "error"]
+    progreso: float = 0
+    mensaje: Optional[str] = None
+    archivo: Optional[str] = None
+    resultado: Optional[dict[str, Any]] = None
+    errores: Optional[Any] = None
+    creado: float
+    actualizado: float
@@ -1,11 +1,16 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import TIMESTAMP, VARCHAR, BigInteger, Numeric, text
-from datetime import datetime
+from sqlalchemy import Index, TIMESTAMP, VARCHAR, BigInteger, Date, Numeric, SmallInteger, text
+from datetime import date, datetime
+from typing import Optional
 from app.core.base_class import Base
 
 class CajaChica(Base):
     __tablename__ = "cajachica"
-    __table_args__ = {"schema": "tesoreria"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_cajachica_fecha_id", "fecha", "id"),
+        {"schema": "tesoreria"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     fecha: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
@@ -14,12 +19,18 @@ class CajaChica(Base):
     ingreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     egreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     adicionales: Mapped[str] = mapped_column(VARCHAR(100), nullable=True)
+    # Saldo tras este movimiento en orden (fecha, id); lo mantiene el trigger trg_saldo_acumulado_*
+    saldo_acumulado: Mapped[Optional[float]] = mapped_column(Numeric(16, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
 
 class Bcpsoles(Base):
     __tablename__ = "bcpsoles"
-    __table_args__ = {"schema": "tesoreria"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_bcpsoles_fecha_id", "fecha", "id"),
+        {"schema": "tesoreria"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     fecha: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
@@ -28,12 +39,18 @@ class Bcpsoles(Base):
     ingreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     egreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     adicionales: Mapped[str] = mapped_column(VARCHAR(100), nullable=True)
+    # Saldo tras este movimiento en orden (fecha, id); lo mantiene el trigger trg_saldo_acumulado_*
+    saldo_acumulado: Mapped[Optional[float]] = mapped_column(Numeric(16, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
 
 class Bcpdolares(Base):
     __tablename__ = "bcpdolares"
-    __table_args__ = {"schema": "tesoreria"}
+    __table_args__ = (
+        # Orden de los listados paginados por cursor
+        Index("ix_bcpdolares_fecha_id", "fecha", "id"),
+        {"schema": "tesoreria"},
+    )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     fecha: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
@@ -42,5 +59,55 @@ class Bcpdolares(Base):
     ingreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     egreso: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     adicionales: Mapped[str] = mapped_column(VARCHAR(100), nullable=True)
+    # Saldo tras este movimiento en orden (fecha, id); lo mantiene el trigger trg_saldo_acumulado_*
+    saldo_acumulado: Mapped[Optional[float]] = mapped_column(Numeric(16, 2), nullable=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
-    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+class SaldoCuenta(Base):
+    """
+    Saldo corrido de cada cuenta de efectivo (cajachica, bcpsoles, bcpdolares).
+
+    Lo mantienen los triggers `trg_saldo_*` de cada tabla; no se escribe desde
+    la aplicación salvo a través de `tesoreria.conciliar_saldo`.
+    """
+    __tablename__ = "saldos_cuentas"
+    __table_args__ = {"schema": "tesoreria"}
+
+    cuenta: Mapped[str] = mapped_column(VARCHAR(30), primary_key=True)
+    saldo: Mapped[float] = mapped_column(Numeric(16, 2), nullable=False, server_default=text('0'))
+    movimientos: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    actualizado_en: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    conciliado_en: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+class SnapshotCobroPago(Base):
+    """
+    Documentos con saldo pendiente (ventas, compras, obligaciones eventuales y
+    fijas del mes), con las mismas reglas que la vista `reporte_cobros_pagos_actual`.
+
+    Los triggers `trg_snapshot_cobros_pagos_*` encolan los documentos afectados
+    y `tesoreria.refrescar_snapshot_cobros_pagos()` recalcula solo esos.
+    """
+    __tablename__ = "snapshot_cobros_pagos"
+    __table_args__ = (
+        Index("ix_snapshot_cobros_pagos_vencimiento", "fecha_vencimiento"),
+        {"schema": "tesoreria"},
+    )
+
+    origen: Mapped[str] = mapped_column(VARCHAR(10), primary_key=True)
+    documento_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    razon_social: Mapped[Optional[str]] = mapped_column(VARCHAR, nullable=True)
+    fecha_vencimiento: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    moneda: Mapped[Optional[str]] = mapped_column(VARCHAR(10), nullable=True)
+    monto_total: Mapped[Optional[float]] = mapped_column(Numeric(14, 2), nullable=True)
+    monto_pagado: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+
+class SnapshotCobroPagoEstado(Base):
+    """Fila única (id = 1) con el mes calculado y la hora del último refresco."""
+    __tablename__ = "snapshot_cobros_pagos_estado"
+    __table_args__ = {"schema": "tesoreria"}
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    periodo: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    refrescado_en: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    completo_en: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 
+from app.core.cache import cache_respuesta
 from app.core.deps import get_current_user
 from app.core.db import get_session
 from app.api.v1.tesoreria.schemas.SchemaTesoreriaCntPorCobrar import CuentasPorCobrarMensualRead, CuentasPorCobrarDetalleOnetoOneReadVentas, CuentasPorCobrarDetalleOnetoOneReadCajaVentas, RegistrarCobro, UpdateFechaPagoRetencionDetraccionSchema
@@ -24,6 +25,11 @@ router_tesoreria_cuentasporcobrar = APIRouter(
 
 
 @router_tesoreria_cuentasporcobrar.get("/resumen-mensual", response_model=List[CuentasPorCobrarMensualRead])
+@cache_respuesta(
+    "cxc.resumen-mensual",
+    List[CuentasPorCobrarMensualRead],
+    tablas=["contabilidad.ventas", "contabilidad.caja_movimientos_ventas", "administracion.global_clientes"],
+)
 async def get_resumen(year: str, db: AsyncSession = Depends(get_session)):
     periodo_like = f"{year}%" 
 
@@ -5,6 +5,7 @@ from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
+from app.core.cache import cache_respuesta
 from app.core.deps import get_current_user
 from app.core.db import get_session
 from app.api.v1.tesoreria.schemas.SchemaTesoreriaCntPorPagar import (
@@ -41,6 +42,11 @@ router_cuentasporpagar = APIRouter(
 )
 
 @router_cuentasporpagar.get("/resumen-mensual", response_model=List[ObligacionRead])
+@cache_respuesta(
+    "cxp.resumen-mensual",
+    List[ObligacionRead],
+    tablas=["tesoreria.obligaciones_fijas", "tesoreria.registros_pagos"],
+)
 async def get_resumen(mes: date, db: AsyncSession = Depends(get_session)):
     # Seleccionamos la obligación y la suma de sus pagos en ese mes
     stmt = (
@@ -223,6 +229,11 @@ async def actualizar_obligacion(
 
 # routers de cuentas por pagar proveedores
 @router_cuentasporpagar.get("/resumen-proveedores", response_model=List[ResponseCuentasPorPagarProveedoresLista])
+@cache_respuesta(
+    "cxp.resumen-proveedores",
+    List[ResponseCuentasPorPagarProveedoresLista],
+    tablas=["contabilidad.compras", "contabilidad.caja_movimientos_compras", "administracion.global_proveedores"],
+)
 async def get_resumen(year: str, db: AsyncSession = Depends(get_session)):
     periodo_like = f"{year}%" 
 
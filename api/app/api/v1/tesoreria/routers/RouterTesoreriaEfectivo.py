@@ -1,14 +1,25 @@
 
+import asyncio
+import logging
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import delete, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
 
 
+from app.core import db as db_module
+from app.core.cache import cache_respuesta
+from app.core.config import settings
 from app.core.deps import get_current_user
 from app.core.db import get_session
-from app.api.v1.tesoreria.schemas.SchemaTesoreriaEfectivo import DeleteRequest, EfectivoOut, SaldosIndependientes, SyncPayload, SyncResponse, ListasUnicasResponse, ReporteCobroPagoActual
-from app.api.v1.tesoreria.models.ModelsTesoreriaEfectivo import CajaChica, Bcpsoles, Bcpdolares
+from app.core.pagination import PaginaOLista, Paginacion, aplicar_rango, paginacion_params, paginar
+from app.api.v1.tesoreria.schemas.SchemaTesoreriaEfectivo import ConciliacionSaldo, DeleteRequest, EfectivoOut, SaldosIndependientes, SyncPayload, SyncResponse, ListasUnicasResponse, ReporteCobroPagoActual, ReporteCobroPagoSnapshot
+from app.api.v1.tesoreria.models.ModelsTesoreriaEfectivo import CajaChica, Bcpsoles, Bcpdolares, SaldoCuenta, SnapshotCobroPago, SnapshotCobroPagoEstado
+
+logger = logging.getLogger("app.tesoreria")
 
 # router caja chica
 router_cajachica = APIRouter(
@@ -17,11 +28,25 @@ router_cajachica = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
-@router_cajachica.get("", response_model=list[EfectivoOut])
-async def get_caja_chica(session: AsyncSession = Depends(get_session)):
-    stmt = select(CajaChica).order_by(CajaChica.id)
-    result = await session.execute(stmt)
-    return result.scalars().all()
+@router_cajachica.get("", response_model=PaginaOLista[EfectivoOut])
+async def get_caja_chica(
+    fecha_desde: Optional[datetime] = Query(None),
+    fecha_hasta: Optional[datetime] = Query(None),
+    referencia: Optional[str] = Query(None),
+    pag: Paginacion = Depends(paginacion_params),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(CajaChica)
+    if referencia is not None:
+        stmt = stmt.where(CajaChica.referencia == referencia)
+    stmt = aplicar_rango(stmt, CajaChica.fecha, fecha_desde, fecha_hasta)
+    return await paginar(
+        session, stmt, pag,
+        ordenes={"id": CajaChica.id, "fecha": CajaChica.fecha},
+        orden_defecto="id",
+        desempate=CajaChica.id,
+        entidad=True,
+    )
 
 @router_cajachica.post("", response_model=SyncResponse)
 async def sync_caja_chica(
@@ -91,27 +116,138 @@ async def delete_multiple_caja_chica(
 
 @router_cajachica.get("/saldos_independientes", response_model=SaldosIndependientes)
 async def obtener_saldos_separados(session: AsyncSession = Depends(get_session)):
-    query = text("SELECT * FROM tesoreria.v_saldos_independientes;")
-    result = await session.execute(query)
-    row = result.mappings().first()
-    
-    # Si por alguna razón la vista no devuelve nada (muy raro), enviamos ceros
-    if not row:
-        return {
-            "saldo_caja_chica": 0.0, 
-            "saldo_bcp_soles": 0.0, 
-            "saldo_bcp_dolares": 0.0
-        }
-        
-    return row
+    # Saldos corridos que mantienen los triggers: lectura de 3 filas, sin
+    # recorrer los libros (ver tesoreria.saldos_cuentas)
+    result = await session.execute(select(SaldoCuenta.cuenta, SaldoCuenta.saldo))
+    saldos = dict(result.all())
+    return {
+        "saldo_caja_chica": saldos.get("cajachica", 0.0),
+        "saldo_bcp_soles": saldos.get("bcpsoles", 0.0),
+        "saldo_bcp_dolares": saldos.get("bcpdolares", 0.0),
+    }
+
+
+async def conciliar_saldos(session: AsyncSession, antiguedad_segundos: int = 0) -> list[dict]:
+    """
+    Recalcula los saldos corridos desde los libros y corrige los que difieren.
+
+    Cada cuenta se concilia en su propia transacción. Con `antiguedad_segundos`
+    se omiten las cuentas conciliadas hace menos de ese tiempo (así varios
+    workers pueden llamarla sin repetir el recorrido).
+    """
+    cuentas = (await session.execute(select(SaldoCuenta.cuenta).order_by(SaldoCuenta.cuenta))).scalars().all()
+    await session.commit()
+
+    resultados = []
+    for cuenta in cuentas:
+        fila = (await session.execute(
+            text("SELECT * FROM tesoreria.conciliar_saldo(:cuenta, make_interval(secs => :antiguedad))"),
+            {"cuenta": cuenta, "antiguedad": antiguedad_segundos},
+        )).mappings().first()
+        await session.commit()
+        if fila is None:
+            continue
+
+        diferencia = float(fila["saldo_calculado"] - fila["saldo_anterior"])
+        if diferencia:
+            logger.warning(f"Saldo de {cuenta} corregido en conciliación: diferencia {diferencia:.2f}")
+        resultados.append({
+            "cuenta": cuenta,
+            "saldo_anterior": fila["saldo_anterior"],
+            "saldo_calculado": fila["saldo_calculado"],
+            "diferencia": diferencia,
+            "movimientos": fila["movimientos_calculados"],
+        })
+    return resultados
+
+
+async def conciliacion_saldos_periodica() -> None:
+    """
+    Tarea de fondo cada `TESORERIA_CONCILIACION_INTERVAL_SECONDS`: concilia los
+    saldos y aplica la cola del snapshot de cobros/pagos (si nadie lo consulta,
+    la cola no crece sin límite y el cambio de mes se recalcula igual).
+    """
+    intervalo = settings.TESORERIA_CONCILIACION_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            async with db_module.AsyncSessionLocal() as session:
+                await conciliar_saldos(session, antiguedad_segundos=intervalo // 2)
+                await session.execute(text("SELECT tesoreria.refrescar_snapshot_cobros_pagos()"))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error en la conciliación de saldos: {e}")
+
+
+@router_cajachica.post("/saldos_independientes/conciliar", response_model=list[ConciliacionSaldo])
+async def conciliar_saldos_endpoint(session: AsyncSession = Depends(get_session)):
+    try:
+        return await conciliar_saldos(session)
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al conciliar saldos: {str(e)}")
 
 @router_cajachica.get("/reporte-cobro-pago-actual", response_model=list[ReporteCobroPagoActual])
+@cache_respuesta(
+    "cajachica.reporte-cobro-pago-actual",
+    list[ReporteCobroPagoActual],
+    tablas=[
+        "contabilidad.ventas", "contabilidad.caja_movimientos_ventas",
+        "contabilidad.compras", "contabilidad.caja_movimientos_compras",
+        "tesoreria.obligaciones_fijas", "tesoreria.registros_pagos",
+        "tesoreria.obligaciones_eventuales", "tesoreria.registros_pagos_eventuales",
+        "administracion.global_clientes", "administracion.global_proveedores",
+    ],
+)
 async def reporte_cobro_pago_actual(session: AsyncSession = Depends(get_session)):
     query = text("SELECT * FROM reporte_cobros_pagos_actual;")
     result = await session.execute(query)
     return result.mappings().all()
 
 
+@router_cajachica.get("/reporte-cobro-pago-actual/snapshot", response_model=ReporteCobroPagoSnapshot)
+async def reporte_cobro_pago_snapshot(
+    refrescar: bool = Query(True, description="Aplica antes los cambios pendientes (costo proporcional a lo modificado)"),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Mismo reporte que `/reporte-cobro-pago-actual`, leído de
+    `tesoreria.snapshot_cobros_pagos` en lugar de recalcular la vista.
+    Con `refrescar=false` devuelve el último estado sin esperar el refresco;
+    `actualizado_en` indica de cuándo es.
+    """
+    try:
+        if refrescar:
+            await session.execute(text("SELECT tesoreria.refrescar_snapshot_cobros_pagos()"))
+            await session.commit()
+
+        estado = await session.get(SnapshotCobroPagoEstado, 1)
+        result = await session.execute(
+            select(SnapshotCobroPago).order_by(SnapshotCobroPago.fecha_vencimiento.asc())
+        )
+    except SQLAlchemyError as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al leer el snapshot de cobros y pagos: {str(e)}")
+
+    return {
+        "actualizado_en": estado.refrescado_en if estado else None,
+        "completo_en": estado.completo_en if estado else None,
+        "periodo": estado.periodo if estado else None,
+        "items": [
+            {
+                "razon_social": fila.razon_social,
+                "fecha_vencimiento": fila.fecha_vencimiento,
+                "moneda": fila.moneda,
+                "monto_total": fila.monto_total,
+                "monto_pagado": fila.monto_pagado,
+                "tabla": fila.origen,
+                "is_check": True,
+            }
+            for fila in result.scalars().all()
+        ],
+    }
+
+
 @router_cajachica.get("/resumen_columnas", response_model=ListasUnicasResponse)
 async def get_datos_resumen_caja_chica(db: AsyncSession = Depends(get_session)):
     desc_cte = (
@@ -175,11 +311,25 @@ router_bcpsoles = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
-@router_bcpsoles.get("", response_model=list[EfectivoOut])
-async def get_bcpsoles(session: AsyncSession = Depends(get_session)):
-    stmt = select(Bcpsoles).order_by(Bcpsoles.id)
-    result = await session.execute(stmt)
-    return result.scalars().all()
+@router_bcpsoles.get("", response_model=PaginaOLista[EfectivoOut])
+async def get_bcpsoles(
+    fecha_desde: Optional[datetime] = Query(None),
+    fecha_hasta: Optional[datetime] = Query(None),
+    referencia: Optional[str] = Query(None),
+    pag: Paginacion = Depends(paginacion_params),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(Bcpsoles)
+    if referencia is not None:
+        stmt = stmt.where(Bcpsoles.referencia == referencia)
+    stmt = aplicar_rango(stmt, Bcpsoles.fecha, fecha_desde, fecha_hasta)
+    return await paginar(
+        session, stmt, pag,
+        ordenes={"id": Bcpsoles.id, "fecha": Bcpsoles.fecha},
+        orden_defecto="id",
+        desempate=Bcpsoles.id,
+        entidad=True,
+    )
 
 
 @router_bcpsoles.post("", response_model=SyncResponse)
@@ -309,11 +459,25 @@ router_bcpdolares = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
-@router_bcpdolares.get("", response_model=list[EfectivoOut])
-async def get_bcpdolares(session: AsyncSession = Depends(get_session)):
-    stmt = select(Bcpdolares).order_by(Bcpdolares.id)
-    result = await session.execute(stmt)
-    return result.scalars().all()
+@router_bcpdolares.get("", response_model=PaginaOLista[EfectivoOut])
+async def get_bcpdolares(
+    fecha_desde: Optional[datetime] = Query(None),
+    fecha_hasta: Optional[datetime] = Query(None),
+    referencia: Optional[str] = Query(None),
+    pag: Paginacion = Depends(paginacion_params),
+    session: AsyncSession = Depends(get_session),
+):
+    stmt = select(Bcpdolares)
+    if referencia is not None:
+        stmt = stmt.where(Bcpdolares.referencia == referencia)
+    stmt = aplicar_rango(stmt, Bcpdolares.fecha, fecha_desde, fecha_hasta)
+    return await paginar(
+        session, stmt, pag,
+        ordenes={"id": Bcpdolares.id, "fecha": Bcpdolares.fecha},
+        orden_defecto="id",
+        desempate=Bcpdolares.id,
+        entidad=True,
+    )
 
 
 @router_bcpdolares.post("", response_model=SyncResponse)
@@ -26,6 +26,8 @@ class SyncResponse(BaseModel):
 
 class EfectivoOut(EfectivoBase):
     id: int
+    # Saldo de la cuenta después de este movimiento (orden fecha, id), calculado en la base
+    saldo_acumulado: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -42,6 +44,13 @@ class SaldosIndependientes(BaseModel):
     class Config:
         from_attributes = True
 
+class ConciliacionSaldo(BaseModel):
+    cuenta: str
+    saldo_anterior: float
+    saldo_calculado: float
+    diferencia: float
+    movimientos: int
+
 class ListasUnicasResponse(BaseModel):
     descripciones: List[str]
     referencias: List[str]
@@ -60,4 +69,11 @@ class ReporteCobroPagoActual(BaseModel):
     is_check: bool
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ReporteCobroPagoSnapshot(BaseModel):
+    # Hora del último refresco aplicado y del último recálculo completo
+    actualizado_en: Optional[datetime] = None
+    completo_en: Optional[datetime] = None
+    periodo: Optional[date] = None
+    items: List[ReporteCobroPagoActual]
\ No newline at end of file
@@ -0,0 +1,82 @@
+# app/conciliar_stock.py
+"""
+Reconstruye el saldo por lote de almacén desde ingresos y salidas.
+
+    python -m app.conciliar_stock              # material y mercadería
+    python -m app.conciliar_stock material
+    python -m app.conciliar_stock --comparar   # solo compara con las vistas antiguas
+
+Corrige diferencias si alguna escritura no pasó por los endpoints (SQL
+manual, restauraciones) y muestra cuántos lotes cambiaron. También
+reconstruye en Redis el conjunto de productos bajo su límite.
+
+Con `--comparar` no modifica nada: lista los lotes y productos bajo su
+límite en los que el saldo por lote difiere de las vistas
+`almacen.v_stock_actual_*` (mientras sigan existiendo en la base).
+"""
+import asyncio
+import logging
+import sys
+
+# Importar la app registra todos los modelos (las relaciones entre ellos se resuelven por nombre)
+import app.main  # noqa: F401
+from app.core import db as db_module
+from app.core.db import dispose_db, init_db
+from app.api.v1.almacen.catalogos.ServiceAlmacenAlertas import reconstruir
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import INVENTARIOS, comparar_con_vistas, recalcular_lotes
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+logger = logging.getLogger("app.conciliar_stock")
+
+
+async def comparar(tipos: list[str]) -> bool:
+    """Registra las diferencias con las vistas antiguas; True si no hay ninguna."""
+    iguales = True
+    for tipo in tipos:
+        async with db_module.AsyncSessionLocal() as session:
+            diferencias = await comparar_con_vistas(session, tipo)
+        if diferencias is None:
+            logger.info(f"Stock de {tipo}: las vistas antiguas ya no existen, nada que comparar.")
+            continue
+        for fila in diferencias["detallado"]:
+            logger.warning(
+                f"Lote {tipo} {fila['uuid_registro']}/{fila['serie']}: "
+                f"tabla {fila['stock_tabla']} vs. vista {fila['stock_vista']}"
+            )
+        for fila in diferencias["limite"]:
+            logger.warning(
+                f"Bajo límite {tipo} {fila['codigo']}: tabla {fila['stock_tabla']} vs. vista {fila['stock_vista']}"
+            )
+        iguales = iguales and not diferencias["detallado"] and not diferencias["limite"]
+        logger.info(
+            f"Stock de {tipo}: {len(diferencias['detallado'])} lotes y "
+            f"{len(diferencias['limite'])} productos bajo límite difieren de las vistas."
+        )
+    return iguales
+
+
+async def main(tipos: list[str], solo_comparar: bool = False) -> bool:
+    init_db()
+    try:
+        if solo_comparar:
+            return await comparar(tipos)
+        for tipo in tipos:
+            async with db_module.AsyncSessionLocal() as session:
+                corregidos = await recalcular_lotes(session, tipo)
+                await session.commit()
+                bajo_limite = await reconstruir(session, tipo)
+            logger.info(f"Stock de {tipo}: {corregidos} lotes corregidos, {len(bajo_limite)} productos bajo su límite.")
+        return True
+    finally:
+        await dispose_db()
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    solo_comparar = "--comparar" in argumentos
+    tipos = [a for a in argumentos if a != "--comparar"] or list(INVENTARIOS)
+    invalidos = [t for t in tipos if t not in INVENTARIOS]
+    if invalidos:
+        sys.exit(f"Tipo desconocido: {', '.join(invalidos)}. Opciones: {', '.join(INVENTARIOS)}")
+    if not asyncio.run(main(tipos, solo_comparar)):
+        sys.exit(1)
@@ -0,0 +1,332 @@
+# app/core/blobs.py
+"""
+Módulo del almacén de imágenes fuera de Postgres, direccionado por contenido.
+
+Las imágenes ya no se guardan como `LargeBinary` en las filas (inflaban
+tablas, WAL y backups, y la misma foto de producto se repetía en cada
+línea de ingreso). Los bytes viven en un almacén de blobs y las filas
+guardan solo su SHA-256 en hexadecimal, que sirve a la vez de id del
+blob, de ETag y de clave de la caché de miniaturas:
+
+- Guardar un contenido que ya existe no lo duplica: se renueva su fecha de
+  uso y se devuelve el mismo hash.
+- Los blobs son inmutables; cambiar una imagen es apuntar la fila a otro
+  hash. Como varias filas pueden compartir un blob, borrar una fila no
+  borra su imagen: `python -m app.purgar_blobs` elimina los blobs que ya no
+  referencia ninguna tabla.
+
+Backends (`BLOBS_BACKEND`):
+
+- `local`: archivos en `BLOBS_DIR/{sha256[:2]}/{sha256}` con escritura atómica.
+- `s3`: cualquier servicio compatible con S3 (AWS, MinIO, R2...). Requiere
+  `boto3`, que solo se importa al elegir este backend.
+- `memoria`: diccionario del proceso, para pruebas.
+
+Las operaciones de disco o red son síncronas y los métodos async las
+ejecutan en un hilo; las versiones `*_sync` las usan las migraciones de
+Alembic, que no corren en el event loop.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from app.core.config import settings
+from app.core.uploads import TAMANIO_TROZO, ArchivoSubido
+
+logger = logging.getLogger("app.blobs")
+
+Origen = Union[bytes, Path]
+
+
+class BlobNoEncontrado(LookupError):
+    """El hash no corresponde a ningún blob del almacén."""
+
+
+class AlmacenBlobs(ABC):
+    """
+    Interfaz de un almacén de blobs por SHA-256.
+
+    Cada backend implementa las primitivas síncronas; la deduplicación y
+    las versiones async son comunes.
+    """
+
+    @abstractmethod
+    def _renovar(self, sha256: str) -> bool:
+        """Marca el blob como usado ahora; False si no existe."""
+
+    @abstractmethod
+    def _escribir(self, sha256: str, origen: Origen) -> None:
+        """Guarda `origen` (bytes o ruta de un archivo) bajo `sha256`."""
+
+    @abstractmethod
+    def leer_sync(self, sha256: str) -> bytes:
+        """
+        Devuelve el contenido del blob.
+
+        Raises:
+            BlobNoEncontrado: Si el blob no existe.
+        """
+
+    @abstractmethod
+    def borrar_sync(self, sha256: str) -> None:
+        """Elimina el blob; no falla si ya no existe."""
+
+    @abstractmethod
+    def listar_sync(self) -> Iterator[tuple[str, float]]:
+        """Recorre los blobs como pares (sha256, último uso en epoch)."""
+
+    def _guardar(self, sha256: str, origen: Origen) -> str:
+        # Renovar antes de escribir: `purgar_huerfanos` no borra un blob
+        # recién reutilizado aunque la fila que lo referencia aún no se confirme
+        if not self._renovar(sha256):
+            self._escribir(sha256, origen)
+        return sha256
+
+    def guardar_sync(self, data: bytes) -> str:
+        """Guarda `data` si no existe y devuelve su SHA-256."""
+        return self._guardar(hashlib.sha256(data).hexdigest(), data)
+
+    def guardar_archivo_sync(self, archivo: ArchivoSubido) -> str:
+        """Como `guardar_sync`, copiando desde el almacén de subidas sin cargarlo en memoria."""
+        return self._guardar(archivo.sha256, archivo.ruta)
+
+    async def guardar(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.guardar_sync, data)
+
+    async def guardar_archivo(self, archivo: ArchivoSubido) -> str:
+        return await asyncio.to_thread(self.guardar_archivo_sync, archivo)
+
+    async def leer(self, sha256: str) -> bytes:
+        return await asyncio.to_thread(self.leer_sync, sha256)
+
+    async def borrar(self, sha256: str) -> None:
+        await asyncio.to_thread(self.borrar_sync, sha256)
+
+
+class AlmacenBlobsLocal(AlmacenBlobs):
+    """Blobs como archivos en un directorio local (o un volumen compartido)."""
+
+    def __init__(self, directorio: str):
+        self.directorio = Path(directorio)
+
+    def _ruta(self, sha256: str) -> Path:
+        return self.directorio / sha256[:2] / sha256
+
+    def _renovar(self, sha256: str) -> bool:
+        try:
+            os.utime(self._ruta(sha256))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _escribir(self, sha256: str, origen: Origen) -> None:
+        destino = self._ruta(sha256)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: otro worker nunca ve un blob a medias
+        fd, tmp = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(origen, Path):
+                    with open(origen, "rb") as src:
+                        shutil.copyfileobj(src, f, TAMANIO_TROZO)
+                else:
+                    f.write(origen)
+            os.replace(tmp, destino)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def leer_sync(self, sha256: str) -> bytes:
+        try:
+            return self._ruta(sha256).read_bytes()
+        except FileNotFoundError:
+            raise BlobNoEncontrado(sha256) from None
+
+    def borrar_sync(self, sha256: str) -> None:
+        try:
+            os.remove(self._ruta(sha256))
+        except FileNotFoundError:
+            pass
+
+    def listar_sync(self) -> Iterator[tuple[str, float]]:
+        if not self.directorio.is_dir():
+            return
+        for directorio in self.directorio.iterdir():
+            if not directorio.is_dir():
+                continue
+            for entrada in os.scandir(directorio):
+                if entrada.name.endswith(".tmp"):
+                    continue
+                try:
+                    yield entrada.name, entrada.stat().st_mtime
+                except FileNotFoundError:
+                    pass
+
+
+class AlmacenBlobsS3(AlmacenBlobs):
+    """Blobs como objetos de un bucket compatible con S3 (`boto3`)."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefijo: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+    ):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("BLOBS_BACKEND='s3' requiere instalar boto3") from e
+        # El cliente de boto3 es seguro entre hilos
+        self._s3 = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefijo = prefijo
+
+    def _clave(self, sha256: str) -> str:
+        return f"{self.prefijo}{sha256[:2]}/{sha256}"
+
+    @staticmethod
+    def _no_existe(error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def _renovar(self, sha256: str) -> bool:
+        clave = self._clave(sha256)
+        try:
+            # Copia sobre sí mismo: actualiza LastModified sin transferir el contenido
+            self._s3.copy_object(
+                Bucket=self.bucket,
+                Key=clave,
+                CopySource={"Bucket": self.bucket, "Key": clave},
+                MetadataDirective="REPLACE",
+            )
+        except self._client_error as e:
+            if self._no_existe(e):
+                return False
+            raise
+        return True
+
+    def _escribir(self, sha256: str, origen: Origen) -> None:
+        if isinstance(origen, Path):
+            # upload_file sube por partes los archivos grandes
+            self._s3.upload_file(str(origen), self.bucket, self._clave(sha256))
+        else:
+            self._s3.put_object(Bucket=self.bucket, Key=self._clave(sha256), Body=origen)
+
+    def leer_sync(self, sha256: str) -> bytes:
+        try:
+            respuesta = self._s3.get_object(Bucket=self.bucket, Key=self._clave(sha256))
+        except self._client_error as e:
+            if self._no_existe(e):
+                raise BlobNoEncontrado(sha256) from None
+            raise
+        return respuesta["Body"].read()
+
+    def borrar_sync(self, sha256: str) -> None:
+        self._s3.delete_object(Bucket=self.bucket, Key=self._clave(sha256))
+
+    def listar_sync(self) -> Iterator[tuple[str, float]]:
+        paginas = self._s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefijo)
+        for pagina in paginas:
+            for objeto in pagina.get("Contents", []):
+                yield objeto["Key"].rsplit("/", 1)[-1], objeto["LastModified"].timestamp()
+
+
+class AlmacenBlobsMemoria(AlmacenBlobs):
+    """Blobs en un diccionario del proceso; sustituto del almacén real en pruebas."""
+
+    def __init__(self):
+        self._blobs: dict[str, tuple[bytes, float]] = {}
+
+    def _renovar(self, sha256: str) -> bool:
+        if sha256 not in self._blobs:
+            return False
+        self._blobs[sha256] = (self._blobs[sha256][0], time.time())
+        return True
+
+    def _escribir(self, sha256: str, origen: Origen) -> None:
+        data = origen.read_bytes() if isinstance(origen, Path) else bytes(origen)
+        self._blobs[sha256] = (data, time.time())
+
+    def leer_sync(self, sha256: str) -> bytes:
+        try:
+            return self._blobs[sha256][0]
+        except KeyError:
+            raise BlobNoEncontrado(sha256) from None
+
+    def borrar_sync(self, sha256: str) -> None:
+        self._blobs.pop(sha256, None)
+
+    def listar_sync(self) -> Iterator[tuple[str, float]]:
+        for sha256, (_, usado) in list(self._blobs.items()):
+            yield sha256, usado
+
+
+def crear_almacen_blobs() -> AlmacenBlobs:
+    """Construye el almacén indicado por `BLOBS_BACKEND`."""
+    if settings.BLOBS_BACKEND == "s3":
+        if not settings.BLOBS_S3_BUCKET:
+            raise RuntimeError("BLOBS_BACKEND='s3' requiere BLOBS_S3_BUCKET")
+        return AlmacenBlobsS3(
+            bucket=settings.BLOBS_S3_BUCKET,
+            prefijo=settings.BLOBS_S3_PREFIX,
+            endpoint_url=settings.BLOBS_S3_ENDPOINT_URL,
+            region=settings.BLOBS_S3_REGION,
+            access_key=settings.BLOBS_S3_ACCESS_KEY,
+            secret_key=settings.BLOBS_S3_SECRET_KEY,
+        )
+    if settings.BLOBS_BACKEND == "memoria":
+        return AlmacenBlobsMemoria()
+    return AlmacenBlobsLocal(settings.BLOBS_DIR)
+
+
+blob_store = crear_almacen_blobs()
+
+
+async def guardar_blob(origen: Union[bytes, ArchivoSubido, None]) -> Optional[str]:
+    """Guarda una imagen (bytes o archivo subido) y devuelve su SHA-256; None si no hay imagen."""
+    if origen is None:
+        return None
+    if isinstance(origen, ArchivoSubido):
+        return await blob_store.guardar_archivo(origen)
+    return await blob_store.guardar(origen)
+
+
+def _purgar_huerfanos(referenciados: set[str], gracia: float) -> int:
+    limite = time.time() - gracia
+    borrados = 0
+    for sha256, usado in list(blob_store.listar_sync()):
+        if sha256 not in referenciados and usado < limite:
+            blob_store.borrar_sync(sha256)
+            borrados += 1
+    return borrados
+
+
+async def purgar_huerfanos(referenciados: set[str], gracia: Optional[float] = None) -> int:
+    """
+    Elimina los blobs que no están en `referenciados` y llevan más de
+    `gracia` segundos sin usarse (por defecto `BLOBS_PURGA_GRACIA_SECONDS`).
+
+    La gracia cubre los blobs ya guardados cuya fila aún no se confirmó.
+    Devuelve cuántos se eliminaron.
+    """
+    return await asyncio.to_thread(_purgar_huerfanos, referenciados, gracia or settings.BLOBS_PURGA_GRACIA_SECONDS)
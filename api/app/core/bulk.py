@@ -0,0 +1,60 @@
+# app/core/bulk.py
+"""
+Módulo de inserciones masivas con `INSERT ... RETURNING`.
+
+`session.add_all()` + `commit()` + un `refresh()` por fila cuesta una ida
+y vuelta a Postgres por registro solo para leer el id y los valores por
+defecto del servidor (`created_at`). `insertar_retornando` manda todas
+las filas como un INSERT de varias filas (el "insertmanyvalues" de
+SQLAlchemy 2.0 arma un solo `VALUES (...), (...)` por lote de hasta
+`insertmanyvalues_page_size` filas) y construye las entidades desde el
+`RETURNING`, en el mismo orden de entrada.
+
+Uso típico en un router:
+
+    registros = await insertar_retornando(
+        session, IngresoMaterial, filas,
+        calculados={"tiene_imagen": lambda f: f["image_sha256"] is not None},
+    )
+    await session.commit()
+    return registros
+
+Las columnas diferidas no vuelven en el RETURNING.
+"""
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+M = TypeVar("M")
+
+
+async def insertar_retornando(
+    session: AsyncSession,
+    modelo: type[M],
+    filas: Sequence[dict],
+    calculados: Optional[dict[str, Callable[[dict], Any]]] = None,
+) -> list[M]:
+    """
+    Inserta `filas` en la tabla de `modelo` y devuelve las entidades persistidas.
+
+    Args:
+        session: Sesión de la transacción; el commit queda a cargo del llamador.
+        modelo: Clase mapeada de destino.
+        filas: Un dict por registro, todos con las mismas claves.
+        calculados: Atributos que el RETURNING no trae (column_property,
+            p. ej. `tiene_imagen`) y que se deducen de la fila de entrada,
+            para no consultarlos después del INSERT.
+
+    Returns:
+        Entidades en el mismo orden que `filas`, ya en el identity map de la sesión.
+    """
+    if not filas:
+        return []
+    stmt = insert(modelo).returning(modelo, sort_by_parameter_order=True)
+    registros = list((await session.scalars(stmt, list(filas))).all())
+    for registro, fila in zip(registros, filas):
+        for atributo, calcular in (calculados or {}).items():
+            set_committed_value(registro, atributo, calcular(fila))
+    return registros
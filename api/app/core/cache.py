@@ -0,0 +1,100 @@
+# app/core/cache.py
+"""
+Módulo de caché de respuestas en Redis (read-through).
+
+Pensado para endpoints de solo lectura con agregaciones pesadas (GROUP BY
+sobre ventas/compras y sus movimientos de caja). La respuesta ya
+serializada se guarda en Redis y las lecturas siguientes se sirven sin
+tocar Postgres ni volver a validar con Pydantic.
+
+Invalidación por tablas: cada tabla tiene un contador de versión
+(`cache:ver:esquema.tabla`) que el bridge de `global_db_changes`
+incrementa cuando la tabla cambia. La clave de la respuesta incluye las
+versiones de las tablas de las que depende, así que un cambio hace que
+la siguiente lectura use otra clave; las entradas viejas expiran por TTL.
+Si la tabla cambia mientras se calcula una respuesta, esta queda guardada
+bajo las versiones anteriores y nunca se sirve.
+
+Uso:
+
+    @router.get("/resumen-mensual", response_model=List[ResumenRead])
+    @cache_respuesta("cxc.resumen-mensual", List[ResumenRead], tablas=["contabilidad.ventas"])
+    async def get_resumen(year: str, db: AsyncSession = Depends(get_session)):
+        ...
+"""
+import functools
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.realtime import CACHE_VERSION_GLOBAL, CACHE_VERSION_PREFIX, redis_client
+
+logger = logging.getLogger("app.cache")
+
+_TIPOS_PARAMETRO = (str, int, float, bool, date, datetime, Decimal, type(None))
+
+
+def _clave(nombre: str, params: dict, versiones: list[Optional[str]]) -> str:
+    crudo = json.dumps([params, versiones], sort_keys=True, default=str)
+    return f"cache:resp:{nombre}:{hashlib.sha1(crudo.encode('utf-8')).hexdigest()}"
+
+
+def _respuesta(contenido: str, estado: str) -> Response:
+    return Response(content=contenido, media_type="application/json", headers={"X-Cache": estado})
+
+
+def cache_respuesta(nombre: str, esquema: Any, tablas: list[str], ttl: Optional[int] = None):
+    """
+    Decorador de endpoints GET que cachea la respuesta serializada.
+
+    Args:
+        nombre: Identificador único del endpoint dentro de la caché.
+        esquema: El mismo tipo que el `response_model` del endpoint.
+        tablas: "esquema.tabla" de las que depende el resultado.
+        ttl: Segundos de vida de cada entrada (por defecto `RESPONSE_CACHE_TTL_SECONDS`).
+
+    La clave se arma con los parámetros simples del endpoint (query/path);
+    la sesión de base de datos y demás dependencias se ignoran.
+    """
+    adaptador = TypeAdapter(esquema)
+    claves_version = [CACHE_VERSION_PREFIX + CACHE_VERSION_GLOBAL] + [CACHE_VERSION_PREFIX + t for t in tablas]
+
+    def decorador(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            params = {k: v for k, v in kwargs.items() if isinstance(v, _TIPOS_PARAMETRO)}
+            clave = None
+            try:
+                versiones = await redis_client.mget(claves_version)
+                clave = _clave(nombre, params, versiones)
+                cacheado = await redis_client.get(clave)
+                if cacheado is not None:
+                    return _respuesta(cacheado, "HIT")
+            except RedisError as e:
+                logger.warning(f"Caché de respuestas no disponible para {nombre}: {e}")
+
+            resultado = await func(*args, **kwargs)
+            contenido = adaptador.dump_json(
+                adaptador.validate_python(resultado, from_attributes=True)
+            ).decode("utf-8")
+
+            if clave is not None:
+                try:
+                    await redis_client.set(clave, contenido, ex=ttl or settings.RESPONSE_CACHE_TTL_SECONDS)
+                except RedisError as e:
+                    logger.warning(f"No se pudo guardar en caché {nombre}: {e}")
+            return _respuesta(contenido, "MISS")
+
+        return wrapper
+    return decorador
@@ -6,6 +6,8 @@ Gestiona la carga de variables de entorno y define la configuración
 general de la aplicación, incluyendo la conexión a la base de datos
 y los parámetros de seguridad JWT.
 """
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -26,6 +28,41 @@ class ConfigSettings(BaseSettings):
     JWT_ALG: str = Field(..., description="Algoritmo de cifrado utilizado para los tokens JWT.")
     JWT_EXPIRE_MINUTES: int = Field(..., description="Tiempo de expiración de los tokens JWT en minutos.")
     REDIS_URL: str = Field(..., description="URL de Redis")
+    AUTH_CACHE_MAX_SIZE: int = Field(1024, description="Número máximo de usuarios autenticados en la caché en memoria de cada proceso.")
+    AUTH_CACHE_LOCAL_TTL_SECONDS: float = Field(15.0, description="TTL en segundos de la caché en memoria de usuarios autenticados.")
+    AUTH_CACHE_REDIS_TTL_SECONDS: int = Field(300, description="TTL en segundos de la caché de usuarios autenticados en Redis.")
+    PASSWORD_HASH_WORKERS: int = Field(4, ge=1, description="Hilos dedicados a bcrypt (hash y verificación de contraseñas) por proceso.")
+    PASSWORD_HASH_MAX_PENDING: int = Field(32, ge=0, description="Operaciones de bcrypt que pueden esperar turno antes de rechazar con 503.")
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = Field(5.0, description="Segundos máximos de espera por un turno de bcrypt antes de responder 503.")
+    AUTH_CACHE_USE_REDIS: bool = Field(True, description="Si es True, la caché de usuarios autenticados se comparte entre workers vía Redis.")
+    THUMBNAIL_CACHE_DIR: str = Field("/tmp/innovat-thumbnails", description="Directorio de la caché en disco de miniaturas de almacén.")
+    THUMBNAIL_CACHE_MAX_BYTES: int = Field(256 * 1024 * 1024, description="Tamaño máximo en bytes de la caché de miniaturas antes de desalojar las menos usadas.")
+    THUMBNAIL_JPEG_QUALITY: int = Field(80, ge=1, le=100, description="Calidad JPEG con la que se recomprimen las miniaturas.")
+    PRESENCE_TTL_SECONDS: int = Field(40, ge=1, description="Segundos sin latido tras los cuales un usuario deja de figurar como conectado.")
+    REALTIME_LEADER_LEASE_SECONDS: int = Field(15, ge=3, description="Duración del lease en Redis del worker que ejecuta el bridge de Postgres; se renueva cada tercio.")
+    REALTIME_COALESCE_WINDOW_MS: int = Field(250, ge=0, description="Milisegundos sin cambios en una tabla antes de emitir su evento agrupado.")
+    REALTIME_COALESCE_MAX_DELAY_MS: int = Field(1000, ge=0, description="Demora máxima en milisegundos de un evento agrupado durante una ráfaga continua.")
+    RESPONSE_CACHE_ENABLED: bool = Field(True, description="Activa la caché en Redis de los reportes agregados de tesorería.")
+    RESPONSE_CACHE_TTL_SECONDS: int = Field(600, ge=1, description="Vida máxima de una respuesta cacheada; la invalidación normal la hace el bridge al cambiar las tablas.")
+    JOBS_WORKER_EMBEDDED: bool = Field(True, description="Si es True, cada proceso de la API consume también la cola de trabajos en segundo plano.")
+    JOBS_CONCURRENCY: int = Field(2, ge=1, description="Trabajos en segundo plano ejecutados a la vez por cada proceso consumidor.")
+    JOBS_TTL_SECONDS: int = Field(24 * 3600, description="Tiempo en segundos que se conserva en Redis el estado de un trabajo.")
+    TESORERIA_CONCILIACION_INTERVAL_SECONDS: int = Field(6 * 3600, ge=0, description="Cada cuántos segundos se recalculan los saldos de caja chica y bancos desde sus libros (0 = desactivado).")
+    ALMACEN_ALERTAS_RECONSTRUIR_SECONDS: int = Field(3600, ge=60, description="Vida del conjunto de productos bajo su límite en Redis; al vencer, la siguiente consulta lo reconstruye desde la base.")
+    UPLOADS_DIR: str = Field("/tmp/innovat-uploads", description="Directorio del almacén local (por SHA-256) donde se copian los archivos subidos.")
+    UPLOADS_TTL_SECONDS: int = Field(6 * 3600, ge=60, description="Segundos sin uso tras los cuales se elimina un archivo subido del almacén local.")
+    UPLOAD_MAX_IMAGE_BYTES: int = Field(10 * 1024 * 1024, ge=1, description="Tamaño máximo en bytes de cada imagen subida en ingresos/salidas de almacén.")
+    UPLOAD_MAX_EXCEL_BYTES: int = Field(50 * 1024 * 1024, ge=1, description="Tamaño máximo en bytes de un Excel de importación.")
+    BLOBS_BACKEND: Literal["local", "s3", "memoria"] = Field("local", description="Almacén de las imágenes (por SHA-256): disco local, servicio compatible con S3 o memoria del proceso (pruebas).")
+    BLOBS_DIR: str = Field("/var/lib/innovat/blobs", description="Directorio del almacén de imágenes con BLOBS_BACKEND=local; debe persistir entre despliegues.")
+    BLOBS_S3_BUCKET: Optional[str] = Field(None, description="Bucket del almacén de imágenes con BLOBS_BACKEND=s3.")
+    BLOBS_S3_PREFIX: str = Field("blobs/", description="Prefijo de las claves de las imágenes dentro del bucket.")
+    BLOBS_S3_ENDPOINT_URL: Optional[str] = Field(None, description="Endpoint de un servicio compatible con S3 (MinIO, R2...); None usa AWS.")
+    BLOBS_S3_REGION: Optional[str] = Field(None, description="Región del bucket de imágenes.")
+    BLOBS_S3_ACCESS_KEY: Optional[str] = Field(None, description="Access key del almacén S3; None usa las credenciales del entorno.")
+    BLOBS_S3_SECRET_KEY: Optional[str] = Field(None, description="Secret key del almacén S3.")
+    BLOBS_PURGA_GRACIA_SECONDS: int = Field(24 * 3600, ge=60, description="Antigüedad mínima de un blob sin referencias para que `purgar_blobs` lo elimine.")
+    EXCEL_PARSE_WORKERS: int = Field(2, ge=1, description="Procesos del pool que leen los archivos Excel subidos, fuera del event loop.")
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
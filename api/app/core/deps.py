@@ -14,22 +14,26 @@ from sqlalchemy.orm import selectinload
 
 from app.core.security import decode_access_token
 from app.core.db import get_session
+from app.core.principal_cache import principal_cache
 from app.api.v1.auth.auth_models import Usuario
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
 
 reusable_oauth2 = HTTPBearer(auto_error=True)
 
 async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(reusable_oauth2),
     session: AsyncSession = Depends(get_session),
-) -> Usuario:
+) -> UsuarioPrincipal:
     """
     Obtiene el usuario actual autenticado a partir de un token JWT.
 
     Esta función de dependencia:
     1. Extrae el token JWT de la cabecera de autorización.
     2. Decodifica el token para obtener el ID del usuario.
-    3. Consulta la base de datos para cargar la instancia ORM `Usuario`
-       junto con sus permisos (`selectinload`).
+    3. Busca el usuario en `principal_cache`; solo si no está cacheado
+       consulta la base de datos para cargar `Usuario` junto con sus
+       permisos (`selectinload`) y guarda el resultado en la caché, salvo
+       que el usuario se haya invalidado durante la consulta.
     4. Realiza validaciones de seguridad:
        - Lanza un error 401 si el token es inválido o expirado.
        - Lanza un error 401 si el usuario no es encontrado.
@@ -40,7 +44,7 @@ async def get_current_user(
         session: Sesión de base de datos asíncrona, inyectada por `get_session`.
 
     Returns:
-        La instancia ORM `Usuario` del usuario autenticado, con sus permisos ya cargados.
+        El `UsuarioPrincipal` del usuario autenticado, con sus permisos incluidos.
 
     Raises:
         HTTPException:
@@ -54,16 +58,41 @@ async def get_current_user(
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
-    stmt = (
-        select(Usuario)
-        .where(Usuario.id == user_id)
-        .options(selectinload(Usuario.permisos))
-    )
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
+    user = await principal_cache.get(user_id)
+    if user is None:
+        # La generación se toma antes del SELECT: si el usuario se invalida
+        # mientras tanto, `set` no cachea el dato viejo
+        generacion = await principal_cache.generacion(user_id)
+        stmt = (
+            select(Usuario)
+            .where(Usuario.id == user_id)
+            .options(selectinload(Usuario.permisos))
+        )
+        result = await session.execute(stmt)
+        db_user = result.scalar_one_or_none()
+        if not db_user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
+        user = UsuarioPrincipal.model_validate(db_user)
+        await principal_cache.set(user, generacion)
+
     if user.estado != "activo":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuario bloqueado")
 
     return user
+
+
+def requiere_modulo(modulo: str):
+    """
+    Dependencia que exige que el usuario autenticado tenga el permiso del módulo.
+
+    Uso: `Depends(requiere_modulo("gerencia"))`.
+
+    Raises:
+        HTTPException: 403 (FORBIDDEN) si el usuario no tiene el permiso.
+    """
+    async def verificar(user: UsuarioPrincipal = Depends(get_current_user)) -> UsuarioPrincipal:
+        if not any(p.name_module == modulo for p in user.permisos):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Sin permiso para este recurso")
+        return user
+
+    return verificar
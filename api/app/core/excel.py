@@ -0,0 +1,78 @@
+# app/core/excel.py
+"""
+Módulo de lectura de Excel fuera del event loop.
+
+`pd.read_excel` (openpyxl/xlrd) es CPU en Python puro: un archivo de
+varios miles de filas bloquea el proceso durante segundos y con él todas
+las demás peticiones y los heartbeats del WebSocket. Aquí la lectura se
+ejecuta en un `ProcessPoolExecutor` compartido (`EXCEL_PARSE_WORKERS`
+procesos) y el event loop solo espera el DataFrame ya armado.
+
+Los parámetros de `leer_excel` viajan al proceso hijo, así que deben ser
+serializables con pickle (tipos de `dtype`, nombres de columnas, etc.).
+Con una ruta (`ArchivoSubido.ruta`) el hijo lee el archivo de disco y no
+se copian los bytes entre procesos.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.excel")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_semaforo: Optional[asyncio.Semaphore] = None
+
+
+def _leer(origen: Union[bytes, Path], normalizar_columnas: bool, kwargs: dict[str, Any]) -> pd.DataFrame:
+    """Se ejecuta en el proceso hijo."""
+    df = pd.read_excel(io.BytesIO(origen) if isinstance(origen, bytes) else origen, **kwargs)
+    if normalizar_columnas:
+        df.columns = [str(c).lower().strip() for c in df.columns]
+    return df
+
+
+def _obtener_executor() -> ProcessPoolExecutor:
+    global _executor, _semaforo
+    if _executor is None:
+        # spawn: el proceso padre ya tiene hilos y sockets abiertos, no se hace fork
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.EXCEL_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Limita los archivos en espera (cada uno ocupa memoria hasta procesarse)
+        _semaforo = asyncio.Semaphore(settings.EXCEL_PARSE_WORKERS * 2)
+    return _executor
+
+
+async def leer_excel(origen: Union[bytes, Path], normalizar_columnas: bool = False, **kwargs: Any) -> pd.DataFrame:
+    """
+    Lee un Excel en el pool de procesos y devuelve el DataFrame.
+
+    Args:
+        origen: Ruta del archivo subido o sus bytes.
+        normalizar_columnas: Si es True, pasa los nombres de columna a
+            minúsculas y sin espacios en los extremos.
+        **kwargs: Argumentos de `pd.read_excel` (p. ej. `dtype`).
+    """
+    executor = _obtener_executor()
+    loop = asyncio.get_running_loop()
+    async with _semaforo:
+        return await loop.run_in_executor(executor, _leer, origen, normalizar_columnas, kwargs)
+
+
+def cerrar_pool_excel() -> None:
+    """Detiene los procesos del pool; se llama al apagar la aplicación."""
+    global _executor, _semaforo
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _semaforo = None
+        logger.info("Pool de lectura de Excel cerrado.")
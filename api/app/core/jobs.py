@@ -0,0 +1,368 @@
+# app/core/jobs.py
+"""
+Módulo de trabajos en segundo plano (cola en Redis).
+
+Las importaciones de Excel pueden tardar minutos; en lugar de mantener la
+petición HTTP abierta, el endpoint guarda el archivo en Redis, encola un
+trabajo y responde de inmediato con su id (202). Un consumidor lo procesa
+después con su propia sesión de base de datos.
+
+- Estado: hash `job:{id}` (estado, progreso, mensaje, resultado, errores),
+  con TTL `JOBS_TTL_SECONDS`. Se consulta vía `GET /jobs/{id}`.
+- Archivo: `job:{id}:archivo`, se elimina al terminar el trabajo. Se
+  copia por trozos (`APPEND`/`GETRANGE`) desde y hacia el almacén local de
+  `app.core.uploads`, así el archivo nunca está entero en memoria.
+- Cola: lista `jobs:cola` (`LPUSH` al encolar). Cada consumidor la lee con
+  `BLMOVE` hacia su lista `jobs:procesando:{consumidor}` y saca el id con
+  `LREM` al terminar: si el proceso muere a mitad de un trabajo, el id
+  sigue en esa lista. Mientras vive renueva `jobs:latido:{consumidor}`;
+  al arrancar (y luego cada `INTERVALO_RECUPERACION`) los consumidores
+  devuelven a la cola los trabajos de los que ya no tienen latido. La
+  entrega es "al menos una vez": un trabajo ya terminado no se repite,
+  pero uno interrumpido a mitad se ejecuta de nuevo desde el principio.
+- Avisos: cada cambio de estado se publica en el canal del usuario
+  (`canal_usuario`), que `/ws/notifications` reenvía al navegador.
+
+Las tareas se registran con `@registrar_tarea("tipo")` y reciben
+`(archivo, db, job)`, con `archivo` un `ArchivoSubido` local; lo que devuelven queda como `resultado`. Una
+`HTTPException` se reporta como error con su `detail` en `errores`.
+
+El consumidor corre dentro de cada proceso de la API
+(`JOBS_WORKER_EMBEDDED`) o aparte con `python -m app.worker`.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import db as db_module
+from app.core.config import settings
+from app.core.realtime import canal_usuario, redis_client
+from app.core.uploads import TAMANIO_TROZO, ArchivoSubido, recibir_flujo
+
+logger = logging.getLogger("app.jobs")
+
+COLA = "jobs:cola"
+CONSUMIDORES = "jobs:consumidores"
+
+# Un consumidor sin latido durante LATIDO_TTL se da por muerto
+LATIDO_INTERVALO = 10
+LATIDO_TTL = 30
+INTERVALO_RECUPERACION = 60
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+# El archivo se guarda como bytes: este cliente no decodifica las respuestas
+redis_binario = aioredis.from_url(settings.REDIS_URL)
+
+
+def _clave_job(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def _clave_archivo(job_id: str) -> str:
+    return f"job:{job_id}:archivo"
+
+
+def _clave_usuario(usuario_id: int) -> str:
+    return f"jobs:usuario:{usuario_id}"
+
+
+def _clave_procesando(consumidor: str) -> str:
+    return f"jobs:procesando:{consumidor}"
+
+
+def _clave_latido(consumidor: str) -> str:
+    return f"jobs:latido:{consumidor}"
+
+
+class ContextoJob:
+    """Se pasa a cada tarea para que reporte su avance."""
+
+    def __init__(self, job_id: str, usuario_id: int):
+        self.id = job_id
+        self.usuario_id = usuario_id
+
+    async def actualizar(self, **campos: Any) -> None:
+        """Guarda los campos indicados en el estado del trabajo y avisa al usuario."""
+        campos["actualizado"] = time.time()
+        clave = _clave_job(self.id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(clave, mapping={k: json.dumps(v, default=str) for k, v in campos.items()})
+            pipe.expire(clave, settings.JOBS_TTL_SECONDS)
+            await pipe.execute()
+        evento = {"type": "job", "id": self.id, **campos}
+        await redis_client.publish(canal_usuario(self.usuario_id), json.dumps(evento, default=str))
+
+    async def progreso(self, porcentaje: float, mensaje: Optional[str] = None) -> None:
+        """Reporta el avance (0-100) y, opcionalmente, un mensaje de la etapa actual."""
+        campos: dict[str, Any] = {"progreso": round(porcentaje, 1)}
+        if mensaje is not None:
+            campos["mensaje"] = mensaje
+        await self.actualizar(**campos)
+
+
+Tarea = Callable[[ArchivoSubido, AsyncSession, ContextoJob], Awaitable[dict]]
+_TAREAS: dict[str, Tarea] = {}
+
+
+def registrar_tarea(tipo: str) -> Callable[[Tarea], Tarea]:
+    """Decorador que registra la función como ejecutora de los trabajos `tipo`."""
+    def decorador(func: Tarea) -> Tarea:
+        _TAREAS[tipo] = func
+        return func
+    return decorador
+
+
+async def encolar_job(tipo: str, archivo: ArchivoSubido, usuario_id: int, nombre_archivo: Optional[str] = None) -> dict:
+    """
+    Guarda el archivo, crea el trabajo en estado pendiente y lo encola.
+
+    Args:
+        tipo: Tipo registrado con `registrar_tarea`.
+        archivo: Archivo subido (ver `app.core.uploads.recibir_archivo`).
+        usuario_id: Dueño del trabajo (solo él puede consultarlo).
+        nombre_archivo: Nombre original del archivo, para mostrarlo.
+
+    Returns:
+        El estado inicial del trabajo.
+    """
+    if tipo not in _TAREAS:
+        raise ValueError(f"Tipo de trabajo no registrado: {tipo}")
+
+    ahora = time.time()
+    job = {
+        "id": uuid.uuid4().hex,
+        "tipo": tipo,
+        "estado": ESTADO_PENDIENTE,
+        "progreso": 0,
+        "mensaje": "En cola",
+        "archivo": nombre_archivo,
+        "usuario_id": usuario_id,
+        "resultado": None,
+        "errores": None,
+        "creado": ahora,
+        "actualizado": ahora,
+    }
+    ttl = settings.JOBS_TTL_SECONDS
+
+    # El archivo va primero: el consumidor puede tomar el id apenas se encola
+    await _subir_archivo(_clave_archivo(job["id"]), archivo, ttl)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(_clave_job(job["id"]), mapping={k: json.dumps(v) for k, v in job.items()})
+        pipe.expire(_clave_job(job["id"]), ttl)
+        pipe.zadd(_clave_usuario(usuario_id), {job["id"]: ahora})
+        pipe.zremrangebyscore(_clave_usuario(usuario_id), "-inf", ahora - ttl)
+        pipe.expire(_clave_usuario(usuario_id), ttl)
+        pipe.lpush(COLA, job["id"])
+        await pipe.execute()
+
+    logger.info(f"Job {job['id']} ({tipo}) encolado por el usuario {usuario_id}.")
+    return job
+
+
+async def _subir_archivo(clave: str, archivo: ArchivoSubido, ttl: int) -> None:
+    await redis_binario.delete(clave)
+    async for trozo in archivo.trozos():
+        async with redis_binario.pipeline(transaction=False) as pipe:
+            pipe.append(clave, trozo)
+            pipe.expire(clave, ttl)
+            await pipe.execute()
+
+
+async def _trozos_archivo(clave: str) -> AsyncIterator[bytes]:
+    inicio = 0
+    while trozo := await redis_binario.getrange(clave, inicio, inicio + TAMANIO_TROZO - 1):
+        yield trozo
+        inicio += len(trozo)
+
+
+async def obtener_job(job_id: str) -> Optional[dict]:
+    """Devuelve el estado del trabajo o None si no existe (o ya expiró)."""
+    data = await redis_client.hgetall(_clave_job(job_id))
+    if not data:
+        return None
+    return {k: json.loads(v) for k, v in data.items()}
+
+
+async def listar_jobs_usuario(usuario_id: int, limite: int = 20) -> list[dict]:
+    """Trabajos recientes del usuario, del más nuevo al más antiguo."""
+    ids = await redis_client.zrevrange(_clave_usuario(usuario_id), 0, limite - 1)
+    jobs = [await obtener_job(job_id) for job_id in ids]
+    return [job for job in jobs if job is not None]
+
+
+async def _ejecutar(job_id: str) -> None:
+    job = await obtener_job(job_id)
+    if job is None:
+        logger.warning(f"Job {job_id} expiró antes de procesarse.")
+        return
+    if job["estado"] in (ESTADO_COMPLETADO, ESTADO_ERROR):
+        # Recuperado de un consumidor que murió después de terminarlo
+        return
+
+    ctx = ContextoJob(job_id, job["usuario_id"])
+    tarea = _TAREAS.get(job["tipo"])
+    archivo = None
+    if tarea is not None and await redis_binario.exists(_clave_archivo(job_id)):
+        archivo = await recibir_flujo(_trozos_archivo(_clave_archivo(job_id)), nombre=job["archivo"])
+    if tarea is None or archivo is None:
+        motivo = "Tipo de trabajo desconocido" if tarea is None else "El archivo del trabajo ya no está disponible"
+        await ctx.actualizar(estado=ESTADO_ERROR, mensaje=motivo)
+        return
+
+    await ctx.actualizar(estado=ESTADO_EN_PROCESO, mensaje="Procesando")
+    try:
+        async with db_module.AsyncSessionLocal() as session:
+            resultado = await tarea(archivo, session, ctx)
+    except asyncio.CancelledError:
+        # Apagado del consumidor: la transacción se revierte y `_procesar`
+        # devuelve el trabajo a la cola
+        await ctx.actualizar(estado=ESTADO_PENDIENTE, progreso=0, mensaje="En cola")
+        raise
+    except HTTPException as e:
+        mensaje = e.detail if isinstance(e.detail, str) else "El archivo tiene errores"
+        await ctx.actualizar(estado=ESTADO_ERROR, mensaje=mensaje, errores=e.detail)
+    except Exception as e:
+        logger.exception(f"Job {job_id} ({job['tipo']}) falló")
+        await ctx.actualizar(estado=ESTADO_ERROR, mensaje=f"Error interno: {str(e)}")
+    else:
+        await ctx.actualizar(
+            estado=ESTADO_COMPLETADO,
+            progreso=100,
+            mensaje=resultado.get("message", "Completado"),
+            resultado=resultado,
+        )
+    await redis_binario.delete(_clave_archivo(job_id))
+
+
+async def _procesar(job_id: str, procesando: str) -> None:
+    """Ejecuta el trabajo y lo saca de la lista `procesando` del consumidor."""
+    try:
+        await _ejecutar(job_id)
+    except asyncio.CancelledError:
+        # Vuelve al frente de la cola para que lo tome otro proceso
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(procesando, 1, job_id)
+            pipe.rpush(COLA, job_id)
+            await pipe.execute()
+        raise
+    except Exception:
+        logger.exception(f"Job {job_id}: error no controlado")
+    await redis_client.lrem(procesando, 1, job_id)
+
+
+async def reencolar_huerfanos() -> int:
+    """
+    Devuelve a la cola los trabajos de consumidores sin latido.
+
+    `LMOVE` mueve cada id de forma atómica, así que varios consumidores
+    pueden recuperar a la vez sin duplicar trabajos.
+
+    Returns:
+        Cantidad de trabajos reencolados.
+    """
+    total = 0
+    for consumidor in await redis_client.smembers(CONSUMIDORES):
+        if await redis_client.exists(_clave_latido(consumidor)):
+            continue
+        procesando = _clave_procesando(consumidor)
+        # Del más nuevo al más antiguo hacia el extremo que se consume: el más antiguo sale primero
+        while (job_id := await redis_client.lmove(procesando, COLA, "LEFT", "RIGHT")) is not None:
+            total += 1
+            logger.warning(f"Job {job_id}: el consumidor {consumidor} dejó de responder; reencolado.")
+            job = await obtener_job(job_id)
+            if job is not None and job["estado"] == ESTADO_EN_PROCESO:
+                await ContextoJob(job_id, job["usuario_id"]).actualizar(
+                    estado=ESTADO_PENDIENTE, progreso=0, mensaje="Reencolado"
+                )
+        await redis_client.srem(CONSUMIDORES, consumidor)
+    return total
+
+
+async def _latido(consumidor: str) -> None:
+    """Renueva el latido del consumidor y, de paso, recupera los huérfanos de otros."""
+    ultima_recuperacion = time.monotonic()
+    while True:
+        await asyncio.sleep(LATIDO_INTERVALO)
+        try:
+            await redis_client.set(_clave_latido(consumidor), 1, ex=LATIDO_TTL)
+            if time.monotonic() - ultima_recuperacion >= INTERVALO_RECUPERACION:
+                ultima_recuperacion = time.monotonic()
+                await reencolar_huerfanos()
+        except RedisError as e:
+            logger.error(f"Job worker: no se pudo renovar el latido ({e}).")
+
+
+async def job_worker(concurrencia: int = settings.JOBS_CONCURRENCY) -> None:
+    """
+    Consume `jobs:cola` ejecutando hasta `concurrencia` trabajos a la vez.
+
+    Pensado para correr como tarea de fondo; al cancelarse cancela también
+    los trabajos en curso y los devuelve a la cola.
+    """
+    assert db_module.AsyncSessionLocal is not None, "AsyncSessionLocal no inicializado; llama init_db() antes"
+    semaforo = asyncio.Semaphore(concurrencia)
+    en_curso: set[asyncio.Task] = set()
+    retry_delay = 5
+
+    consumidor = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    procesando = _clave_procesando(consumidor)
+    await redis_client.set(_clave_latido(consumidor), 1, ex=LATIDO_TTL)
+    await redis_client.sadd(CONSUMIDORES, consumidor)
+    reencolados = await reencolar_huerfanos()
+    if reencolados:
+        logger.warning(f"Job worker: {reencolados} trabajos de consumidores caídos reencolados.")
+    latido = asyncio.create_task(_latido(consumidor))
+
+    def _terminado(tarea: asyncio.Task) -> None:
+        en_curso.discard(tarea)
+        semaforo.release()
+
+    logger.info(f"Job worker {consumidor}: consumiendo '{COLA}' (concurrencia {concurrencia}).")
+    try:
+        while True:
+            await semaforo.acquire()
+            try:
+                job_id = await redis_client.blmove(COLA, procesando, timeout=5, src="RIGHT", dest="LEFT")
+                retry_delay = 5
+            except RedisError as e:
+                semaforo.release()
+                logger.error(f"Job worker: Error de Redis ({e}). Reintentando en {retry_delay}s...")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+                continue
+            except BaseException:
+                semaforo.release()
+                raise
+
+            if job_id is None:
+                semaforo.release()
+                continue
+
+            tarea = asyncio.create_task(_procesar(job_id, procesando))
+            en_curso.add(tarea)
+            tarea.add_done_callback(_terminado)
+    except asyncio.CancelledError:
+        logger.info("Job worker: Deteniendo tarea de forma limpia...")
+        latido.cancel()
+        for tarea in list(en_curso):
+            tarea.cancel()
+        await asyncio.gather(latido, *en_curso, return_exceptions=True)
+        # Lo que quedara en `procesando` lo recupera otro consumidor cuando expire el latido
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(_clave_latido(consumidor))
+            pipe.srem(CONSUMIDORES, consumidor)
+            await pipe.execute()
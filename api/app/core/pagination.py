@@ -0,0 +1,210 @@
+# app/core/pagination.py
+"""
+Módulo de paginación por cursor (keyset) para los endpoints de listado.
+
+En lugar de `OFFSET`, cada página continúa desde los valores de orden de
+la última fila devuelta (`WHERE (fecha, id) < (:fecha, :id)`), así que el
+costo de una página no crece con la tabla si existe un índice sobre las
+columnas de orden.
+
+Uso típico en un router:
+
+    @router.get("/mostrar", response_model=PaginaOLista[WeatherOut])
+    async def mostrar(pag: Paginacion = Depends(paginacion_params), db = Depends(get_session)):
+        query = select(...).where(...)
+        return await paginar(db, query, pag, ordenes={...}, orden_defecto="-fecha_inicio",
+                             desempate=ServicioWeather.id)
+
+Las columnas ofrecidas en `ordenes` deben ser NOT NULL: la comparación
+por tuplas no contempla NULLs.
+
+Compatibilidad: si el cliente no envía `limit` ni `after` se responde la
+lista completa sin sobre `Pagina`, como antes de paginar. Los clientes que
+quieran páginas deben enviar `limit`.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Generic, List, Optional, TypeVar, Union
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+T = TypeVar("T")
+
+
+class Pagina(BaseModel, Generic[T]):
+    """Respuesta paginada: los elementos y el cursor para pedir la siguiente página."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class PaginaOLista:
+    """`response_model` de los listados: `PaginaOLista[X]` es `Pagina[X]` si se pidió una página o `List[X]` si no."""
+
+    def __class_getitem__(cls, item):
+        return Union[Pagina[item], List[item]]
+
+
+@dataclass
+class Paginacion:
+    """Parámetros de paginación recibidos en la query string."""
+    limit: Optional[int]
+    after: Optional[str]
+    sort: Optional[str]
+
+    @property
+    def paginado(self) -> bool:
+        """False si el cliente no pidió páginas (ni `limit` ni `after`)."""
+        return self.limit is not None or self.after is not None
+
+
+def paginacion_params(
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description=f"Cantidad máxima de filas por página (con `after` y sin `limit`: {LIMITE_POR_DEFECTO}). Sin `limit` ni `after` se devuelve la lista completa."),
+    after: Optional[str] = Query(None, description="`next_cursor` devuelto por la página anterior."),
+    sort: Optional[str] = Query(None, description="Campo de orden; prefijo '-' para orden descendente."),
+) -> Paginacion:
+    """Dependencia de FastAPI que agrupa `limit`, `after` y `sort`."""
+    return Paginacion(limit=limit, after=after, sort=sort)
+
+
+def aplicar_rango(query: Select, columna, desde: Optional[date | datetime], hasta: Optional[date | datetime]) -> Select:
+    """Filtra `columna` entre `desde` y `hasta` (ambos inclusive, opcionales)."""
+    if desde is not None:
+        query = query.where(columna >= desde)
+    if hasta is not None:
+        query = query.where(columna <= hasta)
+    return query
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _codificar_cursor(sort: str, valores: list) -> str:
+    crudo = json.dumps({"s": sort, "v": valores}, default=_serializar_valor, separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii")
+
+
+def _cursor_invalido() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def _decodificar_cursor(cursor: str, sort: str, columnas: list) -> list:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, ValueError, UnicodeError):
+        raise _cursor_invalido()
+    if not isinstance(data, dict) or data.get("s") != sort or len(data.get("v") or []) != len(columnas):
+        # El cursor fue generado con otro orden: no es comparable
+        raise _cursor_invalido()
+    try:
+        return [
+            TypeAdapter(col.type.python_type).validate_python(valor)
+            for col, valor in zip(columnas, data["v"])
+        ]
+    except (ValidationError, NotImplementedError):
+        raise _cursor_invalido()
+
+
+def _predicado_keyset(claves: list, valores: list):
+    """
+    Construye la condición "fila posterior al cursor" para claves con dirección mixta.
+
+    Para (a DESC, b DESC) genera: a < :a OR (a = :a AND b < :b).
+    """
+    condiciones = []
+    for i, (columna, descendente) in enumerate(claves):
+        previas = [c == v for (c, _), v in zip(claves[:i], valores[:i])]
+        comparacion = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*previas, comparacion))
+    return or_(*condiciones)
+
+
+async def paginar(
+    db: AsyncSession,
+    query: Select,
+    pag: Paginacion,
+    ordenes: dict,
+    orden_defecto: str,
+    desempate,
+    entidad: bool = False,
+) -> Union[Pagina, list]:
+    """
+    Ejecuta `query` devolviendo una sola página ordenada por keyset.
+
+    Args:
+        db: Sesión de base de datos.
+        query: SELECT con los filtros ya aplicados (su ORDER BY se reemplaza).
+        pag: Parámetros recibidos vía `paginacion_params`.
+        ordenes: Nombre público -> columna por la que se permite ordenar.
+        orden_defecto: Valor de `sort` cuando el cliente no envía uno.
+        desempate: Columna única (normalmente el id) que desempata el orden.
+        entidad: True si `query` selecciona una entidad ORM en lugar de columnas.
+
+    Returns:
+        Una `Pagina` con los elementos y `next_cursor` (None en la última página);
+        la lista completa, ya ordenada, si `pag` no pide páginas.
+
+    Raises:
+        HTTPException: 422 si `sort` no está permitido, 400 si el cursor es inválido.
+    """
+    sort = pag.sort or orden_defecto
+    nombre = sort.lstrip("-")
+    if nombre not in ordenes:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Orden no permitido: '{nombre}'. Opciones: {', '.join(sorted(ordenes))}",
+        )
+    descendente = sort.startswith("-")
+
+    claves = [(ordenes[nombre], descendente)]
+    if ordenes[nombre] is not desempate:
+        claves.append((desempate, descendente))
+
+    query = query.order_by(None).order_by(
+        *[col.desc() if desc else col.asc() for col, desc in claves]
+    )
+    if not pag.paginado:
+        result = await db.execute(query)
+        return list(result.scalars().all()) if entidad else [dict(fila._mapping) for fila in result.all()]
+
+    if pag.after:
+        valores = _decodificar_cursor(pag.after, sort, [col for col, _ in claves])
+        query = query.where(_predicado_keyset(claves, valores))
+
+    limit = pag.limit or LIMITE_POR_DEFECTO
+    etiquetas = [f"_cursor_{i}" for i in range(len(claves))]
+    query = query.add_columns(
+        *[col.label(etiqueta) for (col, _), etiqueta in zip(claves, etiquetas)]
+    ).limit(limit + 1)
+
+    result = await db.execute(query)
+    filas = result.all()
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+
+    if entidad:
+        items = [fila[0] for fila in filas]
+    else:
+        items = [
+            {k: v for k, v in fila._mapping.items() if k not in etiquetas}
+            for fila in filas
+        ]
+
+    next_cursor = None
+    if hay_mas and filas:
+        ultima = filas[-1]._mapping
+        next_cursor = _codificar_cursor(sort, [ultima[e] for e in etiquetas])
+
+    return Pagina(items=items, next_cursor=next_cursor)
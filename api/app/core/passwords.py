@@ -0,0 +1,110 @@
+# app/core/passwords.py
+"""
+Módulo de hash y verificación de contraseñas fuera del event loop.
+
+`bcrypt.hashpw`/`checkpw` consumen ~100-300 ms de CPU por llamada. Si se
+ejecutan directamente en un handler async, una ráfaga de logins (p. ej.
+al inicio de turno) congela todas las demás peticiones del worker.
+
+`password_service` las ejecuta en un pool de hilos acotado (bcrypt libera
+el GIL mientras calcula), limita cuántas operaciones pueden esperar turno
+y, si la cola está llena más de `PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS`,
+responde 503 en lugar de acumular peticiones. `metricas()` expone
+contadores y tiempos para monitoreo.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+logger = logging.getLogger("app.passwords")
+
+T = TypeVar("T")
+
+
+class PasswordService:
+    """Ejecuta bcrypt en un pool de hilos con límite de concurrencia y métricas."""
+
+    def __init__(self, workers: int, max_pendientes: int, timeout_cola: float):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.timeout_cola = timeout_cola
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._semaforo = asyncio.Semaphore(workers + max_pendientes)
+        self._en_curso = 0
+        self._completadas = 0
+        self._rechazadas = 0
+        self._espera_total = 0.0
+        self._ejecucion_total = 0.0
+        self._espera_max = 0.0
+
+    async def _ejecutar(self, func: Callable[..., T], *args) -> T:
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=self.timeout_cola)
+        except asyncio.TimeoutError:
+            self._rechazadas += 1
+            logger.warning("Cola de bcrypt saturada; se rechaza la operación.")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio ocupado, intente nuevamente en unos segundos",
+                headers={"Retry-After": "2"},
+            )
+
+        self._en_curso += 1
+        try:
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(self._executor, self._medir, func, args, inicio)
+            self._completadas += 1
+            return resultado
+        finally:
+            self._en_curso -= 1
+            self._semaforo.release()
+
+    def _medir(self, func: Callable[..., T], args: tuple, inicio: float) -> T:
+        """Se ejecuta en el hilo del pool: separa el tiempo de espera del de cálculo."""
+        comienzo = time.perf_counter()
+        espera = comienzo - inicio
+        try:
+            return func(*args)
+        finally:
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+            self._ejecucion_total += time.perf_counter() - comienzo
+
+    async def hash(self, password: str) -> str:
+        """Versión async de `hash_password`."""
+        return await self._ejecutar(hash_password, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Versión async de `verify_password`."""
+        return await self._ejecutar(verify_password, password, hashed)
+
+    def metricas(self) -> dict:
+        """Contadores y tiempos promedio (ms) desde el arranque del proceso."""
+        completadas = self._completadas or 1
+        return {
+            "workers": self.workers,
+            "en_curso": self._en_curso,
+            "completadas": self._completadas,
+            "rechazadas": self._rechazadas,
+            "espera_promedio_ms": round(self._espera_total / completadas * 1000, 1),
+            "ejecucion_promedio_ms": round(self._ejecucion_total / completadas * 1000, 1),
+            "espera_max_ms": round(self._espera_max * 1000, 1),
+        }
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_service = PasswordService(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pendientes=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout_cola=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+)
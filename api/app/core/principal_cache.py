@@ -0,0 +1,225 @@
+# app/core/principal_cache.py
+"""
+Módulo de caché de usuarios autenticados (principal).
+
+`get_current_user` se ejecuta en cada petición de la API. Para evitar
+consultar `acceso.usuario` y `acceso.permiso` en cada llamada, el usuario
+autenticado se guarda en dos niveles:
+
+1. Un LRU en memoria por proceso, con TTL corto.
+2. Redis (opcional), compartido entre workers, con un TTL más largo.
+
+Los endpoints que modifican usuarios (estado, permisos, contraseña o
+eliminación) deben llamar a `principal_cache.invalidate(user_id)`.
+
+Cada usuario tiene un contador de generación en Redis que `invalidate`
+incrementa. `get_current_user` lo lee (`generacion`) antes de consultar la
+base de datos y `set` solo guarda si no cambió: una petición que leyó el
+usuario justo antes de una invalidación no vuelve a cachear el dato viejo.
+La invalidación se publica además en `CANAL_INVALIDACION` para que cada
+worker descarte su copia en memoria.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.realtime import manager, redis_client
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+
+logger = logging.getLogger("app.principal_cache")
+
+REDIS_KEY_PREFIX = "auth:principal:"
+GENERACION_KEY_PREFIX = "auth:principal:gen:"
+CANAL_INVALIDACION = "auth:principal:invalidar"
+
+# Guardar el principal solo si la generación sigue siendo la leída antes de la consulta
+_guardar_si_generacion = redis_client.register_script(
+    "if (redis.call('get', KEYS[1]) or '0') == ARGV[1] then "
+    "redis.call('set', KEYS[2], ARGV[2], 'EX', ARGV[3]) return 1 else return 0 end"
+)
+
+Generacion = tuple[int, Optional[str]]
+"""Invalidaciones locales vistas y generación en Redis (None si no se pudo leer)."""
+
+
+class PrincipalCache:
+    """
+    Caché LRU con TTL para `UsuarioPrincipal`, respaldada opcionalmente por Redis.
+
+    El nivel local evita incluso el round-trip a Redis en el caso común.
+    Las invalidaciones de otros workers llegan por `CANAL_INVALIDACION`;
+    el TTL local solo acota el caso en que ese aviso se pierda.
+
+    Si Redis falla al invalidar, el usuario queda pendiente: este proceso
+    no usa la caché para él y reintenta la invalidación en cada acceso
+    hasta que Redis responda.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        local_ttl: float,
+        redis_ttl: int,
+        use_redis: bool = True,
+    ):
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+        self._local: OrderedDict[int, tuple[float, UsuarioPrincipal]] = OrderedDict()
+        self._invalidaciones = 0
+        self._pendientes: set[int] = set()
+
+    def _get_local(self, user_id: int) -> Optional[UsuarioPrincipal]:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._local[user_id]
+            return None
+        self._local.move_to_end(user_id)
+        return principal
+
+    def _set_local(self, user_id: int, principal: UsuarioPrincipal) -> None:
+        self._local[user_id] = (time.monotonic() + self.local_ttl, principal)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    def descartar_local(self, user_id: int) -> None:
+        """
+        Quita al usuario de la memoria de este proceso.
+
+        Cuenta como invalidación: una lectura en curso que empezó antes no
+        vuelve a guardar su resultado en memoria.
+        """
+        self._invalidaciones += 1
+        self._local.pop(user_id, None)
+
+    def _al_recibir_invalidacion(self, data: str) -> None:
+        self.descartar_local(int(data))
+
+    async def _reintentar_pendientes(self) -> None:
+        for user_id in list(self._pendientes):
+            if not await self._invalidar_en_redis(user_id):
+                return
+            self._pendientes.discard(user_id)
+
+    async def generacion(self, user_id: int) -> Generacion:
+        """
+        Marca que se pasa a `set`; se toma antes de consultar la base de datos.
+
+        Returns:
+            Las invalidaciones locales vistas hasta ahora y la generación del
+            usuario en Redis ("0" si nunca se invalidó, None si Redis no respondió).
+        """
+        local = self._invalidaciones
+        if not self.use_redis:
+            return local, None
+        try:
+            remota = await redis_client.get(f"{GENERACION_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            logger.warning(f"Redis no disponible para la generación del usuario {user_id}: {e}")
+            return local, None
+        return local, remota or "0"
+
+    async def get(self, user_id: int) -> Optional[UsuarioPrincipal]:
+        """
+        Busca el principal en memoria y, si no está, en Redis.
+
+        Args:
+            user_id: ID del usuario extraído del JWT.
+
+        Returns:
+            El `UsuarioPrincipal` cacheado o None si no existe en ningún nivel
+            (o si su invalidación sigue pendiente).
+        """
+        if self._pendientes:
+            await self._reintentar_pendientes()
+            if user_id in self._pendientes:
+                return None
+
+        principal = self._get_local(user_id)
+        if principal is not None or not self.use_redis:
+            return principal
+
+        local = self._invalidaciones
+        try:
+            raw = await redis_client.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except RedisError as e:
+            logger.warning(f"Redis no disponible para caché de usuario {user_id}: {e}")
+            return None
+        if raw is None:
+            return None
+
+        principal = UsuarioPrincipal.model_validate_json(raw)
+        if local == self._invalidaciones:
+            self._set_local(user_id, principal)
+        return principal
+
+    async def set(self, principal: UsuarioPrincipal, generacion: Generacion) -> None:
+        """
+        Guarda el principal si no hubo invalidaciones desde `generacion`.
+
+        Con Redis habilitado, si no se pudo leer la generación o Redis
+        no responde, no se guarda en ningún nivel: no hay forma de saber si
+        el dato ya quedó viejo.
+        """
+        local, remota = generacion
+        if principal.id in self._pendientes:
+            return
+        if self.use_redis:
+            if remota is None:
+                return
+            try:
+                guardado = await _guardar_si_generacion(
+                    keys=[f"{GENERACION_KEY_PREFIX}{principal.id}", f"{REDIS_KEY_PREFIX}{principal.id}"],
+                    args=[remota, principal.model_dump_json(), self.redis_ttl],
+                )
+            except RedisError as e:
+                logger.warning(f"No se pudo cachear usuario {principal.id} en Redis: {e}")
+                return
+            if not guardado:
+                return
+        if local == self._invalidaciones:
+            self._set_local(principal.id, principal)
+
+    async def _invalidar_en_redis(self, user_id: int) -> bool:
+        """INCR de la generación, DEL de la entrada y aviso a los workers, en una transacción."""
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(f"{GENERACION_KEY_PREFIX}{user_id}")
+                pipe.delete(f"{REDIS_KEY_PREFIX}{user_id}")
+                pipe.publish(CANAL_INVALIDACION, str(user_id))
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"No se pudo invalidar caché de usuario {user_id} en Redis: {e}")
+            return False
+        return True
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Elimina el principal de ambos niveles y de la memoria de los demás workers.
+
+        Debe llamarse después del commit que cambia estado, permisos o
+        contraseña de un usuario, o que lo elimina.
+        """
+        self.descartar_local(user_id)
+        if not self.use_redis:
+            return
+        if not await self._invalidar_en_redis(user_id):
+            self._pendientes.add(user_id)
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    local_ttl=settings.AUTH_CACHE_LOCAL_TTL_SECONDS,
+    redis_ttl=settings.AUTH_CACHE_REDIS_TTL_SECONDS,
+    use_redis=settings.AUTH_CACHE_USE_REDIS,
+)
+manager.escuchar(CANAL_INVALIDACION, principal_cache._al_recibir_invalidacion)
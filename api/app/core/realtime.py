@@ -1,9 +1,15 @@
 #realtime.py
 import asyncio
 import aiopg
+import json
 import logging
+import os
+import time
+import uuid
+from fnmatch import fnmatchcase
+from typing import Awaitable, Callable, Optional
 from redis import asyncio as aioredis
-from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
 from fastapi import WebSocketDisconnect # Asegúrate de importar esto
 from app.core.config import settings
 
@@ -14,13 +20,152 @@ logger = logging.getLogger("app.realtime")
 DB_DSN = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
 redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
 
+
+def canal_usuario(user_id) -> str:
+    """Canal con los eventos dirigidos a un solo usuario (p. ej. avance de sus trabajos)."""
+    return f"user:{user_id}:eventos"
+
+
+def canal_tabla(topico: str) -> str:
+    """Canal con los cambios de una tabla; `topico` es "esquema.tabla" (admite '*')."""
+    return f"db:{topico}"
+
+
+def canal_evento(topico: str) -> str:
+    """Canal de eventos de negocio (p. ej. "alertas.stock"); solo llegan a los sockets suscritos."""
+    return f"evt:{topico}"
+
+
+async def publicar_evento(topico: str, eventos: list[dict]) -> None:
+    """Publica eventos JSON en `canal_evento(topico)`, en un solo pipeline."""
+    if not eventos:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for evento in eventos:
+            pipe.publish(canal_evento(topico), json.dumps(evento))
+        await pipe.execute()
+
+
+def _evento_desde_notify(payload: str) -> Optional[dict]:
+    """
+    Convierte el payload de `global_db_changes` en un evento de invalidación.
+
+    El trigger `notificar_cambio_tabla` envía
+    `{"schema", "table", "op", "count", "ids"}`; cualquier otro payload
+    (p. ej. de un trigger antiguo sin datos) devuelve None.
+    """
+    try:
+        data = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, dict) or "schema" not in data or "table" not in data:
+        return None
+    return {
+        "type": "invalidate",
+        "topic": f"{data['schema']}.{data['table']}",
+        "op": data.get("op"),
+        "count": data.get("count"),
+        "ids": data.get("ids"),
+    }
+
+
+MAX_IDS_EVENTO = 50
+"""Igual que en el trigger: con más ids el evento los omite (ids = null)."""
+
+METRICAS_BRIDGE_KEY = "realtime:bridge:metricas"
+
+CACHE_VERSION_PREFIX = "cache:ver:"
+CACHE_VERSION_GLOBAL = "__global__"
+"""Contadores de versión por tabla que usa `app.core.cache` para invalidar respuestas."""
+
+
+class _Coalescedor:
+    """
+    Agrupa ráfagas de cambios por tabla antes de publicarlas.
+
+    Un tópico se emite cuando pasan `ventana` segundos sin cambios nuevos
+    en él, o a más tardar `max_espera` segundos después del primer cambio
+    pendiente (así una importación larga no posterga el aviso indefinidamente).
+    La clave None agrupa los payloads sin estructura ("refresh").
+    """
+
+    def __init__(self, ventana: float, max_espera: float):
+        self.ventana = ventana
+        self.max_espera = max_espera
+        self._pendientes: dict[Optional[str], dict] = {}
+        self.recibidos = 0
+        self.emitidos = 0
+
+    def agregar(self, evento: Optional[dict], ahora: float) -> None:
+        self.recibidos += 1
+        topico = evento["topic"] if evento else None
+        pendiente = self._pendientes.get(topico)
+        if pendiente is None:
+            self._pendientes[topico] = {"evento": evento, "primero": ahora, "ultimo": ahora}
+            return
+        pendiente["ultimo"] = ahora
+        if evento is None:
+            return
+        acumulado = pendiente["evento"]
+        if acumulado["op"] != evento["op"]:
+            acumulado["op"] = "MULTIPLE"
+        acumulado["count"] = (acumulado["count"] or 0) + (evento["count"] or 0)
+        if acumulado["ids"] is not None and evento["ids"] is not None:
+            ids = list(dict.fromkeys(acumulado["ids"] + evento["ids"]))
+            acumulado["ids"] = ids if len(ids) <= MAX_IDS_EVENTO else None
+        else:
+            acumulado["ids"] = None
+
+    def _vence(self, pendiente: dict) -> float:
+        return min(pendiente["ultimo"] + self.ventana, pendiente["primero"] + self.max_espera)
+
+    def proximo_vencimiento(self) -> Optional[float]:
+        return min((self._vence(p) for p in self._pendientes.values()), default=None)
+
+    def vencidos(self, ahora: float) -> list[tuple[Optional[str], Optional[dict]]]:
+        listos = [t for t, p in self._pendientes.items() if self._vence(p) <= ahora]
+        self.emitidos += len(listos)
+        return [(t, self._pendientes.pop(t)["evento"]) for t in listos]
+
+
+async def _publicar_vencidos(coalescedor: _Coalescedor, ahora: float) -> None:
+    listos = coalescedor.vencidos(ahora)
+    if not listos:
+        return
+    recibidos, coalescedor.recibidos = coalescedor.recibidos, 0
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for topico, evento in listos:
+            # La versión se incrementa antes del aviso: el cliente que recarga
+            # al recibirlo ya no encuentra la respuesta cacheada vieja
+            if evento is None:
+                pipe.incr(CACHE_VERSION_PREFIX + CACHE_VERSION_GLOBAL)
+                pipe.publish("broadcast_channel", "refresh")
+            else:
+                pipe.incr(CACHE_VERSION_PREFIX + topico)
+                pipe.publish(canal_tabla(topico), json.dumps(evento))
+        pipe.hincrby(METRICAS_BRIDGE_KEY, "recibidos", recibidos)
+        pipe.hincrby(METRICAS_BRIDGE_KEY, "emitidos", len(listos))
+        await pipe.execute()
+    logger.debug(f"Realtime Bridge: {recibidos} cambios -> {len(listos)} eventos.")
+
+
 async def db_to_redis_bridge():
     """
     Escucha NOTIFY de Postgres y publica en Redis.
+    Cada cambio se publica en el canal de su tabla (`db:esquema.tabla`);
+    los payloads sin estructura siguen yendo a `broadcast_channel`.
+    Las ráfagas se agrupan por tabla (`_Coalescedor`) y los totales de
+    cambios recibidos vs. eventos emitidos se acumulan en
+    `realtime:bridge:metricas`.
     Maneja reconexión automática y cierre limpio de tareas.
     """
     retry_delay = 5
+    loop = asyncio.get_running_loop()
     while True:
+        coalescedor = _Coalescedor(
+            ventana=settings.REALTIME_COALESCE_WINDOW_MS / 1000,
+            max_espera=settings.REALTIME_COALESCE_MAX_DELAY_MS / 1000,
+        )
         try:
             logger.info("Realtime Bridge: Conectando a infraestructura...")
             # USAR EL CLIENTE GLOBAL, no crear uno nuevo con from_url(redis_client)
@@ -33,13 +178,15 @@ async def db_to_redis_bridge():
                         retry_delay = 5 
                         
                         while True:
+                            vence = coalescedor.proximo_vencimiento()
+                            espera = 1.0 if vence is None else max(0.0, vence - loop.time())
                             try:
-                                _ = await asyncio.wait_for(conn.notifies.get(), timeout=1.0)
-                                # Usamos el cliente global directamente
-                                await redis_client.publish("broadcast_channel", "refresh")
-                                logger.debug("Cambio detectado -> Redis.")
+                                notify = await asyncio.wait_for(conn.notifies.get(), timeout=espera)
+                                coalescedor.agregar(_evento_desde_notify(notify.payload), loop.time())
                             except asyncio.TimeoutError:
-                                continue
+                                pass
+                            # Usamos el cliente global directamente
+                            await _publicar_vencidos(coalescedor, loop.time())
 
         except asyncio.CancelledError:
             logger.info("Realtime Bridge: Deteniendo tarea de forma limpia...")
@@ -50,63 +197,325 @@ async def db_to_redis_bridge():
             # Reintento exponencial limitado a 60 segundos
             retry_delay = min(retry_delay * 2, 60)
 
+LIDER_BRIDGE_KEY = "realtime:bridge:leader"
+
+# Renovar/soltar el lease solo si sigue siendo nuestro (GET + EXPIRE/DEL atómico)
+_renovar_lease = redis_client.register_script(
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('expire', KEYS[1], ARGV[2]) else return 0 end"
+)
+_soltar_lease = redis_client.register_script(
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+async def bridge_con_liderazgo(*tareas_lider: Callable[[], Awaitable[None]]):
+    """
+    Ejecuta `db_to_redis_bridge` en un solo proceso de todo el despliegue.
+
+    Cada worker intenta tomar el lease `realtime:bridge:leader`
+    (`SET NX EX`). El que lo obtiene corre el bridge y renueva el lease cada
+    tercio de su duración; si deja de poder renovarlo (lo perdió, o Redis no
+    responde durante un lease completo) detiene el bridge y vuelve a
+    competir. Al apagarse suelta el lease para que otro worker lo tome de
+    inmediato en lugar de esperar a que expire.
+
+    `tareas_lider` son otras tareas periódicas que tampoco deben correr en
+    cada worker (p. ej. la conciliación de tesorería): se arrancan y se
+    detienen junto con el bridge.
+    """
+    identidad = f"{os.getpid()}:{uuid.uuid4().hex}"
+    lease = settings.REALTIME_LEADER_LEASE_SECONDS
+    intervalo = lease / 3
+    loop = asyncio.get_running_loop()
+
+    while True:
+        tareas: list[asyncio.Task] = []
+        try:
+            try:
+                es_lider = await redis_client.set(LIDER_BRIDGE_KEY, identidad, nx=True, ex=lease)
+            except RedisError as e:
+                logger.error(f"Realtime Bridge: no se pudo consultar el liderazgo ({e}).")
+                es_lider = False
+            if not es_lider:
+                await asyncio.sleep(intervalo)
+                continue
+
+            logger.info(f"Realtime Bridge: este worker ({identidad}) es el líder.")
+            tareas = [asyncio.create_task(db_to_redis_bridge())]
+            tareas += [asyncio.create_task(tarea()) for tarea in tareas_lider]
+            ultima_renovacion = loop.time()
+            while True:
+                await asyncio.sleep(intervalo)
+                try:
+                    if not await _renovar_lease(keys=[LIDER_BRIDGE_KEY], args=[identidad, lease]):
+                        logger.warning("Realtime Bridge: liderazgo perdido.")
+                        break
+                    ultima_renovacion = loop.time()
+                except RedisError as e:
+                    logger.error(f"Realtime Bridge: no se pudo renovar el liderazgo ({e}).")
+                    if loop.time() - ultima_renovacion >= lease:
+                        # Otro worker ya pudo tomar el lease: no duplicar notificaciones
+                        break
+        except asyncio.CancelledError:
+            if tareas:
+                try:
+                    await _soltar_lease(keys=[LIDER_BRIDGE_KEY], args=[identidad])
+                except RedisError:
+                    pass
+            raise
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+
+
+class Presencia:
+    """
+    Usuarios conectados, compartidos entre todos los workers.
+
+    Se guarda en el sorted set `presence:online` (miembro = id de usuario,
+    score = último latido en epoch). Cada worker renueva en un solo
+    pipeline los latidos de sus sockets y barre los vencidos; `ZREM` solo
+    devuelve 1 al worker que realmente quitó al usuario, así cada salida se
+    anuncia una sola vez aunque haya varios barriendo.
+
+    Las altas y bajas se publican como `{"type": "presence", "event":
+    "joined"|"left", "user_id"}` en `CANAL`, en lugar de un "refresh" global.
+    """
+
+    KEY = "presence:online"
+    CANAL = "presence:eventos"
+    TOPICO = "presence"
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    async def _anunciar(self, evento: str, user_ids: list[str]) -> None:
+        if not user_ids:
+            return
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.publish(
+                    self.CANAL,
+                    json.dumps({"type": "presence", "event": evento, "user_id": int(user_id)}),
+                )
+            await pipe.execute()
+
+    async def latido(self, user_ids: list[str]) -> None:
+        """Renueva a los usuarios indicados; anuncia como `joined` a los que no estaban."""
+        if not user_ids:
+            return
+        ahora = time.time()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.zadd(self.KEY, {user_id: ahora})
+            nuevos = await pipe.execute()
+        await self._anunciar("joined", [u for u, n in zip(user_ids, nuevos) if n])
+
+    async def barrer(self) -> None:
+        """Quita a los usuarios sin latido dentro del TTL y los anuncia como `left`."""
+        limite = time.time() - self.ttl
+        vencidos = await redis_client.zrangebyscore(self.KEY, "-inf", limite)
+        if not vencidos:
+            return
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id in vencidos:
+                pipe.zrem(self.KEY, user_id)
+            quitados = await pipe.execute()
+        await self._anunciar("left", [u for u, q in zip(vencidos, quitados) if q])
+
+    async def usuarios_online(self) -> list[int]:
+        """Ids con latido dentro del TTL (O(log n + m) sobre el sorted set)."""
+        ids = await redis_client.zrangebyscore(self.KEY, time.time() - self.ttl, "+inf")
+        return [int(i) for i in ids]
+
+
+presencia = Presencia(ttl=settings.PRESENCE_TTL_SECONDS)
+
+
 class ConnectionManager:
+    """
+    Registro en memoria de los WebSockets abiertos en este proceso.
+
+    Un solo suscriptor de Redis por worker (`_suscriptor`) recibe los
+    mensajes con `listen()` (push, sin sondeo) y los reparte a los sockets
+    registrados. Un único latido (`_latido`) hace ping a todos los sockets
+    y renueva su presencia en Redis, en lugar de un bucle por conexión.
+
+    Cada socket se suscribe a los tópicos que muestra su pantalla enviando
+    `{"type": "subscribe", "topics": ["tesoreria.cajachica", "almacen.*"]}`
+    (y `unsubscribe` para dejarlos); recibe entonces
+    `{"type": "invalidate", "topic", "op", "count", "ids"}` solo para esas
+    tablas. Un socket sin suscripciones recibe `invalidate_all` ante
+    cualquier cambio, como antes. Con el tópico `presence` recibe las
+    altas y bajas de usuarios conectados (ver `Presencia`). Los eventos de
+    negocio (`publicar_evento`, p. ej. el tópico `alertas.stock`) llegan
+    solo a los sockets suscritos.
+
+    Otros módulos pueden escuchar canales internos con `escuchar` (p. ej.
+    la invalidación de `principal_cache`): el mismo suscriptor les entrega
+    el mensaje en cada worker, sin reenviarlo a los sockets.
+    """
+
+    INTERVALO_LATIDO = 15
+    TIMEOUT_ENVIO = 2.0
+
     def __init__(self):
-        # Ya no necesitamos pasar la URL, usamos el cliente global
-        pass
+        self._sockets: dict[str, set] = {}
+        self._topicos: dict = {}
+        self._tareas: list[asyncio.Task] = []
+        self._oyentes: dict[str, Callable[[str], None]] = {}
 
-    async def broadcast_handler(self, websocket, user_id: str):
-        pubsub = None
+    def escuchar(self, canal: str, oyente: Callable[[str], None]) -> None:
+        """Registra `oyente(data)` para `canal`; debe llamarse antes de `iniciar`."""
+        self._oyentes[canal] = oyente
+
+    def iniciar(self) -> None:
+        """Arranca el suscriptor y el latido; se llama en el startup de la app."""
+        if not self._tareas:
+            self._tareas = [
+                asyncio.create_task(self._suscriptor()),
+                asyncio.create_task(self._latido()),
+            ]
+
+    async def detener(self) -> None:
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+
+    async def _enviar(self, websocket, user_id: str, data: str) -> None:
         try:
-            pubsub = redis_client.pubsub()
-            await pubsub.subscribe("broadcast_channel")
-            
-            online_key = f"user:online:{user_id}"
-            last_refresh = asyncio.get_event_loop().time()
+            await asyncio.wait_for(websocket.send_text(data), timeout=self.TIMEOUT_ENVIO)
+        except Exception:
+            # Socket lento o muerto: se descarta para no frenar al resto
+            logger.warning(f"Conexión zombie detectada para {user_id}. Limpiando.")
+            self._quitar(websocket, user_id)
 
-            while True:
-                # 1. Chequeo de estado del socket (Crucial)
-                # Si el estado no es CONNECTED, salimos ya.
-                if websocket.client_state.name != "CONNECTED":
-                    logger.info(f"Terminando zombie loop para usuario {user_id}")
-                    break
+    async def _difundir(self, destinos: list[tuple], data: str) -> None:
+        await asyncio.gather(*(self._enviar(ws, uid, data) for ws, uid in destinos))
 
-                current_time = asyncio.get_event_loop().time()
-                
-                # 2. Heartbeat a Redis
-                if current_time - last_refresh > 15: 
-                    # Intentamos un PING al websocket para ver si sigue vivo
-                    try:
-                        # Enviamos un mensaje vacío o de tipo 'ping'
-                        # Si el socket está muerto, esto lanzará una excepción
-                        await asyncio.wait_for(websocket.send_json({"type": "ping"}), timeout=2.0)
-                        
-                        # Si el ping fue exitoso, renovamos en Redis
-                        await redis_client.expire(online_key, 40)
-                        last_refresh = current_time
-                    except Exception:
-                        # Si falla el envío del ping, el cliente es un zombie
-                        logger.warn(f"Conexión zombie detectada para {user_id}. Limpiando.")
-                        break
+    def _destinos_topico(self, topico: str) -> tuple[list, list]:
+        """Sockets suscritos a `topico` y sockets sin suscripciones (reciben invalidate_all)."""
+        suscritos, globales = [], []
+        for uid, sockets in self._sockets.items():
+            for ws in sockets:
+                patrones = self._topicos.get(ws)
+                if patrones is None:
+                    globales.append((ws, uid))
+                elif any(fnmatchcase(topico, p) for p in patrones):
+                    suscritos.append((ws, uid))
+        return suscritos, globales
+
+    async def _despachar(self, canal: str, data: str) -> None:
+        oyente = self._oyentes.get(canal)
+        if oyente is not None:
+            try:
+                oyente(data)
+            except Exception as e:
+                logger.error(f"Realtime: error en el oyente de {canal} ({e}).")
+        elif canal.startswith("db:"):
+            suscritos, globales = self._destinos_topico(canal[len("db:"):])
+            await asyncio.gather(
+                self._difundir(suscritos, data),
+                self._difundir(globales, "invalidate_all"),
+            )
+        elif canal == Presencia.CANAL:
+            suscritos, globales = self._destinos_topico(Presencia.TOPICO)
+            await asyncio.gather(
+                self._difundir(suscritos, data),
+                self._difundir(globales, "invalidate_all"),
+            )
+        elif canal.startswith("evt:"):
+            suscritos, _ = self._destinos_topico(canal[len("evt:"):])
+            await self._difundir(suscritos, data)
+        elif canal == "broadcast_channel":
+            destinos = [(ws, uid) for uid, sockets in self._sockets.items() for ws in sockets]
+            await self._difundir(destinos, "invalidate_all")
+        else:
+            # Eventos propios del usuario (canal user:{id}:eventos): ya vienen en JSON
+            user_id = canal.split(":")[1]
+            destinos = [(ws, user_id) for ws in self._sockets.get(user_id, ())]
+            await self._difundir(destinos, data)
 
-                # 3. Escuchar mensajes de Redis
-                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-                if message and message['type'] == 'message':
-                    try:
-                        await websocket.send_text("invalidate_all")
-                    except Exception:
-                        break 
+    async def _suscriptor(self) -> None:
+        retry_delay = 5
+        while True:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe("broadcast_channel", Presencia.CANAL, *self._oyentes)
+                await pubsub.psubscribe(canal_usuario("*"), canal_tabla("*"), canal_evento("*"))
+                logger.info("Realtime: suscriptor de Redis activo en este worker.")
+                retry_delay = 5
+                async for message in pubsub.listen():
+                    if message["type"] in ("message", "pmessage"):
+                        await self._despachar(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Realtime: suscriptor caído ({e}). Reintentando en {retry_delay}s...")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            finally:
+                await pubsub.aclose()
+
+    async def _latido(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.INTERVALO_LATIDO)
+                destinos = [(ws, uid) for uid, sockets in self._sockets.items() for ws in sockets]
+                await asyncio.gather(*(
+                    self._enviar(ws, uid, '{"type": "ping"}') for ws, uid in destinos
+                ))
+                await presencia.latido(list(self._sockets))
+                await presencia.barrer()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Realtime: error en el latido ({e}).")
 
-                await asyncio.sleep(0.5)
+    async def _procesar_mensaje(self, websocket, user_id: str, texto: str) -> None:
+        try:
+            data = json.loads(texto)
+        except ValueError:
+            return
+        if not isinstance(data, dict) or data.get("type") not in ("subscribe", "unsubscribe"):
+            return
+        topicos = {t for t in data.get("topics") or [] if isinstance(t, str) and t}
+        actuales = self._topicos.setdefault(websocket, set())
+        if data["type"] == "subscribe":
+            actuales |= topicos
+        else:
+            actuales -= topicos
+        await self._enviar(websocket, user_id, json.dumps({"type": "subscribed", "topics": sorted(actuales)}))
 
+    def _quitar(self, websocket, user_id: str) -> None:
+        self._topicos.pop(websocket, None)
+        sockets = self._sockets.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._sockets[user_id]
+
+    async def broadcast_handler(self, websocket, user_id: str):
+        """Registra el socket y espera a que el cliente se desconecte."""
+        self._sockets.setdefault(user_id, set()).add(websocket)
+        await presencia.latido([user_id])
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text"):
+                    await self._procesar_mensaje(websocket, user_id, message["text"])
+        except (WebSocketDisconnect, RuntimeError):
+            pass
         finally:
-            # IMPORTANTE: Cuando el loop se rompe (por zombie o cierre normal)
-            # si queremos que desaparezca MÁS rápido, podemos borrarlo aquí
-            # pero solo si no fue un refresh. Por ahora, dejemos que el TTL 
-            # de 40s haga su trabajo tras dejar de recibir expires.
-            if pubsub:
-                await pubsub.unsubscribe("broadcast_channel")
-                await pubsub.close()
+            # La baja la hace el barrido cuando vence el TTL, así un refresh
+            # de pestaña no se ve como salida y entrada
+            self._quitar(websocket, user_id)
 
 
 manager = ConnectionManager()
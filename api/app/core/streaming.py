@@ -0,0 +1,108 @@
+# app/core/streaming.py
+"""
+Módulo de respuestas en streaming para exportaciones grandes.
+
+Los listados completos (p. ej. el historial de varios años) no se cargan
+en memoria: la consulta se ejecuta con un cursor del lado del servidor
+(`AsyncSession.stream` + `yield_per`) y cada lote se serializa y se envía
+al cliente en cuanto llega, así que la memoria del worker queda acotada
+por el tamaño del lote y los primeros bytes salen de inmediato.
+
+Formatos:
+- `ndjson`: un objeto JSON por línea (`application/x-ndjson`).
+- `json`: un arreglo JSON emitido elemento por elemento (`application/json`).
+"""
+import logging
+from typing import AsyncIterator, Literal, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger("app.streaming")
+
+FormatoStream = Literal["ndjson", "json"]
+
+TAMANIO_LOTE = 1000
+"""Filas que se traen del cursor del servidor por cada viaje a Postgres."""
+
+_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+async def _filas_serializadas(
+    session: AsyncSession,
+    query: Select,
+    esquema: Type[BaseModel],
+    tamanio_lote: int,
+) -> AsyncIterator[bytes]:
+    result = await session.stream(query.execution_options(yield_per=tamanio_lote))
+    try:
+        async for lote in result.mappings().partitions():
+            yield b"".join(
+                esquema.model_validate(fila).model_dump_json().encode("utf-8") + b"\n"
+                for fila in lote
+            )
+    finally:
+        await result.close()
+
+
+async def _como_ndjson(filas: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in filas:
+            yield chunk
+    except Exception:
+        # El status 200 ya se envió: solo queda cortar el stream y registrar
+        logger.exception("Error durante el streaming NDJSON")
+        raise
+
+
+async def _como_arreglo_json(filas: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield b"["
+    primero = True
+    try:
+        async for chunk in filas:
+            # Cada chunk trae varias filas separadas por salto de línea
+            lineas = chunk.rstrip(b"\n").split(b"\n")
+            cuerpo = b",".join(lineas)
+            yield cuerpo if primero else b"," + cuerpo
+            primero = False
+    except Exception:
+        logger.exception("Error durante el streaming JSON")
+        raise
+    yield b"]"
+
+
+def respuesta_stream(
+    session: AsyncSession,
+    query: Select,
+    esquema: Type[BaseModel],
+    formato: FormatoStream = "ndjson",
+    nombre_archivo: str | None = None,
+    tamanio_lote: int = TAMANIO_LOTE,
+) -> StreamingResponse:
+    """
+    Devuelve una `StreamingResponse` que recorre `query` con un cursor del servidor.
+
+    Args:
+        session: Sesión de la petición (la dependencia `get_session` se
+            cierra después de enviar la respuesta, así que sigue abierta
+            mientras dure el stream).
+        query: SELECT de columnas ya filtrado y ordenado.
+        esquema: Modelo Pydantic con el que se valida y serializa cada fila.
+        formato: "ndjson" (una fila por línea) o "json" (arreglo).
+        nombre_archivo: Si se indica, se envía como adjunto con ese nombre.
+        tamanio_lote: Filas por lote leído del cursor.
+    """
+    filas = _filas_serializadas(session, query, esquema, tamanio_lote)
+    contenido = _como_ndjson(filas) if formato == "ndjson" else _como_arreglo_json(filas)
+
+    headers = {}
+    if nombre_archivo:
+        extension = "ndjson" if formato == "ndjson" else "json"
+        headers["Content-Disposition"] = f'attachment; filename="{nombre_archivo}.{extension}"'
+
+    return StreamingResponse(contenido, media_type=_MEDIA_TYPES[formato], headers=headers)
@@ -0,0 +1,146 @@
+# app/core/thumbnails.py
+"""
+Módulo de miniaturas para las imágenes de almacén.
+
+Las fotos de ingreso/salida se guardan a resolución completa, pero las
+grillas del frontend solo necesitan previsualizaciones. Este módulo genera
+variantes reducidas y recomprimidas en JPEG de forma perezosa (la primera
+vez que se piden) y las guarda en una caché en disco acotada:
+
+- La clave es `{sha256 del original}_{tamaño}.jpg`, así que dos registros
+  con la misma foto comparten miniatura.
+- Cuando la caché supera `THUMBNAIL_CACHE_MAX_BYTES` se eliminan los
+  archivos menos usados (LRU por fecha de modificación).
+
+El trabajo de OpenCV se ejecuta en un hilo para no bloquear el event loop.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.thumbnails")
+
+TAMANIOS_MINIATURA = (64, 128, 256, 512)
+"""Lados máximos (px) aceptados por el parámetro `size` de los endpoints."""
+
+
+def generar_miniatura(data: bytes, size: int, calidad: int) -> bytes:
+    """
+    Reduce la imagen para que su lado mayor sea `size` y la recodifica en JPEG.
+
+    Args:
+        data: Bytes de la imagen original (cualquier formato que lea OpenCV).
+        size: Lado máximo de la miniatura en píxeles.
+        calidad: Calidad JPEG (0-100).
+
+    Returns:
+        Los bytes JPEG de la miniatura.
+
+    Raises:
+        ValueError: Si los bytes no son una imagen decodificable.
+    """
+    imagen = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if imagen is None:
+        raise ValueError("No se pudo decodificar la imagen")
+
+    alto, ancho = imagen.shape[:2]
+    escala = size / max(alto, ancho)
+    if escala < 1:
+        imagen = cv2.resize(
+            imagen,
+            (max(1, int(ancho * escala)), max(1, int(alto * escala))),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    ok, buffer = cv2.imencode(".jpg", imagen, [cv2.IMWRITE_JPEG_QUALITY, calidad])
+    if not ok:
+        raise ValueError("No se pudo codificar la miniatura")
+    return buffer.tobytes()
+
+
+class ThumbnailCache:
+    """Caché en disco de miniaturas con límite de tamaño total y desalojo LRU."""
+
+    def __init__(self, directorio: str, max_bytes: int, calidad: int):
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+        self.calidad = calidad
+        self._lock = asyncio.Lock()
+
+    def _ruta(self, digest: str, size: int) -> Path:
+        return self.directorio / f"{digest}_{size}.jpg"
+
+    def _leer(self, ruta: Path) -> Optional[bytes]:
+        try:
+            data = ruta.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Marca el archivo como usado recientemente para el desalojo LRU
+        os.utime(ruta)
+        return data
+
+    def _escribir(self, ruta: Path, data: bytes) -> None:
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        # Escritura atómica: otro worker nunca ve un archivo a medias
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, ruta)
+        self._desalojar()
+
+    def _desalojar(self) -> None:
+        archivos = []
+        total = 0
+        for entrada in os.scandir(self.directorio):
+            if not entrada.name.endswith(".jpg"):
+                continue
+            st = entrada.stat()
+            archivos.append((st.st_mtime, st.st_size, entrada.path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, tamanio, ruta in sorted(archivos):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamanio
+            if total <= self.max_bytes:
+                break
+
+    async def obtener(self, digest: str, size: int) -> Optional[bytes]:
+        """Devuelve la miniatura cacheada o None si aún no existe."""
+        return await asyncio.to_thread(self._leer, self._ruta(digest, size))
+
+    async def generar(self, digest: str, size: int, original: bytes) -> bytes:
+        """
+        Genera la miniatura de `original`, la guarda en disco y la devuelve.
+
+        Args:
+            digest: SHA-256 hexadecimal del original (clave de la caché).
+            size: Lado máximo de la miniatura en píxeles.
+            original: Bytes de la imagen completa.
+        """
+        miniatura = await asyncio.to_thread(generar_miniatura, original, size, self.calidad)
+        try:
+            # El desalojo recorre el directorio; se serializa dentro del proceso
+            async with self._lock:
+                await asyncio.to_thread(self._escribir, self._ruta(digest, size), miniatura)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la miniatura {digest}_{size}: {e}")
+        return miniatura
+
+
+thumbnail_cache = ThumbnailCache(
+    directorio=settings.THUMBNAIL_CACHE_DIR,
+    max_bytes=settings.THUMBNAIL_CACHE_MAX_BYTES,
+    calidad=settings.THUMBNAIL_JPEG_QUALITY,
+)
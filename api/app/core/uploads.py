@@ -0,0 +1,195 @@
+# app/core/uploads.py
+"""
+Módulo de recepción de archivos subidos sin cargarlos completos en memoria.
+
+`await archivo.read()` duplica en RAM cada archivo del multipart (Starlette
+ya lo tiene en un SpooledTemporaryFile). Aquí el archivo se copia por
+trozos de `TAMANIO_TROZO` a un almacén local direccionado por contenido:
+
+- Mientras se copia se calcula el SHA-256 y se controla el tamaño; si
+  supera el límite se corta la copia y se responde 413.
+- El archivo queda en `UPLOADS_DIR/{sha256[:2]}/{sha256}`; dos subidas del
+  mismo contenido comparten archivo (escritura atómica con `os.replace`).
+- El handler recibe un `ArchivoSubido` (ruta, hash, tamaño) y decide cómo
+  leerlo: por ruta (p. ej. `leer_excel`), con `mapear()` o, si es chico,
+  con `leer()`.
+
+Los archivos no se borran al terminar la petición (otro request puede
+estar usando el mismo contenido): `purgar_subidas` elimina los que llevan
+más de `UPLOADS_TTL_SECONDS` sin usarse y corre periódicamente.
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.uploads")
+
+TAMANIO_TROZO = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ArchivoSubido:
+    """Archivo ya copiado al almacén local."""
+
+    ruta: Path
+    sha256: str
+    tamanio: int
+    nombre: Optional[str] = None
+
+    @contextmanager
+    def mapear(self) -> Iterator[mmap.mmap]:
+        """Mapea el archivo en memoria (solo lectura) sin copiarlo; no admite archivos vacíos."""
+        with open(self.ruta, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                yield mapa
+
+    async def leer(self) -> bytes:
+        """Lee el archivo completo; solo para archivos acotados (imágenes)."""
+        return await asyncio.to_thread(self.ruta.read_bytes)
+
+    async def trozos(self) -> AsyncIterator[bytes]:
+        """Recorre el archivo por trozos de `TAMANIO_TROZO`."""
+        with open(self.ruta, "rb") as f:
+            while trozo := await asyncio.to_thread(f.read, TAMANIO_TROZO):
+                yield trozo
+
+
+def _ruta(sha256: str) -> Path:
+    return Path(settings.UPLOADS_DIR) / sha256[:2] / sha256
+
+
+def _crear_temporal() -> tuple[int, str]:
+    directorio = Path(settings.UPLOADS_DIR) / "tmp"
+    directorio.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=directorio, suffix=".part")
+
+
+def _escribir(f, digest, trozo: bytes) -> None:
+    f.write(trozo)
+    digest.update(trozo)
+
+
+def _consolidar(tmp: str, sha256: str) -> Path:
+    destino = _ruta(sha256)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.exists():
+        # Mismo contenido ya guardado: se descarta la copia y se renueva su uso
+        os.remove(tmp)
+        os.utime(destino)
+    else:
+        os.replace(tmp, destino)
+    return destino
+
+
+async def recibir_flujo(
+    trozos: AsyncIterator[bytes],
+    max_bytes: Optional[int] = None,
+    nombre: Optional[str] = None,
+) -> ArchivoSubido:
+    """
+    Copia un flujo de bytes al almacén local calculando hash y tamaño.
+
+    Args:
+        trozos: Iterador asíncrono con el contenido.
+        max_bytes: Tamaño máximo aceptado; None sin límite.
+        nombre: Nombre original, solo informativo.
+
+    Raises:
+        HTTPException: 413 si el contenido supera `max_bytes`.
+    """
+    fd, tmp = await asyncio.to_thread(_crear_temporal)
+    digest = hashlib.sha256()
+    tamanio = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for trozo in trozos:
+                tamanio += len(trozo)
+                if max_bytes is not None and tamanio > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Archivo demasiado grande ({nombre or 'sin nombre'}): máximo {max_bytes // (1024 * 1024)} MB",
+                    )
+                await asyncio.to_thread(_escribir, f, digest, trozo)
+        sha256 = digest.hexdigest()
+        ruta = await asyncio.to_thread(_consolidar, tmp, sha256)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return ArchivoSubido(ruta=ruta, sha256=sha256, tamanio=tamanio, nombre=nombre)
+
+
+async def _trozos_upload(archivo: UploadFile) -> AsyncIterator[bytes]:
+    while trozo := await archivo.read(TAMANIO_TROZO):
+        yield trozo
+
+
+async def recibir_archivo(archivo: UploadFile, max_bytes: int) -> ArchivoSubido:
+    """Copia un `UploadFile` al almacén local y libera su archivo temporal."""
+    try:
+        return await recibir_flujo(_trozos_upload(archivo), max_bytes, archivo.filename)
+    finally:
+        await archivo.close()
+
+
+async def recibir_archivos(archivos: Optional[list[UploadFile]], max_bytes: int) -> dict[str, ArchivoSubido]:
+    """`recibir_archivo` para cada archivo; el resultado se indexa por nombre."""
+    recibidos = {}
+    for archivo in archivos or []:
+        recibidos[archivo.filename] = await recibir_archivo(archivo, max_bytes)
+    return recibidos
+
+
+def _purgar(max_edad: float) -> int:
+    limite = time.time() - max_edad
+    borrados = 0
+    raiz = Path(settings.UPLOADS_DIR)
+    if not raiz.is_dir():
+        return 0
+    for directorio in raiz.iterdir():
+        if not directorio.is_dir():
+            continue
+        for entrada in os.scandir(directorio):
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    borrados += 1
+            except FileNotFoundError:
+                pass
+    return borrados
+
+
+async def purgar_subidas(max_edad: Optional[float] = None) -> int:
+    """Elimina los archivos sin uso hace más de `max_edad` segundos; devuelve cuántos."""
+    return await asyncio.to_thread(_purgar, max_edad or settings.UPLOADS_TTL_SECONDS)
+
+
+async def purga_subidas_periodica() -> None:
+    """Tarea de fondo: purga el almacén local cada `UPLOADS_TTL_SECONDS / 4`."""
+    while True:
+        try:
+            borrados = await purgar_subidas()
+            if borrados:
+                logger.info(f"Subidas: {borrados} archivos vencidos eliminados.")
+        except asyncio.CancelledError:
+            break
+        except OSError as e:
+            logger.error(f"Subidas: error al purgar ({e}).")
+        try:
+            await asyncio.sleep(settings.UPLOADS_TTL_SECONDS / 4)
+        except asyncio.CancelledError:
+            break
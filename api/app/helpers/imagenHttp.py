@@ -0,0 +1,150 @@
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.blobs import BlobNoEncontrado, blob_store
+from app.core.thumbnails import TAMANIOS_MINIATURA, thumbnail_cache
+
+logger = logging.getLogger("uvicorn.error")
+
+# Las imágenes cambian solo al actualizar el registro; el navegador las
+# guarda y revalida con If-None-Match (304 sin cuerpo si no cambiaron).
+CACHE_CONTROL_IMAGEN = "private, no-cache"
+
+_FIRMAS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def tamanio_miniatura(
+    size: Optional[int] = Query(None, description="Lado máximo en px (64, 128, 256 o 512); omitir para la imagen original"),
+) -> Optional[int]:
+    """Dependencia del parámetro `size`: solo se aceptan los tamaños de `TAMANIOS_MINIATURA`."""
+    if size is not None and size not in TAMANIOS_MINIATURA:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Tamaño no permitido: {size}. Opciones: {', '.join(map(str, TAMANIOS_MINIATURA))}",
+        )
+    return size
+
+
+def detectar_media_type(data: bytes) -> str:
+    """Deduce el Content-Type a partir de los primeros bytes de la imagen."""
+    for firma, media_type in _FIRMAS:
+        if data.startswith(firma):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def calcular_etag(data: bytes) -> str:
+    """ETag fuerte basado en el SHA-256 del contenido."""
+    return f'"{hashlib.sha256(data).hexdigest()}"'
+
+
+def etag_desde_hash(digest_hex: str) -> str:
+    """Construye el ETag a partir de un SHA-256 ya calculado (p. ej. en Postgres)."""
+    return f'"{digest_hex}"'
+
+
+def etag_coincide(request: Request, etag: str) -> bool:
+    """Indica si el cliente ya tiene la versión identificada por `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip() for tag in if_none_match.split(",")}
+
+
+def no_modificado(etag: str, cache_control: str = CACHE_CONTROL_IMAGEN) -> Response:
+    """Respuesta 304 sin cuerpo."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def respuesta_imagen(
+    request: Request,
+    data: bytes,
+    etag: Optional[str] = None,
+    cache_control: str = CACHE_CONTROL_IMAGEN,
+) -> Response:
+    """
+    Devuelve los bytes crudos de una imagen con ETag y Cache-Control.
+
+    Si el cliente envía un If-None-Match que coincide, responde 304 sin cuerpo.
+    """
+    etag = etag or calcular_etag(data)
+    if etag_coincide(request, etag):
+        return no_modificado(etag, cache_control)
+    return Response(
+        content=data,
+        media_type=detectar_media_type(data),
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+async def respuesta_columna_imagen(
+    request: Request,
+    session: AsyncSession,
+    columna,
+    condicion,
+    size: Optional[int] = None,
+    cache_control: str = CACHE_CONTROL_IMAGEN,
+) -> Response:
+    """
+    Sirve la imagen cuyo SHA-256 guarda `columna`, leyéndola del almacén de blobs.
+
+    El hash de la fila es el ETag: si coincide con el If-None-Match del
+    cliente se responde 304 sin leer el blob. Con `size` se sirve una
+    miniatura JPEG desde `thumbnail_cache`, generándola a partir del
+    original solo la primera vez.
+
+    Args:
+        request: Petición entrante (para leer If-None-Match).
+        session: Sesión de base de datos.
+        columna: Atributo ORM con el hash de la imagen, p. ej. `Usuario.imagen_sha256`.
+        condicion: Expresión WHERE que identifica la fila.
+        size: Lado máximo de la miniatura en píxeles; None sirve el original.
+
+    Raises:
+        HTTPException: 404 si la fila no existe, no tiene imagen o el blob falta.
+    """
+    digest = await session.scalar(select(columna).where(condicion))
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    etag = etag_desde_hash(digest if size is None else f"{digest}-{size}")
+    if etag_coincide(request, etag):
+        return no_modificado(etag, cache_control)
+
+    if size is not None:
+        miniatura = await thumbnail_cache.obtener(digest, size)
+        if miniatura is not None:
+            return respuesta_imagen(request, miniatura, etag, cache_control)
+
+    try:
+        data = await blob_store.leer(digest)
+    except BlobNoEncontrado:
+        logger.error(f"Blob {digest} referenciado pero ausente del almacén")
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    if size is not None:
+        try:
+            miniatura = await thumbnail_cache.generar(digest, size, data)
+            return respuesta_imagen(request, miniatura, etag, cache_control)
+        except ValueError as e:
+            # Formato no soportado por OpenCV: se sirve el original
+            logger.warning(f"No se pudo generar miniatura ({e}); se sirve el original")
+            etag = etag_desde_hash(digest)
+    return respuesta_imagen(request, data, etag, cache_control)
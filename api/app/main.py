@@ -6,7 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.auth import auth
 from app.core.security import decode_access_token
-from app.core.realtime import db_to_redis_bridge, manager
+from app.core.realtime import bridge_con_liderazgo, manager
+from app.core.jobs import job_worker
+from app.core.excel import cerrar_pool_excel
+from app.core.uploads import purga_subidas_periodica
+from app.core.passwords import password_service
+from app.core.config import settings
 from app.core.db import init_db, dispose_db, check_db_connection
 
 from app.api.v1.auth import usuario
@@ -16,7 +21,7 @@ from app.api.v1.almacen.catalogos.RouterAlmacenIngresoMaterial import router_ing
 from app.api.v1.almacen.catalogos.RouterAlmacenSalidaMercaderia import router_salidaMercaderia
 from app.api.v1.almacen.catalogos.RouterAlmacenSalidaMaterial import router_salidaMaterial
 from app.api.v1.gerencia.inicio.RouterGerenciaInicioProvClient import router_clientesGerenciaInicio, router_proveedoresGerenciaInicio
-from app.api.v1.tesoreria.routers.RouterTesoreriaEfectivo import router_cajachica, router_bcpsoles, router_bcpdolares
+from app.api.v1.tesoreria.routers.RouterTesoreriaEfectivo import router_cajachica, router_bcpsoles, router_bcpdolares, conciliacion_saldos_periodica
 from app.api.v1.tesoreria.routers.RouterTesoreriaCntPorPagar import router_cuentasporpagar
 from app.api.v1.contabilidad.ventas.routerVentas import router_contabilidad_ventas
 from app.api.v1.tesoreria.routers.RouterTesoreriaCntPorCobrar import router_tesoreria_cuentasporcobrar
@@ -28,6 +33,7 @@ from app.api.v1.administracion.monitoreo.routers.router_MC import router_servici
 from app.api.v1.administracion.monitoreo.routers.router_inventario_chips import router_servicio_inventario_chips
 from app.api.v1.administracion.monitoreo.routers.router_chips import router_servicio_chips
 from app.api.v1.administracion.globalClienteProveedor.router_clientes_global import router_clientes_global
+from app.api.v1.jobs.routerJobs import router_jobs
 
 
 
@@ -63,8 +69,10 @@ app.add_middleware(
     allow_headers=["*"],               # permite Authorization, Content-Type, etc.
 )
 
-# Referencia para la tarea de fondo
+# Referencia para las tareas de fondo
 realtime_task = None
+jobs_task = None
+uploads_task = None
 
 # --- NUEVO ENDPOINT WEBSOCKET REFORZADO ---
 @app.websocket("/ws/notifications")
@@ -78,50 +86,49 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None):
         user_id = str(payload.get("sub"))
         await websocket.accept()
         
-        from app.core.realtime import redis_client
-        online_key = f"user:online:{user_id}"
-        
-        # 1. Marcamos presencia
-        await redis_client.set(online_key, "1", ex=20) 
-        
-        # 2. Notificamos a todos que ALGUIEN ENTRÓ
-        await redis_client.publish("broadcast_channel", "refresh")
-        
         logger.info(f"🔌 WebSocket: Cliente {user_id} conectado.")
         
-        try:
-            await manager.broadcast_handler(websocket, user_id)
-        finally:
-            # 3. Notificamos a todos que ALGUIEN SALIÓ (o refrescó)
-            # Aunque la clave no se borre (por el TTL), al enviar "refresh",
-            # el frontend pedirá la lista /usuarios/online de nuevo.
-            await redis_client.publish("broadcast_channel", "refresh")
-            
-            logger.info(f"🔌 WebSocket: Cliente {user_id} desconectado (notificando refresh).")
+        # La presencia (alta, latidos y baja por TTL) la lleva el manager;
+        # los demás clientes reciben solo el evento joined/left
+        await manager.broadcast_handler(websocket, user_id)
+
+        logger.info(f"🔌 WebSocket: Cliente {user_id} desconectado.")
 
     except Exception as e:
         logger.error(f"❌ WebSocket Error: {e}")
 
 @app.on_event("startup")
 async def on_startup():
-    global realtime_task
+    global realtime_task, jobs_task, uploads_task
     init_db()
     if not await check_db_connection():
         raise RuntimeError("DB Connection Failed")
     
-    # Iniciar el puente en segundo plano
-    realtime_task = asyncio.create_task(db_to_redis_bridge())
+    # Iniciar el puente en segundo plano (solo corre en el worker líder,
+    # igual que la conciliación de tesorería)
+    tareas_lider = []
+    if settings.TESORERIA_CONCILIACION_INTERVAL_SECONDS:
+        tareas_lider.append(conciliacion_saldos_periodica)
+    realtime_task = asyncio.create_task(bridge_con_liderazgo(*tareas_lider))
+    manager.iniciar()
+    if settings.JOBS_WORKER_EMBEDDED:
+        jobs_task = asyncio.create_task(job_worker(settings.JOBS_CONCURRENCY))
+    uploads_task = asyncio.create_task(purga_subidas_periodica())
     logger.info("✅ Servidor iniciado y Bridge activo.")
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    global realtime_task
-    if realtime_task:
-        realtime_task.cancel() # Cancelar tarea para evitar errores de "Task pending"
-        try:
-            await realtime_task
-        except asyncio.CancelledError:
-            pass
+    global realtime_task, jobs_task, uploads_task
+    for task in (realtime_task, jobs_task, uploads_task):
+        if task:
+            task.cancel() # Cancelar tarea para evitar errores de "Task pending"
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    await manager.detener()
+    cerrar_pool_excel()
+    password_service.cerrar()
     await dispose_db()
     logger.info("🚀 API cerrada correctamente.")
 
@@ -151,4 +158,5 @@ app.include_router(router_servicio_pro)
 app.include_router(router_servicio_mc)
 app.include_router(router_servicio_inventario_chips)
 app.include_router(router_servicio_chips)
-app.include_router(router_clientes_global)
\ No newline at end of file
+app.include_router(router_clientes_global)
+app.include_router(router_jobs)
\ No newline at end of file
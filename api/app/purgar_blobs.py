@@ -0,0 +1,55 @@
+# app/purgar_blobs.py
+"""
+Elimina del almacén de imágenes los blobs que ya no referencia ninguna fila.
+
+    python -m app.purgar_blobs
+
+Borrar un registro o cambiar su imagen no borra el blob, porque otras filas
+pueden compartirlo. Aquí se eliminan los que no aparecen en ninguna columna
+de hash y llevan más de `BLOBS_PURGA_GRACIA_SECONDS` sin usarse.
+"""
+import asyncio
+import logging
+
+from sqlalchemy import select, union
+
+# Importar la app registra todos los modelos (las relaciones entre ellos se resuelven por nombre)
+import app.main  # noqa: F401
+from app.core import db as db_module
+from app.core.blobs import purgar_huerfanos
+from app.core.db import dispose_db, init_db
+from app.api.v1.auth.auth_models import Usuario
+from app.api.v1.almacen.catalogos.ModelsAlmacenCatalogosMerMat import CatalogoMaterial, CatalogoMercaderia
+from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMaterial import IngresoMaterial
+from app.api.v1.almacen.catalogos.ModelsAlmacenIngresoMercaderia import IngresoMercaderia
+from app.api.v1.almacen.catalogos.ModelsAlmacenSalidaMaterial import SalidaMaterial
+from app.api.v1.almacen.catalogos.ModelsAlmacenSalidaMercaderia import SalidaMercaderia
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+logger = logging.getLogger("app.purgar_blobs")
+
+# Todas las columnas que guardan el SHA-256 de un blob
+COLUMNAS_BLOB = [
+    Usuario.imagen_sha256,
+    *(getattr(catalogo, f"imagen{n}_sha256") for catalogo in (CatalogoMercaderia, CatalogoMaterial) for n in range(1, 5)),
+    IngresoMercaderia.image_sha256,
+    IngresoMaterial.image_sha256,
+    SalidaMercaderia.image_sha256,
+    SalidaMaterial.image_sha256,
+]
+
+
+async def main() -> None:
+    init_db()
+    try:
+        async with db_module.AsyncSessionLocal() as session:
+            consulta = union(*(select(columna).where(columna.isnot(None)) for columna in COLUMNAS_BLOB))
+            referenciados = set((await session.scalars(consulta)).all())
+        borrados = await purgar_huerfanos(referenciados)
+        logger.info(f"Blobs: {len(referenciados)} referenciados, {borrados} huérfanos eliminados.")
+    finally:
+        await dispose_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+# app/worker.py
+"""
+Consumidor de trabajos en segundo plano como proceso independiente.
+
+    python -m app.worker
+
+Útil con `JOBS_WORKER_EMBEDDED=False` para que las importaciones pesadas
+no compitan por CPU con los procesos que atienden la API.
+"""
+import asyncio
+import logging
+
+# Importar la app registra las tareas declaradas en los routers
+import app.main  # noqa: F401
+from app.core.config import settings
+from app.core.db import dispose_db, init_db
+from app.core.excel import cerrar_pool_excel
+from app.core.jobs import job_worker
+from app.core.uploads import purga_subidas_periodica
+
+logger = logging.getLogger("app.worker")
+
+
+async def main() -> None:
+    init_db()
+    # Los archivos de los trabajos se bajan de Redis al almacén local de este proceso
+    purga = asyncio.create_task(purga_subidas_periodica())
+    try:
+        await job_worker(settings.JOBS_CONCURRENCY)
+    finally:
+        purga.cancel()
+        cerrar_pool_excel()
+        await dispose_db()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Worker detenido.")
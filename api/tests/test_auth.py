@@ -0,0 +1,51 @@
+# tests/test_auth.py
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth.schema_usuario import PermisoBase, UsuarioPrincipal
+from app.core.deps import get_current_user
+from app.main import app
+
+
+def principal(*modulos: str) -> UsuarioPrincipal:
+    creado = datetime(2026, 1, 1)
+    return UsuarioPrincipal(
+        id=1,
+        name="Ana",
+        last_name="Pérez",
+        email="ana@example.com",
+        cargo="Almacén",
+        estado="activo",
+        permisos=[
+            PermisoBase(id=i, name_module=m, usuario_id=1, created_at=creado)
+            for i, m in enumerate(modulos, start=1)
+        ],
+        created_at=creado,
+    )
+
+
+@pytest.fixture
+def cliente_como():
+    def cliente(usuario: UsuarioPrincipal) -> TestClient:
+        app.dependency_overrides[get_current_user] = lambda: usuario
+        return TestClient(app)
+
+    try:
+        yield cliente
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_password_metrics_requiere_gerencia(cliente_como):
+    respuesta = cliente_como(principal("almacen", "ventas")).get("/auth/password-metrics")
+
+    assert respuesta.status_code == 403
+
+
+def test_password_metrics_con_gerencia(cliente_como):
+    respuesta = cliente_como(principal("gerencia")).get("/auth/password-metrics")
+
+    assert respuesta.status_code == 200
+    assert {"en_curso", "rechazadas", "espera_promedio_ms"} <= respuesta.json().keys()
@@ -0,0 +1,119 @@
+# tests/test_blobs.py
+import asyncio
+import hashlib
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+from app.core import blobs
+from app.core.blobs import AlmacenBlobsLocal, AlmacenBlobsMemoria, BlobNoEncontrado
+
+MIGRACION = Path(__file__).parents[1] / "alembic" / "versions" / "f2b8d4a61c39_imagenes_en_almacen_de_blobs.py"
+
+
+@pytest.fixture(params=["memoria", "local"])
+def almacen(request, tmp_path):
+    if request.param == "memoria":
+        return AlmacenBlobsMemoria()
+    return AlmacenBlobsLocal(str(tmp_path / "blobs"))
+
+
+def test_guardar_devuelve_sha256_y_se_relee(almacen):
+    sha256 = almacen.guardar_sync(b"foto")
+
+    assert sha256 == hashlib.sha256(b"foto").hexdigest()
+    assert almacen.leer_sync(sha256) == b"foto"
+
+
+def test_mismo_contenido_se_guarda_una_vez(almacen, monkeypatch):
+    escrituras = []
+    escribir = almacen._escribir
+
+    def contar(sha256, origen):
+        escrituras.append(sha256)
+        escribir(sha256, origen)
+
+    monkeypatch.setattr(almacen, "_escribir", contar)
+
+    primero = almacen.guardar_sync(b"foto")
+    segundo = almacen.guardar_sync(b"foto")
+
+    assert primero == segundo
+    assert escrituras == [primero]
+    assert [sha256 for sha256, _ in almacen.listar_sync()] == [primero]
+
+
+def test_guardar_otra_vez_renueva_el_uso(tmp_path):
+    almacen = AlmacenBlobsLocal(str(tmp_path))
+    sha256 = almacen.guardar_sync(b"foto")
+    os.utime(almacen._ruta(sha256), (1000, 1000))
+
+    almacen.guardar_sync(b"foto")
+
+    assert dict(almacen.listar_sync())[sha256] > 1000
+
+
+def test_blob_inexistente(almacen):
+    with pytest.raises(BlobNoEncontrado):
+        almacen.leer_sync("0" * 64)
+    almacen.borrar_sync("0" * 64)
+
+
+def test_borrar(almacen):
+    sha256 = almacen.guardar_sync(b"foto")
+    almacen.borrar_sync(sha256)
+
+    with pytest.raises(BlobNoEncontrado):
+        almacen.leer_sync(sha256)
+
+
+def test_local_no_deja_temporales(tmp_path):
+    almacen = AlmacenBlobsLocal(str(tmp_path))
+    sha256 = almacen.guardar_sync(b"foto")
+
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [sha256]
+    assert (tmp_path / sha256[:2] / sha256).read_bytes() == b"foto"
+
+
+def test_purgar_respeta_referenciados_y_gracia(monkeypatch):
+    almacen = AlmacenBlobsMemoria()
+    monkeypatch.setattr(blobs, "blob_store", almacen)
+    monkeypatch.setattr(blobs.time, "time", lambda: 1000.0)
+    referenciado = almacen.guardar_sync(b"en uso")
+    viejo = almacen.guardar_sync(b"huerfano viejo")
+    monkeypatch.setattr(blobs.time, "time", lambda: 5000.0)
+    reciente = almacen.guardar_sync(b"huerfano reciente")
+
+    borrados = asyncio.run(blobs.purgar_huerfanos({referenciado}, gracia=3600))
+
+    assert borrados == 1
+    assert {sha256 for sha256, _ in almacen.listar_sync()} == {referenciado, reciente}
+    with pytest.raises(BlobNoEncontrado):
+        almacen.leer_sync(viejo)
+
+
+@pytest.fixture
+def migracion():
+    spec = importlib.util.spec_from_file_location("migracion_blobs", MIGRACION)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_migracion_rechaza_almacen_en_memoria(migracion, monkeypatch):
+    monkeypatch.setattr(migracion.settings, "BLOBS_BACKEND", "memoria")
+
+    with pytest.raises(RuntimeError, match="no es persistente"):
+        migracion._comprobar_almacen()
+
+
+def test_migracion_exige_blobs_dir(migracion, monkeypatch, tmp_path):
+    monkeypatch.setattr(migracion.settings, "BLOBS_BACKEND", "local")
+    monkeypatch.setattr(migracion.settings, "BLOBS_DIR", str(tmp_path / "sin-montar"))
+    with pytest.raises(RuntimeError, match="no existe"):
+        migracion._comprobar_almacen()
+
+    monkeypatch.setattr(migracion.settings, "BLOBS_DIR", str(tmp_path))
+    migracion._comprobar_almacen()
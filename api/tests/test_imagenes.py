@@ -0,0 +1,67 @@
+# tests/test_imagenes.py
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.blobs import blob_store
+from app.core.db import get_session
+from app.core.deps import get_current_user
+from app.main import app
+
+
+class SesionFalsa:
+    """Sesión mínima: `respuesta_columna_imagen` solo lee el hash de la fila."""
+
+    def __init__(self, digest):
+        self.digest = digest
+
+    async def scalar(self, _consulta):
+        return self.digest
+
+
+def png(ancho: int, alto: int) -> bytes:
+    ok, buffer = cv2.imencode(".png", np.full((alto, ancho, 3), 200, dtype=np.uint8))
+    assert ok
+    return buffer.tobytes()
+
+
+@pytest.fixture
+def cliente_con_imagen():
+    digest = blob_store.guardar_sync(png(800, 600))
+    app.dependency_overrides[get_current_user] = lambda: None
+    app.dependency_overrides[get_session] = lambda: SesionFalsa(digest)
+    try:
+        yield TestClient(app), digest
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_size_devuelve_miniatura(cliente_con_imagen):
+    cliente, digest = cliente_con_imagen
+
+    respuesta = cliente.get("/ingresoMaterial/1/imagen", params={"size": 128})
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "image/jpeg"
+    assert respuesta.headers["etag"] == f'"{digest}-128"'
+    imagen = cv2.imdecode(np.frombuffer(respuesta.content, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert max(imagen.shape[:2]) == 128
+
+
+def test_sin_size_devuelve_original(cliente_con_imagen):
+    cliente, digest = cliente_con_imagen
+
+    respuesta = cliente.get("/salidaMercaderia/1/imagen")
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "image/png"
+    assert respuesta.content == blob_store.leer_sync(digest)
+
+
+def test_size_no_permitido(cliente_con_imagen):
+    cliente, _ = cliente_con_imagen
+
+    respuesta = cliente.get("/ingresoMaterial/1/imagen", params={"size": 100})
+
+    assert respuesta.status_code == 422
@@ -0,0 +1,114 @@
+# tests/test_pagination.py
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.core.pagination import Pagina, Paginacion, paginar
+
+metadata = MetaData()
+registros = Table(
+    "registros",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fecha", Date, nullable=False),
+    Column("nombre", String, nullable=False),
+)
+
+# Fechas repetidas a propósito: el id tiene que desempatar
+FILAS = [
+    {"id": i, "fecha": date(2026, 1, 1 + i // 3), "nombre": f"registro {i}"}
+    for i in range(1, 24)
+]
+
+ORDENES = {"fecha": registros.c.fecha, "id": registros.c.id, "nombre": registros.c.nombre}
+
+
+class SesionSqlite:
+    """Adapta una conexión síncrona de SQLite a lo que `paginar` usa de AsyncSession."""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+
+    async def execute(self, consulta):
+        return self.conexion.execute(consulta)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.connect() as conexion:
+        conexion.execute(insert(registros), FILAS)
+        yield SesionSqlite(conexion)
+
+
+def pagina(db, limit=None, after=None, sort=None):
+    pag = Paginacion(limit=limit, after=after, sort=sort)
+    return asyncio.run(
+        paginar(db, select(registros), pag, ordenes=ORDENES, orden_defecto="-fecha", desempate=registros.c.id)
+    )
+
+
+def recorrer(db, limit, sort=None):
+    """Pide páginas siguiendo `next_cursor` hasta la última y devuelve los ids en orden."""
+    ids, cursor = [], None
+    while True:
+        resultado = pagina(db, limit=limit, after=cursor, sort=sort)
+        assert isinstance(resultado, Pagina)
+        assert len(resultado.items) <= limit
+        ids += [item["id"] for item in resultado.items]
+        cursor = resultado.next_cursor
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 23, 100])
+def test_recorrido_descendente_sin_huecos_ni_duplicados(db, limit):
+    esperado = [f["id"] for f in sorted(FILAS, key=lambda f: (f["fecha"], f["id"]), reverse=True)]
+    assert recorrer(db, limit) == esperado
+
+
+def test_recorrido_ascendente_por_otro_campo(db):
+    esperado = [f["id"] for f in sorted(FILAS, key=lambda f: (f["nombre"], f["id"]))]
+    assert recorrer(db, 4, sort="nombre") == esperado
+
+
+def test_ultima_pagina_exacta_sin_cursor(db):
+    resultado = pagina(db, limit=len(FILAS))
+    assert len(resultado.items) == len(FILAS)
+    assert resultado.next_cursor is None
+
+
+def test_sin_limit_ni_after_devuelve_lista_completa(db):
+    resultado = pagina(db)
+    assert isinstance(resultado, list)
+    assert [item["id"] for item in resultado] == recorrer(db, 5)
+
+
+def test_after_sin_limit_usa_limite_por_defecto(db):
+    primera = pagina(db, limit=2)
+    resultado = pagina(db, after=primera.next_cursor)
+    assert isinstance(resultado, Pagina)
+    assert len(resultado.items) == len(FILAS) - 2
+
+
+def test_cursor_de_otro_orden_es_invalido(db):
+    cursor = pagina(db, limit=2, sort="nombre").next_cursor
+    with pytest.raises(HTTPException) as error:
+        pagina(db, limit=2, after=cursor, sort="-fecha")
+    assert error.value.status_code == 400
+
+
+def test_cursor_corrupto_es_invalido(db):
+    with pytest.raises(HTTPException) as error:
+        pagina(db, limit=2, after="no-es-un-cursor")
+    assert error.value.status_code == 400
+
+
+def test_orden_no_permitido(db):
+    with pytest.raises(HTTPException) as error:
+        pagina(db, limit=2, sort="-desconocido")
+    assert error.value.status_code == 422
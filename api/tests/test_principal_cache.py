@@ -0,0 +1,233 @@
+# tests/test_principal_cache.py
+import asyncio
+from datetime import datetime
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.api.v1.auth.schema_usuario import UsuarioPrincipal
+from app.core import principal_cache as modulo
+from app.core.principal_cache import (
+    CANAL_INVALIDACION,
+    GENERACION_KEY_PREFIX,
+    REDIS_KEY_PREFIX,
+    PrincipalCache,
+    principal_cache,
+)
+from app.core.realtime import manager
+
+
+class RedisFalso:
+    """Lo que `PrincipalCache` usa de Redis, sobre un dict."""
+
+    def __init__(self):
+        self.datos: dict[str, str] = {}
+        self.publicados: list[tuple[str, str]] = []
+        self.caido = False
+
+    def _comprobar(self):
+        if self.caido:
+            raise RedisError("sin conexión")
+
+    async def get(self, clave):
+        self._comprobar()
+        return self.datos.get(clave)
+
+    def pipeline(self, transaction=True):
+        return PipelineFalso(self)
+
+    async def guardar_si_generacion(self, keys, args):
+        """Mismo efecto que el script Lua `_guardar_si_generacion`."""
+        self._comprobar()
+        generacion, principal_key = keys
+        esperada, valor, _ttl = args
+        if self.datos.get(generacion, "0") != esperada:
+            return 0
+        self.datos[principal_key] = valor
+        return 1
+
+
+class PipelineFalso:
+    def __init__(self, redis: RedisFalso):
+        self.redis = redis
+        self.comandos = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, clave):
+        self.comandos.append(lambda d: d.__setitem__(clave, str(int(d.get(clave, "0")) + 1)))
+
+    def delete(self, clave):
+        self.comandos.append(lambda d: d.pop(clave, None))
+
+    def publish(self, canal, mensaje):
+        self.comandos.append(lambda d: self.redis.publicados.append((canal, mensaje)))
+
+    async def execute(self):
+        self.redis._comprobar()
+        for comando in self.comandos:
+            comando(self.redis.datos)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    falso = RedisFalso()
+    monkeypatch.setattr(modulo, "redis_client", falso)
+    monkeypatch.setattr(modulo, "_guardar_si_generacion", falso.guardar_si_generacion)
+    return falso
+
+
+def principal(user_id: int, estado: str = "activo") -> UsuarioPrincipal:
+    return UsuarioPrincipal(
+        id=user_id,
+        name="Ana",
+        last_name="Pérez",
+        email=f"usuario{user_id}@example.com",
+        cargo="Almacén",
+        estado=estado,
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+def cache(**kwargs) -> PrincipalCache:
+    opciones = {"max_size": 10, "local_ttl": 60, "redis_ttl": 300, "use_redis": False}
+    return PrincipalCache(**{**opciones, **kwargs})
+
+
+def guardar(c: PrincipalCache, p: UsuarioPrincipal) -> None:
+    """Lo que hace `get_current_user` tras un fallo de caché: generación, SELECT y `set`."""
+    asyncio.run(c.set(p, asyncio.run(c.generacion(p.id))))
+
+
+def test_guarda_y_recupera_en_memoria():
+    c = cache()
+    guardar(c, principal(1))
+    assert asyncio.run(c.get(1)) == principal(1)
+    assert asyncio.run(c.get(2)) is None
+
+
+def test_descarta_el_menos_usado_al_llenarse():
+    c = cache(max_size=2)
+    guardar(c, principal(1))
+    guardar(c, principal(2))
+    asyncio.run(c.get(1))
+    guardar(c, principal(3))
+
+    assert asyncio.run(c.get(2)) is None
+    assert asyncio.run(c.get(1)) is not None
+    assert asyncio.run(c.get(3)) is not None
+
+
+def test_entrada_local_expira(monkeypatch):
+    c = cache(local_ttl=5)
+    reloj = [1000.0]
+    monkeypatch.setattr(modulo.time, "monotonic", lambda: reloj[0])
+    guardar(c, principal(1))
+
+    reloj[0] += 4
+    assert asyncio.run(c.get(1)) is not None
+    reloj[0] += 2
+    assert asyncio.run(c.get(1)) is None
+
+
+def test_otro_proceso_lo_lee_de_redis(redis):
+    escritor, lector = cache(use_redis=True), cache(use_redis=True)
+    guardar(escritor, principal(1))
+
+    assert f"{REDIS_KEY_PREFIX}1" in redis.datos
+    assert asyncio.run(lector.get(1)) == principal(1)
+    # Ya quedó en la memoria del lector
+    redis.datos.clear()
+    assert asyncio.run(lector.get(1)) == principal(1)
+
+
+def test_invalidate_borra_ambos_niveles_y_avisa(redis):
+    c = cache(use_redis=True)
+    guardar(c, principal(1))
+
+    asyncio.run(c.invalidate(1))
+
+    assert f"{REDIS_KEY_PREFIX}1" not in redis.datos
+    assert redis.datos[f"{GENERACION_KEY_PREFIX}1"] == "1"
+    assert redis.publicados == [(CANAL_INVALIDACION, "1")]
+    assert asyncio.run(c.get(1)) is None
+
+
+def test_lectura_previa_a_la_invalidacion_no_se_cachea(redis):
+    """La petición lee la BD justo antes de que otro worker bloquee al usuario."""
+    peticion, admin, otro = (cache(use_redis=True) for _ in range(3))
+    generacion = asyncio.run(peticion.generacion(1))
+    leido = principal(1, estado="activo")  # SELECT previo al commit del bloqueo
+
+    asyncio.run(admin.invalidate(1))
+    asyncio.run(peticion.set(leido, generacion))
+
+    assert f"{REDIS_KEY_PREFIX}1" not in redis.datos
+    assert asyncio.run(peticion.get(1)) is None
+    assert asyncio.run(otro.get(1)) is None
+    # La siguiente petición lee el estado nuevo y ese sí se cachea
+    guardar(peticion, principal(1, estado="bloqueado"))
+    assert asyncio.run(otro.get(1)).estado == "bloqueado"
+
+
+def test_invalidacion_en_el_mismo_proceso_durante_la_lectura():
+    c = cache()
+    generacion = asyncio.run(c.generacion(1))
+
+    asyncio.run(c.invalidate(1))
+    asyncio.run(c.set(principal(1), generacion))
+
+    assert asyncio.run(c.get(1)) is None
+
+
+def test_el_aviso_descarta_la_memoria_de_otro_worker(redis):
+    propio, otro = cache(use_redis=True), cache(use_redis=True)
+    guardar(propio, principal(1))
+    asyncio.run(otro.get(1))
+
+    asyncio.run(propio.invalidate(1))
+    for _canal, data in redis.publicados:
+        otro._al_recibir_invalidacion(data)
+
+    assert otro._get_local(1) is None
+
+
+def test_el_suscriptor_del_worker_entrega_la_invalidacion():
+    principal_cache._set_local(7, principal(7))
+
+    asyncio.run(manager._despachar(CANAL_INVALIDACION, "7"))
+
+    assert principal_cache._get_local(7) is None
+
+
+def test_invalidacion_fallida_deja_de_usar_redis_hasta_reintentar(redis):
+    c, otro = cache(use_redis=True), cache(use_redis=True)
+    guardar(c, principal(1))
+
+    redis.caido = True
+    asyncio.run(c.invalidate(1))
+    assert asyncio.run(c.get(1)) is None
+    guardar(c, principal(1))
+    assert asyncio.run(c.get(1)) is None
+
+    # Al volver Redis, el primer acceso completa la invalidación pendiente
+    redis.caido = False
+    assert asyncio.run(c.get(1)) is None
+    assert f"{REDIS_KEY_PREFIX}1" not in redis.datos
+    assert asyncio.run(otro.get(1)) is None
+    guardar(c, principal(1))
+    assert asyncio.run(c.get(1)) == principal(1)
+
+
+def test_redis_caido_no_rompe_ni_cachea(redis):
+    c = cache(use_redis=True)
+    redis.caido = True
+
+    guardar(c, principal(1))
+    assert asyncio.run(c.get(1)) is None
+    asyncio.run(c.invalidate(1))
+    assert asyncio.run(c.get(1)) is None
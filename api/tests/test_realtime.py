@@ -0,0 +1,86 @@
+# tests/test_realtime.py
+import json
+
+from app.core.realtime import MAX_IDS_EVENTO, _Coalescedor, _evento_desde_notify
+
+
+def evento(tabla="almacen.ingreso_material", op="INSERT", count=1, ids=(1,)):
+    return _evento_desde_notify(json.dumps({
+        "schema": tabla.split(".")[0],
+        "table": tabla.split(".")[1],
+        "op": op,
+        "count": count,
+        "ids": list(ids) if ids is not None else None,
+    }))
+
+
+def test_payload_sin_estructura_es_none():
+    assert _evento_desde_notify("refresh") is None
+    assert _evento_desde_notify(json.dumps({"table": "x"})) is None
+
+
+def test_rafaga_se_emite_una_vez_al_cerrar_la_ventana():
+    c = _Coalescedor(ventana=2, max_espera=20)
+    for i in range(5):
+        c.agregar(evento(ids=[i]), ahora=i)
+
+    assert c.vencidos(5) == []
+    assert c.proximo_vencimiento() == 6
+
+    [(topico, acumulado)] = c.vencidos(6)
+    assert topico == "almacen.ingreso_material"
+    assert acumulado["count"] == 5
+    assert acumulado["ids"] == [0, 1, 2, 3, 4]
+    assert (c.recibidos, c.emitidos) == (5, 1)
+    assert c.proximo_vencimiento() is None
+
+
+def test_max_espera_corta_una_rafaga_continua():
+    c = _Coalescedor(ventana=0.2, max_espera=1)
+    t = 0.0
+    while t < 3:
+        c.agregar(evento(), ahora=t)
+        t += 0.1
+
+    assert c.proximo_vencimiento() == 1
+    assert len(c.vencidos(1)) == 1
+
+
+def test_tablas_distintas_no_se_mezclan():
+    c = _Coalescedor(ventana=0.2, max_espera=1)
+    c.agregar(evento("almacen.ingreso_material"), ahora=0)
+    c.agregar(evento("almacen.salida_material"), ahora=0.15)
+
+    assert [t for t, _ in c.vencidos(0.2)] == ["almacen.ingreso_material"]
+    assert [t for t, _ in c.vencidos(0.35)] == ["almacen.salida_material"]
+
+
+def test_operaciones_distintas_quedan_como_multiple():
+    c = _Coalescedor(ventana=0.2, max_espera=1)
+    c.agregar(evento(op="INSERT"), ahora=0)
+    c.agregar(evento(op="DELETE"), ahora=0.1)
+
+    [(_, acumulado)] = c.vencidos(1)
+    assert acumulado["op"] == "MULTIPLE"
+
+
+def test_ids_se_omiten_al_superar_el_maximo_o_si_falta_alguno():
+    c = _Coalescedor(ventana=0.2, max_espera=1)
+    c.agregar(evento(ids=range(MAX_IDS_EVENTO)), ahora=0)
+    c.agregar(evento(ids=[MAX_IDS_EVENTO]), ahora=0.1)
+    c.agregar(evento("almacen.salida_material", ids=[1]), ahora=0)
+    c.agregar(evento("almacen.salida_material", ids=None), ahora=0.1)
+
+    assert all(acumulado["ids"] is None for _, acumulado in c.vencidos(1))
+
+
+def test_payloads_sin_estructura_se_agrupan_aparte():
+    c = _Coalescedor(ventana=0.2, max_espera=1)
+    c.agregar(None, ahora=0)
+    c.agregar(None, ahora=0.1)
+    c.agregar(evento(), ahora=0.1)
+
+    assert sorted(c.vencidos(1), key=lambda x: x[0] or "") == [
+        (None, None),
+        ("almacen.ingreso_material", evento()),
+    ]
@@ -0,0 +1,84 @@
+# tests/test_stock.py
+import asyncio
+from datetime import datetime
+
+from app.api.v1.almacen.catalogos.SchemaAlmacenIngresoMaterial import StockActualMaterialDetallado
+from app.api.v1.almacen.catalogos.SchemaAlmacenIngresoMercaderia import StockActualLimitMercaderia
+from app.api.v1.almacen.catalogos.ServiceAlmacenStock import stock_bajo_limite, stock_detallado
+
+
+class Resultado:
+    def __init__(self, filas):
+        self.filas = filas
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.filas
+
+
+class SesionFalsa:
+    """Devuelve siempre las mismas filas; solo se prueba cómo se arma la respuesta."""
+
+    def __init__(self, filas):
+        self.filas = filas
+
+    async def execute(self, _consulta):
+        return Resultado(self.filas)
+
+
+LOTE = {
+    "codigo": "MAT-001",
+    "uuid_registro": "3f1c",
+    "name": "Cable",
+    "marca": "Indeco",
+    "modelo": "THW",
+    "medida": "m",
+    "dimension": "2.5mm",
+    "tipo": "Eléctrico",
+    "ubicacion": "A1",
+    "plimit": 5,
+    "serie": "S-1",
+    "cantidad_inicial": 10,
+    "cantidad_salida": 4,
+    "stock_actual": 6,
+    "valor": 12.5,
+    "moneda": "PEN",
+    "fecha_ingreso": datetime(2026, 1, 1),
+    "ingreso_id": 7,
+}
+
+
+def test_detallado_devuelve_url_de_la_imagen_del_ingreso():
+    filas = asyncio.run(stock_detallado(SesionFalsa([
+        {**LOTE, "tiene_imagen": True},
+        {**LOTE, "serie": "S-2", "ingreso_id": 8, "tiene_imagen": False},
+    ]), "material"))
+
+    salida = [StockActualMaterialDetallado.model_validate(f).model_dump() for f in filas]
+    assert [f["imagen_url"] for f in salida] == ["/ingresoMaterial/7/imagen", None]
+    assert "image_byte" not in salida[0]
+
+
+def test_bajo_limite_devuelve_urls_del_catalogo():
+    fila = {
+        "codigo": "MER-001",
+        "name": "Router",
+        "stock_actual": 0,
+        "plimit": 2,
+        "catalogo_id": 3,
+        "tiene_imagen1": True,
+        "tiene_imagen2": False,
+        "tiene_imagen3": True,
+        "tiene_imagen4": False,
+    }
+
+    [resultado] = asyncio.run(stock_bajo_limite(SesionFalsa([fila]), "mercaderia"))
+
+    assert StockActualLimitMercaderia.model_validate(resultado).imagenes_url == {
+        "imagen1": "/catalogoMercaderia/3/imagen/1",
+        "imagen2": None,
+        "imagen3": "/catalogoMercaderia/3/imagen/3",
+        "imagen4": None,
+    }
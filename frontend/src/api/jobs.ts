@@ -0,0 +1,55 @@
+import api from "./client";
+import { ApiError } from "./normalizeError";
+
+export type JobEstado = "pendiente" | "en_proceso" | "completado" | "error";
+
+/** Estado de un trabajo en segundo plano (`GET /jobs/{id}`). */
+export interface Job {
+  id: string;
+  tipo: string;
+  estado: JobEstado;
+  progreso: number;
+  mensaje: string | null;
+  archivo: string | null;
+  resultado: Record<string, unknown> | null;
+  errores: unknown;
+  creado: number;
+  actualizado: number;
+}
+
+const INTERVALO_MS = 1500;
+
+const esperar = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * @description Consulta `/jobs/{id}` hasta que el trabajo termina.
+ * @param onProgreso Se llama con cada estado intermedio (p. ej. para una barra de progreso).
+ * @returns El trabajo completado; si terminó en error lanza un `ApiError` con su mensaje.
+ */
+export async function esperarJob(job: Job, onProgreso?: (job: Job) => void): Promise<Job> {
+  while (job.estado === "pendiente" || job.estado === "en_proceso") {
+    onProgreso?.(job);
+    await esperar(INTERVALO_MS);
+    job = (await api.get<Job>(`/jobs/${job.id}`)).data;
+  }
+  if (job.estado === "error") {
+    throw new ApiError({
+      kind: "http",
+      httpStatus: null,
+      message: job.mensaje || "Error al procesar el archivo",
+      raw: job.errores,
+    });
+  }
+  return job;
+}
+
+/**
+ * @description Sube un Excel a un endpoint de importación (responde 202 con el trabajo encolado)
+ * y espera a que el worker lo procese.
+ */
+export async function importarExcel(url: string, fd: FormData, onProgreso?: (job: Job) => void): Promise<Job> {
+  const { data } = await api.post<Job>(url, fd, {
+    headers: { "Content-Type": "multipart/form-data" },
+  });
+  return esperarJob(data, onProgreso);
+}
@@ -7,7 +7,7 @@ export const UsuarioOutSchema = z.object({
   email: z.email(),
   cargo: z.string(),
   estado: z.enum(["activo", "bloqueado"]),
-  image_base64: z.string(),
+  imagen_url: z.string().nullable(),
   permisos: z.array(
     z.object({
       name_module: z.string(),
@@ -69,7 +69,7 @@ const UsuariosOnlineSchema = z.object({
   email: z.email(),
   cargo: z.string(),
   estado: z.enum(["activo", "bloqueado"]),
-  image_base64: z.string(),
+  imagen_url: z.string().nullable(),
   permisos: z.array(
     z.object({
       name_module: z.string(),
@@ -79,6 +79,7 @@ export function useUpdateUsuario(id: number) {
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ["usuarios"] });
       qc.invalidateQueries({ queryKey: ["usuario", id] });
+      qc.invalidateQueries({ queryKey: ["imagen", `/usuarios/${id}/imagen`] });
     },
   });
 }
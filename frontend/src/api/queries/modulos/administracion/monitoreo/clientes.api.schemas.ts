@@ -77,8 +77,9 @@ export const ChipOutSchema = z.object({
   instalacion: z.iso.datetime().nullable(),
   adicional: z.string().nullable(),
   status: z.number(),
-  imagen1: z.string().nullable(),
-  imagen2: z.string().nullable(),
+  // La API de chips no devuelve imágenes
+  imagen1: z.string().nullable().optional(),
+  imagen2: z.string().nullable().optional(),
   created_at: z.iso.datetime(),
 });
 
@@ -11,10 +11,13 @@ export const CatalogoMercaderiaOutSchema = z.object({
   plimit: z.number(),
   dimension: z.string().nullable(),
   descripcion: z.string().nullable(),
-  imagen1: z.string().nullable(),
-  imagen2: z.string().nullable(),
-  imagen3: z.string().nullable(),
-  imagen4: z.string().nullable(),
+  // Rutas de GET /catalogo*/{id}/imagen/{n}; null si no hay imagen
+  imagenes_url: z.object({
+    imagen1: z.string().nullable(),
+    imagen2: z.string().nullable(),
+    imagen3: z.string().nullable(),
+    imagen4: z.string().nullable(),
+  }),
   created_at: z.iso.datetime(),
 });
 
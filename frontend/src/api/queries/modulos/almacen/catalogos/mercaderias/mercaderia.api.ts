@@ -52,6 +52,12 @@ export function useUpdateCatalogoMercaderia(id: number) {
     }),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ["catalogoMercaderia"] });
+      // Las URLs de imagen no cambian al reemplazar la imagen
+      qc.invalidateQueries({
+        predicate: (q) =>
+          q.queryKey[0] === "imagen" &&
+          String(q.queryKey[1]).startsWith(`/catalogoMercaderia/${id}/`),
+      });
     },
   });
 }
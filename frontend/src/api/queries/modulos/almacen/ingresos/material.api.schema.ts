@@ -40,7 +40,8 @@ export const RegistrarIngresoMaterialOutApiSchema = z.object({
   serie: z.string(),
   cantidad: z.number(),
   valor: z.number(),
-  image_byte: z.string(),
+  // GET {imagen_url}?size=128 devuelve una miniatura
+  imagen_url: z.string().nullable(),
   ubicacion: z.string(),
   created_at: z.iso.datetime(),
 });
@@ -82,7 +83,8 @@ export const StockActualDetalladoMaterialOutApiSchema = z.object({
   valor: z.number(),
   moneda: z.string(),
   fecha_ingreso: z.iso.datetime(),
-  image_byte: z.string(),
+  // Ruta de GET /ingreso*/{id}/imagen del ingreso del lote; null si no hay imagen
+  imagen_url: z.string().nullable(),
 });
 
 export type StockActualDetalladoMaterialType = z.infer<
@@ -92,12 +94,15 @@ export type StockActualDetalladoMaterialType = z.infer<
 export const StockActualLimiteMaterial = z.object({
   codigo: z.string(),
   name: z.string(),
-  imagen1: z.string().nullable(),
-  imagen2: z.string().nullable(),
-  imagen3: z.string().nullable(),
-  imagen4: z.string().nullable(),
   stock_actual: z.number(),
   plimit: z.number(),
+  // Rutas de GET /catalogo*/{id}/imagen/{n}; null si no hay imagen
+  imagenes_url: z.object({
+    imagen1: z.string().nullable(),
+    imagen2: z.string().nullable(),
+    imagen3: z.string().nullable(),
+    imagen4: z.string().nullable(),
+  }),
 });
 
 export type StockActualLimiteType = z.infer<typeof StockActualLimiteMaterial>;
\ No newline at end of file
@@ -46,7 +46,8 @@ export const RegistrarIngresoMercaderiaOutApiSchema = z.object({
   serie: z.string(),
   cantidad: z.number(),
   valor: z.number(),
-  image_byte: z.string(),
+  // GET {imagen_url}?size=128 devuelve una miniatura
+  imagen_url: z.string().nullable(),
   ubicacion: z.string(),
   created_at: z.iso.datetime(),
 });
@@ -99,7 +100,8 @@ export const StockActualDetalladoOutApiSchema = z.object({
   valor: z.number(),
   moneda: z.string(),
   fecha_ingreso: z.iso.datetime(),
-  image_byte: z.string(),
+  // Ruta de GET /ingreso*/{id}/imagen del ingreso del lote; null si no hay imagen
+  imagen_url: z.string().nullable(),
 });
 
 export type StockActualDetalladoType = z.infer<
@@ -109,12 +111,15 @@ export type StockActualDetalladoType = z.infer<
 export const StockActualLimite = z.object({
   codigo: z.string(),
   name: z.string(),
-  imagen1: z.string().nullable(),
-  imagen2: z.string().nullable(),
-  imagen3: z.string().nullable(),
-  imagen4: z.string().nullable(),
   stock_actual: z.number(),
   plimit: z.number(),
+  // Rutas de GET /catalogo*/{id}/imagen/{n}; null si no hay imagen
+  imagenes_url: z.object({
+    imagen1: z.string().nullable(),
+    imagen2: z.string().nullable(),
+    imagen3: z.string().nullable(),
+    imagen4: z.string().nullable(),
+  }),
 });
 
 export type StockActualLimiteType = z.infer<typeof StockActualLimite>;
\ No newline at end of file
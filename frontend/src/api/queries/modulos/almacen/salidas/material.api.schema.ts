@@ -40,7 +40,8 @@ export const RegistrarSalidaMaterialOutApiSchema = z.object({
   serie: z.string(),
   cantidad: z.number(),
   valor: z.number(),
-  image_byte: z.string(),
+  // GET {imagen_url}?size=128 devuelve una miniatura
+  imagen_url: z.string().nullable(),
   created_at: z.iso.datetime(),
 });
 
@@ -0,0 +1,114 @@
+// src/api/topicos.ts
+
+import type { Query, QueryKey } from "@tanstack/react-query";
+
+/**
+ * @description
+ * Tópicos del WebSocket de notificaciones de los que depende cada consulta,
+ * indexados por el primer elemento de su `queryKey`. Un tópico es la tabla
+ * ("esquema.tabla", admite `*`) cuyos cambios invalidan la consulta, o un
+ * evento de negocio ("presence", "alertas.stock").
+ *
+ * `useDatabaseWatcher` se suscribe solo a los tópicos de las consultas
+ * montadas y, ante un cambio, invalida solo las consultas del tópico.
+ * Una lista vacía indica que la consulta no depende de la base (p. ej. las
+ * imágenes, que se revalidan con ETag). Una consulta que no figura aquí se
+ * suscribe a todo (`*`) y se invalida ante cualquier cambio: al agregar un
+ * `queryKey` nuevo, agregarlo también aquí.
+ */
+export const TOPICOS_POR_CONSULTA: Record<string, string[]> = {
+  // Acceso
+  auth: ["acceso.*"],
+  usuarios: ["acceso.*"],
+  usuario: ["acceso.*"],
+  "usuarios-online": ["presence", "acceso.usuario"],
+  imagen: [],
+  "sync-status": [],
+
+  // Almacén
+  catalogoMaterial: ["almacen.catalogo_material"],
+  catalogoMercaderia: ["almacen.catalogo_mercaderia"],
+  ingresoMaterial: ["almacen.ingreso_material"],
+  ingresoMercaderia: ["almacen.ingreso_mercaderia"],
+  salidaMaterial: ["almacen.salida_material"],
+  salidaMercaderia: ["almacen.salida_mercaderia"],
+  stockDetalladoMaterial: ["almacen.ingreso_material", "almacen.salida_material"],
+  stockDetalladoMercaderia: ["almacen.ingreso_mercaderia", "almacen.salida_mercaderia"],
+  // Los cambios de stock llegan como `alerta_stock` y se aplican sobre la caché
+  stockLimiteMaterial: ["alertas.stock", "almacen.catalogo_material"],
+  stockLimiteMercaderia: ["alertas.stock", "almacen.catalogo_mercaderia"],
+
+  // Administración: clientes, proveedores y monitoreo
+  clientes: ["administracion.global_clientes"],
+  "clientes-lista-short": ["administracion.global_clientes"],
+  "proveedores-lista": ["administracion.global_proveedores"],
+  "ubicaciones-lista": ["administracion.tabla_ubicaciones_monitoreo", "administracion.global_clientes"],
+  weather: ["administracion.tabla_weather_monitoreo"],
+  "weather-lista": ["administracion.tabla_weather_monitoreo", "administracion.global_clientes", "administracion.tabla_ubicaciones_monitoreo"],
+  "weather-masiva": ["administracion.tabla_weather_monitoreo"],
+  "calendario-vencimientos-weather": ["administracion.tabla_weather_monitoreo", "administracion.global_clientes"],
+  pro: ["administracion.tabla_pro_monitoreo"],
+  "pro-lista": ["administracion.tabla_pro_monitoreo", "administracion.global_clientes", "administracion.tabla_ubicaciones_monitoreo"],
+  "pro-masiva": ["administracion.tabla_pro_monitoreo"],
+  "calendario-vencimientos-pro": ["administracion.tabla_pro_monitoreo", "administracion.global_clientes"],
+  serviciosMC: ["administracion.tabla_serviciomc_monitoreo"],
+  "serviciosMC-lista": ["administracion.tabla_serviciomc_monitoreo", "administracion.global_clientes", "administracion.tabla_ubicaciones_monitoreo"],
+  "mc-masiva": ["administracion.tabla_serviciomc_monitoreo"],
+  "calendario-vencimientos-mc": ["administracion.tabla_serviciomc_monitoreo", "administracion.global_clientes"],
+  chips: ["administracion.tabla_chips_servicios_monitoreo", "administracion.tabla_chips_inventario_monitoreo"],
+  chipservicio: ["administracion.tabla_chips_servicios_monitoreo"],
+  "chipservicio-lista": ["administracion.tabla_chips_servicios_monitoreo", "administracion.global_clientes", "administracion.tabla_ubicaciones_monitoreo"],
+  "chips-masiva": ["administracion.tabla_chips_servicios_monitoreo"],
+  "calendario-vencimientos-chips": ["administracion.tabla_chips_servicios_monitoreo", "administracion.global_clientes"],
+  "chip-inventario-lista": ["administracion.tabla_chips_inventario_monitoreo"],
+  historialVentas: ["contabilidad.*", "administracion.global_clientes", "administracion.global_proveedores"],
+  historialCompras: ["contabilidad.*", "administracion.global_proveedores"],
+
+  // Gerencia
+  clientesLista: ["gerencia.clientesinicio"],
+  proveedoresLista: ["gerencia.proveedoresinicio"],
+  ProveedoresLista: ["gerencia.proveedoresinicio"],
+
+  // Contabilidad
+  "contabilidad-ventas-lista": ["contabilidad.*ventas", "administracion.global_clientes"],
+  "years-contabilidad-ventas": ["contabilidad.ventas"],
+  "contabilidad-compras-lista": ["contabilidad.*compras", "administracion.global_proveedores"],
+  "years-contabilidad-compras": ["contabilidad.compras"],
+
+  // Tesorería
+  cajachica: ["tesoreria.cajachica"],
+  bcpsoles: ["tesoreria.bcpsoles"],
+  bcpdolares: ["tesoreria.bcpdolares"],
+  listas_unicas_cajachica: ["tesoreria.cajachica"],
+  listas_unicas_bcpsoles: ["tesoreria.bcpsoles"],
+  listas_unicas_bcpdolares: ["tesoreria.bcpdolares"],
+  saldo_actual_cajachica: ["tesoreria.cajachica", "tesoreria.bcpsoles", "tesoreria.bcpdolares"],
+  reporte_cobro_pago_actual_tesoreria: ["contabilidad.*", "tesoreria.*", "administracion.global_clientes", "administracion.global_proveedores"],
+  resumen_mensual_cuentas_por_pagar: ["tesoreria.obligaciones_fijas", "tesoreria.registros_pagos"],
+  resumen_mensual_cuentas_por_pagar_eventuales: ["tesoreria.obligaciones_eventuales", "tesoreria.registros_pagos_eventuales"],
+  detalle_cuenta_por_pagar_moviento_caja_eventuales: ["tesoreria.obligaciones_eventuales", "tesoreria.registros_pagos_eventuales"],
+  resumen_mensual_cuentas_por_pagar_proveedores: ["contabilidad.*compras", "administracion.global_proveedores"],
+  detalle_cuenta_por_pagar_individual_ventas: ["contabilidad.*compras"],
+  detalle_cuenta_por_pagar_moviento_caja_ventas: ["contabilidad.*compras"],
+  resumen_mensual_cuentas_por_pagar_caja: ["contabilidad.*ventas", "administracion.global_clientes"],
+  detalle_cuenta_por_cobrar_individual_ventas: ["contabilidad.*ventas"],
+  detalle_cuenta_por_cobrar_moviento_caja_ventas: ["contabilidad.*ventas"],
+};
+
+/** Tópicos de una consulta; `["*"]` si su `queryKey` no está registrado. */
+export function topicosDeConsulta(queryKey: QueryKey): string[] {
+  return TOPICOS_POR_CONSULTA[String(queryKey[0])] ?? ["*"];
+}
+
+/** Igual que `fnmatchcase` en el backend, solo con el comodín `*`. */
+export function coincideTopico(topico: string, patron: string): boolean {
+  const regex = new RegExp(
+    "^" + patron.split("*").map((p) => p.replace(/[.+?^${}()|[\]\\]/g, "\\$&")).join(".*") + "$",
+  );
+  return regex.test(topico);
+}
+
+/** Si un cambio en `topico` invalida la consulta. */
+export function consultaDependeDe(query: Query, topico: string): boolean {
+  return topicosDeConsulta(query.queryKey).some((patron) => coincideTopico(topico, patron));
+}
@@ -0,0 +1,14 @@
+import { Image } from "antd";
+import type { ImageProps } from "antd";
+import useImagenApi from "../../../hooks/useImagenApi";
+
+interface ImagenApiProps extends Omit<ImageProps, "src"> {
+  url?: string | null;
+  size?: number;
+}
+
+// Imagen servida por la API (`imagen_url`): se descarga con el token
+export const ImagenApi = ({ url, size, ...props }: ImagenApiProps) => {
+  const { data } = useImagenApi(url, size);
+  return <Image src={data} {...props} />;
+};
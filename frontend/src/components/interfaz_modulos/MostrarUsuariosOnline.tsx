@@ -1,7 +1,17 @@
 import { Alert, Avatar, Tooltip } from "antd";
 import { useUsuariosListOnline } from "../../api/queries/auth/usuarios";
-import getBase64WithPrefix from "../../helpers/ImagesBase64";
+import type { UsuarioOutType } from "../../api/queries/auth/usuarios.api.schema";
 import { defaultImage } from "../../assets/images";
+import useImagenApi from "../../hooks/useImagenApi";
+
+function AvatarOnline({ usuario }: { usuario: UsuarioOutType }) {
+  const { data: imagen } = useImagenApi(usuario.imagen_url, 64);
+  return (
+    <Tooltip title={usuario.name}>
+      <Avatar src={imagen ?? defaultImage} size={28} />
+    </Tooltip>
+  );
+}
 
 function UsuariosOnline() {
   const {
@@ -18,16 +28,7 @@ function UsuariosOnline() {
     <div className="absolute right-0 top-1/2 -translate-y-1/2 p-2 mr-4 ">
       {Array.isArray(usuariosOnline) &&
         usuariosOnline.map((usuario) => (
-          <Tooltip key={usuario.id} title={usuario.name}>
-            <Avatar
-              src={
-                usuario.image_base64
-                  ? getBase64WithPrefix(usuario.image_base64)
-                  : defaultImage
-              }
-              size={28}
-            />
-          </Tooltip>
+          <AvatarOnline key={usuario.id} usuario={usuario} />
         ))}
     </div>
   );
@@ -25,7 +25,7 @@ import { useAuthState, useLogout } from "../../api/auth";
 import CustomDropdown from "../molecules/dropdown/CustomDropdown";
 import ThemeToggle from "../../Theme/ThemeToggle";
 import { UseSpinnersIcons } from "../atoms/icons/OtrasLibs/Spinners";
-import getBase64WithPrefix from "../../helpers/ImagesBase64";
+import useImagenApi from "../../hooks/useImagenApi";
 import { ShowMessage } from "../organisms/showMessage";
 import UsuariosOnline from "./MostrarUsuariosOnline";
 
@@ -59,13 +59,8 @@ export function PanelSuperior({ title, MenuItems }: TopPanelProps) {
     navigate({ to: "/" });
   };
 
-  const avatarSrc = useMemo(
-    () =>
-      user?.image_base64
-        ? getBase64WithPrefix(user.image_base64)
-        : defaultImage,
-    [user?.image_base64],
-  );
+  const { data: avatarImagen } = useImagenApi(user?.imagen_url, 64);
+  const avatarSrc = avatarImagen ?? defaultImage;
 
   const cascadingMenuItems: MenuProps["items"] = useMemo(
     () => [
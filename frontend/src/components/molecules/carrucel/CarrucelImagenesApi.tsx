@@ -0,0 +1,20 @@
+import { useImagenesApi } from "../../../hooks/useImagenApi";
+import CarrucelImagenes from "./Carucel";
+
+interface CarrucelImagenesApiProps {
+  urls: (string | null | undefined)[];
+  size?: number;
+  height?: number;
+  fallback: string;
+  preview?: boolean;
+  dots?: boolean;
+  autoplay?: boolean;
+}
+
+// Carrusel con imágenes servidas por la API (`imagen_url` / `imagenes_url`)
+function CarrucelImagenesApi({ urls, size, ...props }: CarrucelImagenesApiProps) {
+  const { data: images } = useImagenesApi(urls, size);
+  return <CarrucelImagenes images={images} {...props} />;
+}
+
+export default CarrucelImagenesApi;
@@ -2,6 +2,27 @@ import { useEffect, useRef } from "react";
 import { useQueryClient } from "@tanstack/react-query";
 import { getToken } from "../api/token";
 import { API_URL } from "../api/client";
+import { consultaDependeDe, topicosDeConsulta } from "../api/topicos";
+import type { UsuarioOutType } from "../api/queries/auth/usuarios.api.schema";
+import type { StockActualLimiteType } from "../api/queries/modulos/almacen/ingresos/material.api.schema";
+
+const CONSULTA_STOCK_LIMITE: Record<string, string> = {
+  material: "stockLimiteMaterial",
+  mercaderia: "stockLimiteMercaderia",
+};
+
+interface AlertaStock {
+  evento: "bajo_limite" | "actualizado" | "repuesto" | "retirado";
+  tipo: string;
+  codigo: string;
+  name: string;
+  stock_actual: number;
+  plimit: number;
+}
+
+// Margen para que un cambio de pantalla (desmontar y montar) no se
+// traduzca en un unsubscribe seguido de un subscribe
+const ESPERA_SINCRONIZAR_MS = 300;
 
 export function useDatabaseWatcher() {
   const queryClient = useQueryClient();
@@ -11,8 +32,130 @@ export function useDatabaseWatcher() {
   );
 
   useEffect(() => {
-    
+
     let isComponentMounted = true; // Control para evitar reconexiones en componentes desmontados
+    let huboConexion = false;
+    let suscritos = new Set<string>();
+    let sincronizarTimeout: ReturnType<typeof setTimeout> | null = null;
+
+    const marcarSincronizando = () => {
+      // 1. Seteamos un estado de "sincronizando" en el cache
+      queryClient.setQueryData(["sync-status"], {
+        isSyncing: true,
+        lastUpdate: Date.now(),
+      });
+      // 2. Después de 2 segundos, lo volvemos a false
+      setTimeout(() => {
+        queryClient.setQueryData(["sync-status"], {
+          isSyncing: false,
+          lastUpdate: Date.now(),
+        });
+      }, 2000);
+    };
+
+    // {"type": "presence", "event": "joined" | "left", "user_id"}: se
+    // actualiza la lista en caché en lugar de recargar todas las consultas
+    const aplicarPresencia = (evento: string, userId: number) => {
+      const online = queryClient.getQueryData<UsuarioOutType[]>(["usuarios-online"]);
+      if (!online) return;
+      if (evento === "left") {
+        queryClient.setQueryData<UsuarioOutType[]>(
+          ["usuarios-online"],
+          online.filter((u) => u.id !== userId),
+        );
+        return;
+      }
+      if (online.some((u) => u.id === userId)) return;
+      const usuario = queryClient
+        .getQueryData<UsuarioOutType[]>(["usuarios"])
+        ?.find((u) => u.id === userId);
+      if (usuario) {
+        queryClient.setQueryData<UsuarioOutType[]>(
+          ["usuarios-online"],
+          [...online, usuario].sort((a, b) => a.name.localeCompare(b.name)),
+        );
+      } else {
+        // Usuario que no está en caché: solo se vuelve a pedir esta lista
+        queryClient.invalidateQueries({ queryKey: ["usuarios-online"] });
+      }
+    };
+
+    // {"type": "alerta_stock", "evento", "tipo", "codigo", ...}: se aplica
+    // sobre la lista de stock bajo el límite en lugar de volver a pedirla
+    const aplicarAlertaStock = (alerta: AlertaStock) => {
+      const queryKey = [CONSULTA_STOCK_LIMITE[alerta.tipo]];
+      const lista = queryClient.getQueryData<StockActualLimiteType[]>(queryKey);
+      if (!lista) return;
+      const { codigo, name, stock_actual, plimit } = alerta;
+      if (alerta.evento === "repuesto" || alerta.evento === "retirado") {
+        queryClient.setQueryData<StockActualLimiteType[]>(
+          queryKey,
+          lista.filter((item) => item.codigo !== codigo),
+        );
+      } else if (lista.some((item) => item.codigo === codigo)) {
+        queryClient.setQueryData<StockActualLimiteType[]>(
+          queryKey,
+          lista.map((item) =>
+            item.codigo === codigo ? { ...item, name, stock_actual, plimit } : item,
+          ),
+        );
+      } else {
+        // Producto nuevo en la lista: el evento no trae las URLs de sus imágenes
+        queryClient.invalidateQueries({ queryKey });
+      }
+    };
+
+    // Tópicos de las consultas montadas (con al menos un observer)
+    const topicosMontados = () => {
+      const topicos = new Set<string>();
+      for (const query of queryClient.getQueryCache().getAll()) {
+        if (query.getObserversCount() > 0) {
+          topicosDeConsulta(query.queryKey).forEach((t) => topicos.add(t));
+        }
+      }
+      return topicos;
+    };
+
+    const enviar = (type: "subscribe" | "unsubscribe", topics: string[]) =>
+      socketRef.current?.send(JSON.stringify({ type, topics }));
+
+    const sincronizar = (inicial = false) => {
+      if (socketRef.current?.readyState !== WebSocket.OPEN) return;
+      const deseados = topicosMontados();
+      const agregar = [...deseados].filter((t) => !suscritos.has(t));
+      const quitar = [...suscritos].filter((t) => !deseados.has(t));
+      // El primer subscribe se envía aunque esté vacío: deja el socket en
+      // modo por tópicos y el backend ya no le manda invalidate_all
+      if (agregar.length || inicial) enviar("subscribe", agregar);
+      if (quitar.length) {
+        enviar("unsubscribe", quitar);
+        // Sin suscripción se perderán sus cambios: quedan vencidas y se
+        // vuelven a pedir al montarse otra vez
+        const quitados = new Set(quitar);
+        queryClient.invalidateQueries({
+          predicate: (query) =>
+            query.getObserversCount() === 0 &&
+            topicosDeConsulta(query.queryKey).some((t) => quitados.has(t)),
+          refetchType: "none",
+        });
+      }
+      suscritos = deseados;
+    };
+
+    const programarSincronizacion = () => {
+      if (sincronizarTimeout) clearTimeout(sincronizarTimeout);
+      sincronizarTimeout = setTimeout(() => sincronizar(), ESPERA_SINCRONIZAR_MS);
+    };
+
+    const unsubscribeCache = queryClient.getQueryCache().subscribe((event) => {
+      if (
+        event.type === "observerAdded" ||
+        event.type === "observerRemoved" ||
+        event.type === "removed"
+      ) {
+        programarSincronizacion();
+      }
+    });
 
     const connect = () => {
       const token = getToken();
@@ -29,35 +172,45 @@ export function useDatabaseWatcher() {
       const socket = new WebSocket(wsUrl);
       socketRef.current = socket;
 
-      socket.onopen = () => console.log("WebSocket conectado correctamente.");
+      socket.onopen = () => {
+        console.log("WebSocket conectado correctamente.");
+        suscritos = new Set();
+        sincronizar(true);
+        if (huboConexion) {
+          // Los cambios ocurridos mientras estuvo caído no llegaron
+          queryClient.invalidateQueries({
+            predicate: (query) => query.state.status === "success",
+          });
+        }
+        huboConexion = true;
+      };
 
       socket.onmessage = (event) => {
         if (event.data === "invalidate_all") {
-          // 1. Seteamos un estado de "sincronizando" en el cache
-          queryClient.setQueryData(["sync-status"], {
-            isSyncing: true,
-            lastUpdate: Date.now(),
-          });
-          queryClient.refetchQueries({ queryKey: ["usuarios-online"] });
-          
+          marcarSincronizando();
           queryClient.invalidateQueries({
             predicate: (query) => query.state.status === "success",
           });
+          return;
+        }
 
-          // 2. Después de 2 segundos, lo volvemos a false
-          setTimeout(() => {
-            queryClient.setQueryData(["sync-status"], {
-              isSyncing: false,
-              lastUpdate: Date.now(),
-            });
-          }, 2000);
+        let data;
+        try {
+          data = JSON.parse(event.data);
+        } catch {
+          return;
         }
-      };
 
-      socket.onclose = (e) => {
-        if (isComponentMounted) {
-          console.warn("WebSocket cerrado. Reintentando en 5s...", e.reason);
-          reconnectTimeoutRef.current = setTimeout(connect, 5000);
+        // {"type": "invalidate", "topic": "esquema.tabla", "op", "count", "ids"}
+        if (data?.type === "invalidate" && typeof data.topic === "string") {
+          marcarSincronizando();
+          queryClient.invalidateQueries({
+            predicate: (query) => consultaDependeDe(query, data.topic),
+          });
+        } else if (data?.type === "presence" && typeof data.user_id === "number") {
+          aplicarPresencia(data.event, data.user_id);
+        } else if (data?.type === "alerta_stock" && data.tipo in CONSULTA_STOCK_LIMITE) {
+          aplicarAlertaStock(data);
         }
       };
 
@@ -70,6 +223,7 @@ export function useDatabaseWatcher() {
         }
 
         if (isComponentMounted) {
+          console.warn("WebSocket cerrado. Reintentando en 5s...", e.reason);
           reconnectTimeoutRef.current = setTimeout(connect, 5000);
         }
       };
@@ -79,6 +233,8 @@ export function useDatabaseWatcher() {
 
     return () => {
       isComponentMounted = false;
+      unsubscribeCache();
+      if (sincronizarTimeout) clearTimeout(sincronizarTimeout);
       if (reconnectTimeoutRef.current)
         clearTimeout(reconnectTimeoutRef.current);
       if (socketRef.current) {
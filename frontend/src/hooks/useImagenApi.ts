@@ -0,0 +1,57 @@
+import { useQueries, useQuery, useQueryClient } from "@tanstack/react-query";
+import api from "../api/client";
+
+const blobToDataUrl = (blob: Blob): Promise<string> =>
+  new Promise((resolve, reject) => {
+    const reader = new FileReader();
+    reader.onload = () => resolve(reader.result as string);
+    reader.onerror = () => reject(reader.error);
+    reader.readAsDataURL(blob);
+  });
+
+const imagenQuery = (url: string | null | undefined, size?: number) => ({
+  queryKey: ["imagen", url, size],
+  queryFn: async () => {
+    const response = await api.get<Blob>(url as string, {
+      responseType: "blob",
+      params: size ? { size } : undefined,
+    });
+    return blobToDataUrl(response.data);
+  },
+});
+
+/**
+ * @description Descarga una imagen servida por la API (`imagen_url`) y la devuelve como data URL.
+ * Un `<img src>` directo no lleva el token, por eso se pide con el cliente autenticado.
+ * El navegador revalida con ETag: volver a montar el componente cuesta un 304.
+ * @param url Ruta relativa devuelta por la API; null o undefined no dispara la consulta.
+ * @param size Lado máximo de la miniatura (64, 128, 256 o 512); sin él se descarga el original.
+ */
+function useImagenApi(url?: string | null, size?: number) {
+  return useQuery({ ...imagenQuery(url, size), enabled: !!url });
+}
+
+/**
+ * @description Igual que `useImagenApi` para varias URLs (p. ej. `imagenes_url` del catálogo).
+ * @returns `data`: las data URL ya descargadas, en el orden de `urls` y sin las que faltan.
+ */
+export function useImagenesApi(urls: (string | null | undefined)[], size?: number) {
+  return useQueries({
+    queries: urls.filter(Boolean).map((url) => imagenQuery(url, size)),
+    combine: (results) => ({
+      data: results.flatMap((r) => (r.data ? [r.data] : [])),
+      isLoading: results.some((r) => r.isLoading),
+    }),
+  });
+}
+
+/**
+ * @description Versión imperativa para handlers (p. ej. copiar la imagen del catálogo al formulario).
+ * @returns Una función que resuelve la data URL, reutilizando la caché de `useImagenApi`.
+ */
+export function useObtenerImagenApi() {
+  const qc = useQueryClient();
+  return (url: string, size?: number) => qc.fetchQuery(imagenQuery(url, size));
+}
+
+export default useImagenApi;
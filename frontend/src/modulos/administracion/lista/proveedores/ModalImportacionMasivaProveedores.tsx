@@ -5,7 +5,7 @@ import { useMutation, useQueryClient } from "@tanstack/react-query";
 import { Upload, Button, Alert, Typography, Space, App, Modal, Progress } from "antd";
 import { UploadOutlined, LoadingOutlined } from "@ant-design/icons";
 import type { ApiError } from "../../../../api/normalizeError";
-import api from "../../../../api/client";
+import { importarExcel, type Job } from "../../../../api/jobs";
 
 
 const { Text } = Typography;
@@ -115,10 +115,9 @@ export default function ProveedorListImportMasiva({ open, onClose }: { open: boo
   };
 
   /* ---- Mutación de subida ---- */
-  const mutation = useMutation<void, ApiError, FormData>({
-    mutationFn: (fd) => api.post("/proveedoresGerenciaInicio/import", fd, {
-      headers: { "Content-Type": "multipart/form-data" }
-    }),
+  const mutation = useMutation<Job, ApiError, FormData>({
+    // El endpoint responde 202 al encolar; se espera a que el worker termine
+    mutationFn: (fd) => importarExcel("/proveedoresGerenciaInicio/import", fd),
     onMutate: () => setStatus("uploading"),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ["proveedoresLista"] });
@@ -14,7 +14,7 @@ import {
 } from "antd";
 import { UploadOutlined, LoadingOutlined } from "@ant-design/icons";
 import type { ApiError } from "../../../../api/normalizeError";
-import api from "../../../../api/client";
+import { importarExcel, type Job } from "../../../../api/jobs";
 
 
 
@@ -157,11 +157,9 @@ export default function HistorialChipsMasivaExcel({
     }
   };
 
-  const mutation = useMutation<void, ApiError, FormData>({
-    mutationFn: (fd) =>
-      api.post("/servicio-chips/importar", fd, {
-        headers: { "Content-Type": "multipart/form-data" },
-      }),
+  const mutation = useMutation<Job, ApiError, FormData>({
+    // El endpoint responde 202 al encolar; se espera a que el worker termine
+    mutationFn: (fd) => importarExcel("/servicio-chips/importar", fd),
     onMutate: () => setStatus("uploading"),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ["chipservicio-lista"] });
@@ -14,7 +14,7 @@ import {
 } from "antd";
 import { UploadOutlined, LoadingOutlined } from "@ant-design/icons";
 import type { ApiError } from "../../../../api/normalizeError";
-import api from "../../../../api/client";
+import { importarExcel, type Job } from "../../../../api/jobs";
 
 
 
@@ -166,11 +166,9 @@ export default function HistorialMcMasivaExcel({
     }
   };
 
-  const mutation = useMutation<void, ApiError, FormData>({
-    mutationFn: (fd) =>
-      api.post("/servicio-mc/importar", fd, {
-        headers: { "Content-Type": "multipart/form-data" },
-      }),
+  const mutation = useMutation<Job, ApiError, FormData>({
+    // El endpoint responde 202 al encolar; se espera a que el worker termine
+    mutationFn: (fd) => importarExcel("/servicio-mc/importar", fd),
     onMutate: () => setStatus("uploading"),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ["serviciosMC-lista"] });
@@ -2,7 +2,6 @@ import { useForm } from "@tanstack/react-form";
 import { App, Button, Col, Flex, Form, Input, InputNumber, Modal, Row } from "antd";
 import z from "zod";
 import { useQueryClient } from "@tanstack/react-query";
-import { defaultImage } from "../../../../assets/images";
 import { ApiError } from "../../../../api/normalizeError";
 import { setFormErrors } from "../../../../helpers/formHelpers";
 import FormUploadImage from "../../../../components/molecules/upload/UploadImage";
@@ -11,7 +10,7 @@ import FormSelectCreatable from "../../../../components/molecules/select/SelectA
 import type { CatalogoMaterialCreateApiType, CatalogoMaterialOutType } from "../../../../api/queries/modulos/almacen/catalogos/materiales/material.api.schema";
 import { useUpdateCatalogoMaterial } from "../../../../api/queries/modulos/almacen/catalogos/materiales/material.api";
 import TextArea from "antd/es/input/TextArea";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { useImagenesApi } from "../../../../hooks/useImagenApi";
 
 
 const CatalogoMaterialCreateUISchema = z.object({
@@ -54,15 +53,30 @@ export function useCatalogoMaterialFromCache(
   return chipservicio?.find((c) => c.id === id);
 }
 
-function CatalogoMaterialUpdate({
-  id,
-  open,
-  onClose,
-}: {
+interface CatalogoMaterialUpdateProps {
   id: number;
   open: boolean;
   onClose: () => void;
-}) {
+}
+
+// Las imágenes ya no viajan en el listado: se descargan antes de montar el formulario
+function CatalogoMaterialUpdate(props: CatalogoMaterialUpdateProps) {
+  const catalogoMaterial = useCatalogoMaterialFromCache(props.id);
+  const { data: imagenTotal, isLoading } = useImagenesApi(
+    Object.values(catalogoMaterial?.imagenes_url ?? {}),
+  );
+
+  if (isLoading) return null;
+
+  return <FormCatalogoMaterialUpdate {...props} imagenTotal={imagenTotal} />;
+}
+
+function FormCatalogoMaterialUpdate({
+  id,
+  open,
+  onClose,
+  imagenTotal,
+}: CatalogoMaterialUpdateProps & { imagenTotal: string[] }) {
   const { message } = App.useApp();
 
   const catalogoMaterial = useCatalogoMaterialFromCache(id);
@@ -115,13 +129,6 @@ function CatalogoMaterialUpdate({
     },
   ];
 
-  const imagenTotal = [
-    catalogoMaterial?.imagen1 || "",
-    catalogoMaterial?.imagen2 || "",
-    catalogoMaterial?.imagen3 || "",
-    catalogoMaterial?.imagen4 || "",
-  ].filter(Boolean) as string[];
-
   const form = useForm({
     defaultValues: {
       codigo: catalogoMaterial?.codigo || "",
@@ -133,9 +140,7 @@ function CatalogoMaterialUpdate({
       plimit: catalogoMaterial?.plimit || 0,
       descripcion: catalogoMaterial?.descripcion || "",
       dimension: catalogoMaterial?.dimension || "",
-      imagen: imagenTotal.map((img) => ({
-        image_byte: img ? getBase64WithPrefix(img) : defaultImage,
-      })) || [],
+      imagen: imagenTotal.map((img) => ({ image_byte: img })),
     },
     validators: {
       onSubmit: CatalogoMaterialCreateUISchema,
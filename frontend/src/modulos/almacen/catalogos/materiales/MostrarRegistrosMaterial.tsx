@@ -15,7 +15,7 @@ import {
 import { useCallback, useMemo, useState, useRef, useEffect } from "react";
 import { useVirtualizer } from "@tanstack/react-virtual";
 
-import CarrucelImagenes from "../../../../components/molecules/carrucel/Carucel";
+import CarrucelImagenesApi from "../../../../components/molecules/carrucel/CarrucelImagenesApi";
 import { defaultImage } from "../../../../assets/images";
 import { ordenarPorFecha } from "../../../../helpers/OrdenacionAscDscPorFechasISO";
 import { SearchBar } from "../../../../components/molecules/input/SearchBar";
@@ -32,7 +32,6 @@ import {
   useDeleteCatalogoMaterial,
 } from "../../../../api/queries/modulos/almacen/catalogos/materiales/material.api";
 import type { CatalogoMaterialOutType } from "../../../../api/queries/modulos/almacen/catalogos/materiales/material.api.schema";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
 
 const { Title, Text } = Typography;
 const { useBreakpoint } = Grid;
@@ -121,12 +120,7 @@ function MostrarRegistrosMateriales() {
         categoria: item.tipo ?? "-", // Nota: aquí usas item.tipo
         dimension: item.dimension ?? "",
         descripcion: item.descripcion ?? "",
-        imagenTotal: [
-          item.imagen1,
-          item.imagen2,
-          item.imagen3,
-          item.imagen4,
-        ].filter(Boolean) as string[],
+        imagenTotal: Object.values(item.imagenes_url).filter(Boolean) as string[],
         created_at: item.created_at ?? "-",
       })
     );
@@ -237,14 +231,13 @@ function MostrarRegistrosMateriales() {
 
                   <Row gutter={16} align="top">
                     <Col xs={24} md={8}>
-                      <CarrucelImagenes
+                      <CarrucelImagenesApi
                         autoplay={item.imagenTotal.length > 1}
                         height={140}
                         fallback={defaultImage}
                         preview={true}
-                        images={item.imagenTotal.map((img) =>
-                          img ? getBase64WithPrefix(img) : defaultImage
-                        )}
+                        urls={item.imagenTotal}
+                        size={512}
                       />
                     </Col>
                     <Col xs={24} md={16}>
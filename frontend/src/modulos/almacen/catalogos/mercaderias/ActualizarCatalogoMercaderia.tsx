@@ -7,14 +7,13 @@ import type {
 } from "../../../../api/queries/modulos/almacen/catalogos/mercaderias/mercaderia.api.schema";
 import { useQueryClient } from "@tanstack/react-query";
 import { useUpdateCatalogoMercaderia } from "../../../../api/queries/modulos/almacen/catalogos/mercaderias/mercaderia.api";
-import { defaultImage } from "../../../../assets/images";
 import { ApiError } from "../../../../api/normalizeError";
 import { setFormErrors } from "../../../../helpers/formHelpers";
 import FormUploadImage from "../../../../components/molecules/upload/UploadImage";
 import { FieldWrapper } from "../../../../helpers/FieldWrapperForm";
 import FormSelectCreatable from "../../../../components/molecules/select/SelectAddItem";
 import TextArea from "antd/es/input/TextArea";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { useImagenesApi } from "../../../../hooks/useImagenApi";
 
 const CatalogoMercaderiaCreateUISchema = z.object({
   codigo: z.string().min(1, "El código es requerido"),
@@ -56,15 +55,30 @@ export function useCatalogoMercaderiaFromCache(
   return chipservicio?.find((c) => c.id === id);
 }
 
-function CatalogoMercaderiaUpdate({
-  id,
-  open,
-  onClose,
-}: {
+interface CatalogoMercaderiaUpdateProps {
   id: number;
   open: boolean;
   onClose: () => void;
-}) {
+}
+
+// Las imágenes ya no viajan en el listado: se descargan antes de montar el formulario
+function CatalogoMercaderiaUpdate(props: CatalogoMercaderiaUpdateProps) {
+  const catalogoMercaderia = useCatalogoMercaderiaFromCache(props.id);
+  const { data: imagenTotal, isLoading } = useImagenesApi(
+    Object.values(catalogoMercaderia?.imagenes_url ?? {}),
+  );
+
+  if (isLoading) return null;
+
+  return <FormCatalogoMercaderiaUpdate {...props} imagenTotal={imagenTotal} />;
+}
+
+function FormCatalogoMercaderiaUpdate({
+  id,
+  open,
+  onClose,
+  imagenTotal,
+}: CatalogoMercaderiaUpdateProps & { imagenTotal: string[] }) {
   const { message } = App.useApp();
 
   const catalogoMercaderia = useCatalogoMercaderiaFromCache(id);
@@ -117,13 +131,6 @@ function CatalogoMercaderiaUpdate({
     },
   ];
 
-  const imagenTotal = [
-    catalogoMercaderia?.imagen1 || "",
-    catalogoMercaderia?.imagen2 || "",
-    catalogoMercaderia?.imagen3 || "",
-    catalogoMercaderia?.imagen4 || "",
-  ].filter(Boolean) as string[];
-
   const form = useForm({
     defaultValues: {
       codigo: catalogoMercaderia?.codigo || "",
@@ -135,10 +142,7 @@ function CatalogoMercaderiaUpdate({
       plimit: catalogoMercaderia?.plimit || 0,
       descripcion: catalogoMercaderia?.descripcion || "",
       dimension: catalogoMercaderia?.dimension || "",
-      imagen:
-        imagenTotal.map((img) => ({
-          image_byte: img ? getBase64WithPrefix(img) : defaultImage,
-        })) || [],
+      imagen: imagenTotal.map((img) => ({ image_byte: img })),
     },
     validators: {
       onSubmit: CatalogoMercaderiaCreateUISchema,
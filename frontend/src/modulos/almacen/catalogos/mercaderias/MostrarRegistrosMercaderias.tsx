@@ -16,7 +16,7 @@ import { useCallback, useMemo, useState, useRef, useEffect } from "react";
 import { useVirtualizer } from "@tanstack/react-virtual";
 
 // --- Imports de componentes y helpers (se mantienen igual)
-import CarrucelImagenes from "../../../../components/molecules/carrucel/Carucel";
+import CarrucelImagenesApi from "../../../../components/molecules/carrucel/CarrucelImagenesApi";
 import { defaultImage } from "../../../../assets/images";
 import { ordenarPorFecha } from "../../../../helpers/OrdenacionAscDscPorFechasISO";
 import { SearchBar } from "../../../../components/molecules/input/SearchBar";
@@ -33,7 +33,6 @@ import {
   useDeleteCatalogoMercaderia,
 } from "../../../../api/queries/modulos/almacen/catalogos/mercaderias/mercaderia.api";
 import type { CatalogoMercaderiaOutType } from "../../../../api/queries/modulos/almacen/catalogos/mercaderias/mercaderia.api.schema";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
 
 const { Title, Text } = Typography;
 const { useBreakpoint } = Grid;
@@ -118,7 +117,7 @@ function MostrarRegistrosMercaderias() {
         categoria: item.categoria ?? "-",
         dimension: item.dimension ?? "",
         descripcion: item.descripcion ?? "",
-        imagenTotal: [item.imagen1, item.imagen2, item.imagen3, item.imagen4].filter(Boolean) as string[],
+        imagenTotal: Object.values(item.imagenes_url).filter(Boolean) as string[],
         created_at: item.created_at ?? "-",
     }));
 
@@ -218,12 +217,13 @@ function MostrarRegistrosMercaderias() {
 
                   <Row gutter={16} align="top">
                     <Col xs={24} md={8}>
-                      <CarrucelImagenes
+                      <CarrucelImagenesApi
                         autoplay={item.imagenTotal.length > 1}
                         height={140}
                         fallback={defaultImage}
                         preview={true}
-                        images={item.imagenTotal.map((img) => getBase64WithPrefix(img))}
+                        urls={item.imagenTotal}
+                        size={512}
                       />
                     </Col>
                     <Col xs={24} md={16}>
@@ -35,7 +35,7 @@ import { useCatalogoMaterialList } from "../../../../api/queries/modulos/almacen
 import TextArea from "antd/es/input/TextArea";
 import { useProveedoresListaList } from "../../../../api/queries/modulos/administracion/lista/proveedores/proveedoresLista.api";
 import ModalCreateProveedoresLista from "../../../administracion/lista/proveedores/ModalListaCreateListaProv";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { useObtenerImagenApi } from "../../../../hooks/useImagenApi";
 const { Text } = Typography;
 
 const ProductoSchema = z.object({
@@ -100,6 +100,7 @@ function ModalProductoMaterial({
   const createMercaderia = useToggle();
 
   const { data: dataMaterial } = useCatalogoMaterialList();
+  const obtenerImagen = useObtenerImagenApi();
 
   const material = useMemo(() => {
     return (
@@ -207,18 +208,16 @@ function ModalProductoMaterial({
                         );
 
                         if (producSelect) {
-                          field.form.setFieldValue(
-                            "image",
-                            producSelect.imagen1
-                              ? [
-                                  {
-                                    image_byte: getBase64WithPrefix(
-                                      producSelect.imagen1,
-                                    ),
-                                  },
-                                ]
-                              : [],
-                          );
+                          // La imagen del catálogo se descarga aparte; se descarta si ya cambió la selección
+                          const imagenUrl = producSelect.imagenes_url.imagen1;
+                          field.form.setFieldValue("image", []);
+                          if (imagenUrl) {
+                            obtenerImagen(imagenUrl).then((imagen) => {
+                              if (field.form.getFieldValue(field.name) === stringVal) {
+                                field.form.setFieldValue("image", [{ image_byte: imagen }]);
+                              }
+                            });
+                          }
 
                           field.form.setFieldValue(
                             "codigo",
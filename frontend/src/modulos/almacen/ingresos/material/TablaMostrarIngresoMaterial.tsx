@@ -2,7 +2,6 @@ import {
   Alert,
   Empty,
   Flex,
-  Image,
   Input,
   Popconfirm,
   Skeleton,
@@ -25,7 +24,7 @@ import {
   useCatalogoIngresoMaterialList,
   useDeteteIngresoMaterial,
 } from "../../../../api/queries/modulos/almacen/ingresos/material.api";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { ImagenApi } from "../../../../components/atoms/imagen/ImagenApi";
 
 const { Text } = Typography;
 
@@ -78,7 +77,7 @@ const mapChipServicioTable = (
     cantidad: (w.cantidad ?? undefined),
     valor: `${w.moneda ?? undefined} ${(w.valor ?? undefined).toFixed(2)}`,
     total: `${w.moneda ?? undefined} ${((w.cantidad ?? 0) * (w.valor ?? 0)).toFixed(2)}`,
-    imagen: w.image_byte ? getBase64WithPrefix(w.image_byte) : "-",
+    imagen: w.imagen_url ?? "",
     created_at: w.created_at ?? "-",
   }));
 };
@@ -162,7 +161,7 @@ function TablaMostrarIngresoMaterial() {
         align: "center",
         render: (_, record) => (
           <Flex align="center" justify="center">
-            <Image width={30} height={25} src={record.imagen} />
+            <ImagenApi width={30} height={25} url={record.imagen} size={512} />
           </Flex>
         ),
       },
@@ -33,7 +33,7 @@ import { v4 as uuidv4 } from "uuid";
 import { useCatalogoMercaderiaList } from "../../../../api/queries/modulos/almacen/catalogos/mercaderias/mercaderia.api";
 import { useProveedoresListaList } from "../../../../api/queries/modulos/administracion/lista/proveedores/proveedoresLista.api";
 import ModalCreateProveedoresLista from "../../../administracion/lista/proveedores/ModalListaCreateListaProv";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { useObtenerImagenApi } from "../../../../hooks/useImagenApi";
 import { SerieItem } from "../../../../components/molecules/upload/arrayCompuestoImagen";
 
 const { Text } = Typography;
@@ -122,6 +122,7 @@ export function ModalProducto({
 }: ModalProps) {
   const createMercaderia = useToggle();
   const { data: dataMercaderia } = useCatalogoMercaderiaList();
+  const obtenerImagen = useObtenerImagenApi();
 
   const mercaderias = useMemo(
     () =>
@@ -208,16 +209,16 @@ export function ModalProducto({
                             (c) => c.name === stringVal,
                           );
                           if (select) {
-                            const nuevaImagen = select.imagen1
-                              ? [
-                                  {
-                                    image_byte: getBase64WithPrefix(
-                                      select.imagen1,
-                                    ),
-                                  },
-                                ]
-                              : [];
-                            form.setFieldValue("image", nuevaImagen);
+                            // La imagen del catálogo se descarga aparte; se descarta si ya cambió la selección
+                            const imagenUrl = select.imagenes_url.imagen1;
+                            form.setFieldValue("image", []);
+                            if (imagenUrl) {
+                              obtenerImagen(imagenUrl).then((imagen) => {
+                                if (form.getFieldValue(field.name) === stringVal) {
+                                  form.setFieldValue("image", [{ image_byte: imagen }]);
+                                }
+                              });
+                            }
                             form.setFieldValue("codigo", select.codigo || "");
                             form.setFieldValue("marca", select.marca || "");
                             form.setFieldValue("modelo", select.modelo || "");
@@ -2,7 +2,6 @@ import {
   Alert,
   Empty,
   Flex,
-  Image,
   Input,
   Popconfirm,
   Skeleton,
@@ -25,7 +24,7 @@ import { SearchOutlined } from "@ant-design/icons";
 import Highlighter from "react-highlight-words";
 import type { RegistrarIngresoMercaderiaOutApiType } from "../../../../api/queries/modulos/almacen/ingresos/mercaderia.api.schema";
 import isoToDDMMYYYY from "../../../../helpers/Fechas";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { ImagenApi } from "../../../../components/atoms/imagen/ImagenApi";
 
 const { Text } = Typography;
 
@@ -79,7 +78,7 @@ const mapChipServicioTable = (
     cantidad: (w.cantidad ?? undefined),
     valor: `${w.moneda ?? undefined} ${(w.valor ?? undefined).toFixed(2)}`,
     total: `${w.moneda ?? undefined} ${((w.cantidad ?? 0) * (w.valor ?? 0)).toFixed(2)}`,
-    imagen: w.image_byte ? getBase64WithPrefix(w.image_byte) : "-",
+    imagen: w.imagen_url ?? "",
     ubicacion: w.ubicacion ?? "-",
     created_at: w.created_at ?? "-",
   }));
@@ -165,7 +164,7 @@ function TablaMostrarIngresoMercaderia() {
         align: "center",
         render: (_, record) => (
           <Flex align="center" justify="center">
-            <Image width={30} height={25} src={record.imagen} />
+            <ImagenApi width={30} height={25} url={record.imagen} size={512} />
           </Flex>
         ),
       },
@@ -15,9 +15,8 @@ import { useCatalogoStockLimiteMercaderiaList } from "../../../../../api/queries
 import { memo, useMemo, useState } from "react";
 import type { StockActualLimiteType } from "../../../../../api/queries/modulos/almacen/ingresos/mercaderia.api.schema";
 import { SearchBar } from "../../../../../components/molecules/input/SearchBar";
-import CarrucelImagenes from "../../../../../components/molecules/carrucel/Carucel";
+import CarrucelImagenesApi from "../../../../../components/molecules/carrucel/CarrucelImagenesApi";
 import { defaultImage } from "../../../../../assets/images";
-import getBase64WithPrefix from "../../../../../helpers/ImagesBase64";
 import { useCatalogoStockLimiteMaterialList } from "../../../../../api/queries/modulos/almacen/ingresos/material.api";
 
 const { Title, Text } = Typography;
@@ -26,7 +25,7 @@ interface ServicioMcData {
   id: number;
   codigo: string;
   name: string;
-  imagenTotal: string[];
+  imagenesUrl: (string | null)[];
   stock_actual: number;
   plimit: number;
   status: string;
@@ -96,12 +95,7 @@ function MercaderiaSearch() {
         id: index,
         codigo: item.codigo ?? "",
         name: (item.name ?? "").toUpperCase(),
-        imagenTotal: [
-          item.imagen1,
-          item.imagen2,
-          item.imagen3,
-          item.imagen4,
-        ].filter(Boolean) as string[],
+        imagenesUrl: Object.values(item.imagenes_url),
         stock_actual: item.stock_actual ?? 0,
         plimit: item.plimit ?? 0,
         status: Status({stock_actual: item.stock_actual, plimit: item.plimit})
@@ -155,14 +149,13 @@ function MercaderiaSearch() {
                 style={{ height: "100%" }}
               >
                 <div style={{ width: 60, flexShrink: 0 }}>
-                  <CarrucelImagenes
+                  <CarrucelImagenesApi
+                    urls={item.imagenesUrl}
+                    size={128}
                     autoplay
                     height={40}
                     fallback={defaultImage}
                     preview
-                    images={item.imagenTotal.map((img) =>
-                      img ? getBase64WithPrefix(img) : defaultImage,
-                    )}
                   />
                 </div>
                 <div style={{ display: "flex", flexDirection: "column", flex: 1, minWidth: 0}}>
@@ -211,12 +204,7 @@ function MaterialSearch() {
         id: index,
         codigo: item.codigo ?? "",
         name: (item.name ?? "").toUpperCase(),
-        imagenTotal: [
-          item.imagen1,
-          item.imagen2,
-          item.imagen3,
-          item.imagen4,
-        ].filter(Boolean) as string[],
+        imagenesUrl: Object.values(item.imagenes_url),
         stock_actual: item.stock_actual ?? 0,
         plimit: item.plimit ?? 0,
         status: Status({stock_actual: item.stock_actual, plimit: item.plimit})
@@ -269,14 +257,13 @@ function MaterialSearch() {
                 style={{ height: "100%" }}
               >
                 <div style={{ width: 60, flexShrink: 0 }}>
-                  <CarrucelImagenes
+                  <CarrucelImagenesApi
+                    urls={item.imagenesUrl}
+                    size={128}
                     autoplay
                     height={40}
                     fallback={defaultImage}
                     preview
-                    images={item.imagenTotal.map((img) =>
-                      img ? getBase64WithPrefix(img) : defaultImage,
-                    )}
                   />
                 </div>
                 <div style={{ display: "flex", flexDirection: "column", flex: 1, minWidth: 0}}>
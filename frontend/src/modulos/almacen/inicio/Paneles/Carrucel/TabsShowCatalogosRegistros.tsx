@@ -3,9 +3,7 @@ import { useCatalogoStockLimiteMercaderiaList } from "../../../../../api/queries
 import { useCatalogoStockLimiteMaterialList } from "../../../../../api/queries/modulos/almacen/ingresos/material.api";
 import { memo, useMemo } from "react";
 import type { StockActualLimiteType } from "../../../../../api/queries/modulos/almacen/ingresos/mercaderia.api.schema";
-import CarrucelImagenes from "../../../../../components/molecules/carrucel/Carucel";
-import { defaultImage } from "../../../../../assets/images";
-import getBase64WithPrefix from "../../../../../helpers/ImagesBase64";
+import CarrucelImagenesApi from "../../../../../components/molecules/carrucel/CarrucelImagenesApi";
 import InfiniteCarousel from "../../../../../components/molecules/carrucel/CarrucelInfinito";
 import { RiAlarmWarningFill } from "react-icons/ri";
 
@@ -13,13 +11,9 @@ import { RiAlarmWarningFill } from "react-icons/ri";
 const { Title, Text } = Typography;
 
 // --- Tipos ---
-interface ServicioMcData
-  extends Omit<
-    StockActualLimiteType,
-    "imagen1" | "imagen2" | "imagen3" | "imagen4"
-  > {
+interface ServicioMcData extends Omit<StockActualLimiteType, "imagenes_url"> {
   id: string; // Cambiado a string para asegurar unicidad
-  imagenTotal: string[];
+  imagenesUrl: (string | null)[];
   status: "mercaderia" | "material";
 }
 
@@ -28,18 +22,15 @@ interface ServicioMcData
 const transformToServicioData = (
   items: StockActualLimiteType[] = [],
   type: "mercaderia" | "material",
-  defaultImage: string,
 ): ServicioMcData[] => {
   return items
-    .map((item, index) => ({
+    .map(({ imagenes_url, ...item }, index) => ({
       ...item,
       // Unicidad real: prefijo + código o id de base de datos si existe
       id: `${type}-${item.codigo || index}`,
       codigo: item.codigo ?? "",
       name: (item.name ?? "").toUpperCase(),
-      imagenTotal: [item.imagen1, item.imagen2, item.imagen3, item.imagen4]
-        .filter(Boolean)
-        .map((img) => (img ? getBase64WithPrefix(img) : defaultImage)),
+      imagenesUrl: Object.values(imagenes_url),
       stock_actual: item.stock_actual ?? 0,
       plimit: item.plimit ?? 0,
       status: type,
@@ -91,11 +82,12 @@ const ProductCard = memo(({ item }: { item: ServicioMcData }) => (
   >
     <Flex align="center" justify="start" gap={12} style={{ height: "100%" }}>
       <div style={{ width: 120, flexShrink: 0 }}>
-        <CarrucelImagenes
+        <CarrucelImagenesApi
+          urls={item.imagenesUrl}
+          size={256}
           autoplay
           height={90}
           preview
-          images={item.imagenTotal}
           fallback={""}
         />
       </div>
@@ -141,16 +133,8 @@ export function CarrucelProductos() {
   } = useCatalogoStockLimiteMaterialList();
 
   const dataSource = useMemo(() => {
-    const mercaderia = transformToServicioData(
-      dataMercaderia,
-      "mercaderia",
-      defaultImage,
-    );
-    const materiales = transformToServicioData(
-      dataMateriales,
-      "material",
-      defaultImage,
-    );
+    const mercaderia = transformToServicioData(dataMercaderia, "mercaderia");
+    const materiales = transformToServicioData(dataMateriales, "material");
     return [...mercaderia, ...materiales];
   }, [dataMercaderia, dataMateriales]);
 
@@ -29,8 +29,8 @@ import CatalogoMaterialesCreate from "../../catalogos/materiales/CrearCatalogoMa
 import type { RegistrarSalidaMaterialCreateApiType } from "../../../../api/queries/modulos/almacen/salidas/material.api.schema";
 import { useCreateSalidaMaterial } from "../../../../api/queries/modulos/almacen/salidas/material.api";
 import { useCatalogoStockDetalladoMaterialList } from "../../../../api/queries/modulos/almacen/ingresos/material.api";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
 import { useClientesListaList } from "../../../../api/queries/modulos/administracion/lista/clientes/clientesLista.api";
+import { useObtenerImagenApi } from "../../../../hooks/useImagenApi";
 const { Text } = Typography;
 
 const ProductoSchema = z.object({
@@ -92,7 +92,7 @@ interface Detalle {
   valor: number;
   moneda: string;
   fecha_ingreso: string;
-  image_byte: string;
+  imagen_url: string | null;
 }
 
 // Estructura mejorada para el Map
@@ -119,6 +119,7 @@ function ModalProductoMaterial({
   dataStock,
 }: ModalProps) {
   const createMercaderia = useToggle();
+  const obtenerImagen = useObtenerImagenApi();
 
   // 1. Agrupación de datos con cálculo de stock disponible
   const productosMap = useMemo(() => {
@@ -406,18 +407,15 @@ function ModalProductoMaterial({
                                   seleccionado.uuid_registro,
                                 );
 
-                                field.form.setFieldValue(
-                                  "image",
-                                  seleccionado.image_byte
-                                    ? [
-                                        {
-                                          image_byte: getBase64WithPrefix(
-                                            seleccionado.image_byte,
-                                          ),
-                                        },
-                                      ]
-                                    : [],
-                                );
+                                // La imagen del ingreso se descarga aparte; se descarta si ya cambió el lote
+                                field.form.setFieldValue("image", []);
+                                if (seleccionado.imagen_url) {
+                                  obtenerImagen(seleccionado.imagen_url).then((imagen) => {
+                                    if (field.form.getFieldValue("uuid_material") === seleccionado.uuid_registro) {
+                                      field.form.setFieldValue("image", [{ image_byte: imagen }]);
+                                    }
+                                  });
+                                }
                                 field.form.setFieldValue("cantidad", 0);
                               }
                             }}
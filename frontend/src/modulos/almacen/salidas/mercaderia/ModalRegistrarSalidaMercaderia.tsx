@@ -1,7 +1,6 @@
 import { useForm } from "@tanstack/react-form";
 import {
   App,
-  Avatar,
   Button,
   Checkbox,
   Col,
@@ -32,8 +31,9 @@ import { setFormErrors } from "../../../../helpers/formHelpers";
 import type { RegistrarSalidaMercaderiaCreateApiType } from "../../../../api/queries/modulos/almacen/salidas/mercaderia.api.schema";
 import { useCreateSalidaMercaderia } from "../../../../api/queries/modulos/almacen/salidas/mercaderia.api";
 import { useCatalogoStockDetalladoMercaderiaList } from "../../../../api/queries/modulos/almacen/ingresos/mercaderia.api";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
 import { useClientesListaList } from "../../../../api/queries/modulos/administracion/lista/clientes/clientesLista.api";
+import { useObtenerImagenApi } from "../../../../hooks/useImagenApi";
+import { ImagenApi } from "../../../../components/atoms/imagen/ImagenApi";
 const { Text } = Typography;
 
 const ProductoSchema = z.object({
@@ -85,7 +85,7 @@ const isUsuarioField = (field: string): field is UsuarioField => {
 interface DetalleProductos {
   uuid_registro: string;
   serie: string;
-  image_byte: string;
+  imagen_url: string | null;
   cantidad: number;
   valor: number;
   moneda: string;
@@ -119,6 +119,7 @@ function ModalProducto({
   dataStock,
 }: ModalProps) {
   const createMercaderia = useToggle();
+  const obtenerImagen = useObtenerImagenApi();
 
   const productosData = useMemo(() => {
     const map = new Map<string, Producto>();
@@ -148,7 +149,7 @@ function ModalProducto({
         map.get(item.codigo)!.variantes.push({
           uuid_registro: item.uuid_registro,
           serie: item.serie,
-          image_byte: item.image_byte,
+          imagen_url: item.imagen_url,
           cantidad: stockDisponible, // <-- Stock real para este modal
           valor: item.valor,
           moneda: item.moneda,
@@ -220,11 +221,10 @@ function ModalProducto({
         return;
       }
 
-      dataParaGuardar.forEach((item) => {
-        // 1. Preparamos la imagen correctamente
-        // Si item.image_byte ya es el base64, lo envolvemos en el formato que espera tu lista
-        const imagenFormateada = item.image_byte
-          ? [{ image_byte: getBase64WithPrefix(item.image_byte) }]
+      for (const item of dataParaGuardar) {
+        // 1. La imagen del ingreso de cada lote se descarga (o se toma de la caché) como data URL
+        const imagenFormateada = item.imagen_url
+          ? [{ image_byte: await obtenerImagen(item.imagen_url) }]
           : [];
 
         onSave({
@@ -243,7 +243,7 @@ function ModalProducto({
           moneda: item.moneda || "",
           image: imagenFormateada, // Enviamos el array con el formato correcto
         });
-      });
+      }
 
       form.reset(); // Limpia el formulario para la próxima vez
       onClose();
@@ -307,16 +307,15 @@ function ModalProducto({
                           );
                           form.setFieldValue("serie", seleccionado.serie);
 
-                          const imageVal = seleccionado.image_byte
-                            ? [
-                                {
-                                  image_byte: getBase64WithPrefix(
-                                    seleccionado.image_byte,
-                                  ),
-                                },
-                              ]
-                            : [];
-                          form.setFieldValue("image", imageVal);
+                          // La imagen del ingreso se descarga aparte; se descarta si ya cambió el producto
+                          form.setFieldValue("image", []);
+                          if (seleccionado.imagen_url) {
+                            obtenerImagen(seleccionado.imagen_url).then((imagen) => {
+                              if (form.getFieldValue("uuid_mercaderia") === seleccionado.uuid_registro) {
+                                form.setFieldValue("image", [{ image_byte: imagen }]);
+                              }
+                            });
+                          }
                         }
                       }}
                     />
@@ -423,16 +422,12 @@ function ModalProducto({
                                     {/* INFO DE LA SERIE */}
                                     <Col span={16}>
                                       <Flex gap={12} align="center">
-                                        <Avatar
-                                          shape="square"
-                                          size={45}
-                                          src={
-                                            v.image_byte
-                                              ? getBase64WithPrefix(
-                                                  v.image_byte,
-                                                )
-                                              : undefined
-                                          }
+                                        <ImagenApi
+                                          url={v.imagen_url}
+                                          size={64}
+                                          width={45}
+                                          height={45}
+                                          preview={false}
                                         />
                                         <div className="flex flex-col gap-2">
                                           <h1 className="font-semibold text-xs dark:text-mist-900">
@@ -2,7 +2,6 @@ import {
   Alert,
   Empty,
   Flex,
-  Image,
   Input,
   Popconfirm,
   Skeleton,
@@ -23,7 +22,7 @@ import Highlighter from "react-highlight-words";
 import isoToDDMMYYYY from "../../../../helpers/Fechas";
 import type { RegistrarSalidaMercaderiaOutApiType } from "../../../../api/queries/modulos/almacen/salidas/mercaderia.api.schema";
 import { useCatalogoSalidaMercaderiaList, useDeteteSalidaMercaderia } from "../../../../api/queries/modulos/almacen/salidas/mercaderia.api";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import { ImagenApi } from "../../../../components/atoms/imagen/ImagenApi";
 
 const { Text } = Typography;
 
@@ -76,7 +75,7 @@ const mapChipServicioTable = (
     cantidad: (w.cantidad ?? undefined),
     valor: `${w.moneda ?? undefined} ${(w.valor ?? undefined).toFixed(2)}`,
     total: `${w.moneda ?? undefined} ${((w.cantidad ?? 0) * (w.valor ?? 0)).toFixed(2)}`,
-    imagen: w.image_byte ? getBase64WithPrefix(w.image_byte) : "-",
+    imagen: w.imagen_url ?? "",
     created_at: w.created_at ?? "-",
   }));
 };
@@ -161,7 +160,7 @@ function TablaMostrarIngresoMercaderia() {
         align: "center",
         render: (_, record) => (
           <Flex align="center" justify="center">
-            <Image width={30} height={25} src={record.imagen} />
+            <ImagenApi width={30} height={25} url={record.imagen} size={512} />
           </Flex>
         ),
       },
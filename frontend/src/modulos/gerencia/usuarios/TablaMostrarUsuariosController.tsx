@@ -27,18 +27,33 @@ import {
   useUsuariosList,
 } from "../../../api/queries/auth/usuarios";
 import { defaultImage } from "../../../assets/images";
-import getBase64WithPrefix from "../../../helpers/ImagesBase64";
+import useImagenApi from "../../../hooks/useImagenApi";
 import { NewModalRegistro } from "./form/ModalcreateNew";
 import { RegistroUpdateUsuario } from "./form/ModalUpdateNew";
 
 
 const { Title } = Typography;
 
+// La imagen se descarga con el token (un <img src> directo no lo lleva)
+function CeldaImagenUsuario({ url }: { url: string | null }) {
+  const { data: imagen } = useImagenApi(url, 128);
+  const src = imagen ?? defaultImage;
+  return (
+    <Popover
+      content={<Image src={src} width={70} height={60} />}
+      trigger="hover"
+      placement="right"
+    >
+      <AvatarAtom src={src} size={30} />
+    </Popover>
+  );
+}
+
 // --- Tipado e Interfaces ---
 interface DataType {
   item: number;
   key: number;
-  image: string;
+  image: string | null;
   name: string;
   last_name: string;
   email: string;
@@ -77,9 +92,7 @@ function UsuarioTable() {
     return data.map((u, i) => ({
       item: i + 1,
       key: u.id,
-      image: u.image_base64
-        ? getBase64WithPrefix(u.image_base64)
-        : defaultImage,
+      image: u.imagen_url,
       name: u.name,
       last_name: u.last_name,
       email: u.email,
@@ -107,15 +120,7 @@ function UsuarioTable() {
         width: 80,
         align: "center",
         fixed: "left",
-        render: (src) => (
-          <Popover
-            content={<Image src={src} width={70} height={60} />}
-            trigger="hover"
-            placement="right"
-          >
-            <AvatarAtom src={src} size={30} />
-          </Popover>
-        ),
+        render: (url) => <CeldaImagenUsuario url={url} />,
       },
       {
         title: "Nombre",
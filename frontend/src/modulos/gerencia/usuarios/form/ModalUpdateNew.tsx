@@ -10,7 +10,7 @@ import { setFormErrors } from "../../../../helpers/formHelpers";
 import { ApiError } from "../../../../api/normalizeError";
 import { FromUsuarioCreate } from "./Compose";
 import { useQueryClient } from "@tanstack/react-query";
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
+import useImagenApi from "../../../../hooks/useImagenApi";
 import z from "zod";
 import { createFieldChecker } from "../../../../helpers/isFieldMapErrorsInputsUI";
 
@@ -66,16 +66,35 @@ export function useUsuarioFromCache(id: number): UsuarioOutType | undefined {
 
 export function RegistroUpdateUsuario({ id, open, onClose }: ModalProps) {
   const usuario = useUsuarioFromCache(id);
+  // La imagen actual ya no viaja en el listado: se descarga antes de montar el formulario
+  const { data: imagenActual, isLoading } = useImagenApi(usuario?.imagen_url);
+
+  if (!usuario || isLoading) return null;
+
+  return (
+    <FormUpdateUsuario
+      id={id}
+      open={open}
+      onClose={onClose}
+      usuario={usuario}
+      imagenActual={imagenActual}
+    />
+  );
+}
+
+interface FormUpdateUsuarioProps extends ModalProps {
+  usuario: UsuarioOutType;
+  imagenActual?: string;
+}
+
+function FormUpdateUsuario({ id, open, onClose, usuario, imagenActual }: FormUpdateUsuarioProps) {
   const { mutateAsync, isPending, isError, error, reset: resetMutation } = useUpdateUsuario(id);
   const { message } = App.useApp();
 
-  if (!usuario) return null;
-
-  // 1. Convertimos la imagen de caché de string a un File real antes de pasarlo al formulario
+  // 1. Convertimos la imagen descargada (data URL) a un File real antes de pasarlo al formulario
   let imagenInicial: File | undefined = undefined;
-  if (usuario.image_base64) {
-    const base64Completo = getBase64WithPrefix(usuario.image_base64);
-    imagenInicial = base64ToFile(base64Completo, "usuario_foto.png");
+  if (imagenActual) {
+    imagenInicial = base64ToFile(imagenActual, "usuario_foto.png");
   }
 
   const form = useAppForm({
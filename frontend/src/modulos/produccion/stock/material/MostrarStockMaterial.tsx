@@ -13,12 +13,11 @@ import {
 import { useCallback, useMemo, useState, useRef, useEffect } from "react";
 import { useVirtualizer } from "@tanstack/react-virtual";
 
-import CarrucelImagenes from "../../../../components/molecules/carrucel/Carucel";
+import CarrucelImagenesApi from "../../../../components/molecules/carrucel/CarrucelImagenesApi";
 import { defaultImage } from "../../../../assets/images";
 import { ordenarPorFecha } from "../../../../helpers/OrdenacionAscDscPorFechasISO";
 import { SearchBar } from "../../../../components/molecules/input/SearchBar";
 
-import getBase64WithPrefix from "../../../../helpers/ImagesBase64";
 import isoToDDMMYYYY from "../../../../helpers/Fechas";
 import { useCatalogoStockDetalladoMaterialList } from "../../../../api/queries/modulos/almacen/ingresos/material.api";
 import type { StockActualDetalladoMaterialType } from "../../../../api/queries/modulos/almacen/ingresos/material.api.schema";
@@ -42,7 +41,7 @@ interface ServicioMcData {
   total: number;
   moneda: string;
   fecha_ingreso: string;
-  image_byte: string;
+  imagen_url: string | null;
   ubicacion: string;
 }
 
@@ -92,7 +91,7 @@ function MostrarStockMaterial() {
         total: (item.stock_actual ?? 0) * (item.valor ?? 0),
         moneda: item.moneda ?? "",
         fecha_ingreso: item.fecha_ingreso ?? "",
-        image_byte: getBase64WithPrefix(item.image_byte) ?? "",
+        imagen_url: item.imagen_url,
         ubicacion: item.ubicacion.toUpperCase() ?? "",
       })
     );
@@ -189,12 +188,13 @@ function MostrarStockMaterial() {
                 >
                   <Row gutter={16} align="middle">
                     <Col xs={24} md={8}>
-                      <CarrucelImagenes
+                      <CarrucelImagenesApi
+                        urls={[item.imagen_url]}
+                        size={512}
                         autoplay={false}
                         height={160}
                         fallback={defaultImage}
                         preview={true}
-                        images={item.image_byte ? [item.image_byte] : []}
                       />
                     </Col>
                     <Col xs={24} md={16}>